@@ -0,0 +1,599 @@
+"""
+Benchmark de los Pipelines de Predicción y Clasificación
+========================================================
+Mide el tiempo y la memoria de cada etapa de los cuatro sistemas
+(REGRESION_ML_AG, REGRESION_ML_EN, CLASIFICACION_ML_AG, CLASIFICACION_ML_EN)
+con plantillas sintéticas de 1.000, 10.000, 100.000 y 1.000.000 de filas:
+
+    cargar_modelo -> leer_datos_excel -> preprocesar_datos
+                  -> hacer_predicciones / hacer_clasificacion -> escribir_resultados
+
+Las plantillas se generan una vez (plantillas/) remuestreando filas de la base
+de cada sistema: Base_Prediccion_Biomasa.csv (AG) y Paneles_solares_con_outliers.xlsx
+(EN). Con la misma semilla los datos son siempre los mismos, así dos corridas
+son comparables.
+
+Cada combinación de sistema y tamaño corre en un proceso aparte, dentro de la
+carpeta del sistema y con sus propios módulos. Por cada etapa se guarda:
+
+    segundos         tiempo real (el mínimo de las repeticiones)
+    cpu_segundos     tiempo de CPU del proceso en esa repetición
+    memoria_pico_mb  memoria máxima reservada durante la etapa (tracemalloc,
+                     medida en una pasada aparte para no afectar los tiempos)
+
+cargar_modelo se mide en frío: cada repetición en un intérprete nuevo, que
+importa el script de predicción y carga el modelo (con las librerías que eso
+importe). Así se nota si un import diferido vuelve a hacerse al inicio. Las
+demás etapas se miden en el proceso del sistema.
+
+Con --raiz se mide otra copia del proyecto (por ejemplo una carpeta donde los
+cuatro sistemas ya tienen su modelo entrenado); los sistemas sin los archivos
+de su modelo se informan como omitidos.
+
+Los resultados se guardan en JSON (resultados/benchmark_<fecha>.json) y dos
+corridas se comparan con un umbral de regresión (con alguna etapa más lenta o
+con más memoria que el umbral el comando termina con código 1).
+
+Uso:
+    python benchmark_pipelines.py                                   # todo (1M filas tarda varios minutos)
+    python benchmark_pipelines.py --proyectos REGRESION_ML_AG --filas 1000 10000
+    python benchmark_pipelines.py --salida resultados/antes.json
+    python benchmark_pipelines.py --comparar resultados/antes.json resultados/despues.json --umbral 10
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARPETA_BENCHMARK = os.path.dirname(os.path.abspath(__file__))
+CARPETA_PLANTILLAS = os.path.join(CARPETA_BENCHMARK, 'plantillas')
+CARPETA_RESULTADOS = os.path.join(CARPETA_BENCHMARK, 'resultados')
+
+FILAS = [1000, 10000, 100000, 1000000]
+
+# Repeticiones de la medición de tiempos (desde 100.000 filas se hace una sola)
+REPETICIONES = 3
+FILAS_UNA_REPETICION = 100000
+
+# Umbral de regresión por defecto (%) y tiempo mínimo para comparar una etapa:
+# por debajo de eso la diferencia es ruido de la medición
+UMBRAL = 10.0
+SEGUNDOS_MINIMOS = 0.005
+MEMORIA_MINIMA_MB = 1.0
+
+SEMILLA = 0
+
+# Bases de las que se remuestrean las filas: archivo (desde la raíz) y, para las columnas
+# del modelo que tienen otro nombre en la base, columna del modelo -> columna de la base
+FUENTES = {
+    'biomasa': {
+        'archivo': os.path.join('Bases_de_Datos', 'Base_Prediccion_Biomasa.csv'),
+        'columnas': {
+            'NDVI Outlier Manual': 'NDVI',
+            'NDRE Outlier Manual': 'NDRE',
+            'PRECIPITACION Outlier Manual': 'Precipitación',
+            'DIAS SIN LLUVIA Estadistica': 'Días_sin_lluvia',
+        },
+    },
+    'paneles': {
+        'archivo': os.path.join('Bases_de_Datos', 'Paneles_solares_con_outliers.xlsx'),
+        'columnas': {},
+    },
+}
+
+# Sistemas: carpeta, script de predicción, hoja y columna de resultados de la plantilla
+PROYECTOS = {
+    'REGRESION_ML_AG': {
+        'script': '3_predecir_en_excel.py',
+        'tipo': 'regresion',
+        'hoja': 'Datos para Predicción',
+        'columna_resultado': 'Biomasa_Predicha',
+        'fuente': 'biomasa',
+    },
+    'REGRESION_ML_EN': {
+        'script': '3_predecir_en_excel.py',
+        'tipo': 'regresion',
+        'hoja': 'Datos para Predicción',
+        'columna_resultado': 'Consumo_kWh_Mensual_Predicho',
+        'fuente': 'paneles',
+    },
+    'CLASIFICACION_ML_AG': {
+        'script': '3_predecir_en_excel_clasificacion.py',
+        'tipo': 'clasificacion',
+        'hoja': 'Datos para Clasificación',
+        'columna_resultado': 'Categoria_Predicha',
+        'fuente': 'biomasa',
+    },
+    'CLASIFICACION_ML_EN': {
+        'script': '3_predecir_en_excel_clasificacion.py',
+        'tipo': 'clasificacion',
+        'hoja': 'Datos para Clasificación',
+        'columna_resultado': 'Categoria_Predicha',
+        'fuente': 'paneles',
+    },
+}
+
+
+# ==================== PLANTILLAS SINTÉTICAS ====================
+
+def ruta_plantilla(proyecto, filas):
+    return os.path.join(CARPETA_PLANTILLAS, f'{proyecto}_{filas}.xlsx')
+
+
+def generar_plantilla(proyecto, columnas, filas, semilla=SEMILLA, raiz=RAIZ):
+    """Plantilla con `filas` filas remuestreadas de la base del sistema
+
+    Se toman filas completas de la base al azar (con reemplazo), así cada
+    columna conserva su distribución y las relaciones entre columnas.
+    La estructura es la de la plantilla del sistema: títulos en las filas 1-3,
+    encabezados en la fila 5 y datos desde la fila 6.
+    """
+
+    import numpy as np
+    from carga_bases import cargar_base
+    from openpyxl import Workbook
+
+    config = PROYECTOS[proyecto]
+    fuente = FUENTES[config['fuente']]
+    base = cargar_base(os.path.join(raiz, fuente['archivo']), detalle=False)
+
+    origen = [fuente['columnas'].get(col, col) for col in columnas]
+    faltantes = [col for col in origen if col not in base.columns]
+    if faltantes:
+        raise ValueError(f"La base {os.path.basename(fuente['archivo'])} no tiene: {', '.join(faltantes)}")
+
+    azar = np.random.default_rng(semilla)
+    muestra = base[origen].iloc[azar.integers(0, len(base), filas)]
+    # Valores de Python (None para vacíos) para escribirlos en el Excel
+    muestra = muestra.astype(object).where(muestra.notna(), None)
+
+    os.makedirs(CARPETA_PLANTILLAS, exist_ok=True)
+    destino = ruta_plantilla(proyecto, filas)
+    temporal = destino + '.tmp.xlsx'
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(config['hoja'])
+    ws.append([f'PLANTILLA SINTÉTICA DE BENCHMARK - {proyecto}'])
+    ws.append([f'{filas} filas remuestreadas de {os.path.basename(fuente["archivo"])} (semilla {semilla})'])
+    ws.append([''])
+    ws.append([])
+    ws.append(['ID'] + list(columnas) + [config['columna_resultado']])
+    for i, fila in enumerate(muestra.itertuples(index=False), 1):
+        ws.append([i, *fila, None])
+    wb.save(temporal)
+    os.replace(temporal, destino)
+
+    return destino
+
+
+def plantilla_vigente(proyecto, columnas, filas):
+    """True si la plantilla ya generada tiene los encabezados del modelo actual"""
+
+    from openpyxl import load_workbook
+
+    plantilla = ruta_plantilla(proyecto, filas)
+    if not os.path.exists(plantilla):
+        return False
+
+    wb = load_workbook(plantilla, read_only=True)
+    try:
+        hoja = wb[PROYECTOS[proyecto]['hoja']]
+        encabezados = next(hoja.iter_rows(min_row=5, max_row=5, values_only=True), ())
+    except KeyError:
+        return False
+    finally:
+        wb.close()
+    return list(encabezados[1:1 + len(columnas)]) == list(columnas)
+
+
+# ==================== MEDICIÓN (proceso de cada sistema) ====================
+
+def cargar_predictor(carpeta, script):
+    """Importa el script de predicción de la carpeta como módulo (sin ejecutar su main)"""
+    spec = importlib.util.spec_from_file_location('predictor_benchmark', os.path.join(carpeta, script))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir_carga_en_frio(proyecto, raiz=RAIZ, con_memoria=False):
+    """Importa el script y carga el modelo en este proceso (recién iniciado)
+
+    Retorna {'segundos', 'cpu_segundos'[, 'memoria_pico_mb']}.
+    """
+
+    config = PROYECTOS[proyecto]
+    carpeta = os.path.join(raiz, proyecto)
+    os.chdir(carpeta)
+    sys.path.insert(0, carpeta)
+
+    if con_memoria:
+        tracemalloc.start()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = cargar_predictor(carpeta, config['script'])
+        pipeline, _ = predictor.cargar_modelo()
+    medida = {'segundos': time.perf_counter() - inicio,
+              'cpu_segundos': time.process_time() - inicio_cpu}
+    if con_memoria:
+        medida['memoria_pico_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    if pipeline is None:
+        raise RuntimeError("No se pudo cargar el modelo")
+    return medida
+
+
+def _carga_en_frio(proyecto, raiz, con_memoria=False):
+    """Ejecuta medir_carga_en_frio en un intérprete nuevo y retorna su resultado"""
+
+    comando = [sys.executable, os.path.abspath(__file__), '--carga-en-frio', proyecto,
+               '--raiz', raiz]
+    if con_memoria:
+        comando.append('--con-memoria')
+
+    proceso = subprocess.run(comando, capture_output=True, text=True, encoding='utf-8')
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode != 0 or not lineas:
+        error = (proceso.stderr.strip().splitlines() or ['Error desconocido'])[-1]
+        raise RuntimeError(f"cargar_modelo en frío: {error}")
+    return json.loads(lineas[-1])
+
+
+def etapas(predictor, tipo, plantilla):
+    """Lista de (nombre, función) de cada etapa; cada función recibe el estado y lo actualiza"""
+
+    def cargar(estado):
+        estado['pipeline'], estado['info'] = predictor.cargar_modelo()
+        if estado['pipeline'] is None:
+            raise RuntimeError("No se pudo cargar el modelo")
+
+    def leer(estado):
+        estado['df'] = predictor.leer_datos_excel(plantilla, estado['pipeline'].columnas)
+        if estado['df'] is None:
+            raise RuntimeError("No se pudieron leer los datos de la plantilla")
+
+    def preprocesar(estado):
+        estado['X'] = predictor.preprocesar_datos(estado['df'], estado['pipeline'])
+
+    if tipo == 'regresion':
+        def predecir(estado):
+            estado['predicciones'] = predictor.hacer_predicciones(estado['pipeline'], estado['X'])
+
+        def escribir(estado):
+            if not predictor.escribir_resultados(plantilla, estado['predicciones'], estado['df']):
+                raise RuntimeError("No se pudieron escribir los resultados")
+
+        return [('cargar_modelo', cargar), ('leer_datos_excel', leer),
+                ('preprocesar_datos', preprocesar), ('hacer_predicciones', predecir),
+                ('escribir_resultados', escribir)]
+
+    def clasificar(estado):
+        estado['predicciones'], estado['probas'] = predictor.hacer_clasificacion(
+            estado['pipeline'], estado['X'])
+
+    def escribir(estado):
+        clases = estado['pipeline'].clases_modelo() if estado['probas'] is not None else None
+        if not predictor.escribir_resultados(plantilla, estado['predicciones'], estado['probas'],
+                                             estado['df'], clases):
+            raise RuntimeError("No se pudieron escribir los resultados")
+
+    return [('cargar_modelo', cargar), ('leer_datos_excel', leer),
+            ('preprocesar_datos', preprocesar), ('hacer_clasificacion', clasificar),
+            ('escribir_resultados', escribir)]
+
+
+def ejecutar_etapas(predictor, tipo, plantilla_original, trabajo, con_memoria):
+    """Una pasada completa sobre una copia nueva de la plantilla
+
+    Retorna {etapa: {'segundos', 'cpu_segundos'[, 'memoria_pico_mb']}}.
+    """
+
+    # Cada pasada parte de la plantilla sin predicciones
+    shutil.copyfile(plantilla_original, trabajo)
+
+    estado, medidas = {}, {}
+    for nombre, funcion in etapas(predictor, tipo, trabajo):
+        if con_memoria:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcion(estado)
+        medidas[nombre] = {'segundos': time.perf_counter() - inicio,
+                           'cpu_segundos': time.process_time() - inicio_cpu}
+
+        if con_memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            medidas[nombre]['memoria_pico_mb'] = (pico - base) / (1024 * 1024)
+
+    return medidas
+
+
+def medir_proyecto(proyecto, filas, repeticiones=REPETICIONES, regenerar=False, raiz=RAIZ):
+    """Mide las etapas de un sistema con una plantilla de `filas` filas (se ejecuta en su carpeta)"""
+
+    config = PROYECTOS[proyecto]
+    carpeta = os.path.join(raiz, proyecto)
+    if not os.path.isdir(carpeta):
+        return {'estado': 'omitido', 'motivo': f"No existe la carpeta {carpeta}"}
+    os.chdir(carpeta)
+    sys.path.insert(0, carpeta)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = cargar_predictor(carpeta, config['script'])
+        _, faltantes = predictor.archivos_modelo()
+    if faltantes:
+        return {'estado': 'omitido', 'motivo': f"Faltan archivos del modelo: {', '.join(faltantes)}"}
+
+    # Columnas del modelo para generar la plantilla
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline, _ = predictor.cargar_modelo()
+    if pipeline is None:
+        return {'estado': 'omitido', 'motivo': "No se pudo cargar el modelo"}
+
+    plantilla = ruta_plantilla(proyecto, filas)
+    generada = None
+    if regenerar or not plantilla_vigente(proyecto, pipeline.columnas, filas):
+        inicio = time.perf_counter()
+        generar_plantilla(proyecto, pipeline.columnas, filas, raiz=raiz)
+        generada = time.perf_counter() - inicio
+    del pipeline
+
+    if filas >= FILAS_UNA_REPETICION:
+        repeticiones = 1
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as temporal:
+        trabajo = os.path.join(temporal, os.path.basename(plantilla))
+
+        # Tiempos: el mínimo de las repeticiones
+        pasadas = [ejecutar_etapas(predictor, config['tipo'], plantilla, trabajo, False)
+                   for _ in range(repeticiones)]
+        resultado = {nombre: min((p[nombre] for p in pasadas), key=lambda m: m['segundos'])
+                     for nombre in pasadas[0]}
+
+        # Memoria: una pasada aparte con tracemalloc
+        tracemalloc.start()
+        try:
+            memoria = ejecutar_etapas(predictor, config['tipo'], plantilla, trabajo, True)
+        finally:
+            tracemalloc.stop()
+        for nombre, medida in memoria.items():
+            resultado[nombre]['memoria_pico_mb'] = medida['memoria_pico_mb']
+
+    # cargar_modelo en frío: aquí el modelo y sus librerías ya están cargados,
+    # así que se mide en un intérprete nuevo por repetición
+    frio = [_carga_en_frio(proyecto, raiz) for _ in range(repeticiones)]
+    resultado['cargar_modelo'] = min(frio, key=lambda m: m['segundos'])
+    resultado['cargar_modelo']['memoria_pico_mb'] = \
+        _carga_en_frio(proyecto, raiz, con_memoria=True)['memoria_pico_mb']
+
+    return {
+        'estado': 'ok',
+        'repeticiones': repeticiones,
+        'segundos_total': sum(m['segundos'] for m in resultado.values()),
+        'plantilla_generada_segundos': generada,
+        'etapas': {nombre: {clave: round(valor, 6) for clave, valor in medida.items()}
+                   for nombre, medida in resultado.items()},
+    }
+
+
+# ==================== CORRIDA COMPLETA ====================
+
+def _medir_en_proceso(proyecto, filas, repeticiones, regenerar, raiz):
+    """Ejecuta medir_proyecto en un proceso nuevo y retorna su resultado"""
+
+    comando = [sys.executable, os.path.abspath(__file__), '--trabajador', proyecto, str(filas),
+               '--repeticiones', str(repeticiones), '--raiz', raiz]
+    if regenerar:
+        comando.append('--regenerar')
+
+    proceso = subprocess.run(comando, capture_output=True, text=True, encoding='utf-8')
+    lineas = proceso.stdout.strip().splitlines()
+    if proceso.returncode != 0 or not lineas:
+        error = (proceso.stderr.strip().splitlines() or ['Error desconocido'])[-1]
+        return {'estado': 'error', 'motivo': error}
+    return json.loads(lineas[-1])
+
+
+def _version(modulo):
+    try:
+        return __import__(modulo).__version__
+    except Exception:
+        return None
+
+
+def _commit(raiz):
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz,
+                                capture_output=True, text=True, timeout=10)
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ejecutar_benchmark(proyectos=None, filas=None, repeticiones=REPETICIONES, salida=None,
+                       regenerar=False, raiz=RAIZ):
+    """Mide todas las combinaciones y guarda el JSON. Retorna la ruta del JSON"""
+
+    proyectos = proyectos or list(PROYECTOS)
+    filas = filas or FILAS
+
+    print("=" * 70)
+    print("BENCHMARK DE LOS PIPELINES DE PREDICCIÓN")
+    print("=" * 70)
+    print(f"✓ Sistemas: {', '.join(proyectos)}")
+    print(f"✓ Tamaños: {', '.join(f'{n:,}' for n in filas)} filas")
+
+    resultados = {}
+    for proyecto in proyectos:
+        resultados[proyecto] = {}
+        print(f"\n📊 {proyecto}")
+        for n in filas:
+            resultado = _medir_en_proceso(proyecto, n, repeticiones, regenerar, raiz)
+            resultados[proyecto][str(n)] = resultado
+
+            if resultado['estado'] != 'ok':
+                simbolo = '⚠' if resultado['estado'] == 'omitido' else '❌'
+                print(f"  {simbolo} {n:>9,} filas: {resultado['motivo']}")
+                if resultado['estado'] == 'omitido':
+                    break
+                continue
+
+            detalle = '  '.join(f"{nombre}={medida['segundos']:.3f}s"
+                                for nombre, medida in resultado['etapas'].items())
+            print(f"  ✓ {n:>9,} filas: {resultado['segundos_total']:.2f} s  ({detalle})")
+
+    datos = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'raiz': os.path.abspath(raiz),
+        'commit': _commit(raiz),
+        'plataforma': platform.platform(),
+        'python': platform.python_version(),
+        'versiones': {modulo: _version(modulo) for modulo in ('numpy', 'pandas', 'openpyxl', 'sklearn')},
+        'semilla': SEMILLA,
+        'resultados': resultados,
+    }
+
+    if salida is None:
+        os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+        salida = os.path.join(CARPETA_RESULTADOS,
+                              f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    elif os.path.dirname(salida):
+        os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✓ Resultados guardados: {salida}")
+    return salida
+
+
+# ==================== COMPARACIÓN ====================
+
+def comparar(archivo_base, archivo_nuevo, umbral=UMBRAL):
+    """Compara dos corridas etapa por etapa
+
+    Una etapa es una regresión si su tiempo o su memoria crece más que `umbral`
+    por ciento (las etapas por debajo de SEGUNDOS_MINIMOS / MEMORIA_MINIMA_MB
+    no se comparan). Retorna la lista de regresiones.
+    """
+
+    with open(archivo_base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(archivo_nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    print("=" * 86)
+    print(f"COMPARACIÓN: {os.path.basename(archivo_base)} -> {os.path.basename(archivo_nuevo)} "
+          f"(umbral {umbral:g}%)")
+    print("=" * 86)
+
+    regresiones = []
+    for proyecto, por_tamano in nuevo['resultados'].items():
+        for filas, resultado in por_tamano.items():
+            anterior = base['resultados'].get(proyecto, {}).get(filas)
+            if not anterior or anterior.get('estado') != 'ok' or resultado.get('estado') != 'ok':
+                continue
+
+            print(f"\n📊 {proyecto} - {int(filas):,} filas")
+            print(f"  {'etapa':<22}{'tiempo antes':>13}{'después':>10}{'cambio':>9}"
+                  f"{'memoria antes':>16}{'después':>10}{'cambio':>9}")
+
+            for etapa, medida in resultado['etapas'].items():
+                previa = anterior['etapas'].get(etapa)
+                if previa is None:
+                    continue
+
+                marcas = []
+                cambios = []
+                for clave, minimo, unidad in (('segundos', SEGUNDOS_MINIMOS, 's'),
+                                              ('memoria_pico_mb', MEMORIA_MINIMA_MB, 'MB')):
+                    antes, despues = previa.get(clave), medida.get(clave)
+                    if antes is None or despues is None:
+                        cambios.append((antes, despues, None))
+                        continue
+                    cambio = (despues - antes) / antes * 100 if antes else 0.0
+                    cambios.append((antes, despues, cambio))
+                    if max(antes, despues) >= minimo and cambio > umbral:
+                        marcas.append(f'{clave} +{cambio:.1f}%')
+                        regresiones.append({'proyecto': proyecto, 'filas': int(filas), 'etapa': etapa,
+                                            'medida': clave, 'antes': antes, 'despues': despues,
+                                            'cambio_pct': cambio})
+
+                (t0, t1, ct), (m0, m1, cm) = cambios
+                texto = (f"  {etapa:<22}{t0:>12.3f}s{t1:>9.3f}s{_porcentaje(ct):>9}"
+                         f"{_mb(m0):>16}{_mb(m1):>10}{_porcentaje(cm):>9}")
+                print(texto + ('  ❌' if marcas else ''))
+
+    print("\n" + "=" * 86)
+    if regresiones:
+        print(f"❌ {len(regresiones)} regresiones de más de {umbral:g}%:")
+        for r in regresiones:
+            print(f"   - {r['proyecto']} {r['filas']:,} filas, {r['etapa']} ({r['medida']}): "
+                  f"{r['antes']:.3f} -> {r['despues']:.3f} (+{r['cambio_pct']:.1f}%)")
+    else:
+        print(f"✓ Sin regresiones de más de {umbral:g}%")
+    print("=" * 86)
+
+    return regresiones
+
+
+def _porcentaje(cambio):
+    return '-' if cambio is None else f'{cambio:+.1f}%'
+
+
+def _mb(valor):
+    return '-' if valor is None else f'{valor:.1f} MB'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas de los cuatro pipelines")
+    parser.add_argument('--proyectos', nargs='+', choices=list(PROYECTOS), default=None,
+                        help="Sistemas a medir (por defecto todos)")
+    parser.add_argument('--filas', nargs='+', type=int, default=None,
+                        help=f"Tamaños de las plantillas (por defecto {' '.join(map(str, FILAS))})")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help=f"Repeticiones de la medición de tiempos (por defecto {REPETICIONES}; "
+                             f"una sola desde {FILAS_UNA_REPETICION} filas)")
+    parser.add_argument('--salida', default=None,
+                        help="Archivo JSON de resultados (por defecto resultados/benchmark_<fecha>.json)")
+    parser.add_argument('--raiz', default=RAIZ,
+                        help="Carpeta con los cuatro sistemas y Bases_de_Datos (por defecto este proyecto)")
+    parser.add_argument('--regenerar', action='store_true',
+                        help="Volver a generar las plantillas sintéticas")
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NUEVO'),
+                        help="Comparar dos archivos de resultados")
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help=f"Con --comparar: aumento máximo permitido en %% (por defecto {UMBRAL:g})")
+    parser.add_argument('--trabajador', nargs=2, metavar=('PROYECTO', 'FILAS'), help=argparse.SUPPRESS)
+    parser.add_argument('--carga-en-frio', metavar='PROYECTO', help=argparse.SUPPRESS)
+    parser.add_argument('--con-memoria', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.carga_en_frio:
+        # Intérprete nuevo para medir cargar_modelo: imprime la medida como JSON
+        print(json.dumps(medir_carga_en_frio(args.carga_en_frio, os.path.abspath(args.raiz),
+                                             args.con_memoria)))
+    elif args.trabajador:
+        # Proceso de un sistema: imprime el resultado como JSON en la última línea
+        proyecto, filas = args.trabajador[0], int(args.trabajador[1])
+        print(json.dumps(medir_proyecto(proyecto, filas, args.repeticiones, args.regenerar,
+                                        os.path.abspath(args.raiz))))
+    elif args.comparar:
+        sys.exit(1 if comparar(*args.comparar, umbral=args.umbral) else 0)
+    else:
+        ejecutar_benchmark(args.proyectos, args.filas, args.repeticiones, args.salida, args.regenerar,
+                           os.path.abspath(args.raiz))
@@ -16,14 +16,24 @@ INSTRUCCIONES:
 3. Abre el archivo Excel
 4. Llena los datos
 5. Haz clic en el botón "🎯 PREDECIR CLASE"
+
+Para preparar más filas con formato (por ejemplo 50.000):
+    python 4_crear_excel_con_boton_clasificacion.py --filas 50000
 """
 
+import argparse
 import json
 import os
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 from datetime import datetime
 
+from estilos_plantilla import registrar_estilos, formato_columnas, fila, agregar_filas_id
+
+# Filas de datos preparadas por defecto
+FILAS_DATOS = 25
+
 
 def crear_codigo_vba_clasificacion():
     """Genera el código VBA que ejecutará las predicciones de clasificación"""
@@ -135,8 +145,11 @@ End Sub
     return vba_code
 
 
-def crear_excel_con_boton_clasificacion():
-    """Crea el archivo Excel con la estructura y prepara para macros de clasificación"""
+def crear_excel_con_boton_clasificacion(filas=FILAS_DATOS):
+    """Crea el archivo Excel con la estructura y prepara para macros de clasificación
+
+    filas : filas de datos con formato y número de ID
+    """
 
     print("\n" + "🚀" * 35)
     print("   CREADOR DE EXCEL CON BOTÓN DE CLASIFICACIÓN")
@@ -158,133 +171,129 @@ def crear_excel_con_boton_clasificacion():
     print(f"✓ Variables: {len(variables)}")
     print(f"✓ Clases: {', '.join(clases)}\n")
 
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Datos para Clasificación"
+    # Crear workbook (write-only: cada fila se escribe en el archivo al agregarla)
+    wb = Workbook(write_only=True)
 
     # ==================== ESTILOS ====================
+    # Se registran una vez y las celdas los usan por nombre
     border = Border(
         left=Side(style='thin', color='666666'),
         right=Side(style='thin', color='666666'),
         top=Side(style='thin', color='666666'),
         bottom=Side(style='thin', color='666666')
     )
+    centrado = Alignment(horizontal='center', vertical='center')
+
+    estilos = registrar_estilos(wb, {
+        'boton': {
+            'font': Font(bold=True, size=14, color="FFFFFF", name='Arial'),
+            'fill': PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid"),
+            'alignment': centrado,
+        },
+        'aviso_boton': {
+            'font': Font(bold=True, size=10, color="9C27B0", name='Arial'),
+            'alignment': Alignment(horizontal='left', vertical='center'),
+        },
+        'info_modelo': {
+            'font': Font(italic=True, size=10, color="555555"),
+            'alignment': Alignment(horizontal='center'),
+        },
+        'marca_tiempo': {'font': Font(italic=True, size=9, color="006400")},
+        'encabezado': {
+            'font': Font(bold=True, color="FFFFFF", size=12, name='Arial'),
+            'fill': PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True),
+            'border': border,
+        },
+        'encabezado_prediccion': {
+            'font': Font(bold=True, color="FFFFFF", size=12, name='Arial'),
+            'fill': PatternFill(start_color="9C27B0", end_color="9C27B0", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        'dato': {'alignment': centrado, 'border': border},
+        'prediccion': {
+            'fill': PatternFill(start_color="F3E5F5", end_color="F3E5F5", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        # Hoja de instrucciones
+        'titulo_instrucciones': {
+            'font': Font(bold=True, size=14, color="D32F2F"),
+            'alignment': centrado,
+        },
+        'separador': {'font': Font(color="CCCCCC", size=9)},
+        'opcion': {
+            'font': Font(bold=True, size=12, color="1976D2"),
+            'fill': PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid"),
+        },
+        'paso': {'font': Font(bold=True, size=10, color="F57C00")},
+        'vineta': {'font': Font(size=9, color="555555")},
+        'advertencia': {
+            'font': Font(bold=True, size=11, color="D32F2F"),
+            'fill': PatternFill(start_color="FFEBEE", end_color="FFEBEE", fill_type="solid"),
+        },
+        'codigo_vba': {
+            'font': Font(name='Consolas', size=9, color="000000"),
+            'fill': PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid"),
+        },
+    })
+
+    ws = wb.create_sheet("Datos para Clasificación")
+    header_row = 5
+    pred_col = len(variables) + 2
 
-    header_fill = PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12, name='Arial')
-
-    pred_fill = PatternFill(start_color="9C27B0", end_color="9C27B0", fill_type="solid")
-    pred_font = Font(bold=True, color="FFFFFF", size=12, name='Arial')
+    # ==================== ANCHOS Y FORMATO POR COLUMNA ====================
+    # Las filas de datos toman el formato de su columna sin escribir sus celdas
+    columnas = {'A': ('dato', 6)}
+    for col_idx in range(2, pred_col):
+        columnas[get_column_letter(col_idx)] = ('dato', 18)
+    columnas[get_column_letter(pred_col)] = ('prediccion', 18)
+    formato_columnas(ws, estilos, columnas)
 
-    button_fill = PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid")
+    ws.row_dimensions[1].height = 40
+    ws.row_dimensions[header_row].height = 30
 
 
     # ==================== ÁREA DEL BOTÓN ====================
-    ws.merge_cells('A1:C1')
-    ws['A1'] = '🎯 PREDECIR CLASE DE BIOMASA'
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF", name='Arial')
-    ws['A1'].fill = button_fill
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 40
-
-    # Instrucciones del botón
-    ws.merge_cells('D1:G1')
-    ws['D1'] = '👈 HAZ CLIC EN EL BOTÓN VERDE DESPUÉS DE LLENAR LOS DATOS'
-    ws['D1'].font = Font(bold=True, size=10, color="9C27B0", name='Arial')
-    ws['D1'].alignment = Alignment(horizontal='left', vertical='center')
+    # Instrucciones del botón en D1
+    ws.append(fila(ws, ['🎯 PREDECIR CLASE DE BIOMASA', None, None,
+                        '👈 HAZ CLIC EN EL BOTÓN VERDE DESPUÉS DE LLENAR LOS DATOS'],
+                   ['boton', 'boton', 'boton', 'aviso_boton'], pred_col))
+    ws.merged_cells.add('A1:C1')
+    ws.merged_cells.add('D1:G1')
 
 
     # ==================== INFORMACIÓN ====================
-    ws['A2'] = f'📊 Modelo: {model_info["modelo"]} | Accuracy: {model_info["metricas"]["accuracy_test"]:.4f} | Clases: {", ".join(clases)}'
-    ws['A2'].font = Font(italic=True, size=10, color="555555")
-    ws.merge_cells('A2:G2')
-    ws['A2'].alignment = Alignment(horizontal='center')
+    ws.append(fila(ws, [f'📊 Modelo: {model_info["modelo"]} | Accuracy: {model_info["metricas"]["accuracy_test"]:.4f} | Clases: {", ".join(clases)}'],
+                   'info_modelo', pred_col))
+    ws.merged_cells.add('A2:G2')
 
-    ws['A3'] = ''  # Timestamp se agregará aquí después de predecir
-    ws['A3'].font = Font(italic=True, size=9, color="006400")
+    ws.append(fila(ws, [None], 'marca_tiempo', pred_col))  # Timestamp se agregará aquí después de predecir
 
-    ws['A4'] = ''  # Fila vacía
+    ws.append(fila(ws, [], columnas=pred_col))  # Fila vacía
 
 
     # ==================== ENCABEZADOS ====================
-    header_row = 5
-
-    # ID
-    cell = ws.cell(row=header_row, column=1)
-    cell.value = 'ID'
-    cell.font = header_font
-    cell.fill = header_fill
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    cell.border = border
-
-    # Variables
-    for col_idx, variable in enumerate(variables, start=2):
-        cell = ws.cell(row=header_row, column=col_idx)
-        cell.value = variable
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = border
-
-    # Columna de predicción
-    pred_col = len(variables) + 2
-    cell = ws.cell(row=header_row, column=pred_col)
-    cell.value = 'Clase_Predicha'
-    cell.font = pred_font
-    cell.fill = pred_fill
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    cell.border = border
-
-    ws.row_dimensions[header_row].height = 30
+    ws.append(fila(ws, ['ID'] + variables + ['Clase_Predicha'],
+                   ['encabezado'] * (pred_col - 1) + ['encabezado_prediccion']))
 
 
     # ==================== FILAS DE DATOS ====================
-    data_start_row = 6
-
-    for i in range(25):
-        row = data_start_row + i
-
-        # ID
-        cell = ws.cell(row=row, column=1)
-        cell.value = i + 1
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-        # Columnas de datos
-        for col_idx in range(2, pred_col):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = ""
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-
-        # Columna de predicción
-        cell = ws.cell(row=row, column=pred_col)
-        cell.value = ""
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.fill = PatternFill(start_color="F3E5F5", end_color="F3E5F5", fill_type="solid")
-
-
-    # ==================== AJUSTAR ANCHOS ====================
-    ws.column_dimensions['A'].width = 6
-
-    for col_idx in range(2, pred_col + 1):
-        col_letter = chr(64 + col_idx)
-        ws.column_dimensions[col_letter].width = 18
+    # Solo se escribe el ID; el resto de la fila toma el formato de su columna
+    agregar_filas_id(ws, 1, filas, 'dato')
 
 
     # ==================== HOJA DE INSTRUCCIONES ====================
     ws_inst = wb.create_sheet("📖 Instrucciones VBA")
-
-    ws_inst['A1'] = '📖 INSTRUCCIONES PARA ACTIVAR EL BOTÓN DE CLASIFICACIÓN'
-    ws_inst['A1'].font = Font(bold=True, size=14, color="D32F2F")
-    ws_inst.merge_cells('A1:B1')
-    ws_inst['A1'].alignment = Alignment(horizontal='center', vertical='center')
+    ws_inst.column_dimensions['A'].width = 120
     ws_inst.row_dimensions[1].height = 25
 
+    ws_inst.append(fila(ws_inst, ['📖 INSTRUCCIONES PARA ACTIVAR EL BOTÓN DE CLASIFICACIÓN'],
+                        'titulo_instrucciones'))
+    ws_inst.merged_cells.add('A1:B1')
+
     instrucciones = [
-        "",
         "⚠️ IMPORTANTE: Este archivo necesita configuración VBA para funcionar",
         "━" * 100,
         "",
@@ -334,34 +343,25 @@ def crear_excel_con_boton_clasificacion():
         "",
     ]
 
-    row = 1
     for inst in instrucciones:
-        ws_inst[f'A{row}'] = inst
-
         if inst.startswith('━'):
-            ws_inst[f'A{row}'].font = Font(color="CCCCCC", size=9)
+            estilo = 'separador'
         elif inst.startswith(('OPCIÓN', 'CÓDIGO VBA')):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=12, color="1976D2")
-            ws_inst[f'A{row}'].fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+            estilo = 'opcion'
         elif any(c.isdigit() and '. ' in inst for c in inst[:3]):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=10, color="F57C00")
+            estilo = 'paso'
         elif inst.startswith('   •'):
-            ws_inst[f'A{row}'].font = Font(size=9, color="555555")
+            estilo = 'vineta'
         elif inst.startswith('⚠️'):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=11, color="D32F2F")
-            ws_inst[f'A{row}'].fill = PatternFill(start_color="FFEBEE", end_color="FFEBEE", fill_type="solid")
+            estilo = 'advertencia'
+        else:
+            estilo = None
 
-        row += 1
+        ws_inst.append(fila(ws_inst, [inst], estilo) if estilo else [inst])
 
     # Agregar el código VBA
-    vba_lines = crear_codigo_vba_clasificacion().split('\n')
-    for vba_line in vba_lines:
-        ws_inst[f'A{row}'] = vba_line
-        ws_inst[f'A{row}'].font = Font(name='Consolas', size=9, color="000000")
-        ws_inst[f'A{row}'].fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid")
-        row += 1
-
-    ws_inst.column_dimensions['A'].width = 120
+    for vba_line in crear_codigo_vba_clasificacion().split('\n'):
+        ws_inst.append(fila(ws_inst, [vba_line], 'codigo_vba'))
 
 
     # ==================== GUARDAR ====================
@@ -381,7 +381,8 @@ def crear_excel_con_boton_clasificacion():
     print(f"   1. {filename} - Plantilla Excel")
     print(f"   2. {vba_filename} - Código VBA para el botón")
 
-    print(f"\n📋 Variables incluidas: {len(variables)}")
+    print(f"\n📋 Filas de datos preparadas: {filas:,}")
+    print(f"📋 Variables incluidas: {len(variables)}")
     for i, var in enumerate(variables, 1):
         print(f"   {i}. {var}")
 
@@ -400,8 +401,13 @@ def crear_excel_con_boton_clasificacion():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Crea la plantilla Excel con botón de clasificación')
+    parser.add_argument('--filas', type=int, default=FILAS_DATOS,
+                        help=f'Filas de datos con formato y número de ID (por defecto {FILAS_DATOS})')
+    args = parser.parse_args()
+
     try:
-        crear_excel_con_boton_clasificacion()
+        crear_excel_con_boton_clasificacion(args.filas)
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
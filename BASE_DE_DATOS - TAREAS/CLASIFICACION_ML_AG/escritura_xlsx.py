@@ -0,0 +1,868 @@
+"""
+Escritura Rápida de Resultados en Excel (.xlsx / .xlsm)
+=======================================================
+Un archivo .xlsx es un ZIP con un XML por hoja. Para escribir las
+predicciones, openpyxl lee y vuelve a guardar TODO el libro (todas las hojas,
+estilos y dibujos). Este módulo solo modifica el XML de la hoja de destino
+(y styles.xml si hace falta un estilo nuevo). Las demás partes del ZIP se
+copian byte a byte, sin descomprimirlas.
+
+El XML de la hoja se lee, se modifica y se vuelve a comprimir por bloques,
+fila por fila: la memoria no depende del tamaño de la hoja. Con
+escribir_filas_xlsx los cambios llegan de un iterable (por ejemplo un
+generador sobre arrays de numpy), así tampoco hace falta un dict por celda.
+
+Solo usa la librería estándar de Python.
+
+Uso:
+    from escritura_xlsx import EstiloCelda, localizar_columna, escribir_celdas_xlsx
+
+    col = localizar_columna('Plantilla.xlsx', 'Datos para Predicción', 5, 'Biomasa_Predicha')
+    verde = EstiloCelda(relleno='C6EFCE')
+    escribir_celdas_xlsx('Plantilla.xlsx', 'Datos para Predicción',
+                         {(6, col): (1234.5, verde), (7, col): (987.1, verde)})
+
+    # Muchas filas: los cambios de cada fila, en orden creciente de fila
+    cambios = ((int(f), {col: (float(v), verde)}) for f, v in zip(filas, valores))
+    escribir_filas_xlsx('Plantilla.xlsx', 'Datos para Predicción', cambios,
+                        ultima_fila=int(filas[-1]), ultima_columna=col)
+
+Si el archivo tiene algo que este módulo no sabe modificar de forma segura
+(por ejemplo ZIP64 o celdas sin referencia), se lanza ErrorEscrituraXlsx y
+el script que lo llama puede volver a usar openpyxl.
+"""
+
+import codecs
+import os
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from collections import namedtuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, unescape
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL_DOC = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_REL_PKG = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Estructuras del formato ZIP (iguales a las de zipfile)
+_CABECERA_LOCAL = struct.Struct('<4s2B4HL2L2H')
+_ENTRADA_CENTRAL = struct.Struct('<4s4B4HL2L5H2L')
+_FIN_DIRECTORIO = struct.Struct('<4s4H2LH')
+_LIMITE_ZIP32 = 0xFFFFFFFF
+
+# Bytes que se leen del XML de la hoja por vez, y caracteres que se juntan
+# antes de comprimir la hoja modificada
+_BLOQUE_LECTURA = 1 << 16
+_BLOQUE_ESCRITURA = 1 << 20
+
+# Estilo de una celda escrita: color de relleno (RGB), negrita y centrado.
+# Las celdas escritas con estilo=None conservan el estilo que ya tenían.
+EstiloCelda = namedtuple('EstiloCelda', ['relleno', 'negrita', 'centrado'],
+                         defaults=(None, False, True))
+
+
+class ErrorEscrituraXlsx(Exception):
+    """El archivo no se puede modificar con la escritura rápida"""
+
+
+# ==================== UTILIDADES ====================
+
+def letra_columna(numero):
+    """1 -> 'A', 27 -> 'AA'"""
+    letras = ''
+    while numero > 0:
+        numero, resto = divmod(numero - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def numero_columna(letras):
+    """'A' -> 1, 'AA' -> 27"""
+    numero = 0
+    for letra in letras:
+        numero = numero * 26 + ord(letra) - 64
+    return numero
+
+
+def _ruta_hoja(zf, nombre_hoja):
+    """Ruta dentro del ZIP del XML de la hoja con ese nombre"""
+
+    libro = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    rel_id = None
+    for hoja in libro.iter(f'{NS_MAIN}sheet'):
+        if hoja.get('name') == nombre_hoja:
+            rel_id = hoja.get(f'{NS_REL_DOC}id')
+            break
+    if rel_id is None:
+        raise KeyError(f"No existe la hoja '{nombre_hoja}'")
+
+    relaciones = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for rel in relaciones.iter(f'{NS_REL_PKG}Relationship'):
+        if rel.get('Id') == rel_id:
+            destino = rel.get('Target')
+            if destino.startswith('/'):
+                return destino.lstrip('/')
+            return os.path.normpath(os.path.join('xl', destino)).replace(os.sep, '/')
+
+    raise ErrorEscrituraXlsx(f"No se encontró la relación {rel_id} de la hoja")
+
+
+def _texto_compartido(zf, indice):
+    """Lee un texto de sharedStrings.xml sin cargar el archivo completo"""
+
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return None
+    with zf.open('xl/sharedStrings.xml') as f:
+        actual = -1
+        for _, elem in ElementTree.iterparse(f, events=('end',)):
+            if elem.tag == f'{NS_MAIN}si':
+                actual += 1
+                if actual == indice:
+                    return ''.join(t.text or '' for t in elem.iter(f'{NS_MAIN}t'))
+                elem.clear()
+    return None
+
+
+_PATRON_FILA = re.compile(r'<row\b[^>]*?\sr="(\d+)"[^>]*?(/?)>')
+_PATRON_CELDA = re.compile(r'<c\b([^>]*?)(/>|>(.*?)</c>)', re.DOTALL)
+_PATRON_REF = re.compile(r'\sr="([A-Z]+)(\d+)"')
+_PATRON_ESTILO = re.compile(r'\ss="(\d+)"')
+_PATRON_COLUMNA = re.compile(r'<col\b[^>]*>')
+
+
+def leer_fila(filename, nombre_hoja, fila):
+    """Valores de una fila como {número de columna: texto} (celdas con valor)
+
+    Lee el XML de la hoja de forma incremental y se detiene en esa fila.
+    """
+
+    patron = re.compile(rf'<row\b[^>]*?\sr="{fila}"[^>]*?>')
+    with zipfile.ZipFile(filename) as zf:
+        ruta = _ruta_hoja(zf, nombre_hoja)
+        contenido, inicio = '', None
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        with zf.open(ruta) as f:
+            while inicio is None or not (inicio.group(0).endswith('/>') or
+                                         contenido.find('</row>', inicio.end()) >= 0):
+                bloque = f.read(1 << 16)
+                if not bloque:
+                    return {}
+                desde = max(0, len(contenido) - 200)
+                contenido += decodificador.decode(bloque)
+                if inicio is None:
+                    inicio = patron.search(contenido, desde)
+
+        if inicio.group(0).endswith('/>'):
+            return {}
+        fin = contenido.find('</row>', inicio.end())
+
+        valores = {}
+        for celda in _PATRON_CELDA.finditer(contenido, inicio.end(), fin):
+            atributos, cuerpo = celda.group(1), celda.group(3) or ''
+            ref = _PATRON_REF.search(' ' + atributos)
+            valor = re.search(r'<v>(.*?)</v>', cuerpo)
+            if ' t="s"' in atributos and valor:
+                valor = _texto_compartido(zf, int(valor.group(1)))
+            elif 'inlineStr' in atributos:
+                valor = unescape(''.join(re.findall(r'<t[^>]*>(.*?)</t>', cuerpo, re.DOTALL)))
+            else:
+                valor = unescape(valor.group(1)) if valor else None
+            if ref and valor not in (None, ''):
+                valores[numero_columna(ref.group(1))] = valor
+
+    return valores
+
+
+def _textos_compartidos(zf):
+    """Todos los textos de sharedStrings.xml, en orden"""
+
+    textos = []
+    if 'xl/sharedStrings.xml' in zf.namelist():
+        with zf.open('xl/sharedStrings.xml') as f:
+            for _, elem in ElementTree.iterparse(f, events=('end',)):
+                if elem.tag == f'{NS_MAIN}si':
+                    textos.append(''.join(t.text or '' for t in elem.iter(f'{NS_MAIN}t')))
+                    elem.clear()
+    return textos
+
+
+def _valor_celda(celda, compartidos):
+    """Valor de un elemento <c> como lo entrega openpyxl con data_only=True
+    (los números con formato de fecha quedan como número)"""
+
+    tipo = celda.get('t', 'n')
+    if tipo == 'inlineStr':
+        return ''.join(t.text or '' for t in celda.iter(f'{NS_MAIN}t'))
+    valor = celda.findtext(f'{NS_MAIN}v')
+    if valor is None:
+        return None
+    if tipo == 's':
+        return compartidos[int(valor)]
+    if tipo == 'b':
+        return valor == '1'
+    if tipo == 'n':
+        return float(valor) if ('.' in valor or 'E' in valor or 'e' in valor) else int(valor)
+    return valor
+
+
+def leer_filas(filename, nombre_hoja, primera_fila=1):
+    """Genera (número de fila, {número de columna: valor}) desde primera_fila
+
+    Recorre el XML de la hoja con memoria constante: cada fila se descarta
+    después de entregarla (el modo read_only de openpyxl conserva un elemento
+    vacío por fila leída hasta terminar la hoja). Las filas que no existen en
+    el archivo no se entregan.
+    """
+
+    with zipfile.ZipFile(filename) as zf:
+        ruta = _ruta_hoja(zf, nombre_hoja)
+        compartidos = _textos_compartidos(zf)
+
+        with zf.open(ruta) as f:
+            datos, numero = None, 0
+            for evento, elem in ElementTree.iterparse(f, events=('start', 'end')):
+                if evento == 'start':
+                    if elem.tag == f'{NS_MAIN}sheetData':
+                        datos = elem
+                    continue
+                if elem.tag != f'{NS_MAIN}row':
+                    continue
+
+                numero = int(elem.get('r', numero + 1))
+                if numero >= primera_fila:
+                    valores, columna = {}, 0
+                    for celda in elem.iter(f'{NS_MAIN}c'):
+                        ref = celda.get('r')
+                        columna = numero_columna(ref.rstrip('0123456789')) if ref else columna + 1
+                        valor = _valor_celda(celda, compartidos)
+                        if valor is not None:
+                            valores[columna] = valor
+                    yield numero, valores
+
+                if datos is not None:
+                    datos.clear()
+
+
+def localizar_columna(filename, nombre_hoja, fila, texto):
+    """Número de columna cuyo valor en `fila` es `texto` (o None)"""
+
+    for columna, valor in leer_fila(filename, nombre_hoja, fila).items():
+        if valor == texto:
+            return columna
+    return None
+
+
+# ==================== ESTILOS ====================
+
+def _fijar_atributo(etiqueta, nombre, valor):
+    """Asigna un atributo en una etiqueta XML de apertura"""
+    if re.search(rf'\s{nombre}="[^"]*"', etiqueta):
+        return re.sub(rf'\s{nombre}="[^"]*"', f' {nombre}="{valor}"', etiqueta, count=1)
+    return re.sub(r'\s*(/?>)$', rf' {nombre}="{valor}"\1', etiqueta, count=1)
+
+
+def _elementos(bloque, etiqueta):
+    """Lista de elementos <etiqueta .../> o <etiqueta>...</etiqueta> de un bloque"""
+    return re.findall(rf'<{etiqueta}\b[^>]*/>|<{etiqueta}\b[^>]*(?<!/)>.*?</{etiqueta}>',
+                      bloque, re.DOTALL)
+
+
+def _clave_elemento(elemento):
+    """Clave para comparar elementos de styles.xml: los atributos sin importar
+    el orden y el contenido sin espacios entre etiquetas"""
+
+    apertura = re.match(r'<[\w:]+\b[^>]*?/?>', elemento).group(0)
+    atributos = frozenset(re.findall(r'([\w:]+)="([^"]*)"', apertura))
+    interior = '' if apertura.endswith('/>') else elemento[len(apertura):elemento.rindex('</')]
+    return atributos, re.sub(r'>\s+<', '><', interior.strip())
+
+
+def _color_solido(relleno):
+    """Color RGB (6 dígitos) de un relleno sólido, o None"""
+
+    if 'patternType="solid"' not in relleno:
+        return None
+    color = re.search(r'<fgColor\b[^>]*\srgb="([0-9A-Fa-f]{6,8})"', relleno)
+    return color.group(1).upper()[-6:] if color else None
+
+
+class _Estilos:
+    """Agrega a styles.xml los formatos (xf) que necesitan las celdas escritas
+
+    Antes de agregar un relleno, una fuente o un xf se busca uno igual en
+    styles.xml: al volver a predecir en el mismo archivo se reutilizan los que
+    agregó la ejecución anterior y styles.xml no crece.
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+        self.cache = {}
+        self.nuevos_rellenos = []
+        self.nuevas_fuentes = []
+        self.nuevos_xf = []
+
+        self.rellenos = _elementos(self._seccion('fills'), 'fill')
+        self.fuentes = _elementos(self._seccion('fonts'), 'font')
+        self.xfs = _elementos(self._seccion('cellXfs'), 'xf')
+        if not self.xfs or not self.fuentes:
+            raise ErrorEscrituraXlsx("styles.xml sin formatos de celda")
+
+        # Índice del primero de cada relleno sólido / fuente / xf existente
+        self.indice_relleno = {}
+        for i, relleno in enumerate(self.rellenos):
+            self.indice_relleno.setdefault(_color_solido(relleno), i)
+        self.indice_fuente = {}
+        for i, fuente in enumerate(self.fuentes):
+            self.indice_fuente.setdefault(_clave_elemento(fuente), i)
+        self.indice_xf = {}
+        for i, xf in enumerate(self.xfs):
+            self.indice_xf.setdefault(_clave_elemento(xf), i)
+
+    def _seccion(self, nombre):
+        m = re.search(rf'<{nombre}\b[^>]*>(.*?)</{nombre}>', self.xml, re.DOTALL)
+        if m is None:
+            raise ErrorEscrituraXlsx(f"styles.xml sin sección <{nombre}>")
+        return m.group(1)
+
+    def _id_relleno(self, color):
+        if color not in self.indice_relleno:
+            self.indice_relleno[color] = len(self.rellenos) + len(self.nuevos_rellenos)
+            self.nuevos_rellenos.append(
+                f'<fill><patternFill patternType="solid"><fgColor rgb="00{color}"/>'
+                f'<bgColor rgb="00{color}"/></patternFill></fill>')
+        return self.indice_relleno[color]
+
+    def _id_fuente(self, fuente):
+        clave = _clave_elemento(fuente)
+        if clave not in self.indice_fuente:
+            self.indice_fuente[clave] = len(self.fuentes) + len(self.nuevas_fuentes)
+            self.nuevas_fuentes.append(fuente)
+        return self.indice_fuente[clave]
+
+    def indice(self, base, estilo):
+        """Índice del xf = xf base + estilo (se reutiliza uno igual o se crea)
+
+        Si el xf base ya tiene ese formato, se retorna el mismo base.
+        """
+
+        clave = (base, estilo)
+        if clave in self.cache:
+            return self.cache[clave]
+
+        base = base if base < len(self.xfs) + len(self.nuevos_xf) else 0
+        xf = (self.xfs + self.nuevos_xf)[base]
+        apertura = re.match(r'<xf\b[^>]*?/?>', xf).group(0)
+        interior = '' if apertura.endswith('/>') else xf[len(apertura):-len('</xf>')]
+        apertura = apertura[:-2] + '>' if apertura.endswith('/>') else apertura
+
+        if estilo.relleno:
+            apertura = _fijar_atributo(apertura, 'fillId',
+                                       self._id_relleno(estilo.relleno.upper()[-6:]))
+            apertura = _fijar_atributo(apertura, 'applyFill', 1)
+
+        if estilo.negrita:
+            id_fuente = int(re.search(r'fontId="(\d+)"', apertura).group(1)) \
+                if 'fontId=' in apertura else 0
+            fuentes = self.fuentes + self.nuevas_fuentes
+            fuente = fuentes[min(id_fuente, len(fuentes) - 1)]
+            if '<b/>' not in fuente:
+                fuente = ('<font><b/></font>' if fuente.endswith('/>')
+                          else re.sub(r'^(<font\b[^>]*>)', r'\1<b/>', fuente))
+            apertura = _fijar_atributo(apertura, 'fontId', self._id_fuente(fuente))
+            apertura = _fijar_atributo(apertura, 'applyFont', 1)
+
+        if estilo.centrado:
+            interior = re.sub(r'<alignment\b[^>]*/>', '', interior)
+            interior = '<alignment horizontal="center"/>' + interior
+            apertura = _fijar_atributo(apertura, 'applyAlignment', 1)
+
+        nuevo = apertura + interior + '</xf>'
+        clave_xf = _clave_elemento(nuevo)
+        if clave_xf == _clave_elemento(xf):
+            indice = base
+        elif clave_xf in self.indice_xf:
+            indice = self.indice_xf[clave_xf]
+        else:
+            indice = len(self.xfs) + len(self.nuevos_xf)
+            self.indice_xf[clave_xf] = indice
+            self.nuevos_xf.append(nuevo)
+
+        self.cache[clave] = indice
+        return indice
+
+    def _agregar(self, xml, seccion, elementos, total):
+        if not elementos:
+            return xml
+        m = re.search(rf'<{seccion}\b[^>]*>', xml)
+        apertura = _fijar_atributo(m.group(0), 'count', total)
+        cierre = xml.index(f'</{seccion}>', m.end())
+        return xml[:m.start()] + apertura + xml[m.end():cierre] + ''.join(elementos) + xml[cierre:]
+
+    def xml_modificado(self):
+        if not (self.nuevos_xf or self.nuevos_rellenos or self.nuevas_fuentes):
+            return None
+        xml = self._agregar(self.xml, 'fonts', self.nuevas_fuentes,
+                            len(self.fuentes) + len(self.nuevas_fuentes))
+        xml = self._agregar(xml, 'fills', self.nuevos_rellenos,
+                            len(self.rellenos) + len(self.nuevos_rellenos))
+        xml = self._agregar(xml, 'cellXfs', self.nuevos_xf,
+                            len(self.xfs) + len(self.nuevos_xf))
+        return xml
+
+
+# ==================== HOJA ====================
+
+def _xml_celda(ref, valor, estilo):
+    """XML de una celda con su valor (número, texto, booleano o vacía)"""
+
+    atributo_estilo = f' s="{estilo}"' if estilo is not None else ''
+    if valor is None or valor == '' or (isinstance(valor, float) and valor != valor):
+        return f'<c r="{ref}"{atributo_estilo}/>'
+    if isinstance(valor, bool):
+        return f'<c r="{ref}"{atributo_estilo} t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, str):
+        numero = repr(float(valor)) if isinstance(valor, float) else str(int(valor))
+        return f'<c r="{ref}"{atributo_estilo}><v>{numero}</v></c>'
+    texto = escape(str(valor))
+    espacio = ' xml:space="preserve"' if texto != texto.strip() else ''
+    return f'<c r="{ref}"{atributo_estilo} t="inlineStr"><is><t{espacio}>{texto}</t></is></c>'
+
+
+def _estilos_columnas(xml):
+    """Rangos (min, max, estilo) de las columnas con formato (<cols>)
+
+    Una celda que no existe se ve con el formato de su columna; al insertarla
+    se le asigna ese formato, como hace Excel al escribir en ella.
+    """
+
+    rangos = []
+    for columna in _PATRON_COLUMNA.finditer(xml, 0, max(xml.find('<sheetData'), 0)):
+        atributos = dict(re.findall(r'(\w+)="([^"]*)"', columna.group(0)))
+        if 'style' in atributos and 'min' in atributos and 'max' in atributos:
+            rangos.append((int(atributos['min']), int(atributos['max']), int(atributos['style'])))
+    return rangos
+
+
+def _estilo_columna(rangos, columna):
+    for minimo, maximo, estilo in rangos:
+        if minimo <= columna <= maximo:
+            return estilo
+    return None
+
+
+def _parchear_fila(numero_fila, contenido, cambios, estilos, columnas=()):
+    """Reemplaza o inserta celdas dentro del contenido de una fila
+
+    columnas : rangos de _estilos_columnas (formato de las celdas insertadas)
+    """
+
+    existentes = []
+    for celda in _PATRON_CELDA.finditer(contenido):
+        ref = _PATRON_REF.search(' ' + celda.group(1))
+        if ref is None:
+            raise ErrorEscrituraXlsx(f"Celda sin referencia en la fila {numero_fila}")
+        existentes.append((numero_columna(ref.group(1)), celda))
+
+    partes, pos = [], 0
+    pendientes = sorted(cambios.items())
+    i = 0
+    for columna, celda in existentes:
+        while i < len(pendientes) and pendientes[i][0] < columna:
+            partes.append(contenido[pos:celda.start()])
+            pos = celda.start()
+            partes.append(_nueva_celda(numero_fila, pendientes[i],
+                                       _estilo_columna(columnas, pendientes[i][0]), estilos))
+            i += 1
+        if i < len(pendientes) and pendientes[i][0] == columna:
+            if '<f>' in (celda.group(3) or '') or '<f ' in (celda.group(3) or ''):
+                raise ErrorEscrituraXlsx(f"La celda {letra_columna(columna)}{numero_fila} tiene una fórmula")
+            partes.append(contenido[pos:celda.start()])
+            estilo_actual = _PATRON_ESTILO.search(celda.group(1))
+            partes.append(_nueva_celda(numero_fila, pendientes[i],
+                                       int(estilo_actual.group(1)) if estilo_actual else None,
+                                       estilos))
+            pos = celda.end()
+            i += 1
+    partes.append(contenido[pos:])
+    for pendiente in pendientes[i:]:
+        partes.append(_nueva_celda(numero_fila, pendiente,
+                                   _estilo_columna(columnas, pendiente[0]), estilos))
+    return ''.join(partes)
+
+
+def _nueva_celda(numero_fila, cambio, estilo_actual, estilos):
+    columna, (valor, estilo) = cambio
+    if estilo is None:
+        indice = estilo_actual
+    elif estilos is None:
+        raise ErrorEscrituraXlsx("El archivo no tiene styles.xml")
+    else:
+        indice = estilos.indice(estilo_actual or 0, estilo)
+    return _xml_celda(f'{letra_columna(columna)}{numero_fila}', valor, indice)
+
+
+class _LectorXml:
+    """Texto de una entrada del ZIP leído por bloques
+
+    Las posiciones son relativas a `texto`, que solo guarda lo que falta
+    entregar (desde `pos`) y el último bloque leído.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.decodificador = codecs.getincrementaldecoder('utf-8')()
+        self.texto = ''
+        self.pos = 0
+        self.fin = False
+
+    def _leer(self):
+        bloque = self.archivo.read(_BLOQUE_LECTURA)
+        self.fin = not bloque
+        self.texto += self.decodificador.decode(bloque, final=self.fin)
+
+    def buscar(self, subcadena, desde=None):
+        """Posición de subcadena a partir de desde (leyendo lo necesario) o -1"""
+
+        desde = self.pos if desde is None else desde
+        while True:
+            encontrada = self.texto.find(subcadena, desde)
+            if encontrada >= 0 or self.fin:
+                return encontrada
+            desde = max(desde, len(self.texto) - len(subcadena) + 1)
+            self._leer()
+
+    def entregar(self, hasta):
+        """Texto desde la posición actual hasta `hasta`"""
+
+        parte = self.texto[self.pos:hasta]
+        self.pos = hasta
+        return parte
+
+    def compactar(self):
+        """Descarta el texto ya entregado (las posiciones obtenidas antes dejan de valer)"""
+
+        if self.pos >= _BLOQUE_LECTURA:
+            self.texto = self.texto[self.pos:]
+            self.pos = 0
+
+    def resto(self):
+        """El texto que falta, por bloques"""
+
+        yield self.entregar(len(self.texto))
+        while not self.fin:
+            self._leer()
+            yield self.entregar(len(self.texto))
+
+
+def _parchear_hoja(archivo, filas, estilos, ultima_fila, ultima_columna):
+    """Aplica los cambios a la hoja leyéndola y entregándola por partes (texto)
+
+    filas : iterable de (fila, {columna: (valor, estilo)}) en orden creciente de fila
+    ultima_fila, ultima_columna : las mayores escritas (para ajustar <dimension>)
+    """
+
+    lector = _LectorXml(archivo)
+    inicio_datos = lector.buscar('<sheetData')
+    fin_etiqueta = lector.buscar('>', inicio_datos) if inicio_datos >= 0 else -1
+    if fin_etiqueta < 0:
+        raise ErrorEscrituraXlsx("La hoja no tiene <sheetData>")
+
+    vacia = lector.texto[fin_etiqueta - 1] == '/'
+
+    # Antes de las filas: ajustar la dimensión declarada si las celdas nuevas
+    # quedan por fuera, y leer el formato de las columnas
+    encabezado = lector.entregar(inicio_datos)
+    columnas = _estilos_columnas(encabezado + '<sheetData')
+    dimension = re.search(r'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"\s*/>', encabezado)
+    if dimension and dimension.group(3):
+        max_fila = max(int(dimension.group(4)), ultima_fila)
+        max_col = max(numero_columna(dimension.group(3)), ultima_columna)
+        nueva = f'<dimension ref="{dimension.group(1)}{dimension.group(2)}:{letra_columna(max_col)}{max_fila}"/>'
+        encabezado = encabezado[:dimension.start()] + nueva + encabezado[dimension.end():]
+    yield encabezado
+
+    lector.entregar(fin_etiqueta + 1)
+    yield '<sheetData>'
+
+    pendientes = iter(filas)
+    anterior = 0
+
+    def fila_nueva(cambio):
+        numero, celdas = cambio
+        return f'<row r="{numero}">' + _parchear_fila(numero, '', celdas, estilos, columnas) + '</row>'
+
+    def avanzar():
+        nonlocal anterior
+        cambio = next(pendientes, None)
+        if cambio is not None:
+            if cambio[0] <= anterior:
+                raise ValueError("Las filas a escribir deben estar en orden creciente")
+            anterior = cambio[0]
+        return cambio
+
+    siguiente = avanzar()
+    while siguiente is not None and not vacia:
+        lector.compactar()
+        inicio = lector.buscar('<')
+        fin_tag = lector.buscar('>', inicio) if inicio >= 0 else -1
+        if fin_tag < 0:
+            raise ErrorEscrituraXlsx("XML de la hoja incompleto")
+        if lector.texto.startswith('</sheetData>', inicio):
+            break
+        fila_actual = _PATRON_FILA.match(lector.texto, inicio)
+        if fila_actual is None or fila_actual.end() != fin_tag + 1:
+            raise ErrorEscrituraXlsx("Fila sin número (r) en la hoja")
+        numero = int(fila_actual.group(1))
+
+        if siguiente[0] < numero:
+            # La fila no existe: insertarla antes de esta
+            yield lector.entregar(inicio)
+            yield fila_nueva(siguiente)
+            siguiente = avanzar()
+            continue
+
+        if fila_actual.group(2):  # <row .../> sin celdas
+            contenido, fin = '', fila_actual.end()
+        else:
+            fin_contenido = lector.buscar('</row>', fila_actual.end())
+            if fin_contenido < 0:
+                raise ErrorEscrituraXlsx("XML de la hoja incompleto")
+            contenido = lector.texto[fila_actual.end():fin_contenido]
+            fin = fin_contenido + len('</row>')
+
+        if siguiente[0] == numero:
+            apertura = re.sub(r'\sspans="[^"]*"', '', fila_actual.group(0))
+            if fila_actual.group(2):
+                apertura = apertura[:-2].rstrip() + '>'
+            yield lector.entregar(inicio)
+            yield apertura + _parchear_fila(numero, contenido, siguiente[1], estilos, columnas) + '</row>'
+            lector.entregar(fin)
+            siguiente = avanzar()
+        else:
+            yield lector.entregar(fin)
+
+    # Filas después de la última fila existente (o en una hoja sin filas)
+    if siguiente is not None:
+        fin_datos = lector.pos if vacia else lector.buscar('</sheetData>')
+        if fin_datos < 0:
+            raise ErrorEscrituraXlsx("La hoja no tiene </sheetData>")
+        yield lector.entregar(fin_datos)
+        while siguiente is not None:
+            yield fila_nueva(siguiente)
+            siguiente = avanzar()
+    if vacia:
+        yield '</sheetData>'
+
+    yield from lector.resto()
+
+
+# ==================== ZIP ====================
+
+def _fecha_dos(fecha):
+    anio, mes, dia, hora, minuto, segundo = fecha
+    return (hora << 11) | (minuto << 5) | (segundo // 2), ((anio - 1980) << 9) | (mes << 5) | dia
+
+
+def _copiar_bytes(origen, destino, cantidad):
+    while cantidad > 0:
+        bloque = origen.read(min(cantidad, 1 << 20))
+        if not bloque:
+            raise ErrorEscrituraXlsx("Archivo ZIP truncado")
+        destino.write(bloque)
+        cantidad -= len(bloque)
+
+
+def _copiar_entrada(origen, info, destino):
+    """Copia una entrada del ZIP tal cual (cabecera + datos comprimidos)"""
+
+    origen.seek(info.header_offset)
+    cabecera = origen.read(_CABECERA_LOCAL.size)
+    campos = _CABECERA_LOCAL.unpack(cabecera)
+    largo_nombre, largo_extra = campos[10], campos[11]
+    nombre = origen.read(largo_nombre)
+    destino.write(cabecera)
+    destino.write(nombre)
+    _copiar_bytes(origen, destino, largo_extra + info.compress_size)
+
+    # Descriptor de datos opcional (bit 3)
+    if info.flag_bits & 0x08:
+        firma = origen.read(4)
+        resto = 12 if firma == b'PK\x07\x08' else 8
+        destino.write(firma)
+        destino.write(origen.read(resto))
+
+    return nombre
+
+
+def _escribir_entrada(info, partes, destino):
+    """Escribe una entrada nueva comprimida con DEFLATE
+
+    partes : iterable de texto; se comprime a medida que llega. El CRC y los
+             tamaños se completan en la cabecera local al terminar.
+    """
+
+    flags = info.flag_bits & 0x800
+    nombre = info.filename.encode('utf-8' if flags else 'cp437')
+    hora, fecha = _fecha_dos(info.date_time)
+    inicio = destino.tell()
+
+    destino.write(_CABECERA_LOCAL.pack(b'PK\x03\x04', 20, 0, flags, zipfile.ZIP_DEFLATED,
+                                       hora, fecha, 0, 0, 0, len(nombre), 0))
+    destino.write(nombre)
+
+    compresor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    crc = tamano = comprimido = 0
+    acumuladas, largo = [], 0
+
+    def volcar():
+        nonlocal crc, tamano, comprimido
+        datos = ''.join(acumuladas).encode('utf-8')
+        crc = zlib.crc32(datos, crc)
+        tamano += len(datos)
+        bloque = compresor.compress(datos)
+        comprimido += len(bloque)
+        destino.write(bloque)
+        acumuladas.clear()
+
+    for parte in partes:
+        acumuladas.append(parte)
+        largo += len(parte)
+        if largo >= _BLOQUE_ESCRITURA:
+            volcar()
+            largo = 0
+    volcar()
+    bloque = compresor.flush()
+    comprimido += len(bloque)
+    destino.write(bloque)
+
+    if tamano >= _LIMITE_ZIP32 or comprimido >= _LIMITE_ZIP32:
+        raise ErrorEscrituraXlsx("Archivo ZIP64 no soportado")
+
+    # CRC, tamaño comprimido y tamaño (a partir del byte 14 de la cabecera local)
+    final = destino.tell()
+    destino.seek(inicio + 14)
+    destino.write(struct.pack('<3L', crc & 0xFFFFFFFF, comprimido, tamano))
+    destino.seek(final)
+    return nombre, flags, zipfile.ZIP_DEFLATED, crc & 0xFFFFFFFF, comprimido, tamano, b''
+
+
+def _reescribir_zip(filename, reemplazos, al_final=()):
+    """Crea el ZIP con las partes reemplazadas y el resto copiado byte a byte
+
+    reemplazos : {ruta: función(zf) -> iterable de texto, o None para copiar la parte sin cambios}
+    al_final : rutas que se escriben después de las demás (su contenido depende
+               de otra parte, por ejemplo styles.xml de la hoja). El directorio
+               central conserva el orden original.
+    """
+
+    carpeta = os.path.dirname(os.path.abspath(filename))
+    descriptor, temporal = tempfile.mkstemp(suffix='.xlsx', dir=carpeta)
+    try:
+        with zipfile.ZipFile(filename) as zf, open(filename, 'rb') as origen, \
+                os.fdopen(descriptor, 'wb') as destino:
+            entradas = zf.infolist()
+            if len(entradas) >= 0xFFFF or any(
+                    i.file_size >= _LIMITE_ZIP32 or i.compress_size >= _LIMITE_ZIP32 or
+                    i.header_offset >= _LIMITE_ZIP32 for i in entradas):
+                raise ErrorEscrituraXlsx("Archivo ZIP64 no soportado")
+
+            def escribir(info):
+                desplazamiento = destino.tell()
+                partes = reemplazos[info.filename](zf) if info.filename in reemplazos else None
+                if partes is not None:
+                    nombre, flags, metodo, crc, comprimido, tamano, extra = \
+                        _escribir_entrada(info, partes, destino)
+                else:
+                    nombre = _copiar_entrada(origen, info, destino)
+                    flags, metodo, crc = info.flag_bits, info.compress_type, info.CRC
+                    comprimido, tamano, extra = info.compress_size, info.file_size, info.extra
+                if desplazamiento >= _LIMITE_ZIP32:
+                    raise ErrorEscrituraXlsx("Archivo ZIP64 no soportado")
+
+                hora, fecha = _fecha_dos(info.date_time)
+                return (_ENTRADA_CENTRAL.pack(b'PK\x01\x02', info.create_version, info.create_system,
+                                              info.extract_version, info.reserved, flags, metodo,
+                                              hora, fecha, crc, comprimido, tamano, len(nombre),
+                                              len(extra), len(info.comment), 0, info.internal_attr,
+                                              info.external_attr, desplazamiento)
+                        + nombre + extra + info.comment)
+
+            directorio = [None] * len(entradas)
+            for indice, info in enumerate(entradas):
+                if info.filename not in al_final:
+                    directorio[indice] = escribir(info)
+            for indice, info in enumerate(entradas):
+                if info.filename in al_final:
+                    directorio[indice] = escribir(info)
+
+            inicio_directorio = destino.tell()
+            for entrada in directorio:
+                destino.write(entrada)
+            destino.write(_FIN_DIRECTORIO.pack(b'PK\x05\x06', 0, 0, len(directorio), len(directorio),
+                                               destino.tell() - inicio_directorio,
+                                               inicio_directorio, len(zf.comment)))
+            destino.write(zf.comment)
+
+        shutil.copymode(filename, temporal)
+        os.replace(temporal, filename)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_filas_xlsx(filename, nombre_hoja, filas, ultima_fila, ultima_columna):
+    """Escribe celdas fila por fila sin reescribir el resto del libro
+
+    filas : iterable de (fila, {columna: (valor, EstiloCelda o None)}) en orden
+            creciente de fila; se consume mientras se reescribe la hoja, así que
+            puede ser un generador (no hace falta tener todas las celdas en memoria)
+    ultima_fila, ultima_columna : la mayor fila y la mayor columna que se escriben
+    Filas y columnas empiezan en 1; estilo None conserva el formato actual.
+    """
+
+    with zipfile.ZipFile(filename) as zf:
+        ruta = _ruta_hoja(zf, nombre_hoja)
+        nombres = zf.namelist()
+        estilos = _Estilos(zf.read('xl/styles.xml').decode('utf-8')) \
+            if 'xl/styles.xml' in nombres else None
+
+    def hoja(zf):
+        with zf.open(ruta) as archivo:
+            yield from _parchear_hoja(archivo, filas, estilos, ultima_fila, ultima_columna)
+
+    def xml_estilos(zf):
+        xml = estilos.xml_modificado()
+        return None if xml is None else [xml]
+
+    reemplazos = {ruta: hoja}
+    al_final = ()
+    if estilos is not None:
+        reemplazos['xl/styles.xml'] = xml_estilos
+        # styles.xml depende de la hoja: si está antes en el ZIP, se escribe al final
+        if nombres.index('xl/styles.xml') < nombres.index(ruta):
+            al_final = ('xl/styles.xml',)
+
+    _reescribir_zip(filename, reemplazos, al_final)
+
+
+def escribir_celdas_xlsx(filename, nombre_hoja, celdas):
+    """Escribe celdas en una hoja sin reescribir el resto del libro
+
+    celdas : dict {(fila, columna): (valor, EstiloCelda o None)}
+             filas y columnas empiezan en 1; estilo None conserva el formato actual
+    """
+
+    if not celdas:
+        return
+
+    por_fila = {}
+    for (fila, columna), cambio in celdas.items():
+        por_fila.setdefault(fila, {})[columna] = cambio
+
+    escribir_filas_xlsx(filename, nombre_hoja, sorted(por_fila.items()),
+                        max(por_fila), max(columna for _, columna in celdas))
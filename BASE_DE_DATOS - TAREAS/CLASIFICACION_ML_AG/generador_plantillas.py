@@ -0,0 +1,533 @@
+"""
+Generador de Plantillas Sintéticas de Gran Volumen
+==================================================
+crear_excel_ejemplo() del notebook escribe 10 filas con np.random.uniform:
+sirve para ver que el sistema funciona, no para saber cómo se comporta con una
+exportación de producción. Este módulo genera plantillas de millones de filas
+con datos parecidos a los reales, en segundos:
+
+    1. Ajustar: de la base del sistema (Base_Prediccion_Biomasa_Outliers1.xlsx /
+       Paneles_solares_con_outliers.xlsx) se guarda, por cada variable del modelo,
+         numéricas    la distribución (cuantiles) y si son enteras
+         categóricas  la frecuencia de cada valor
+         todas        la proporción de celdas vacías
+       y la correlación entre las numéricas (cópula gaussiana sobre los rangos)
+    2. Generar: por bloques de filas, todo con operaciones de numpy (normales
+       correlacionadas -> cuantiles por interpolación; categorías con
+       rng.choice y las frecuencias)
+    3. Escribir: el XML de la hoja se escribe en streaming dentro del ZIP del
+       .xlsx, bloque por bloque y sin openpyxl: la memoria no depende del
+       número de filas
+
+El archivo tiene la estructura de la plantilla del sistema (títulos en las
+filas 1-3, encabezados en la fila 5 con ID, las variables y la columna de
+resultados vacía, datos desde la fila 6), así 3_predecir_en_excel*.py lo
+procesa igual que la plantilla real. Con simple=True tiene la de
+crear_excel_ejemplo (hoja 'Datos Nuevos', encabezados en la fila 1).
+
+Las variables se toman del model_info de la carpeta y la base es la primera
+de BASES (en la carpeta o en ../Bases_de_Datos) que tiene todas.
+
+Uso:
+    python generador_plantillas.py --filas 1000000
+    python generador_plantillas.py --filas 200000 --semilla 7 --salida Carga_200k.xlsx
+    python generador_plantillas.py --filas 10 --simple          (como crear_excel_ejemplo)
+
+    from generador_plantillas import generar_plantilla
+    generar_plantilla('Plantilla_Carga.xlsx', filas=1000000)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from datetime import datetime
+from statistics import NormalDist
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from escritura_xlsx import letra_columna
+
+# Sistemas: archivo de información del modelo, clave con sus variables y hoja de datos
+SISTEMAS = [
+    {'tipo': 'regresion', 'info': 'model_info.json', 'variables': 'feature_names',
+     'hoja': 'Datos para Predicción'},
+    {'tipo': 'clasificacion', 'info': 'model_info_clasificacion.json',
+     'variables': 'variables_predictoras', 'hoja': 'Datos para Clasificación'},
+]
+
+# Bases de las que se ajustan los datos y columna de resultados de la plantilla
+# de cada tipo de sistema que usa esa base
+BASES = [
+    {'archivo': 'Base_Prediccion_Biomasa_Outliers1.xlsx',
+     'resultado': {'regresion': 'Biomasa_Predicha', 'clasificacion': 'Categoria_Predicha'}},
+    {'archivo': 'Paneles_solares_con_outliers.xlsx',
+     'resultado': {'regresion': 'Consumo_kWh_Mensual_Predicho', 'clasificacion': 'Categoria_Predicha'}},
+]
+
+CARPETA_BASES = os.path.join('..', 'Bases_de_Datos')
+
+SEMILLA = 42
+
+# Cuantiles que se guardan de cada variable numérica
+N_CUANTILES = 1001
+
+# Filas que se generan y escriben de una vez (la memoria depende de esto, no del total)
+FILAS_POR_BLOQUE = 50000
+
+# Compresión del ZIP: 1 es varias veces más rápida que la de openpyxl (6) y el
+# archivo queda apenas más grande
+NIVEL_COMPRESION = 1
+
+# Encabezados en la fila 5 y datos desde la 6 (como 2_crear_plantilla_excel*.py)
+FILA_ENCABEZADOS = 5
+HOJA_SIMPLE = 'Datos Nuevos'
+
+
+# ==================== AJUSTE ====================
+
+def _decimales(valores, maximo=6):
+    """Menor número de decimales con el que se escriben todos los valores"""
+    for decimales in range(maximo + 1):
+        if np.allclose(np.round(valores, decimales), valores, rtol=0, atol=1e-9):
+            return decimales
+    return maximo
+
+
+def ajustar_base(filename, columnas, hoja=None):
+    """Distribución de cada columna y correlación entre las numéricas
+
+    Retorna un dict que usa generar_bloques: {'base', 'filas', 'columnas':
+    {nombre: {...}}, 'numericas', 'cholesky'}
+    """
+
+    from carga_bases import cargar_base
+
+    base = cargar_base(filename, columnas=list(columnas), hoja=hoja, detalle=False)
+    faltantes = [col for col in columnas if col not in base.columns]
+    if faltantes:
+        raise ValueError(f"{os.path.basename(filename)} no tiene: {', '.join(faltantes)}")
+
+    probabilidades = np.linspace(0, 1, N_CUANTILES)
+    ajuste = {'base': os.path.basename(filename), 'filas': len(base), 'columnas': {}}
+
+    for col in columnas:
+        serie = base[col]
+        vacios = float(serie.isna().mean())
+        presentes = serie.dropna()
+        if len(presentes) == 0:
+            raise ValueError(f"La columna '{col}' de {ajuste['base']} está vacía")
+
+        if serie.dtype.kind in 'iuf':
+            valores = presentes.to_numpy(dtype=np.float64)
+            decimales = _decimales(valores)
+            ajuste['columnas'][col] = {
+                'tipo': 'numerica',
+                'cuantiles': np.quantile(valores, probabilidades),
+                'decimales': decimales,
+                'vacios': vacios,
+            }
+        else:
+            frecuencias = presentes.astype(str).value_counts(normalize=True).sort_index()
+            ajuste['columnas'][col] = {
+                'tipo': 'categorica',
+                'valores': frecuencias.index.tolist(),
+                'frecuencias': frecuencias.to_numpy(dtype=np.float64),
+                'vacios': vacios,
+            }
+
+    # Cópula gaussiana: correlación de los puntajes normales de los rangos
+    # (filas con todas las numéricas presentes)
+    numericas = [col for col, c in ajuste['columnas'].items() if c['tipo'] == 'numerica']
+    ajuste['numericas'] = numericas
+    ajuste['cholesky'] = None
+    completas = base[numericas].dropna().to_numpy(dtype=np.float64)
+    if len(numericas) > 1 and len(completas) > len(numericas):
+        rangos = completas.argsort(axis=0).argsort(axis=0)
+        normal = NormalDist()
+        puntajes = np.vectorize(normal.inv_cdf)((rangos + 0.5) / len(completas))
+        correlacion = np.nan_to_num(np.corrcoef(puntajes, rowvar=False))
+        np.fill_diagonal(correlacion, 1.0)
+        try:
+            ajuste['cholesky'] = np.linalg.cholesky(correlacion)
+        except np.linalg.LinAlgError:
+            # No es definida positiva (columnas casi iguales): se recortan los autovalores
+            autovalores, autovectores = np.linalg.eigh(correlacion)
+            correlacion = autovectores @ np.diag(np.clip(autovalores, 1e-6, None)) @ autovectores.T
+            d = np.sqrt(np.diag(correlacion))
+            ajuste['cholesky'] = np.linalg.cholesky(correlacion / np.outer(d, d))
+
+    return ajuste
+
+
+# ==================== GENERACIÓN ====================
+
+def generar_bloques(ajuste, filas, semilla=SEMILLA, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera los datos por bloques
+
+    Cada bloque es {columna: array}: las numéricas float64 con NaN en los
+    vacíos y las categóricas el índice del valor en ajuste['columnas'][col]['valores']
+    (-1 en los vacíos). Con la misma semilla los datos son siempre los mismos.
+    """
+
+    azar = np.random.default_rng(semilla)
+    normal = NormalDist()
+    # Puntaje normal de cada cuantil (los extremos se acotan para que sean finitos)
+    probabilidades = np.clip(np.linspace(0, 1, N_CUANTILES), 1e-6, 1 - 1e-6)
+    puntajes_cuantiles = np.array([normal.inv_cdf(p) for p in probabilidades])
+    numericas = ajuste['numericas']
+
+    for inicio in range(0, filas, filas_por_bloque):
+        n = min(filas_por_bloque, filas - inicio)
+        bloque = {}
+
+        if numericas:
+            z = azar.standard_normal((n, len(numericas)))
+            if ajuste['cholesky'] is not None:
+                z = z @ ajuste['cholesky'].T
+            for j, col in enumerate(numericas):
+                config = ajuste['columnas'][col]
+                valores = np.round(np.interp(z[:, j], puntajes_cuantiles, config['cuantiles']),
+                                   config['decimales'])
+                if config['vacios']:
+                    valores[azar.random(n) < config['vacios']] = np.nan
+                bloque[col] = valores
+
+        for col, config in ajuste['columnas'].items():
+            if config['tipo'] != 'categorica':
+                continue
+            codigos = azar.choice(len(config['valores']), size=n, p=config['frecuencias'])
+            if config['vacios']:
+                codigos[azar.random(n) < config['vacios']] = -1
+            bloque[col] = codigos
+
+        yield {col: bloque[col] for col in ajuste['columnas']}
+
+
+# ==================== ESCRITURA XLSX EN STREAMING ====================
+
+_TIPOS_CONTENIDO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+
+_RELACIONES_PAQUETE = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_RELACIONES_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '<Relationship Id="rId3" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+    'Target="sharedStrings.xml"/>'
+    '</Relationships>'
+)
+
+# Formatos de celda: 0 normal, 1 negrita (títulos y encabezados)
+_ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _libro(nombre_hoja):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(nombre_hoja, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _textos_compartidos(textos):
+    elementos = ''.join(f'<si><t xml:space="preserve">{escape(t)}</t></si>' for t in textos)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'count="{len(textos)}" uniqueCount="{len(textos)}">{elementos}</sst>'
+    )
+
+
+def _fila_textos(numero, textos, indices, estilo=1):
+    """XML de una fila de títulos o encabezados (textos compartidos en negrita)"""
+    celdas = ''.join(f'<c r="{letra_columna(j)}{numero}" s="{estilo}" t="s"><v>{indices[t]}</v></c>'
+                     for j, t in enumerate(textos, 1) if t)
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+def _xml_bloque(bloque, ajuste, letras, primera_fila, primer_id, indices, columna_id):
+    """XML de las filas de un bloque, armado columna por columna con numpy"""
+
+    n = len(next(iter(bloque.values())))
+    numeros = np.arange(primera_fila, primera_fila + n).astype(str)
+    celdas = []
+
+    if columna_id:
+        ids = np.arange(primer_id, primer_id + n).astype(str)
+        celdas.append(np.char.add(np.char.add(np.char.add('<c r="A', numeros), '"><v>'),
+                                  np.char.add(ids, '</v></c>')))
+
+    for col, letra in zip(bloque, letras):
+        config = ajuste['columnas'][col]
+        valores = bloque[col]
+        if config['tipo'] == 'numerica':
+            vacios = np.isnan(valores)
+            if config['decimales'] == 0:
+                texto = np.where(vacios, 0, valores).astype(np.int64).astype(str)
+            else:
+                texto = np.where(vacios, 0, valores).astype(str)
+            apertura = '"><v>'
+        else:
+            vacios = valores < 0
+            codigos = np.array([str(indices[v]) for v in config['valores']])
+            texto = codigos[np.maximum(valores, 0)]
+            apertura = '" t="s"><v>'
+        celda = np.char.add(np.char.add(np.char.add(f'<c r="{letra}', numeros), apertura),
+                            np.char.add(texto, '</v></c>'))
+        celdas.append(np.where(vacios, '', celda))
+
+    inicio_fila = np.char.add(np.char.add('<row r="', numeros), '">')
+    return ''.join(f'{a}{"".join(c)}</row>' for a, *c in zip(inicio_fila.tolist(),
+                                                              *(c.tolist() for c in celdas)))
+
+
+def escribir_plantilla(destino, ajuste, filas, nombre_hoja, titulos=(), columna_resultado=None,
+                       fila_encabezados=FILA_ENCABEZADOS, columna_id=True, semilla=SEMILLA,
+                       al_terminar_bloque=None):
+    """Genera `filas` filas con el ajuste y las escribe en un .xlsx en streaming
+
+    titulos : textos de las filas 1, 2, ... (antes de los encabezados)
+    columna_resultado : encabezado de la última columna (queda vacía para las predicciones)
+    columna_id : agrega la columna 'ID' (1, 2, ...) antes de las variables
+    al_terminar_bloque(filas_escritas) se llama después de cada bloque.
+    Retorna el tamaño del archivo en bytes.
+    """
+
+    columnas = list(ajuste['columnas'])
+    encabezados = (['ID'] if columna_id else []) + columnas + ([columna_resultado] if columna_resultado else [])
+    primera = 2 if columna_id else 1
+    letras = [letra_columna(j) for j in range(primera, primera + len(columnas))]
+
+    # Textos compartidos: títulos, encabezados y valores de las categorías
+    textos = list(dict.fromkeys(
+        [t for t in titulos if t] + encabezados +
+        [v for c in ajuste['columnas'].values() if c['tipo'] == 'categorica' for v in c['valores']]))
+    indices = {t: i for i, t in enumerate(textos)}
+
+    ultima_fila = fila_encabezados + filas
+    dimension = f'A1:{letra_columna(len(encabezados))}{ultima_fila}'
+    anchos = ''.join(f'<col min="{j}" max="{j}" width="{max(12, len(str(t)) + 4)}" customWidth="1"/>'
+                     for j, t in enumerate(encabezados, 1))
+
+    carpeta = os.path.dirname(os.path.abspath(destino))
+    temporal = os.path.join(carpeta, f'.{os.path.basename(destino)}.tmp')
+    try:
+        with zipfile.ZipFile(temporal, 'w', zipfile.ZIP_DEFLATED, compresslevel=NIVEL_COMPRESION) as zf:
+            zf.writestr('[Content_Types].xml', _TIPOS_CONTENIDO)
+            zf.writestr('_rels/.rels', _RELACIONES_PAQUETE)
+            zf.writestr('xl/workbook.xml', _libro(nombre_hoja))
+            zf.writestr('xl/_rels/workbook.xml.rels', _RELACIONES_LIBRO)
+            zf.writestr('xl/styles.xml', _ESTILOS)
+            zf.writestr('xl/sharedStrings.xml', _textos_compartidos(textos))
+
+            with zf.open('xl/worksheets/sheet1.xml', 'w') as hoja:
+                cabecera = ''.join(_fila_textos(i, [t], indices) for i, t in enumerate(titulos, 1) if t)
+                cabecera += _fila_textos(fila_encabezados, encabezados, indices)
+                hoja.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    f'<dimension ref="{dimension}"/><cols>{anchos}</cols><sheetData>{cabecera}'
+                ).encode('utf-8'))
+
+                escritas = 0
+                for bloque in generar_bloques(ajuste, filas, semilla):
+                    hoja.write(_xml_bloque(bloque, ajuste, letras, fila_encabezados + 1 + escritas,
+                                           escritas + 1, indices, columna_id).encode('utf-8'))
+                    escritas += len(next(iter(bloque.values())))
+                    if al_terminar_bloque is not None:
+                        al_terminar_bloque(escritas)
+
+                hoja.write(b'</sheetData></worksheet>')
+
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    return os.path.getsize(destino)
+
+
+# ==================== PLANTILLA DEL SISTEMA ====================
+
+def sistema_de_la_carpeta(carpeta='.'):
+    """(config de SISTEMAS, variables del modelo) según el model_info de la carpeta; None si no hay"""
+
+    for sistema in SISTEMAS:
+        ruta = os.path.join(carpeta, sistema['info'])
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if sistema['variables'] in info:
+                return sistema, list(info[sistema['variables']])
+    return None, None
+
+
+def buscar_base(columnas, carpeta='.'):
+    """Primera base de BASES (en la carpeta o en ../Bases_de_Datos) que tiene todas las columnas"""
+
+    from openpyxl import load_workbook
+    from carga_bases import esquema_para
+
+    for base in BASES:
+        for directorio in (carpeta, os.path.join(carpeta, CARPETA_BASES)):
+            ruta = os.path.join(directorio, base['archivo'])
+            if not os.path.exists(ruta):
+                continue
+            # Solo los encabezados (no se carga la base completa)
+            wb = load_workbook(ruta, read_only=True)
+            try:
+                hoja = wb[esquema_para(ruta)[1]['hoja']]
+                encabezados = next(hoja.iter_rows(max_row=1, values_only=True), ())
+            finally:
+                wb.close()
+            if all(col in encabezados for col in columnas):
+                return base, ruta
+            break
+    return None, None
+
+
+def generar_plantilla(destino, filas, columnas=None, base=None, semilla=SEMILLA, simple=False,
+                      nombre_hoja=None, columna_resultado=None, detalle=True):
+    """Genera una plantilla sintética con la estructura del sistema de la carpeta actual
+
+    columnas : variables (por defecto las del model_info de la carpeta)
+    base : archivo del que se ajustan los datos (por defecto el de BASES que tiene las variables)
+    simple : hoja 'Datos Nuevos' con los encabezados en la fila 1 (como crear_excel_ejemplo)
+    Retorna la ruta del archivo generado.
+    """
+
+    sistema, variables = sistema_de_la_carpeta()
+    columnas = list(columnas or variables or [])
+    if not columnas:
+        raise ValueError("No se encontró model_info.json ni model_info_clasificacion.json: "
+                         "indica las columnas")
+
+    config_base = None
+    if base is None:
+        config_base, base = buscar_base(columnas)
+        if base is None:
+            raise ValueError(f"Ninguna base de {CARPETA_BASES} tiene las columnas: {', '.join(columnas)}")
+
+    inicio = time.perf_counter()
+    ajuste = ajustar_base(base, columnas)
+    if detalle:
+        print(f"✓ Distribución ajustada a {ajuste['base']} ({ajuste['filas']} filas) "
+              f"en {time.perf_counter() - inicio:.2f} s")
+        for col, config in ajuste['columnas'].items():
+            vacios = f", {config['vacios']:.1%} vacías" if config['vacios'] else ''
+            if config['tipo'] == 'numerica':
+                q = config['cuantiles']
+                print(f"  - {col}: {q[0]:g} .. {q[len(q) // 2]:g} .. {q[-1]:g}{vacios}")
+            else:
+                frecuencias = ', '.join(f"{v} {p:.0%}" for v, p in zip(config['valores'], config['frecuencias']))
+                print(f"  - {col}: {frecuencias}{vacios}")
+
+    if simple:
+        nombre_hoja = nombre_hoja or HOJA_SIMPLE
+        titulos, fila_encabezados, columna_id = (), 1, False
+    else:
+        tipo = sistema['tipo'] if sistema else 'regresion'
+        nombre_hoja = nombre_hoja or (sistema or SISTEMAS[0])['hoja']
+        if columna_resultado is None and config_base is not None:
+            columna_resultado = config_base['resultado'][tipo]
+        titulos = [f'PLANTILLA SINTÉTICA - {filas:,} filas con la distribución de {ajuste["base"]}',
+                   f'Semilla: {semilla}',
+                   f'Fecha: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}']
+        fila_encabezados, columna_id = FILA_ENCABEZADOS, True
+
+    def avance(escritas):
+        if detalle and (escritas % (FILAS_POR_BLOQUE * 10) == 0 or escritas == filas):
+            print(f"  ... {escritas:,} filas ({time.perf_counter() - inicio:.1f} s)")
+
+    inicio = time.perf_counter()
+    tamano = escribir_plantilla(destino, ajuste, filas, nombre_hoja, titulos, columna_resultado,
+                                fila_encabezados, columna_id, semilla,
+                                al_terminar_bloque=avance if filas > FILAS_POR_BLOQUE else None)
+    if detalle:
+        segundos = time.perf_counter() - inicio
+        print(f"✓ Plantilla creada: {destino}")
+        print(f"  {filas:,} filas en {segundos:.2f} s ({filas / max(segundos, 1e-9):,.0f} filas/s), "
+              f"{tamano / 1024 / 1024:.1f} MB")
+
+    return destino
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de plantillas sintéticas de gran volumen")
+    parser.add_argument('--filas', type=int, default=1000000, help="Filas de datos (por defecto 1000000)")
+    parser.add_argument('--salida', default=None,
+                        help="Archivo a crear (por defecto Plantilla_Sintetica_<filas>.xlsx)")
+    parser.add_argument('--semilla', type=int, default=SEMILLA, help=f"Semilla (por defecto {SEMILLA})")
+    parser.add_argument('--base', default=None, help="Base de la que se ajustan los datos")
+    parser.add_argument('--columnas', nargs='+', default=None,
+                        help="Variables (por defecto las del model_info de la carpeta)")
+    parser.add_argument('--simple', action='store_true',
+                        help="Hoja 'Datos Nuevos' con encabezados en la fila 1 (como crear_excel_ejemplo)")
+    args = parser.parse_args()
+
+    if args.filas < 1:
+        parser.error("--filas debe ser al menos 1")
+    salida = args.salida or f'Plantilla_Sintetica_{args.filas}.xlsx'
+
+    print("=" * 70)
+    print("GENERADOR DE PLANTILLAS SINTÉTICAS")
+    print("=" * 70)
+    try:
+        generar_plantilla(salida, args.filas, args.columnas, args.base, args.semilla, args.simple)
+    except (ValueError, OSError) as e:
+        print(f"\n❌ ERROR: {str(e)}")
+        sys.exit(1)
+
+    script = next((s for s in ('3_predecir_en_excel.py', '3_predecir_en_excel_clasificacion.py')
+                   if os.path.exists(s)), '3_predecir_en_excel.py')
+    print("\nPara predecir:")
+    print(f"  predecir_desde_excel('{salida}')  (en el notebook)" if args.simple else
+          f"  python {script} {salida}")
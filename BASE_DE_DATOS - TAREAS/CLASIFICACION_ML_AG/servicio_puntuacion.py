@@ -0,0 +1,536 @@
+"""
+Servicio HTTP de Puntuación con Micro-Lotes
+===========================================
+Cuando varias personas (y el formulario de la intranet) piden predicciones
+de una fila al mismo tiempo, cada solicitud se convertía en una ejecución
+aparte de 3_predecir_en_excel.py o de clasificar_valores_directos. Este
+servicio mantiene los modelos cargados y junta las solicitudes que llegan
+casi al mismo tiempo en un micro-lote:
+
+    solicitudes de 1 fila -> cola -> lote (hasta --max-lote filas o
+    --max-espera-ms desde la primera) -> UNA predicción vectorizada -> respuestas
+
+Atiende modelos de regresión (model_info.json + pipeline_prediccion.pkl) y
+de clasificación (model_info_clasificacion.json + pipeline_clasificacion.pkl),
+cada uno con su nombre. Si los archivos de un modelo cambian en disco
+(reentrenamiento) se vuelve a cargar antes del siguiente lote.
+
+INSTRUCCIONES:
+1. Ejecuta: python servicio_puntuacion.py
+   (atiende el modelo de esta carpeta; para atender otros agrega
+    --modelo nombre=carpeta, por ejemplo:
+    python servicio_puntuacion.py --modelo regresion=../REGRESION_ML_AG
+                                  --modelo clasificacion=../CLASIFICACION_ML_AG)
+2. Pide predicciones por HTTP (ver abajo) o mide la carga con generador_carga.py
+3. Para detenerlo: Ctrl+C
+
+API (JSON):
+  GET  /salud                 modelos cargados, sus columnas y estadísticas de los lotes
+  POST /predecir/<nombre>     {"registro": {"NDVI": 0.7, ...}}   -> {"ok": true, "prediccion": ...}
+                              {"registros": [{...}, {...}]}      -> {"ok": true, "predicciones": [...]}
+  (con un solo modelo también sirve POST /predecir)
+
+Una solicitud inválida se responde con 400 y {"ok": false, "error": ...}; un
+cuerpo de más de MAX_CUERPO bytes, con 413 (y se cierra la conexión).
+
+Los modelos de clasificación también responden "confianza" y "probabilidades"
+(una por clase). Los valores vacíos (null) se imputan igual que en el Excel:
+las numéricas con la mediana del entrenamiento y las categóricas con su valor
+más frecuente.
+
+Nota: los modelos guardados sin medianas imputarían con la mediana del
+micro-lote, así que el resultado dependería de las otras solicitudes; en ese
+caso un null en una variable numérica se responde con 400 (vuelve a guardar
+el modelo con el script 1 para poder enviarlos).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+HOST = '127.0.0.1'
+PUERTO = int(os.environ.get('SERVICIO_PUERTO', '8780'))
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# Espera máxima desde la primera solicitud de un lote y filas máximas por lote
+MAX_ESPERA_MS = 5.0
+MAX_LOTE = 256
+
+# Tamaño máximo del cuerpo de una solicitud
+MAX_CUERPO = 1 << 20
+
+# Archivos de cada tipo de modelo (los mismos que usan los scripts de cada carpeta)
+PAQUETES = {
+    'regresion': {
+        'info': 'model_info.json',
+        'pipeline': 'pipeline_prediccion.pkl',
+        'modelo': 'best_model.pkl',
+        'scaler': 'scaler.pkl',
+        'encoder': None,
+        'columnas': 'feature_names',
+        'nombre': 'model_name',
+    },
+    'clasificacion': {
+        'info': 'model_info_clasificacion.json',
+        'pipeline': 'pipeline_clasificacion.pkl',
+        'modelo': 'best_model_clasificacion.pkl',
+        'scaler': 'scaler_clasificacion.pkl',
+        'encoder': 'label_encoder_clasificacion.pkl',
+        'columnas': 'variables_predictoras',
+        'nombre': 'modelo',
+    },
+}
+
+
+class ErrorSolicitud(Exception):
+    """Solicitud inválida (se responde con el estado, 400 por defecto, y el mensaje)"""
+
+    def __init__(self, mensaje, estado=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def tipo_paquete(carpeta):
+    """'regresion' o 'clasificacion' según los archivos de la carpeta (o None)"""
+    for tipo, archivos in PAQUETES.items():
+        if os.path.exists(os.path.join(carpeta, archivos['info'])):
+            return tipo
+    return None
+
+
+def cargar_paquete(carpeta, tipo):
+    """(info, pipeline) de un modelo guardado por el script 1 de su carpeta
+
+    Usa el pipeline completo si existe; si no, lo arma con los archivos
+    separados (igual que 3_predecir_en_excel.py y predictor_simple_clasificacion.py).
+    """
+
+    from pipeline_prediccion import PipelinePrediccion, cargar_pipeline
+
+    archivos = PAQUETES[tipo]
+    with open(os.path.join(carpeta, archivos['info']), 'r', encoding='utf-8') as f:
+        info = json.load(f)
+
+    ruta_pipeline = os.path.join(carpeta, archivos['pipeline'])
+    if os.path.exists(ruta_pipeline):
+        return info, cargar_pipeline(ruta_pipeline)
+
+    with open(os.path.join(carpeta, archivos['modelo']), 'rb') as f:
+        modelo = pickle.load(f)
+    with open(os.path.join(carpeta, archivos['scaler']), 'rb') as f:
+        scaler = pickle.load(f)
+
+    le_target = None
+    if archivos['encoder']:
+        with open(os.path.join(carpeta, archivos['encoder']), 'rb') as f:
+            le_target = pickle.load(f)
+        usa_escalado = info.get('usa_escalado', True)
+    else:
+        # En el notebook de regresión los árboles se entrenan sin escalar
+        from arboles_numpy import es_modelo_arboles
+        usa_escalado = info.get('usa_escalado', not es_modelo_arboles(modelo))
+
+    pipeline = PipelinePrediccion.desde_artefactos(modelo, scaler, info, info[archivos['columnas']],
+                                                   le_target=le_target, usa_escalado=usa_escalado)
+    return info, pipeline
+
+
+def firma_paquete(carpeta, tipo):
+    """Tamaño y fecha de modificación de los archivos del modelo (detecta reentrenamientos)"""
+
+    from pipeline_prediccion import carpeta_arboles
+
+    archivos = PAQUETES[tipo]
+    rutas = [os.path.join(carpeta, archivos[clave])
+             for clave in ('info', 'pipeline', 'modelo', 'scaler', 'encoder') if archivos[clave]]
+    arboles = carpeta_arboles(os.path.join(carpeta, archivos['pipeline']))
+    if os.path.isdir(arboles):
+        rutas += sorted(os.path.join(arboles, nombre) for nombre in os.listdir(arboles))
+
+    firma = []
+    for ruta in rutas:
+        try:
+            estado = os.stat(ruta)
+            firma.append((ruta, estado.st_size, estado.st_mtime_ns))
+        except OSError:
+            firma.append((ruta, None, None))
+    return tuple(firma)
+
+
+def _a_json(valor):
+    """Escalar numpy -> tipo de Python serializable"""
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+class ModeloMicroLotes:
+    """Un modelo cargado y la cola de filas que esperan su micro-lote"""
+
+    def __init__(self, nombre, carpeta, max_espera_ms=MAX_ESPERA_MS, max_lote=MAX_LOTE):
+        self.nombre = nombre
+        self.carpeta = os.path.abspath(carpeta)
+        self.tipo = tipo_paquete(self.carpeta)
+        if self.tipo is None:
+            raise FileNotFoundError(
+                f"{self.carpeta} no tiene model_info.json ni model_info_clasificacion.json")
+
+        self.max_espera = max_espera_ms / 1000
+        self.max_lote = max_lote
+        self.cola = None
+        # Un hilo por modelo: la predicción no bloquea el bucle de asyncio
+        self.ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'lotes-{nombre}')
+
+        self.firma = None
+        self.info = None
+        self.pipeline = None
+        self.categoricas = set()
+        self.cargar()
+
+        self.lotes = 0
+        self.filas = 0
+        self.lote_maximo = 0
+        self.segundos_prediccion = 0.0
+
+    def cargar(self):
+        """Carga (o recarga si cambió en disco) el modelo"""
+
+        firma = firma_paquete(self.carpeta, self.tipo)
+        if self.pipeline is not None and firma == self.firma:
+            return
+
+        self.info, self.pipeline = cargar_paquete(self.carpeta, self.tipo)
+        self.firma = firma
+        self.categoricas = set(self.pipeline.columnas_categoricas())
+
+    def describir(self):
+        """Datos del modelo para GET /salud"""
+
+        from codificacion_categorica import MAPEOS_PREDETERMINADOS
+
+        categorias = self.pipeline.categorias or {}
+        valores = {col: list(categorias[col]) if col in categorias
+                   else list(MAPEOS_PREDETERMINADOS.get(col, ({}, 0))[0])
+                   for col in self.pipeline.columnas if col in self.categoricas}
+        return {
+            'tipo': self.tipo,
+            'carpeta': self.carpeta,
+            'modelo': self.info.get(PAQUETES[self.tipo]['nombre']),
+            'columnas': self.pipeline.columnas,
+            'categorias': valores,
+            'lotes': self.lotes,
+            'filas': self.filas,
+            'filas_por_lote': round(self.filas / self.lotes, 2) if self.lotes else 0,
+            'lote_maximo': self.lote_maximo,
+            'segundos_prediccion': round(self.segundos_prediccion, 3),
+        }
+
+    def validar(self, registro):
+        """Revisa una fila antes de ponerla en la cola (ErrorSolicitud si no sirve)"""
+
+        if not isinstance(registro, dict):
+            raise ErrorSolicitud("Cada registro debe ser un objeto {variable: valor}")
+
+        faltantes = [col for col in self.pipeline.columnas if col not in registro]
+        if faltantes:
+            raise ErrorSolicitud(f"Faltan valores para: {', '.join(faltantes)}")
+
+        for col in self.pipeline.columnas:
+            valor = registro[col]
+            if col in self.categoricas:
+                # Un objeto o una lista no se puede buscar en el vocabulario y
+                # haría fallar el micro-lote de todas las solicitudes
+                if valor is not None and not isinstance(valor, (str, int, float)):
+                    raise ErrorSolicitud(f"'{col}' debe ser texto o número (recibido: {valor!r})")
+                continue
+            if valor is None:
+                if self.pipeline.medianas is None:
+                    raise ErrorSolicitud(f"'{col}' no puede ir vacío: el modelo no guardó medianas "
+                                         f"para imputarlo (vuelve a guardarlo con el script 1)")
+                continue
+            # Un texto en una columna numérica se codificaría como categoría
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                raise ErrorSolicitud(f"'{col}' debe ser numérico (recibido: {valor!r})")
+
+    def predecir_lote(self, registros):
+        """Predicción vectorizada de un micro-lote (se ejecuta en el hilo del modelo)"""
+
+        import pandas as pd
+
+        self.cargar()
+
+        inicio = time.perf_counter()
+        df = pd.DataFrame.from_records(registros, columns=self.pipeline.columnas)
+        # Las numéricas como float: una columna con solo null no queda como texto
+        numericas = [col for col in self.pipeline.columnas if col not in self.categoricas]
+        df[numericas] = df[numericas].astype('float64')
+        X = self.pipeline.transformar(df)
+
+        if self.pipeline.es_clasificacion:
+            etiquetas, probas = self.pipeline.predecir_matriz_proba(X)
+            if probas is None:
+                resultados = [{'prediccion': _a_json(e)} for e in etiquetas]
+            else:
+                clases = [str(c) for c in self.pipeline.clases_modelo()]
+                resultados = [
+                    {'prediccion': _a_json(e),
+                     'confianza': round(float(p.max()), 6),
+                     'probabilidades': dict(zip(clases, (round(float(v), 6) for v in p)))}
+                    for e, p in zip(etiquetas, probas)
+                ]
+        else:
+            resultados = [{'prediccion': float(v)} for v in self.pipeline.predecir_matriz(X)]
+
+        self.segundos_prediccion += time.perf_counter() - inicio
+        return resultados
+
+    async def puntuar(self, registro):
+        """Pone una fila en la cola y espera su resultado"""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((registro, futuro))
+        return await futuro
+
+    async def atender_cola(self):
+        """Arma los micro-lotes: toma la primera fila y espera a las siguientes
+        hasta llenar el lote o cumplir la espera máxima
+        """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.cola.get()]
+            limite = loop.time() + self.max_espera
+
+            while len(lote) < self.max_lote:
+                if not self.cola.empty():
+                    lote.append(self.cola.get_nowait())
+                    continue
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            registros = [registro for registro, _ in lote]
+            try:
+                resultados = await loop.run_in_executor(self.ejecutor, self.predecir_lote, registros)
+            except Exception as e:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            self.lotes += 1
+            self.filas += len(lote)
+            self.lote_maximo = max(self.lote_maximo, len(lote))
+            for (_, futuro), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+
+
+class ServicioPuntuacion:
+    """Servidor HTTP/1.1 mínimo (conexiones persistentes) sobre asyncio"""
+
+    def __init__(self, modelos):
+        self.modelos = modelos
+
+    async def iniciar(self, host=HOST, puerto=PUERTO):
+        for modelo in self.modelos.values():
+            modelo.cola = asyncio.Queue()
+        tareas = [asyncio.create_task(modelo.atender_cola()) for modelo in self.modelos.values()]
+
+        servidor = await asyncio.start_server(self.atender_conexion, host, puerto)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+
+    async def atender_conexion(self, lector, escritor):
+        """Atiende solicitudes en la misma conexión hasta que el cliente la cierre"""
+        try:
+            while True:
+                try:
+                    solicitud = await self._leer_solicitud(lector)
+                except ErrorSolicitud as e:
+                    # El cuerpo no se leyó: se responde y se cierra la conexión
+                    self._escribir_respuesta(escritor, e.estado, {'ok': False, 'error': str(e)}, False)
+                    await escritor.drain()
+                    break
+                if solicitud is None:
+                    break
+                metodo, ruta, cuerpo, mantener = solicitud
+
+                try:
+                    estado, respuesta = await self.responder(metodo, ruta, cuerpo)
+                except ErrorSolicitud as e:
+                    estado, respuesta = e.estado, {'ok': False, 'error': str(e)}
+                except Exception as e:
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {'ok': False, 'error': str(e)}
+
+                self._escribir_respuesta(escritor, estado, respuesta, mantener)
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _leer_solicitud(self, lector):
+        """(método, ruta, cuerpo, mantener_conexión) o None si el cliente cerró
+
+        Lanza ErrorSolicitud si una línea supera el límite del lector (64 KB), o
+        si el Content-Length no es válido o supera MAX_CUERPO.
+        """
+
+        linea = await self._leer_linea(lector)
+        if not linea:
+            return None
+        try:
+            metodo, ruta, version = linea.decode('latin-1').split()
+        except ValueError:
+            return None
+
+        encabezados = {}
+        while True:
+            linea = await self._leer_linea(lector)
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            encabezados[nombre.strip().lower()] = valor.strip()
+
+        texto_largo = encabezados.get('content-length', '') or '0'
+        try:
+            largo = int(texto_largo)
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            raise ErrorSolicitud(f"Content-Length inválido: {texto_largo}")
+        if largo > MAX_CUERPO:
+            raise ErrorSolicitud(f"El cuerpo supera el máximo de {MAX_CUERPO} bytes",
+                                 HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        cuerpo = await lector.readexactly(largo) if largo else b''
+
+        conexion = encabezados.get('connection', '').lower()
+        mantener = conexion != 'close' if version == 'HTTP/1.1' else conexion == 'keep-alive'
+        return metodo.upper(), urlsplit(ruta).path, cuerpo, mantener
+
+    @staticmethod
+    async def _leer_linea(lector):
+        """Una línea de la solicitud (ErrorSolicitud si no cabe en el búfer del lector)"""
+        try:
+            return await lector.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise ErrorSolicitud("Línea de la solicitud o encabezado demasiado largo")
+
+    @staticmethod
+    def _escribir_respuesta(escritor, estado, respuesta, mantener):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        escritor.write(
+            f'HTTP/1.1 {estado.value} {estado.phrase}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(cuerpo)}\r\n'
+            f'Connection: {"keep-alive" if mantener else "close"}\r\n\r\n'.encode('latin-1')
+            + cuerpo
+        )
+
+    async def responder(self, metodo, ruta, cuerpo):
+        """(estado HTTP, respuesta JSON) de una solicitud"""
+
+        partes = [p for p in ruta.split('/') if p]
+
+        if metodo == 'GET' and partes == ['salud']:
+            return HTTPStatus.OK, {'ok': True, 'modelos': {nombre: modelo.describir()
+                                                           for nombre, modelo in self.modelos.items()}}
+
+        if metodo != 'POST' or not partes or partes[0] != 'predecir' or len(partes) > 2:
+            return HTTPStatus.NOT_FOUND, {'ok': False, 'error': f'Ruta no encontrada: {metodo} {ruta}'}
+
+        if len(partes) == 2:
+            modelo = self.modelos.get(partes[1])
+            if modelo is None:
+                return HTTPStatus.NOT_FOUND, {'ok': False, 'error': f'Modelo desconocido: {partes[1]}'}
+        elif len(self.modelos) == 1:
+            modelo = next(iter(self.modelos.values()))
+        else:
+            raise ErrorSolicitud(f"Indica el modelo: /predecir/<{'|'.join(self.modelos)}>")
+
+        try:
+            datos = json.loads(cuerpo.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ErrorSolicitud(f"JSON inválido: {str(e)}")
+        if not isinstance(datos, dict) or not ('registro' in datos or 'registros' in datos):
+            raise ErrorSolicitud("El cuerpo debe tener 'registro' o 'registros'")
+
+        if 'registro' in datos:
+            modelo.validar(datos['registro'])
+            resultado = await modelo.puntuar(datos['registro'])
+            return HTTPStatus.OK, {'ok': True, **resultado}
+
+        registros = datos['registros']
+        if not isinstance(registros, list):
+            raise ErrorSolicitud("'registros' debe ser una lista")
+        for registro in registros:
+            modelo.validar(registro)
+        resultados = await asyncio.gather(*(modelo.puntuar(r) for r in registros))
+        return HTTPStatus.OK, {'ok': True, 'predicciones': resultados}
+
+
+def _leer_modelo(texto):
+    """Convierte 'nombre=carpeta' en (nombre, carpeta)"""
+    nombre, separador, carpeta = texto.partition('=')
+    if not separador or not nombre or not carpeta:
+        raise argparse.ArgumentTypeError("Usa el formato nombre=carpeta")
+    return nombre, carpeta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP de puntuación con micro-lotes")
+    parser.add_argument('--modelo', type=_leer_modelo, action='append', default=None,
+                        metavar='NOMBRE=CARPETA',
+                        help="Modelo a atender (se puede repetir); por defecto el de esta carpeta")
+    parser.add_argument('--puerto', type=int, default=PUERTO, help=f"Puerto (por defecto {PUERTO})")
+    parser.add_argument('--max-espera-ms', type=float, default=MAX_ESPERA_MS,
+                        help=f"Espera máxima para completar un lote (por defecto {MAX_ESPERA_MS} ms)")
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE,
+                        help=f"Filas máximas por lote (por defecto {MAX_LOTE})")
+    args = parser.parse_args()
+
+    sys.path.insert(0, CARPETA)
+    modelos_pedidos = args.modelo or [(tipo_paquete(CARPETA) or 'modelo', CARPETA)]
+
+    print("=" * 70)
+    print("SERVICIO DE PUNTUACIÓN CON MICRO-LOTES")
+    print("=" * 70)
+
+    modelos = {}
+    for nombre, carpeta in modelos_pedidos:
+        try:
+            modelos[nombre] = ModeloMicroLotes(nombre, carpeta, args.max_espera_ms, args.max_lote)
+        except Exception as e:
+            print(f"\n❌ ERROR al cargar el modelo '{nombre}' ({carpeta}): {str(e)}")
+            print("   Ejecuta primero el script 1 de esa carpeta")
+            sys.exit(1)
+        modelo = modelos[nombre]
+        print(f"✓ {nombre}: {modelo.tipo}, {len(modelo.pipeline.columnas)} variables ({modelo.carpeta})")
+
+    print(f"\n✓ Escuchando en http://{HOST}:{args.puerto}")
+    print(f"  Lotes de hasta {args.max_lote} filas, espera máxima {args.max_espera_ms} ms")
+    print(f"  Modelos: {', '.join(f'POST /predecir/{nombre}' for nombre in modelos)}")
+    print("Presiona Ctrl+C para detener\n")
+
+    try:
+        asyncio.run(ServicioPuntuacion(modelos).iniciar(HOST, args.puerto))
+    except KeyboardInterrupt:
+        print("\n\n⚠ Servicio detenido por el usuario")
+    except OSError as e:
+        print(f"\n❌ ERROR: No se pudo abrir el puerto {args.puerto}: {str(e)}")
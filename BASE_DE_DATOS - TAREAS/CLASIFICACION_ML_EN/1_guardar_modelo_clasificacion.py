@@ -2,7 +2,8 @@
 Script 1: Guardar Modelo de Clasificación Entrenado
 ===================================================
 Este script se ejecuta DESPUÉS de entrenar todos los modelos en el notebook.
-Guarda el mejor modelo, el scaler y la información relevante.
+Guarda el mejor modelo, el scaler y la información relevante, y también
+el pipeline completo (preprocesamiento + modelo + clases) en un solo archivo.
 
 INSTRUCCIONES:
 1. Ejecuta primero el notebook: 0_clasificacion_biomasa_ml.ipynb
@@ -15,11 +16,16 @@ El script extraerá automáticamente:
 - El LabelEncoder
 - Las métricas de desempeño
 - Los nombres de las variables
+- El vocabulario de las variables categóricas (si existe df_model)
 """
 
 import pickle
 import json
 from datetime import datetime
+import numpy as np
+from arboles_numpy import es_modelo_arboles
+from codificacion_categorica import vocabularios_categoricos
+from pipeline_prediccion import PipelinePrediccion, guardar_pipeline
 import os
 import sys
 
@@ -70,6 +76,15 @@ def guardar_modelo_clasificacion():
         X_imputed = getattr(__main__, 'X_imputed')
         X_train = getattr(__main__, 'X_train')
 
+        # Datos antes de codificar las categóricas e imputer (opcionales)
+        df_model = getattr(__main__, 'df_model', None)
+        imputer = getattr(__main__, 'imputer', None)
+
+        # En el notebook los árboles se entrenan con X_train y el resto con X_train_scaled
+        usa_escalado = getattr(__main__, 'usa_escalado', None)
+        if usa_escalado is None:
+            usa_escalado = not es_modelo_arboles(best_model)
+
     except Exception as e:
         print(f"❌ ERROR: No se pueden obtener variables del notebook")
         print(f"   Detalles: {str(e)}")
@@ -98,9 +113,18 @@ def guardar_modelo_clasificacion():
         'n_classes': len(classes),
         'n_features': len(feature_names),
         'n_train_samples': X_train.shape[0],
-        'class_encoding': {str(i): clase for i, clase in enumerate(classes)}
+        'class_encoding': {str(i): clase for i, clase in enumerate(classes)},
+        'usa_escalado': bool(usa_escalado)
     }
 
+    # Vocabulario de las variables categóricas (mismo orden que LabelEncoder)
+    if df_model is not None and all(col in df_model.columns for col in feature_names):
+        categorias, por_defecto = vocabularios_categoricos(df_model[feature_names])
+        model_info['categorias'] = categorias
+        model_info['categorias_por_defecto'] = por_defecto
+    else:
+        print("⚠ No se encontró df_model: no se guarda el vocabulario de las variables categóricas\n")
+
     # Agregar hiperparámetros si están disponibles
     if hasattr(best_model, 'best_params_'):
         model_info['hiperparametros'] = str(best_model.best_params_)
@@ -131,6 +155,26 @@ def guardar_modelo_clasificacion():
         json.dump(model_info, f, indent=2, ensure_ascii=False)
     print("   ✓ Información guardada: model_info_clasificacion.json")
 
+    # Guardar pipeline completo (imputar -> codificar -> escalar -> clasificar -> decodificar)
+    if imputer is not None and hasattr(imputer, 'statistics_'):
+        medianas = imputer.statistics_
+    else:
+        medianas = np.nanmedian(np.asarray(X_train, dtype=np.float64), axis=0)
+
+    pipeline = PipelinePrediccion(
+        feature_names, best_model, scaler=scaler if usa_escalado else None,
+        categorias=model_info.get('categorias'),
+        categorias_por_defecto=model_info.get('categorias_por_defecto'),
+        medianas=medianas, clases=classes
+    )
+    # Escalado incorporado en los coeficientes/umbrales: el modelo recibe los datos sin escalar
+    if pipeline.plegar_escalado() and usa_escalado:
+        print("   ✓ Escalado incorporado en los parámetros del modelo")
+    carpeta_arboles = guardar_pipeline(pipeline, 'pipeline_clasificacion.pkl')
+    print("   ✓ Pipeline guardado: pipeline_clasificacion.pkl")
+    if carpeta_arboles:
+        print(f"   ✓ Árboles guardados como arreglos (mmap): {carpeta_arboles}/")
+
     # Crear backup
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_filename = f'modelo_clasificacion_backup_{timestamp}.pkl'
@@ -158,6 +202,11 @@ def guardar_modelo_clasificacion():
     print(f"\n📋 Variables predictoras:")
     for i, var in enumerate(feature_names, 1):
         print(f"   {i}. {var}")
+    for var, valores in model_info.get('categorias', {}).items():
+        if len(valores) <= 10:
+            print(f"   {var}: {', '.join(f'{v}={i}' for i, v in enumerate(valores))}")
+        else:
+            print(f"   {var}: {len(valores)} categorías")
 
     print("\n" + "=" * 70)
     print("PRÓXIMOS PASOS:")
@@ -8,17 +8,30 @@ INSTRUCCIONES:
 2. Se creará el archivo: Plantilla_Clasificacion_Biomasa.xlsx
 3. Llena los datos en el Excel
 4. Ejecuta el script de clasificación (3_predecir_en_excel_clasificacion.py)
+
+Para preparar más filas con formato (por ejemplo 50.000):
+    python 2_crear_plantilla_excel_clasificacion.py --filas 50000
 """
 
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 from datetime import datetime
+import argparse
 import json
 import os
 
+from estilos_plantilla import registrar_estilos, formato_columnas, fila, agregar_filas_id
+
+# Filas de datos preparadas por defecto
+FILAS_DATOS = 20
+
+
+def crear_plantilla_excel_clasificacion(filas=FILAS_DATOS):
+    """Crea un archivo Excel plantilla para clasificación de biomasa
 
-def crear_plantilla_excel_clasificacion():
-    """Crea un archivo Excel plantilla para clasificación de biomasa"""
+    filas : filas de datos con formato y número de ID
+    """
 
     print("\n" + "=" * 70)
     print("CREANDO PLANTILLA EXCEL PARA CLASIFICACIÓN DE BIOMASA")
@@ -46,116 +59,118 @@ def crear_plantilla_excel_clasificacion():
     print(f"✓ Clases: {', '.join(classes)}")
     print(f"✓ Variables: {len(feature_names)}\n")
 
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Datos para Clasificación"
+    # Crear workbook (write-only: cada fila se escribe en el archivo al agregarla)
+    wb = Workbook(write_only=True)
 
-    # Estilos
-    header_fill = PatternFill(start_color="2196F3", end_color="2196F3", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    prediction_fill = PatternFill(start_color="FF9800", end_color="FF9800", fill_type="solid")
-    prediction_font = Font(bold=True, color="FFFFFF", size=12)
+    # Estilos (se registran una vez y las celdas los usan por nombre)
     border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
         top=Side(style='thin'),
         bottom=Side(style='thin')
     )
+    centrado = Alignment(horizontal='center')
+    fuente_clasificacion = Font(bold=True, color="FFFFFF", size=12)
+    relleno_clasificacion = PatternFill(start_color="FF9800", end_color="FF9800", fill_type="solid")
+
+    estilos = registrar_estilos(wb, {
+        'titulo': {
+            'font': Font(bold=True, size=14, color="1565C0"),
+            'alignment': Alignment(horizontal='center', vertical='center'),
+        },
+        'info_modelo': {'font': Font(italic=True, size=10, color="555555"), 'alignment': centrado},
+        'clases': {'font': Font(bold=True, size=10, color="FF6F00"), 'alignment': centrado},
+        'encabezado': {
+            'font': Font(bold=True, color="FFFFFF", size=12),
+            'fill': PatternFill(start_color="2196F3", end_color="2196F3", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', wrap_text=True),
+            'border': border,
+        },
+        'encabezado_prediccion': {
+            'font': fuente_clasificacion,
+            'fill': relleno_clasificacion,
+            'alignment': centrado,
+            'border': border,
+        },
+        'encabezado_probabilidad': {
+            'font': fuente_clasificacion,
+            'fill': relleno_clasificacion,
+            'alignment': Alignment(horizontal='center', wrap_text=True),
+            'border': border,
+        },
+        'dato': {'alignment': centrado, 'border': border},
+        'prediccion': {
+            'fill': PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        # Hoja de instrucciones
+        'titulo_instrucciones': {'font': Font(bold=True, size=14, color="1976D2"), 'alignment': centrado},
+        'separador': {'font': Font(color="CCCCCC", size=10)},
+        'seccion': {
+            'font': Font(bold=True, size=13, color="1976D2"),
+            'fill': PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid"),
+        },
+        'paso': {'font': Font(bold=True, size=11, color="F57C00")},
+        'variable': {'font': Font(size=10, color="2E7D32")},
+        'vineta': {'font': Font(size=10, color="555555")},
+        'solucion': {'font': Font(italic=True, size=10, color="1976D2")},
+        'texto': {'font': Font(size=10)},
+    })
+
+    ws = wb.create_sheet("Datos para Clasificación")
+    header_row = 5
+    pred_col = len(feature_names) + 2
+
+    # Confianza y probabilidad de cada clase (las llena el script de clasificación)
+    prob_headers = ['Confianza'] + [f'Prob_{clase}' for clase in classes]
+    last_col = pred_col + len(prob_headers)
+
+    # Anchos y formato por columna: las filas de datos lo toman sin escribir sus celdas
+    columnas = {'A': ('dato', 6)}
+    for col_idx in range(2, pred_col):
+        columnas[get_column_letter(col_idx)] = ('dato', 20)
+    columnas[get_column_letter(pred_col)] = ('prediccion', 18)
+    for col_idx in range(pred_col + 1, last_col + 1):
+        columnas[get_column_letter(col_idx)] = ('dato', 14)
+    formato_columnas(ws, estilos, columnas)
 
-    # Título
-    ws['A1'] = '🔍 CLASIFICADOR DE BIOMASA - MACHINE LEARNING'
-    ws['A1'].font = Font(bold=True, size=14, color="1565C0")
-    ws.merge_cells('A1:F1')
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
     ws.row_dimensions[1].height = 30
+    ws.row_dimensions[header_row].height = 35
+
+    # Título
+    ws.append(fila(ws, ['🔍 CLASIFICADOR DE BIOMASA - MACHINE LEARNING'], 'titulo', last_col))
 
     # Información del modelo
-    ws['A2'] = f'📊 Modelo: {model_info["modelo"]} | Accuracy: {model_info["metricas"]["accuracy_test"]:.4f} | F1-Score: {model_info["metricas"]["f1_test"]:.4f}'
-    ws['A2'].font = Font(italic=True, size=10, color="555555")
-    ws.merge_cells('A2:F2')
-    ws['A2'].alignment = Alignment(horizontal='center')
+    ws.append(fila(ws, [f'📊 Modelo: {model_info["modelo"]} | Accuracy: {model_info["metricas"]["accuracy_test"]:.4f} | F1-Score: {model_info["metricas"]["f1_test"]:.4f}'],
+                   'info_modelo', last_col))
 
     # Clases disponibles
-    ws['A3'] = f'🎯 Clases: {", ".join(classes)}'
-    ws['A3'].font = Font(bold=True, size=10, color="FF6F00")
-    ws.merge_cells('A3:F3')
-    ws['A3'].alignment = Alignment(horizontal='center')
+    ws.append(fila(ws, [f'🎯 Clases: {", ".join(classes)}'], 'clases', last_col))
 
-    ws['A4'] = ''  # Fila vacía
+    ws.append(fila(ws, [], columnas=last_col))  # Fila vacía
 
-    # Encabezados de columnas (fila 5)
-    header_row = 5
+    for rango in ('A1:F1', 'A2:F2', 'A3:F3'):
+        ws.merged_cells.add(rango)
 
-    # ID
-    ws[f'A{header_row}'] = 'ID'
-    ws[f'A{header_row}'].font = header_font
-    ws[f'A{header_row}'].fill = header_fill
-    ws[f'A{header_row}'].alignment = Alignment(horizontal='center')
-    ws[f'A{header_row}'].border = border
-
-    # Variables predictoras
-    for col_idx, feature in enumerate(feature_names, start=2):
-        cell = ws.cell(row=header_row, column=col_idx)
-        cell.value = feature
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', wrap_text=True)
-        cell.border = border
-
-    # Columna de clasificación
-    pred_col = len(feature_names) + 2
-    cell = ws.cell(row=header_row, column=pred_col)
-    cell.value = 'Categoria_Predicha'
-    cell.font = prediction_font
-    cell.fill = prediction_fill
-    cell.alignment = Alignment(horizontal='center')
-    cell.border = border
+    # Encabezados de columnas (fila 5): ID, variables predictoras, clasificación y probabilidades
+    ws.append(fila(ws, ['ID'] + feature_names + ['Categoria_Predicha'] + prob_headers,
+                   ['encabezado'] * (pred_col - 1) + ['encabezado_prediccion']
+                   + ['encabezado_probabilidad'] * len(prob_headers)))
 
-    ws.row_dimensions[header_row].height = 35
-
-    # Agregar filas vacías para datos (20 filas)
-    data_start_row = 6
-    for i in range(20):
-        row = data_start_row + i
-
-        # ID
-        ws[f'A{row}'] = i + 1
-        ws[f'A{row}'].border = border
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-
-        # Columnas de variables
-        for col_idx in range(2, pred_col):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = ""
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-
-        # Columna de predicción
-        cell = ws.cell(row=row, column=pred_col)
-        cell.value = ""
-        cell.border = border
-        cell.fill = PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid")
-        cell.alignment = Alignment(horizontal='center')
-
-    # Ajustar anchos de columna
-    ws.column_dimensions['A'].width = 6
-    for col_idx in range(2, pred_col):
-        col_letter = chr(64 + col_idx)
-        ws.column_dimensions[col_letter].width = 20
-    ws.column_dimensions[chr(64 + pred_col)].width = 18
+    # Agregar filas vacías para datos (solo se escribe el ID; el resto de la fila
+    # toma el formato de su columna)
+    agregar_filas_id(ws, 1, filas, 'dato')
 
     # Hoja de Instrucciones
     ws_inst = wb.create_sheet("📖 Instrucciones")
-
-    ws_inst['A1'] = '📖 GUÍA DE USO - CLASIFICADOR DE BIOMASA'
-    ws_inst['A1'].font = Font(bold=True, size=14, color="1976D2")
-    ws_inst.merge_cells('A1:B1')
-    ws_inst['A1'].alignment = Alignment(horizontal='center')
+    ws_inst.column_dimensions['A'].width = 100
     ws_inst.row_dimensions[1].height = 25
 
+    ws_inst.append(fila(ws_inst, ['📖 GUÍA DE USO - CLASIFICADOR DE BIOMASA'], 'titulo_instrucciones'))
+    ws_inst.merged_cells.add('A1:B1')
+
     instrucciones = [
-        "",
         "🚀 INSTRUCCIONES DE USO",
         "═" * 80,
         "",
@@ -164,6 +179,7 @@ def crear_plantilla_excel_clasificacion():
         "   • Ingresa tus datos en las columnas correspondientes",
         "   • NO modifiques los encabezados (fila 5)",
         "   • NO llenes la columna 'Categoria_Predicha' (se llenará automáticamente)",
+        "   • Tampoco las columnas 'Confianza' y 'Prob_...' (se llenan junto con la clasificación)",
         "",
         "2️⃣ EJECUTAR CLASIFICACIÓN",
         "   • Guarda este archivo Excel (Ctrl+S)",
@@ -175,6 +191,8 @@ def crear_plantilla_excel_clasificacion():
         "   • Abre nuevamente este Excel",
         "   • La columna 'Categoria_Predicha' tendrá las clasificaciones",
         "   • Valores posibles: " + ", ".join(classes),
+        "   • 'Confianza' es la probabilidad de la clase elegida (0 a 1)",
+        "   • 'Prob_<clase>' es la probabilidad que el modelo asigna a cada clase",
         "",
         "",
         "📊 INFORMACIÓN DEL MODELO",
@@ -232,30 +250,24 @@ def crear_plantilla_excel_clasificacion():
         "",
     ])
 
-    row = 1
     for inst in instrucciones:
-        ws_inst[f'A{row}'] = inst
-
         # Estilos
         if inst.startswith('═'):
-            ws_inst[f'A{row}'].font = Font(color="CCCCCC", size=10)
+            estilo = 'separador'
         elif any(inst.startswith(emoji) for emoji in ['🚀', '📊', '📋', '🎯', '❓']):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=13, color="1976D2")
-            ws_inst[f'A{row}'].fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+            estilo = 'seccion'
         elif any(inst.startswith(emoji) for emoji in ['1️⃣', '2️⃣', '3️⃣']):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=11, color="F57C00")
+            estilo = 'paso'
         elif inst.startswith('   ✓'):
-            ws_inst[f'A{row}'].font = Font(size=10, color="2E7D32")
+            estilo = 'variable'
         elif inst.startswith('   •'):
-            ws_inst[f'A{row}'].font = Font(size=10, color="555555")
+            estilo = 'vineta'
         elif inst.startswith('   →'):
-            ws_inst[f'A{row}'].font = Font(italic=True, size=10, color="1976D2")
+            estilo = 'solucion'
         else:
-            ws_inst[f'A{row}'].font = Font(size=10)
+            estilo = 'texto'
 
-        row += 1
-
-    ws_inst.column_dimensions['A'].width = 100
+        ws_inst.append(fila(ws_inst, [inst], estilo))
 
     # Guardar archivo
     filename = 'Plantilla_Clasificacion_Biomasa.xlsx'
@@ -267,6 +279,7 @@ def crear_plantilla_excel_clasificacion():
     print(f"\n📂 Archivo creado: {filename}")
     print(f"🎯 Clases posibles: {', '.join(classes)}")
     print(f"📋 Variables requeridas: {len(feature_names)}")
+    print(f"📋 Filas de datos preparadas: {filas:,}")
 
     print(f"\n📋 Lista de variables:")
     for i, var in enumerate(feature_names, 1):
@@ -285,8 +298,13 @@ def crear_plantilla_excel_clasificacion():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Crea la plantilla Excel para clasificación')
+    parser.add_argument('--filas', type=int, default=FILAS_DATOS,
+                        help=f'Filas de datos con formato y número de ID (por defecto {FILAS_DATOS})')
+    args = parser.parse_args()
+
     try:
-        crear_plantilla_excel_clasificacion()
+        crear_plantilla_excel_clasificacion(args.filas)
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
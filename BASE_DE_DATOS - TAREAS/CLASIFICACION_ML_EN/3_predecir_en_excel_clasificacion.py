@@ -8,30 +8,78 @@ INSTRUCCIONES:
 1. Asegúrate de haber llenado el Excel: Plantilla_Clasificacion_Biomasa.xlsx
 2. Ejecuta este script: python 3_predecir_en_excel_clasificacion.py
 3. Las clasificaciones se escribirán en la columna 'Categoria_Predicha'
+
+Los módulos pesados (pandas, numpy, openpyxl, el pipeline) se importan dentro
+de las funciones que los usan: verificar los archivos y salir solo usa la
+librería estándar. Para ver el tiempo de cada etapa del arranque:
+    python 3_predecir_en_excel_clasificacion.py --profile-startup
+
+También acepta exportaciones Parquet / Feather / Arrow IPC (ver lectura_columnar.py):
+solo se leen las columnas del modelo y las clasificaciones se escriben en otro
+archivo del mismo formato (clientes.parquet -> clientes_predicciones.parquet):
+    python 3_predecir_en_excel_clasificacion.py clientes.parquet
+    python 3_predecir_en_excel_clasificacion.py clientes.parquet --salida clases.feather
+
+Para exportaciones que no caben en memoria, --memoria MB preprocesa y clasifica
+por fragmentos guardados en disco (np.memmap, ver fragmentos_memmap.py): la
+memoria de trabajo depende del presupuesto y no del tamaño del archivo (los
+resultados quedan en un archivo con mmap):
+    python 3_predecir_en_excel_clasificacion.py clientes.parquet --memoria 256
+
+Con --trace se escribe una línea JSON por etapa (cargar_modelo, leer_datos_excel,
+preprocesar_datos, hacer_clasificacion, escribir_resultados) con su tiempo real
+y de CPU, filas y bytes leídos / escritos (ver traza_etapas.py), en la salida
+de errores o agregadas a un archivo:
+    python 3_predecir_en_excel_clasificacion.py --trace trazas.jsonl
 """
 
+import time
+_INICIO = time.perf_counter()
+
 import pickle
 import json
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime
+import argparse
 import os
 import sys
 
+import traza_etapas
+
+# Columnas de identificación que se copian al archivo de predicciones (entrada columnar)
+COLUMNAS_ID = ['ID']
+
+# Presupuesto por defecto del modo fuera de memoria (--memoria), en MB;
+# el mismo valor que fragmentos_memmap.MEMORIA_MB
+MEMORIA_MB = 512
+
+
+def archivos_modelo():
+    """Archivos del modelo que se van a usar y los que faltan: (requeridos, faltantes)"""
+
+    if os.path.exists('pipeline_clasificacion.pkl'):
+        archivos_requeridos = ['pipeline_clasificacion.pkl', 'model_info_clasificacion.json']
+    else:
+        archivos_requeridos = ['best_model_clasificacion.pkl', 'scaler_clasificacion.pkl',
+                               'label_encoder_clasificacion.pkl', 'model_info_clasificacion.json']
+    faltantes = [f for f in archivos_requeridos if not os.path.exists(f)]
+
+    return archivos_requeridos, faltantes
+
 
+@traza_etapas.trazar('cargar_modelo')
 def cargar_modelo():
-    """Carga el modelo, scaler y label encoder"""
+    """Carga el pipeline de clasificación (preprocesamiento + modelo + clases)
+
+    Usa pipeline_clasificacion.pkl si existe; si no (modelos guardados antes),
+    arma el mismo pipeline con el modelo, el scaler y el label encoder.
+    """
 
     print("=" * 70)
     print("SISTEMA DE CLASIFICACIÓN DE BIOMASA")
     print("=" * 70)
 
     # Verificar archivos necesarios
-    archivos_requeridos = ['best_model_clasificacion.pkl', 'scaler_clasificacion.pkl',
-                           'label_encoder_clasificacion.pkl', 'model_info_clasificacion.json']
-    faltantes = [f for f in archivos_requeridos if not os.path.exists(f)]
+    archivos_requeridos, faltantes = archivos_modelo()
 
     if faltantes:
         print("\n❌ ERROR: Faltan archivos necesarios:")
@@ -39,38 +87,62 @@ def cargar_modelo():
             print(f"   - {archivo}")
         print("\nPor favor, ejecuta primero desde el notebook:")
         print("  %run 1_guardar_modelo_clasificacion.py")
-        return None, None, None, None
-
-    # Cargar modelo
-    with open('best_model_clasificacion.pkl', 'rb') as f:
-        model = pickle.load(f)
-    print("✓ Modelo cargado")
-
-    # Cargar scaler
-    with open('scaler_clasificacion.pkl', 'rb') as f:
-        scaler = pickle.load(f)
-    print("✓ Scaler cargado")
-
-    # Cargar label encoder
-    with open('label_encoder_clasificacion.pkl', 'rb') as f:
-        le_target = pickle.load(f)
-    print("✓ LabelEncoder cargado")
+        return None, None
 
     # Cargar información
     with open('model_info_clasificacion.json', 'r', encoding='utf-8') as f:
         info = json.load(f)
     print("✓ Información cargada")
 
+    from pipeline_prediccion import PipelinePrediccion, cargar_pipeline
+
+    if 'pipeline_clasificacion.pkl' in archivos_requeridos:
+        # Cargar pipeline completo (una sola lectura)
+        pipeline = cargar_pipeline('pipeline_clasificacion.pkl')
+        print("✓ Pipeline cargado (preprocesamiento + modelo + clases)")
+        if getattr(pipeline, 'arboles', None):
+            print(f"✓ {pipeline.modelo.n_arboles} árboles abiertos con mmap (predicción sin sklearn)")
+    else:
+        # Cargar modelo
+        with open('best_model_clasificacion.pkl', 'rb') as f:
+            model = pickle.load(f)
+        print("✓ Modelo cargado")
+
+        # Cargar scaler
+        with open('scaler_clasificacion.pkl', 'rb') as f:
+            scaler = pickle.load(f)
+        print("✓ Scaler cargado")
+
+        # Cargar label encoder
+        with open('label_encoder_clasificacion.pkl', 'rb') as f:
+            le_target = pickle.load(f)
+        print("✓ LabelEncoder cargado")
+
+        pipeline = PipelinePrediccion.desde_artefactos(model, scaler, info,
+                                                       info['variables_predictoras'],
+                                                       le_target=le_target,
+                                                       usa_escalado=info.get('usa_escalado', True))
+
     print(f"\nModelo: {info['modelo']}")
     print(f"Clases: {', '.join(info['clases'])}")
     print(f"Accuracy: {info['metricas']['accuracy_test']:.4f}")
     print(f"F1-Score: {info['metricas']['f1_test']:.4f}")
 
-    return model, scaler, le_target, info
+    arboles = ['pipeline_clasificacion_arboles'] if getattr(pipeline, 'arboles', None) else []
+    traza_etapas.anotar(bytes_leidos=traza_etapas.tamano_archivos(*archivos_requeridos, *arboles))
+
+    return pipeline, info
+
 
+@traza_etapas.trazar('leer_datos_excel')
+def leer_datos_excel(filename, feature_names, filas=None):
+    """Lee los datos del archivo Excel
 
-def leer_datos_excel(filename, feature_names):
-    """Lee los datos del archivo Excel"""
+    filas : número opcional de filas de datos a leer (desde la fila 6);
+            si es None se leen todas.
+    """
+
+    import pandas as pd
 
     print("\n" + "=" * 70)
     print("LEYENDO DATOS DEL EXCEL")
@@ -82,7 +154,7 @@ def leer_datos_excel(filename, feature_names):
         return None
 
     # Leer Excel (header en fila 5, datos empiezan en fila 6)
-    df = pd.read_excel(filename, sheet_name='Datos para Clasificación', header=4)
+    df = pd.read_excel(filename, sheet_name='Datos para Clasificación', header=4, nrows=filas)
 
     print(f"✓ Archivo leído: {filename}")
     print(f"  Total de filas: {len(df)}")
@@ -107,71 +179,66 @@ def leer_datos_excel(filename, feature_names):
 
     print(f"\n✓ Columnas verificadas: {len(feature_names)} variables")
 
+    traza_etapas.anotar(archivo=filename, filas=len(df_filtrado),
+                        bytes_leidos=traza_etapas.tamano_archivos(filename))
+
     return df_filtrado
 
 
-def preprocesar_datos(df, feature_names, scaler):
-    """Preprocesa los datos para clasificación"""
+@traza_etapas.trazar('preprocesar_datos')
+def preprocesar_datos(df, pipeline):
+    """Preprocesa los datos para clasificación
+
+    Retorna la matriz numpy (imputada, codificada y escalada) para el modelo.
+    """
 
     print("\n" + "=" * 70)
     print("PREPROCESANDO DATOS")
     print("=" * 70)
 
-    # Seleccionar solo las columnas necesarias
-    X = df[feature_names].copy()
-
     # Verificar valores faltantes
-    valores_faltantes = X.isnull().sum()
+    valores_faltantes = df[pipeline.columnas].isnull().sum()
     if valores_faltantes.any():
         print("\n⚠ ADVERTENCIA: Hay valores faltantes:")
         for col, count in valores_faltantes[valores_faltantes > 0].items():
             print(f"   - {col}: {count} valores faltantes")
         print("\n  Se rellenarán con la mediana de cada columna")
+        print("  (las categóricas con su valor más frecuente en el entrenamiento)")
 
-        # Rellenar con mediana
-        for col in X.columns:
-            if X[col].isnull().any():
-                if X[col].dtype in ['float64', 'int64']:
-                    X[col].fillna(X[col].median(), inplace=True)
-                else:
-                    X[col].fillna(X[col].mode()[0] if not X[col].mode().empty else 'Franco', inplace=True)
-
-    # Codificar variables categóricas
-    categorical_cols = X.select_dtypes(include=['object']).columns
+    categorical_cols = pipeline.columnas_categoricas()
     if len(categorical_cols) > 0:
-        print(f"\n✓ Codificando variables categóricas: {list(categorical_cols)}")
-
-        # Mapeo para Tipo_suelo
-        tipo_suelo_map = {'Arenoso': 0, 'Arcilloso': 1, 'Franco': 2}
+        print(f"\n✓ Codificando variables categóricas: {categorical_cols}")
 
-        for col in categorical_cols:
-            if col == 'Tipo_suelo':
-                X[col] = X[col].map(tipo_suelo_map)
-                X[col].fillna(2, inplace=True)
-            else:
-                X[col] = pd.Categorical(X[col]).codes
+    # Imputar, codificar y escalar sobre una sola matriz numpy
+    X_scaled = pipeline.transformar(df)
 
-    print(f"✓ Datos preprocesados: {X.shape}")
-
-    # Escalar datos
-    X_scaled = scaler.transform(X)
+    print(f"✓ Datos preprocesados: {X_scaled.shape}")
     print("✓ Datos escalados")
 
+    traza_etapas.anotar(filas=len(X_scaled), bytes_escritos=X_scaled.nbytes)
+
     return X_scaled
 
 
-def hacer_clasificacion(model, X_scaled, le_target):
-    """Hace las clasificaciones usando el modelo"""
+@traza_etapas.trazar('hacer_clasificacion')
+def hacer_clasificacion(pipeline, X_scaled):
+    """Hace las clasificaciones usando el modelo del pipeline
+
+    El modelo se evalúa una sola vez: se calculan las probabilidades y la clase
+    de cada fila es la de mayor probabilidad.
+    Retorna (predicciones, probabilidades); probabilidades es una matriz
+    (filas, clases) en el orden de pipeline.clases_modelo(), o None si el
+    modelo no calcula probabilidades.
+    """
+
+    import numpy as np
 
     print("\n" + "=" * 70)
     print("HACIENDO CLASIFICACIONES")
     print("=" * 70)
 
-    # Predicciones
-    predicciones_encoded = model.predict(X_scaled)
-
-    # Decodificar predicciones
-    predicciones = le_target.inverse_transform(predicciones_encoded)
+    # Predicciones (decodificadas a nombres de clase) y probabilidades en una sola pasada
+    predicciones, probas = pipeline.predecir_matriz_proba(X_scaled)
 
     print(f"✓ Clasificaciones realizadas: {len(predicciones)} valores")
 
@@ -181,35 +248,36 @@ def hacer_clasificacion(model, X_scaled, le_target):
     for clase, count in zip(unique, counts):
         print(f"    - {clase}: {count} ({count/len(predicciones)*100:.1f}%)")
 
-    # Probabilidades si están disponibles
-    if hasattr(model, "predict_proba"):
-        try:
-            # Para GridSearchCV, usar best_estimator_
-            if hasattr(model, 'best_estimator_'):
-                probas = model.best_estimator_.predict_proba(X_scaled)
-            else:
-                probas = model.predict_proba(X_scaled)
-
-            # Confianza promedio
-            max_probas = probas.max(axis=1)
-            print(f"\n  Confianza de las predicciones:")
-            print(f"    - Promedio: {max_probas.mean()*100:.1f}%")
-            print(f"    - Mínimo: {max_probas.min()*100:.1f}%")
-            print(f"    - Máximo: {max_probas.max()*100:.1f}%")
-
-            return predicciones, max_probas
-        except:
-            return predicciones, None
-    else:
-        return predicciones, None
+    # Confianza (probabilidad de la clase elegida)
+    if probas is not None:
+        max_probas = probas.max(axis=1)
+        print(f"\n  Confianza de las predicciones:")
+        print(f"    - Promedio: {max_probas.mean()*100:.1f}%")
+        print(f"    - Mínimo: {max_probas.min()*100:.1f}%")
+        print(f"    - Máximo: {max_probas.max()*100:.1f}%")
 
+    traza_etapas.anotar(filas=len(predicciones), bytes_leidos=X_scaled.nbytes,
+                        bytes_escritos=predicciones.nbytes + (probas.nbytes if probas is not None else 0))
 
-def escribir_resultados(filename, predicciones, probas, df_original):
-    """Escribe las clasificaciones en el mismo archivo Excel"""
+    return predicciones, probas
 
-    print("\n" + "=" * 70)
-    print("ESCRIBIENDO RESULTADOS EN EXCEL")
-    print("=" * 70)
+
+def columnas_probabilidad(clases):
+    """Encabezados de las columnas extra: la confianza y la probabilidad de cada clase"""
+    return ['Confianza'] + [f'Prob_{clase}' for clase in clases]
+
+
+def valores_probabilidad(probas):
+    """Valores de las columnas extra por fila: [confianza, prob. clase 1, ...] (4 decimales)"""
+    import numpy as np
+    return np.round(np.column_stack([probas.max(axis=1), probas]), 4).tolist()
+
+
+def escribir_resultados_openpyxl(filename, predicciones, df_original, probas=None, clases=None):
+    """Escribe las clasificaciones cargando y guardando el libro completo con openpyxl"""
+
+    from openpyxl import load_workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
 
     # Cargar el workbook existente
     wb = load_workbook(filename)
@@ -253,6 +321,31 @@ def escribir_resultados(filename, predicciones, probas, df_original):
 
         cell.font = Font(bold=True, size=11)
 
+    # Confianza y probabilidad de cada clase (a la derecha de Categoria_Predicha)
+    if probas is not None:
+        encabezados = {ws.cell(row=header_row, column=col).value: col
+                       for col in range(1, ws.max_column + 1)}
+        siguiente = pred_col + 1
+        columnas = []
+        for nombre in columnas_probabilidad(clases):
+            if nombre not in encabezados:
+                while ws.cell(row=header_row, column=siguiente).value not in (None, ''):
+                    siguiente += 1
+                encabezados[nombre] = siguiente
+                celda = ws.cell(row=header_row, column=siguiente)
+                celda.value = nombre
+                celda.font = Font(bold=True, color="FFFFFF", size=12)
+                celda.fill = PatternFill(start_color="FF9800", end_color="FF9800", fill_type="solid")
+                celda.alignment = Alignment(horizontal='center')
+            columnas.append(encabezados[nombre])
+
+        for i, fila_valores in enumerate(valores_probabilidad(probas)):
+            row = data_start_row + df_original.index[i]
+            for col, valor in zip(columnas, fila_valores):
+                cell = ws.cell(row=row, column=col)
+                cell.value = valor
+                cell.alignment = Alignment(horizontal='center')
+
     # Agregar marca de tiempo
     ws['A3'] = f'✓ Última clasificación: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
     ws['A3'].font = Font(italic=True, size=9, color="006400", bold=True)
@@ -260,8 +353,88 @@ def escribir_resultados(filename, predicciones, probas, df_original):
     # Guardar archivo
     wb.save(filename)
 
+    return True
+
+
+@traza_etapas.trazar('escribir_resultados')
+def escribir_resultados(filename, predicciones, probas, df_original, clases=None):
+    """Escribe las clasificaciones en el mismo archivo Excel
+
+    Si hay probabilidades, también escribe la confianza y la probabilidad de
+    cada clase (columnas 'Confianza' y 'Prob_<clase>'); si la plantilla no
+    tiene esas columnas, se agregan a la derecha de 'Categoria_Predicha'.
+    clases : nombres de las clases en el orden de las columnas de probas
+
+    Solo se reescribe la hoja de datos dentro del archivo (ver escritura_xlsx.py);
+    si el archivo no admite esa escritura se usa openpyxl como respaldo.
+    """
+
+    from escritura_xlsx import (EstiloCelda, ErrorEscrituraXlsx, escribir_celdas_xlsx,
+                                leer_fila, localizar_columna)
+
+    print("\n" + "=" * 70)
+    print("ESCRIBIENDO RESULTADOS EN EXCEL")
+    print("=" * 70)
+
+    try:
+        # Encontrar la columna de predicciones (fila de encabezados = 5)
+        pred_col = localizar_columna(filename, 'Datos para Clasificación', 5, 'Categoria_Predicha')
+        if pred_col is None:
+            print("❌ ERROR: No se encuentra la columna 'Categoria_Predicha'")
+            return False
+
+        # Colores por categoría
+        colores = {
+            'Baja': EstiloCelda(relleno="FFC7CE", negrita=True),
+            'Media': EstiloCelda(relleno="FFEB9C", negrita=True),
+            'Alta': EstiloCelda(relleno="C6EFCE", negrita=True)
+        }
+        estilo_otro = EstiloCelda(relleno="E0E0E0", negrita=True)
+
+        # Escribir predicciones
+        data_start_row = 6
+        filas = df_original.index.to_numpy() + data_start_row
+        celdas = {
+            (int(row), pred_col): (str(pred), colores.get(pred, estilo_otro))
+            for row, pred in zip(filas, predicciones)
+        }
+
+        # Confianza y probabilidad de cada clase
+        if probas is not None:
+            estilo_encabezado = EstiloCelda(relleno="FF9800", negrita=True)
+            encabezados = leer_fila(filename, 'Datos para Clasificación', 5)
+            por_nombre = {valor: col for col, valor in encabezados.items()}
+            siguiente = pred_col + 1
+            columnas = []
+            for nombre in columnas_probabilidad(clases):
+                col = por_nombre.get(nombre)
+                if col is None:
+                    # Plantilla sin esta columna: usar la siguiente columna libre
+                    while siguiente in encabezados:
+                        siguiente += 1
+                    col = siguiente
+                    encabezados[col] = nombre
+                    celdas[(5, col)] = (nombre, estilo_encabezado)
+                columnas.append(col)
+
+            for row, fila_valores in zip(filas, valores_probabilidad(probas)):
+                for col, valor in zip(columnas, fila_valores):
+                    celdas[(int(row), col)] = (valor, None)
+
+        # Agregar marca de tiempo (conserva el formato de la celda)
+        celdas[(3, 1)] = (f'✓ Última clasificación: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', None)
+
+        escribir_celdas_xlsx(filename, 'Datos para Clasificación', celdas)
+
+    except ErrorEscrituraXlsx as e:
+        print(f"⚠ Escritura rápida no disponible ({str(e)}), guardando con openpyxl...")
+        if not escribir_resultados_openpyxl(filename, predicciones, df_original, probas, clases):
+            return False
+
     print(f"✓ Resultados escritos en: {filename}")
     print(f"  Columna: Categoria_Predicha")
+    if probas is not None:
+        print(f"  Columnas: {', '.join(columnas_probabilidad(clases))}")
     print(f"  Filas actualizadas: {len(predicciones)}")
 
     # Leyenda de colores
@@ -270,20 +443,311 @@ def escribir_resultados(filename, predicciones, probas, df_original):
     print(f"    🟡 Amarillo: Biomasa Media")
     print(f"    🔴 Rojo: Biomasa Baja")
 
+    traza_etapas.anotar(archivo=filename, filas=len(predicciones),
+                        bytes_escritos=traza_etapas.tamano_archivos(filename))
+
+    return True
+
+
+def procesar_archivo_columnar(filename, pipeline, salida=None, memoria_mb=None):
+    """Clasifica un archivo Parquet / Feather / Arrow IPC y escribe los resultados en otro archivo
+
+    Solo se leen las columnas del modelo (y las de COLUMNAS_ID si existen); se
+    clasifican todas las filas (los valores vacíos se imputan). El archivo de
+    salida tiene esas columnas más 'Categoria_Predicha' y, si el modelo
+    calcula probabilidades, 'Confianza' y 'Prob_<clase>'.
+    salida : archivo de salida (su extensión define el formato); por defecto
+             <nombre>_predicciones con la misma extensión
+    memoria_mb : si se indica, se procesa fuera de memoria por fragmentos en
+                 disco con ese presupuesto (ver clasificar_columnar_en_disco)
+    Retorna True si se completó.
+    """
+
+    from lectura_columnar import columnas_archivo, escribir_tabla, formato_columnar, leer_tabla, ruta_salida
+
+    print("\n" + "=" * 70)
+    print("LEYENDO DATOS (FORMATO COLUMNAR)")
+    print("=" * 70)
+
+    if not os.path.exists(filename):
+        print(f"\n❌ ERROR: No se encuentra el archivo {filename}")
+        return False
+
+    try:
+        import pyarrow as pa
+        disponibles = columnas_archivo(filename)
+    except ImportError:
+        print("\n❌ ERROR: Para leer Parquet/Feather/Arrow instala pyarrow: pip install pyarrow")
+        return False
+    except Exception as e:
+        print(f"\n❌ ERROR al leer {filename}: {str(e)}")
+        return False
+
+    columnas_faltantes = [col for col in pipeline.columnas if col not in disponibles]
+    if columnas_faltantes:
+        print(f"\n❌ ERROR: Faltan columnas en el archivo:")
+        for col in columnas_faltantes:
+            print(f"   - {col}")
+        return False
+
+    # Proyección: solo las columnas que se usan
+    identificacion = [col for col in COLUMNAS_ID if col in disponibles and col not in pipeline.columnas]
+    salida = salida or ruta_salida(filename)
+
+    if memoria_mb:
+        try:
+            return clasificar_columnar_en_disco(filename, pipeline, identificacion, salida, memoria_mb)
+        except Exception as e:
+            print(f"\n❌ ERROR al clasificar por fragmentos: {str(e)}")
+            return False
+
+    formato = formato_columnar(filename)
+    with traza_etapas.etapa('leer_datos_excel', archivo=filename, formato=formato):
+        tabla = leer_tabla(filename, identificacion + pipeline.columnas)
+        # Bytes de las columnas leídas (no de todo el archivo)
+        traza_etapas.anotar(filas=tabla.num_rows, bytes_leidos=tabla.nbytes)
+
+    print(f"✓ Archivo leído: {filename}")
+    print(f"  Filas: {tabla.num_rows}")
+    print(f"  Columnas leídas: {tabla.num_columns} de {len(disponibles)}")
+
+    if tabla.num_rows == 0:
+        print("\n❌ ERROR: No hay datos para clasificar")
+        return False
+
+    # Preprocesar y clasificar
+    try:
+        with traza_etapas.etapa('preprocesar_datos', formato=formato):
+            X_scaled = pipeline.transformar_tabla(tabla)
+            traza_etapas.anotar(filas=len(X_scaled), bytes_escritos=X_scaled.nbytes)
+        print(f"✓ Datos preprocesados: {X_scaled.shape[0]} filas x {X_scaled.shape[1]} variables")
+        predicciones, probas = hacer_clasificacion(pipeline, X_scaled)
+    except Exception as e:
+        print(f"\n❌ ERROR al hacer clasificaciones: {str(e)}")
+        return False
+
+    # Escribir resultados
+    try:
+        with traza_etapas.etapa('escribir_resultados', archivo=salida, formato=formato_columnar(salida)):
+            resultado = tabla.append_column('Categoria_Predicha', pa.array(predicciones.astype(str)))
+            columnas = ['Categoria_Predicha']
+            if probas is not None:
+                nombres = columnas_probabilidad(pipeline.clases_modelo())
+                valores = [probas.max(axis=1)] + [probas[:, k] for k in range(probas.shape[1])]
+                for nombre, columna in zip(nombres, valores):
+                    resultado = resultado.append_column(nombre, pa.array(columna, type=pa.float64()))
+                columnas += nombres
+            escribir_tabla(resultado, salida)
+            traza_etapas.anotar(filas=resultado.num_rows, bytes_escritos=traza_etapas.tamano_archivos(salida))
+    except Exception as e:
+        print(f"\n❌ ERROR al escribir resultados: {str(e)}")
+        return False
+
+    print("\n" + "=" * 70)
+    print("✅ ¡CLASIFICACIÓN COMPLETADA EXITOSAMENTE!")
+    print("=" * 70)
+    print(f"\nClasificaciones escritas en: {salida}")
+    print(f"  Columnas: {', '.join(columnas)}")
+    print(f"  Filas: {len(predicciones)}")
+    print("\n" + "=" * 70)
+
     return True
 
 
-def main():
-    """Función principal"""
+def clasificar_columnar_en_disco(filename, pipeline, identificacion, salida, memoria_mb):
+    """Clasifica un archivo columnar fuera de memoria (ver fragmentos_memmap.py)
+
+    1. Lee el archivo por lotes y escribe la matriz codificada (sin imputar) en
+       fragmentos np.memmap en disco
+    2. Imputa, escala y clasifica fragmento por fragmento sobre un np.memmap de
+       resultados: por fila, la posición de la clase en pipeline.clases_modelo()
+       y, si el modelo las calcula, las probabilidades de cada clase
+    3. Vuelve a leer el archivo por lotes y escribe cada lote con sus resultados
+    Si el pipeline no guardó medianas, se imputa con las de todo el archivo,
+    calculadas sobre los fragmentos (como al clasificarlo de una vez).
+    Con --trace cada pasada es una etapa (preprocesar_datos incluye la lectura).
+    Retorna True si se completó.
+    """
+
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    from fragmentos_memmap import FragmentosDisco, filas_por_fragmento, memoria_maxima_mb
+    from lectura_columnar import FORMATOS, escribir_lotes, formato_columnar, leer_lotes
+
+    # Validar la salida antes de las pasadas sobre el archivo
+    if formato_columnar(salida) is None:
+        raise ValueError(f"Formato de salida no soportado: {salida} "
+                         f"(usa {', '.join(sorted(FORMATOS))})")
+
+    columnas = identificacion + pipeline.columnas
+    filas_lote = filas_por_fragmento(memoria_mb, len(pipeline.columnas))
+    clases = np.asarray(pipeline.clases_modelo())
+    indice_clases = pd.Index(clases)
+    con_probas = hasattr(pipeline.modelo, 'predict_proba')
+
+    medianas = None
+
+    def clasificar(X):
+        predicciones, probas = pipeline.predecir_matriz_proba(pipeline.imputar_y_escalar(np.array(X),
+                                                                                         medianas))
+        codigos = indice_clases.get_indexer(predicciones)
+        return codigos if probas is None else np.column_stack([codigos, probas])
 
-    filename = 'Plantilla_Clasificacion_Biomasa.xlsx'
+    print("\n" + "=" * 70)
+    print(f"CLASIFICACIÓN FUERA DE MEMORIA (presupuesto {memoria_mb} MB, "
+          f"hasta {filas_lote} filas por fragmento)")
+    print("=" * 70)
+
+    formato = formato_columnar(filename)
+
+    with FragmentosDisco(len(pipeline.columnas)) as fragmentos:
+        # 1. Preprocesar a fragmentos en disco
+        with traza_etapas.etapa('preprocesar_datos', archivo=filename, formato=formato):
+            for lote in leer_lotes(filename, pipeline.columnas, filas_lote):
+                with fragmentos.nuevo(lote.num_rows) as X:
+                    pipeline.transformar_tabla(lote, salida=X, imputar=False)
+                print(f"  ✓ Fragmento {len(fragmentos)}: {lote.num_rows} filas preprocesadas "
+                      f"(acumulado: {fragmentos.filas})")
+                del lote
+
+            if pipeline.medianas is None and fragmentos.filas:
+                categoricas = pipeline.columnas_categoricas()
+                medianas = fragmentos.medianas([j for j, col in enumerate(pipeline.columnas)
+                                                if col not in categoricas])
+                print("  ✓ Medianas de todo el archivo calculadas (el modelo no las guardó)")
+            traza_etapas.anotar(filas=fragmentos.filas, fragmentos=len(fragmentos),
+                                bytes_escritos=traza_etapas.tamano_archivos(fragmentos.carpeta))
+
+        if fragmentos.filas == 0:
+            print("\n❌ ERROR: No hay datos para clasificar")
+            return False
+
+        # 2. Imputar y clasificar fragmento por fragmento
+        with traza_etapas.etapa('hacer_clasificacion', formato=formato):
+            resultados = fragmentos.predecir(
+                clasificar, 1 + len(clases) if con_probas else 1,
+                lambda numero, filas: print(f"  ✓ Fragmento {numero}: {filas} filas clasificadas"))
+            traza_etapas.anotar(filas=len(resultados), bytes_escritos=resultados.nbytes)
+
+        codigos = resultados[:, 0].astype(np.intp)
+        print(f"\n✓ Clasificaciones realizadas: {len(codigos)} valores")
+        print(f"\n  Distribución de clasificaciones:")
+        for clase, count in zip(clases, np.bincount(codigos, minlength=len(clases))):
+            if count:
+                print(f"    - {clase}: {count} ({count/len(codigos)*100:.1f}%)")
+
+        nombres = ['Categoria_Predicha'] + (columnas_probabilidad(clases) if con_probas else [])
+
+        # 3. Escribir cada lote del archivo con su tramo de resultados
+        def lotes_con_resultados():
+            inicio = 0
+            for lote in leer_lotes(filename, columnas, filas_lote):
+                fin = inicio + lote.num_rows
+                lote = lote.append_column('Categoria_Predicha',
+                                          pa.array(clases[codigos[inicio:fin]].astype(str)))
+                if con_probas:
+                    probas = resultados[inicio:fin, 1:]
+                    valores = [probas.max(axis=1)] + [probas[:, k] for k in range(probas.shape[1])]
+                    for nombre, columna in zip(nombres[1:], valores):
+                        lote = lote.append_column(nombre, pa.array(columna, type=pa.float64()))
+                yield lote
+                inicio = fin
+
+        with traza_etapas.etapa('escribir_resultados', archivo=salida, formato=formato_columnar(salida)):
+            filas = escribir_lotes(lotes_con_resultados(), salida)
+            traza_etapas.anotar(filas=filas, bytes_escritos=traza_etapas.tamano_archivos(salida))
+        del resultados, codigos
+
+    print("\n" + "=" * 70)
+    print("✅ ¡CLASIFICACIÓN COMPLETADA EXITOSAMENTE!")
+    print("=" * 70)
+    print(f"\nClasificaciones escritas en: {salida}")
+    print(f"  Columnas: {', '.join(nombres)}")
+    print(f"  Filas: {filas}")
+    memoria = memoria_maxima_mb()
+    if memoria is not None:
+        print(f"  Memoria máxima del proceso: {memoria:.0f} MB")
+    print("\n" + "=" * 70)
+
+    return True
+
+
+def verificar(filename):
+    """Verifica que existan el modelo y el Excel sin cargar nada. Retorna True si está todo"""
+
+    _, faltantes = archivos_modelo()
+    if not os.path.exists(filename):
+        faltantes.append(filename)
+
+    for archivo in faltantes:
+        print(f"❌ Falta: {archivo}")
+    if not faltantes:
+        print("✓ Modelo y Excel disponibles")
+
+    return not faltantes
+
+
+def perfilar_arranque(filename, filas_prueba=10):
+    """Tiempo de cada etapa del arranque (--profile-startup); no escribe en el Excel
+
+    Mide dos caminos contra su presupuesto (ver perfil_arranque.py):
+    verificar los archivos y salir, y cargar el modelo y clasificar filas_prueba filas.
+    """
+
+    from perfil_arranque import PerfilArranque, PRESUPUESTO_VERIFICACION, PRESUPUESTO_10_FILAS
+
+    perfil = PerfilArranque(_INICIO)
+
+    with perfil.etapa('verificar archivos'):
+        completo = verificar(filename)
+    perfil.hito('verificar archivos y salir', PRESUPUESTO_VERIFICACION)
+
+    df = None
+    if completo:
+        for modulo in ('numpy', 'pandas', 'openpyxl', 'pipeline_prediccion', 'escritura_xlsx'):
+            perfil.importar(modulo)
+
+        with perfil.etapa('cargar modelo (artefactos)'):
+            pipeline, info = cargar_modelo()
+        with perfil.etapa(f'leer {filas_prueba} filas del Excel'):
+            df = leer_datos_excel(filename, pipeline.columnas, filas=filas_prueba)
+        if df is not None:
+            with perfil.etapa('preprocesar'):
+                X_scaled = preprocesar_datos(df, pipeline)
+            with perfil.etapa('clasificar'):
+                hacer_clasificacion(pipeline, X_scaled)
+        perfil.hito(f'clasificar {filas_prueba} filas', PRESUPUESTO_10_FILAS)
+
+    perfil.reporte()
+    if not completo:
+        print("\n⚠ Faltan archivos: no se midió la carga del modelo")
+    elif df is None:
+        print(f"\n⚠ Las filas 6 a {5 + filas_prueba} no tienen datos: no se midió la clasificación")
+
+    return completo
+
+
+def main(filename='Plantilla_Clasificacion_Biomasa.xlsx', salida=None, memoria_mb=None):
+    """Función principal
+
+    salida : solo con archivos Parquet / Feather / Arrow, dónde escribir las clasificaciones
+    memoria_mb : solo con archivos Parquet / Feather / Arrow, presupuesto del modo
+                 fuera de memoria (fragmentos en disco)
+    """
+
+    from lectura_columnar import formato_columnar
 
     # 1. Cargar modelo
-    model, scaler, le_target, info = cargar_modelo()
-    if model is None:
+    pipeline, info = cargar_modelo()
+    if pipeline is None:
+        return
+
+    if formato_columnar(filename):
+        procesar_archivo_columnar(filename, pipeline, salida, memoria_mb)
         return
 
-    feature_names = info['variables_predictoras']
+    feature_names = pipeline.columnas
 
     # 2. Leer datos
     df = leer_datos_excel(filename, feature_names)
@@ -292,21 +756,22 @@ def main():
 
     # 3. Preprocesar
     try:
-        X_scaled = preprocesar_datos(df, feature_names, scaler)
+        X_scaled = preprocesar_datos(df, pipeline)
     except Exception as e:
         print(f"\n❌ ERROR al preprocesar datos: {str(e)}")
         return
 
     # 4. Clasificar
     try:
-        predicciones, probas = hacer_clasificacion(model, X_scaled, le_target)
+        predicciones, probas = hacer_clasificacion(pipeline, X_scaled)
+        clases = pipeline.clases_modelo() if probas is not None else None
     except Exception as e:
         print(f"\n❌ ERROR al hacer clasificaciones: {str(e)}")
         return
 
     # 5. Escribir resultados
     try:
-        exito = escribir_resultados(filename, predicciones, probas, df)
+        exito = escribir_resultados(filename, predicciones, probas, df, clases)
     except Exception as e:
         print(f"\n❌ ERROR al escribir resultados: {str(e)}")
         return
@@ -321,11 +786,45 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clasificación automática en Excel")
+    parser.add_argument('archivo', nargs='?', default='Plantilla_Clasificacion_Biomasa.xlsx',
+                        help="Archivo Excel (o Parquet/Feather/Arrow) con los datos a clasificar")
+    parser.add_argument('--salida', metavar='ARCHIVO', default=None,
+                        help="Con un archivo Parquet/Feather/Arrow: dónde escribir las clasificaciones "
+                             "(por defecto <nombre>_predicciones con la misma extensión)")
+    parser.add_argument('--memoria', type=int, nargs='?', const=MEMORIA_MB, default=None,
+                        metavar='MB',
+                        help="Con Parquet/Feather/Arrow: clasificar fuera de memoria por fragmentos "
+                             f"en disco con este presupuesto (por defecto {MEMORIA_MB} MB)")
+    parser.add_argument('--verificar', action='store_true',
+                        help="Solo verificar que existan el modelo y el Excel, y salir")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Medir el tiempo de cada etapa del arranque (no escribe en el Excel)")
+    parser.add_argument('--trace', nargs='?', const=traza_etapas.DESTINO_ESTANDAR, default=None,
+                        metavar='ARCHIVO',
+                        help="Escribir el tiempo, las filas y los bytes de cada etapa como JSON lines "
+                             "(en la salida de errores, o agregadas a ARCHIVO)")
+    args = parser.parse_args()
+
+    if args.verificar:
+        sys.exit(0 if verificar(args.archivo) else 1)
+
+    if args.trace:
+        try:
+            traza_etapas.activar(args.trace, script=os.path.basename(__file__))
+        except (ValueError, OSError) as e:
+            parser.error(f"--trace: {e}")
+
     try:
-        main()
+        if args.profile_startup:
+            perfilar_arranque(args.archivo)
+        else:
+            main(args.archivo, salida=args.salida, memoria_mb=args.memoria)
     except KeyboardInterrupt:
         print("\n\n⚠ Proceso interrumpido por el usuario")
     except Exception as e:
         print(f"\n❌ ERROR INESPERADO: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        traza_etapas.desactivar()
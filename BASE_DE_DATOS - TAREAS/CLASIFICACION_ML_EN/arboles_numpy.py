@@ -0,0 +1,293 @@
+"""
+Modelos de Árboles como Arreglos Numpy
+======================================
+Un Random Forest con 200 árboles de profundidad ilimitada ocupa decenas de MB
+en best_model.pkl, y pickle.load tiene que reconstruir y copiar cada árbol en
+cada ejecución. Aquí los nodos de todos los árboles se guardan en arreglos
+.npy (uno por atributo, con los árboles uno tras otro) que se abren con mmap:
+
+    variable.npy    variable que se compara en cada nodo
+    umbral.npy      umbral de la comparación (X <= umbral va a la izquierda)
+    izquierda.npy   hijo izquierdo de cada nodo (las hojas apuntan a sí mismas)
+    derecha.npy     hijo derecho de cada nodo (las hojas apuntan a sí mismas)
+    valor.npy       valor de cada nodo (predicción o proporción de cada clase)
+    raices.npy      nodo raíz de cada árbol
+    profundidades.npy
+    arboles.json    número de árboles, clases y cómo se combinan los árboles
+
+Abrir el modelo tarda lo mismo sin importar el número de árboles (solo se
+leen las páginas que se usan), y varios procesos en el mismo equipo
+comparten esas páginas en memoria.
+
+La predicción solo usa numpy (no importa sklearn): todas las filas avanzan
+por todos los árboles a la vez, un nivel por iteración, así el número de
+operaciones depende de la profundidad y no del número de árboles.
+
+Uso:
+    arboles = exportar_arboles(best_model, 'pipeline_prediccion_arboles')
+    arboles = cargar_arboles('pipeline_prediccion_arboles')
+    predicciones = arboles.predict(X)
+"""
+
+import json
+import os
+
+import numpy as np
+
+# Modelos de sklearn que se pueden guardar como arreglos
+MODELOS_BOSQUE = {  # un árbol o promedio de árboles
+    'DecisionTreeRegressor', 'DecisionTreeClassifier',
+    'ExtraTreeRegressor', 'ExtraTreeClassifier',
+    'RandomForestRegressor', 'RandomForestClassifier',
+    'ExtraTreesRegressor', 'ExtraTreesClassifier',
+}
+MODELOS_BOOSTING = {  # valor inicial + tasa de aprendizaje * suma de árboles
+    'GradientBoostingRegressor', 'GradientBoostingClassifier',
+}
+
+ARREGLOS = ('variable', 'umbral', 'izquierda', 'derecha', 'valor', 'raices', 'profundidades')
+
+# Pares (árbol, fila) que se recorren a la vez; limita la memoria de cada bloque de filas
+PARES_POR_BLOQUE = 2 ** 20
+
+
+class ArbolesEnArreglos:
+    """Árbol, bosque o gradient boosting de sklearn guardado como arreglos de nodos
+
+    Expone predict (y predict_proba en clasificación) igual que el modelo
+    original, para usarlo dentro de PipelinePrediccion.
+
+    salida = base + factor * suma de las hojas de todos los árboles
+    enlace : None (regresión, o proporciones de clase en bosques),
+             'logistica' o 'softmax' (gradient boosting de clasificación)
+    """
+
+    def __init__(self, variable, umbral, izquierda, derecha, valor, raices,
+                 profundidades, clases=None, base=None, factor=None, enlace=None):
+        self.variable = variable
+        self.umbral = umbral
+        self.izquierda = izquierda
+        self.derecha = derecha
+        self.valor = valor
+        self.raices = raices
+        self.profundidades = profundidades
+        self.classes_ = None if clases is None else np.asarray(clases)
+        self.base = np.zeros(valor.shape[1]) if base is None else np.asarray(base, dtype=np.float64)
+        self.factor = 1.0 / len(raices) if factor is None else float(factor)
+        self.enlace = enlace
+
+    @property
+    def es_clasificacion(self):
+        return self.classes_ is not None
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    def plegar_escalado(self, media, escala):
+        """Árboles equivalentes que reciben los datos sin escalar
+
+        (x - media) / escala <= umbral  equivale a  x <= umbral * escala + media
+        Solo cambian los umbrales; una fila a menos de la precisión float32 de un
+        umbral puede tomar la otra rama.
+        """
+        variable = np.asarray(self.variable)
+        umbral = np.asarray(self.umbral) * escala[variable] + media[variable]
+        return ArbolesEnArreglos(self.variable, umbral, self.izquierda, self.derecha, self.valor,
+                                 self.raices, self.profundidades, clases=self.classes_,
+                                 base=self.base, factor=self.factor, enlace=self.enlace)
+
+    def _sumar_hojas(self, X):
+        """base + factor * suma, sobre todos los árboles, del valor de la hoja de cada fila"""
+
+        # sklearn compara en float32: se usa la misma precisión para obtener las mismas hojas
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_filas, n_columnas = X.shape
+        plano = X.ravel()
+
+        raices = self.raices.astype(np.int32)[:, np.newaxis]
+        profundidad = int(self.profundidades.max()) if self.n_arboles else 0
+        total = np.empty((n_filas, self.valor.shape[1]), dtype=np.float64)
+
+        bloque = max(1, PARES_POR_BLOQUE // max(1, self.n_arboles))
+        for inicio in range(0, n_filas, bloque):
+            fin = min(n_filas, inicio + bloque)
+
+            # nodos[t, i]: nodo en el que está la fila i dentro del árbol t
+            nodos = np.repeat(raices, fin - inicio, axis=1)
+            desplazamiento = np.arange(inicio, fin, dtype=np.intp) * n_columnas
+
+            # Un nivel por iteración; las filas que llegan a una hoja se quedan en ella
+            for _ in range(profundidad):
+                x = np.take(plano, np.take(self.variable, nodos) + desplazamiento)
+                izquierda = x <= np.take(self.umbral, nodos)
+                nodos = np.where(izquierda, np.take(self.izquierda, nodos),
+                                 np.take(self.derecha, nodos))
+
+            total[inicio:fin] = np.take(self.valor, nodos, axis=0).sum(axis=0)
+
+        total *= self.factor
+        total += self.base
+        return total
+
+    def predict(self, X):
+        if self.es_clasificacion:
+            return self.classes_[self.predict_proba(X).argmax(axis=1)]
+        return self._sumar_hojas(X)[:, 0]
+
+    def predict_proba(self, X):
+        if not self.es_clasificacion:
+            raise AttributeError("predict_proba solo está disponible en clasificación")
+
+        salida = self._sumar_hojas(X)
+        if self.enlace == 'logistica':
+            positiva = 1.0 / (1.0 + np.exp(-salida[:, 0]))
+            return np.column_stack([1.0 - positiva, positiva])
+        if self.enlace == 'softmax':
+            salida = np.exp(salida - salida.max(axis=1, keepdims=True))
+            return salida / salida.sum(axis=1, keepdims=True)
+        return salida
+
+
+def es_modelo_arboles(modelo):
+    """True si el modelo es un árbol, bosque o gradient boosting de sklearn
+
+    En los notebooks estos modelos se entrenan con X_train sin escalar.
+    """
+    if isinstance(modelo, ArbolesEnArreglos):
+        return True
+    modelo = getattr(modelo, 'best_estimator_', modelo)
+    return type(modelo).__name__ in MODELOS_BOSQUE | MODELOS_BOOSTING
+
+
+def _arboles_de(modelo):
+    """(modelo, [(árbol sklearn Tree, columna de salida)], combinación), o None si
+    el modelo no es soportado
+
+    combinación: dict con base, factor y enlace (ver ArbolesEnArreglos)
+    """
+
+    modelo = getattr(modelo, 'best_estimator_', modelo)  # GridSearchCV
+    nombre = type(modelo).__name__
+    if getattr(modelo, 'n_outputs_', 1) != 1:
+        return None
+
+    if nombre in MODELOS_BOSQUE:
+        estimadores = getattr(modelo, 'estimators_', None) or [modelo]
+        arboles = [(estimador.tree_, None) for estimador in estimadores]
+        return modelo, arboles, {}
+
+    if nombre in MODELOS_BOOSTING:
+        if getattr(modelo, 'loss', None) == 'exponential':
+            return None
+        etapas = modelo.estimators_  # (n_etapas, n_salidas)
+        arboles = [(estimador.tree_, k) for etapa in etapas for k, estimador in enumerate(etapa)]
+        inicial = np.zeros((1, modelo.n_features_in_), dtype=np.float32)
+        base = np.asarray(modelo._raw_predict_init(inicial), dtype=np.float64)[0]
+        enlace = None
+        if hasattr(modelo, 'classes_'):
+            enlace = 'logistica' if etapas.shape[1] == 1 else 'softmax'
+        return modelo, arboles, {'base': base, 'factor': modelo.learning_rate, 'enlace': enlace}
+
+    return None
+
+
+def convertir_arboles(modelo):
+    """ArbolesEnArreglos (en memoria) a partir de un modelo de sklearn, o None"""
+
+    if isinstance(modelo, ArbolesEnArreglos):
+        return modelo
+
+    resultado = _arboles_de(modelo)
+    if resultado is None:
+        return None
+    modelo, arboles, combinacion = resultado
+
+    clasificacion = hasattr(modelo, 'classes_')
+    boosting = 'enlace' in combinacion
+    n_salidas = len(combinacion['base']) if boosting else None
+
+    inicio = 0
+    partes = {nombre: [] for nombre in ARREGLOS}
+
+    for arbol, columna in arboles:
+        n = arbol.node_count
+        nodos = np.arange(inicio, inicio + n, dtype=np.int32)
+        hoja = arbol.children_left < 0
+
+        partes['variable'].append(np.where(hoja, 0, arbol.feature).astype(np.int32))
+        partes['umbral'].append(np.where(hoja, 0.0, arbol.threshold))
+        partes['izquierda'].append(np.where(hoja, nodos, arbol.children_left + inicio).astype(np.int32))
+        partes['derecha'].append(np.where(hoja, nodos, arbol.children_right + inicio).astype(np.int32))
+
+        if boosting:
+            # Cada árbol de gradient boosting suma a una sola salida (una por clase)
+            valor = np.zeros((n, n_salidas))
+            valor[:, columna] = arbol.value[:, 0, 0]
+        else:
+            valor = arbol.value[:, 0, :].astype(np.float64)
+            if clasificacion:
+                # Proporción de cada clase en la hoja (igual que predict_proba de cada árbol)
+                valor = valor / valor.sum(axis=1, keepdims=True)
+        partes['valor'].append(valor)
+
+        partes['raices'].append(inicio)
+        partes['profundidades'].append(arbol.max_depth)
+        inicio += n
+
+    arreglos = {
+        nombre: (np.concatenate(valores) if nombre not in ('raices', 'profundidades')
+                 else np.array(valores, dtype=np.int32))
+        for nombre, valores in partes.items()
+    }
+    arreglos['valor'] = np.ascontiguousarray(arreglos['valor'])
+
+    return ArbolesEnArreglos(**arreglos, clases=modelo.classes_ if clasificacion else None,
+                             **combinacion)
+
+
+def exportar_arboles(modelo, carpeta):
+    """Guarda el modelo como arreglos .npy en carpeta. Retorna ArbolesEnArreglos,
+    o None si el modelo no es un árbol, bosque o boosting soportado (no se escribe nada)
+    """
+
+    arboles = convertir_arboles(modelo)
+    if arboles is None:
+        return None
+
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre in ARREGLOS:
+        # Escribir a un temporal y reemplazar: un predictor en ejecución que tenga
+        # abierto el archivo anterior con mmap sigue viendo el modelo anterior completo
+        destino = os.path.join(carpeta, f'{nombre}.npy')
+        temporal = destino + '.tmp'
+        with open(temporal, 'wb') as f:
+            np.save(f, getattr(arboles, nombre))
+        os.replace(temporal, destino)
+
+    meta = {
+        'n_arboles': arboles.n_arboles,
+        'clases': None if arboles.classes_ is None else arboles.classes_.tolist(),
+        'base': arboles.base.tolist(),
+        'factor': arboles.factor,
+        'enlace': arboles.enlace,
+    }
+    with open(os.path.join(carpeta, 'arboles.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    return arboles
+
+
+def cargar_arboles(carpeta):
+    """Abre con mmap (solo lectura) los arreglos guardados con exportar_arboles"""
+
+    with open(os.path.join(carpeta, 'arboles.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+
+    # np.asarray: vista ndarray sobre el mmap (sin copiar los datos)
+    arreglos = {
+        nombre: np.asarray(np.load(os.path.join(carpeta, f'{nombre}.npy'), mmap_mode='r'))
+        for nombre in ARREGLOS
+    }
+    return ArbolesEnArreglos(**arreglos, clases=meta['clases'], base=meta.get('base'),
+                             factor=meta.get('factor'), enlace=meta.get('enlace'))
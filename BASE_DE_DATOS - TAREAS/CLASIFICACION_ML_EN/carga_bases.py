@@ -0,0 +1,303 @@
+"""
+Carga Rápida de las Bases de Datos con Esquema
+==============================================
+pd.read_csv y pd.read_excel sin argumentos adivinan el tipo de cada columna
+en cada lectura: las fechas quedan como texto y cada celda de texto es un
+objeto de Python. Con los volúmenes de producción eso hace la carga lenta y
+el DataFrame muy pesado en memoria.
+
+Este módulo guarda el esquema de cada base (ESQUEMAS): el tipo de cada
+columna, las categorías conocidas (Región, Producto, Canal_venta, Tipo_suelo,
+...) y el formato de las fechas (Fecha, Fecha_medición). cargar_base lo usa
+para leer:
+
+    CSV   con el lector multihilo de pyarrow (si no está instalado, con el
+          lector C de pandas), convirtiendo cada columna una sola vez
+    Excel (las versiones .xlsx con la hoja 'Datos Limpios' / 'Hoja1')
+
+Las columnas categóricas quedan con dtype 'category' (un código int8 por
+celda en lugar de un objeto de texto), con las categorías en orden
+alfabético, igual que LabelEncoder en los notebooks.
+
+Uso:
+    from carga_bases import cargar_base
+    df = cargar_base('Base_Ventas_Insumos_Agro.csv')
+    df = cargar_base('Base_Prediccion_Biomasa_Outliers1.xlsx')   # hoja 'Datos Limpios'
+
+    python carga_bases.py Base_Ventas_Insumos_Agro.csv --comparar  (tiempo y memoria contra pandas)
+
+Nota: las columnas 'category' no aparecen en df.select_dtypes(include=['object']);
+en los notebooks usa select_dtypes(include=['object', 'category']).
+"""
+
+import argparse
+import fnmatch
+import os
+import time
+
+_CATEGORIAS_BIOMASA = {
+    'Tipo_suelo': ['Arcilloso', 'Arenoso', 'Franco'],
+}
+
+_TIPOS_BIOMASA = {
+    'NDVI': 'float64',
+    'NDRE': 'float64',
+    'Precipitación': 'float64',
+    'Temperatura_media': 'float64',
+    'Días_sin_lluvia': 'int16',
+    'Biomasa_real': 'float64',
+}
+
+# Nombre -> esquema. archivos: patrones del nombre del archivo; hoja: hoja del
+# Excel; fechas: {columna: formato}; categorias: {columna: [valores] o None
+# (categorías tomadas de los datos)}; tipos: {columna: dtype}
+ESQUEMAS = {
+    'biomasa': {
+        'archivos': ['Base_Prediccion_Biomasa*.csv'],
+        'fechas': {'Fecha_medición': '%Y-%m-%d'},
+        'categorias': {'ID_parcela': None, **_CATEGORIAS_BIOMASA,
+                       'Categoría_biomasa': ['Alta', 'Baja', 'Media']},
+        'tipos': _TIPOS_BIOMASA,
+    },
+    'biomasa_limpia': {
+        'archivos': ['Base_Prediccion_Biomasa*.xlsx'],
+        'hoja': 'Datos Limpios',
+        'fechas': {'Fecha de Medicion': None},
+        'categorias': {'ID_parcela': None, **_CATEGORIAS_BIOMASA,
+                       'Categoria de Biomasa': ['Alta', 'Baja', 'Media'],
+                       'Validacion': ['NO VALIDO', 'VALIDO']},
+        'tipos': {
+            'NDVI Outlier Manual': 'float64',
+            'NDRE Outlier Manual': 'float64',
+            'PRECIPITACION Outlier Manual': 'float64',
+            'DIAS SIN LLUVIA Estadistica': 'float64',  # tiene celdas vacías
+            'Biomasa_real Estadistica': 'float64',
+        },
+    },
+    'ventas_insumos': {
+        'archivos': ['Base_Ventas_Insumos_Agro*.csv'],
+        'fechas': {'Fecha': '%Y-%m-%d'},
+        'categorias': {
+            'Región': ['Amazonía', 'Andina', 'Caribe', 'Orinoquía', 'Pacífica'],
+            'Producto': ['Fertilizante', 'Herbicida', 'Insecticida', 'Semilla', 'Suplemento'],
+            'Cliente': ['Asociación', 'Distribuidor', 'Finca', 'Productor'],
+            'Tipo_cultivo': ['Arroz', 'Caña', 'Maíz', 'Palma', 'Pastos'],
+            'Canal_venta': ['Distribuidor', 'En línea', 'Tienda'],
+        },
+        'tipos': {
+            'Cantidad_vendida': 'int32',
+            'Precio_unitario': 'float64',
+            'Costo': 'float64',
+            'Mes': 'int8',
+            'Total_venta': 'float64',
+        },
+    },
+    'ventas_insumos_limpia': {
+        'archivos': ['Base_Ventas_Insumos_Agro*.xlsx'],
+        'hoja': 'Hoja1',
+        'fechas': {'Fecha': None},
+        'categorias': {
+            'Region': ['Amazonia', 'Andina', 'Caribe', 'Orinoquia', 'Pacifica'],
+            'Producto': ['Fertilizante', 'Herbicida', 'Insecticida', 'Semilla', 'Suplemento'],
+            'Cliente': ['Asociacion', 'Distribuidor', 'Finca', 'Productor'],
+            'Tipo_cultivo': ['Arroz', 'Caña', 'Maiz', 'Palma', 'Pastos'],
+            'Canal_venta': ['Distribuidor', 'En Linea', 'Tienda'],
+        },
+        'tipos': {
+            'Cantidad_vendida': 'int32',
+            'Precio_unitario': 'float64',
+            'Costo': 'float64',
+            'Mes': 'int8',
+            'Total_venta': 'float64',
+        },
+    },
+    'paneles_solares': {
+        'archivos': ['Paneles_solares*.xlsx'],
+        'hoja': 'Datos Limpios',
+        'fechas': {},
+        'categorias': {
+            'ID_Cliente': None,
+            'Sector': ['Comercial', 'Industrial', 'Residencial'],
+            'Ciudad': ['Cereté', 'Lorica', 'Montería', 'Planeta Rica', 'Sahagún'],
+            'Puede_Pagar_Solar': ['No', 'Sí'],
+            'Validar': ['NO VALIDO', 'VALIDO'],
+        },
+        'tipos': {
+            'Consumo_kWh_Mensual': 'float64',
+            'Estrato': 'int8',
+            'Area_m2': 'float64',
+            'Factura_Mensual_COP': 'float64',
+        },
+    },
+}
+
+
+def esquema_para(filename):
+    """(nombre, esquema) que corresponde al archivo según su nombre, o (None, None)"""
+
+    nombre_archivo = os.path.basename(filename)
+    for nombre, esquema in ESQUEMAS.items():
+        if any(fnmatch.fnmatch(nombre_archivo, patron) for patron in esquema['archivos']):
+            return nombre, esquema
+    return None, None
+
+
+def _leer_csv_pyarrow(filename, esquema, columnas):
+    """CSV con el lector multihilo de pyarrow; cada columna se convierte una sola vez"""
+
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    tipos = {col: pa.from_numpy_dtype(tipo) for col, tipo in esquema['tipos'].items()}
+    tipos.update({col: pa.timestamp('us') for col in esquema['fechas']})
+    tipos.update({col: pa.dictionary(pa.int32(), pa.string()) for col in esquema['categorias']})
+
+    formatos = sorted({formato for formato in esquema['fechas'].values() if formato})
+    opciones = pacsv.ConvertOptions(column_types=tipos, timestamp_parsers=formatos or None,
+                                    include_columns=columnas)
+    tabla = pacsv.read_csv(filename, read_options=pacsv.ReadOptions(use_threads=True),
+                           convert_options=opciones)
+    return tabla.to_pandas()
+
+
+def _leer_csv_pandas(filename, esquema, columnas):
+    """CSV con el lector C de pandas (cuando pyarrow no está instalado)"""
+
+    import pandas as pd
+
+    # Los enteros se leen como float y se convierten al final (pueden traer vacíos)
+    tipos = {col: 'float64' if tipo.startswith('int') else tipo
+             for col, tipo in esquema['tipos'].items()}
+    tipos.update({col: 'category' for col in esquema['categorias']})
+
+    df = pd.read_csv(filename, dtype=tipos, usecols=columnas)
+    for col, formato in esquema['fechas'].items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=formato)
+    return df
+
+
+def _aplicar_esquema(df, esquema, detalle=True):
+    """Tipos, fechas y categorías del esquema sobre un DataFrame ya leído"""
+
+    import pandas as pd
+
+    for col, tipo in esquema['tipos'].items():
+        if col not in df.columns or df[col].dtype == tipo:
+            continue
+        if tipo.startswith('int') and df[col].isna().any():
+            # Un entero con celdas vacías queda como float (NaN)
+            df[col] = df[col].astype('float64')
+        else:
+            df[col] = df[col].astype(tipo)
+
+    for col, formato in esquema['fechas'].items():
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=formato)
+
+    for col, categorias in esquema['categorias'].items():
+        if col not in df.columns:
+            continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        actuales = df[col].cat.categories
+        if categorias is None:
+            categorias = sorted(actuales)
+        else:
+            nuevas = sorted(set(actuales) - set(categorias))
+            if nuevas and detalle:
+                print(f"⚠ {col}: valores que no están en el esquema: {', '.join(map(str, nuevas))}")
+            categorias = list(categorias) + nuevas
+        df[col] = df[col].cat.set_categories(categorias)
+
+    return df
+
+
+def cargar_base(filename, columnas=None, hoja=None, detalle=True):
+    """DataFrame de una de las bases con los tipos de su esquema
+
+    columnas : lista opcional de columnas a leer (en un CSV las demás no se convierten)
+    hoja : hoja del Excel; por defecto la del esquema
+    Si el archivo no tiene esquema se lee con pandas sin cambios.
+    """
+
+    import pandas as pd
+
+    nombre, esquema = esquema_para(filename)
+    es_csv = filename.lower().endswith('.csv')
+
+    if esquema is None:
+        if detalle:
+            print(f"⚠ {os.path.basename(filename)} no tiene esquema registrado: lectura estándar de pandas")
+        if es_csv:
+            return pd.read_csv(filename, usecols=columnas)
+        return pd.read_excel(filename, sheet_name=hoja or 0, usecols=columnas)
+
+    if es_csv:
+        try:
+            df = _leer_csv_pyarrow(filename, esquema, columnas)
+        except ImportError:
+            df = _leer_csv_pandas(filename, esquema, columnas)
+    else:
+        df = pd.read_excel(filename, sheet_name=hoja or esquema.get('hoja', 0), usecols=columnas)
+
+    return _aplicar_esquema(df, esquema, detalle=detalle)
+
+
+def comparar_carga(filename, repeticiones=3):
+    """Tiempo y memoria de cargar_base contra la lectura estándar de pandas"""
+
+    import pandas as pd
+
+    def medir(funcion):
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            df = funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+        return mejor, df.memory_usage(deep=True).sum() / 1e6
+
+    if filename.lower().endswith('.csv'):
+        estandar = lambda: pd.read_csv(filename)
+    else:
+        estandar = lambda: pd.read_excel(filename, sheet_name=esquema_para(filename)[1].get('hoja', 0))
+
+    t_estandar, mb_estandar = medir(estandar)
+    t_esquema, mb_esquema = medir(lambda: cargar_base(filename, detalle=False))
+
+    print("\n" + "=" * 70)
+    print("COMPARACIÓN CON LA LECTURA ESTÁNDAR DE PANDAS")
+    print("=" * 70)
+    print(f"  {'':<22}{'tiempo':>12}{'memoria':>14}")
+    print(f"  {'pandas (inferencia)':<22}{t_estandar:>10.3f} s{mb_estandar:>11.1f} MB")
+    print(f"  {'cargar_base (esquema)':<22}{t_esquema:>10.3f} s{mb_esquema:>11.1f} MB")
+    print(f"\n  ⚡ Tiempo: {t_estandar / t_esquema:.1f}x   Memoria: {mb_estandar / mb_esquema:.1f}x menos")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga una base de datos con su esquema")
+    parser.add_argument('archivo', help="CSV o Excel de una de las bases")
+    parser.add_argument('--comparar', action='store_true',
+                        help="Comparar tiempo y memoria con la lectura estándar de pandas")
+    args = parser.parse_args()
+
+    nombre, esquema = esquema_para(args.archivo)
+    if esquema is None:
+        print(f"❌ ERROR: No hay esquema para {args.archivo}")
+        print(f"   Esquemas disponibles: {', '.join(ESQUEMAS)}")
+        raise SystemExit(1)
+
+    inicio = time.perf_counter()
+    df = cargar_base(args.archivo)
+    segundos = time.perf_counter() - inicio
+
+    print("=" * 70)
+    print(f"BASE: {os.path.basename(args.archivo)} (esquema '{nombre}')")
+    print("=" * 70)
+    print(f"✓ {len(df)} filas x {len(df.columns)} columnas en {segundos:.3f} s")
+    print(f"✓ Memoria: {df.memory_usage(deep=True).sum() / 1e6:.2f} MB\n")
+    for col, tipo in df.dtypes.items():
+        print(f"  {col:<32} {tipo}")
+
+    if args.comparar:
+        comparar_carga(args.archivo)
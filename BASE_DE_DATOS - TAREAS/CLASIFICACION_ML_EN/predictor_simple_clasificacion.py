@@ -4,16 +4,139 @@ CLASIFICADOR SIMPLIFICADO PARA EXCEL
 Script simplificado para clasificar biomasa desde Excel sin complicaciones.
 
 Uso: python predictor_simple_clasificacion.py
+     python predictor_simple_clasificacion.py --profile-startup   (tiempos del arranque)
+
+Desde Python, el modelo de cada carpeta se carga una sola vez por proceso
+(ver obtener_modelo): llamar a clasificar_valores_directos en un ciclo no
+vuelve a leer los archivos del modelo en cada llamada. Para muchos registros,
+clasificar_lote los clasifica todos juntos:
+    etiquetas, confianzas = clasificar_lote(registros)
+    python predictor_simple_clasificacion.py --benchmark 10000   (compara ambos caminos)
 """
 
+import time
+_INICIO = time.perf_counter()
+
 import pickle
 import json
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from datetime import datetime
+import argparse
 import os
+import threading
+from collections import OrderedDict
+
+# Modelos que se mantienen cargados a la vez (uno por carpeta de proyecto)
+MAX_MODELOS_CARGADOS = 4
+
+# Si cambia alguno de estos archivos (reentrenamiento) el modelo se vuelve a cargar
+ARCHIVOS_MODELO = ['pipeline_clasificacion.pkl', 'pipeline_clasificacion_arboles',
+                   'best_model_clasificacion.pkl', 'scaler_clasificacion.pkl',
+                   'label_encoder_clasificacion.pkl', 'model_info_clasificacion.json']
+
+# carpeta -> (firma, info, pipeline); el usado más recientemente queda al final
+_MODELOS_CARGADOS = OrderedDict()
+# Protege _MODELOS_CARGADOS y _LOCKS_CARPETA; la carga en sí va con el lock de su carpeta
+_LOCK_MODELOS = threading.Lock()
+_LOCKS_CARPETA = {}
+
+
+def archivos_necesarios(archivo_excel):
+    """Archivos que necesita la clasificación (nombre -> archivo)"""
+
+    if os.path.exists('pipeline_clasificacion.pkl'):
+        return {
+            'pipeline': 'pipeline_clasificacion.pkl',
+            'info': 'model_info_clasificacion.json',
+            'excel': archivo_excel
+        }
+    return {
+        'modelo': 'best_model_clasificacion.pkl',
+        'scaler': 'scaler_clasificacion.pkl',
+        'encoder': 'label_encoder_clasificacion.pkl',
+        'info': 'model_info_clasificacion.json',
+        'excel': archivo_excel
+    }
+
+
+def cargar_pipeline_clasificacion(info, carpeta='.'):
+    """Pipeline de clasificación: pipeline_clasificacion.pkl o los archivos separados"""
+
+    from pipeline_prediccion import PipelinePrediccion, cargar_pipeline
+
+    if os.path.exists(os.path.join(carpeta, 'pipeline_clasificacion.pkl')):
+        return cargar_pipeline(os.path.join(carpeta, 'pipeline_clasificacion.pkl'))
+
+    with open(os.path.join(carpeta, 'best_model_clasificacion.pkl'), 'rb') as f:
+        modelo = pickle.load(f)
+
+    with open(os.path.join(carpeta, 'scaler_clasificacion.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+
+    with open(os.path.join(carpeta, 'label_encoder_clasificacion.pkl'), 'rb') as f:
+        le_target = pickle.load(f)
+
+    return PipelinePrediccion.desde_artefactos(modelo, scaler, info, info['variables_predictoras'],
+                                               le_target=le_target,
+                                               usa_escalado=info.get('usa_escalado', True))
+
+
+def _firma_modelo(carpeta):
+    """Tamaño y fecha de modificación de los archivos del modelo (detecta reentrenamientos)"""
+
+    firma = []
+    for nombre in ARCHIVOS_MODELO:
+        ruta = os.path.join(carpeta, nombre)
+        if os.path.isdir(ruta):
+            rutas = sorted(os.path.join(ruta, archivo) for archivo in os.listdir(ruta))
+        else:
+            rutas = [ruta]
+        for archivo in rutas:
+            try:
+                estado = os.stat(archivo)
+                firma.append((archivo, estado.st_size, estado.st_mtime_ns))
+            except OSError:
+                firma.append((archivo, None, None))
+    return tuple(firma)
+
+
+def obtener_modelo(carpeta='.'):
+    """(info, pipeline) del modelo de una carpeta, cargados una sola vez por proceso
+
+    En cada llamada solo se revisa la fecha y el tamaño de los archivos del
+    modelo: si cambiaron, se vuelve a cargar. Si hay más de MAX_MODELOS_CARGADOS
+    carpetas cargadas, se descarta la usada hace más tiempo.
+    """
+
+    carpeta = os.path.abspath(carpeta)
+    firma = _firma_modelo(carpeta)
+
+    with _LOCK_MODELOS:
+        cargado = _MODELOS_CARGADOS.get(carpeta)
+        if cargado is not None and cargado[0] == firma:
+            _MODELOS_CARGADOS.move_to_end(carpeta)
+            return cargado[1], cargado[2]
+        lock_carpeta = _LOCKS_CARPETA.setdefault(carpeta, threading.Lock())
+
+    # Cargar una carpeta no bloquea a quienes usan las demás; dos llamadas a
+    # la misma carpeta esperan y la segunda toma el modelo que cargó la primera
+    with lock_carpeta:
+        with _LOCK_MODELOS:
+            cargado = _MODELOS_CARGADOS.get(carpeta)
+            if cargado is not None and cargado[0] == firma:
+                _MODELOS_CARGADOS.move_to_end(carpeta)
+                return cargado[1], cargado[2]
+
+        with open(os.path.join(carpeta, 'model_info_clasificacion.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        pipeline = cargar_pipeline_clasificacion(info, carpeta)
+
+        with _LOCK_MODELOS:
+            _MODELOS_CARGADOS[carpeta] = (firma, info, pipeline)
+            _MODELOS_CARGADOS.move_to_end(carpeta)
+            while len(_MODELOS_CARGADOS) > MAX_MODELOS_CARGADOS:
+                _MODELOS_CARGADOS.popitem(last=False)
+
+    return info, pipeline
 
 
 def clasificar_biomasa_simple(archivo_excel='Plantilla_Clasificacion_Biomasa.xlsx'):
@@ -23,14 +146,8 @@ def clasificar_biomasa_simple(archivo_excel='Plantilla_Clasificacion_Biomasa.xls
     print("     CLASIFICADOR DE BIOMASA - VERSIÓN SIMPLE")
     print("🔍" * 35 + "\n")
 
-    # Verificar archivos
-    archivos = {
-        'modelo': 'best_model_clasificacion.pkl',
-        'scaler': 'scaler_clasificacion.pkl',
-        'encoder': 'label_encoder_clasificacion.pkl',
-        'info': 'model_info_clasificacion.json',
-        'excel': archivo_excel
-    }
+    # Verificar archivos (antes de importar pandas y openpyxl)
+    archivos = archivos_necesarios(archivo_excel)
 
     for nombre, archivo in archivos.items():
         if not os.path.exists(archivo):
@@ -41,22 +158,17 @@ def clasificar_biomasa_simple(archivo_excel='Plantilla_Clasificacion_Biomasa.xls
                 print(f"\n💡 Ejecuta: python 2_crear_plantilla_excel_clasificacion.py")
             return
 
+    import pandas as pd
+    import numpy as np
+    from openpyxl import load_workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
     print("📋 Cargando modelo...")
 
     # Cargar modelo
-    with open('best_model_clasificacion.pkl', 'rb') as f:
-        modelo = pickle.load(f)
-
-    with open('scaler_clasificacion.pkl', 'rb') as f:
-        scaler = pickle.load(f)
+    info, pipeline = obtener_modelo()
 
-    with open('label_encoder_clasificacion.pkl', 'rb') as f:
-        le_target = pickle.load(f)
-
-    with open('model_info_clasificacion.json', 'r') as f:
-        info = json.load(f)
-
-    features = info['variables_predictoras']
+    features = pipeline.columnas
     classes = info['clases']
 
     print(f"   ✓ Modelo: {info['modelo']}")
@@ -78,19 +190,11 @@ def clasificar_biomasa_simple(archivo_excel='Plantilla_Clasificacion_Biomasa.xls
 
     # Preprocesar
     print("\n🔧 Preprocesando...")
-    X = df_valido[features].copy()
-
-    if 'Tipo_suelo' in X.columns:
-        tipo_suelo_map = {'Arenoso': 0, 'Arcilloso': 1, 'Franco': 2}
-        X['Tipo_suelo'] = X['Tipo_suelo'].map(tipo_suelo_map)
-        X['Tipo_suelo'].fillna(2, inplace=True)
-
-    X_scaled = scaler.transform(X)
+    X_scaled = pipeline.transformar(df_valido)
 
     # Clasificar
     print("\n🎯 Clasificando...")
-    predicciones_encoded = modelo.predict(X_scaled)
-    predicciones = le_target.inverse_transform(predicciones_encoded)
+    predicciones = pipeline.predecir_matriz(X_scaled)
 
     unique, counts = np.unique(predicciones, return_counts=True)
     print(f"\n   📊 Resultados:")
@@ -156,30 +260,24 @@ def clasificar_biomasa_simple(archivo_excel='Plantilla_Clasificacion_Biomasa.xls
     print("\n" + "=" * 70 + "\n")
 
 
-def clasificar_valores_directos(**kwargs):
-    """Clasificar biomasa con valores específicos desde Python"""
+def clasificar_valores_directos(carpeta_modelo='.', **kwargs):
+    """Clasificar biomasa con valores específicos desde Python
+
+    carpeta_modelo : carpeta con los archivos del modelo (por defecto la actual);
+                     el modelo se carga una sola vez (ver obtener_modelo)
+    """
 
     print("\n🎯 CLASIFICACIÓN DIRECTA DE BIOMASA")
     print("=" * 50)
 
     # Cargar modelo
-    if not os.path.exists('best_model_clasificacion.pkl'):
+    if not (os.path.exists(os.path.join(carpeta_modelo, 'pipeline_clasificacion.pkl')) or
+            os.path.exists(os.path.join(carpeta_modelo, 'best_model_clasificacion.pkl'))):
         print("❌ Error: Ejecuta primero el script 1")
         return None
 
-    with open('best_model_clasificacion.pkl', 'rb') as f:
-        modelo = pickle.load(f)
-
-    with open('scaler_clasificacion.pkl', 'rb') as f:
-        scaler = pickle.load(f)
-
-    with open('label_encoder_clasificacion.pkl', 'rb') as f:
-        le_target = pickle.load(f)
-
-    with open('model_info_clasificacion.json', 'r') as f:
-        info = json.load(f)
-
-    features = info['variables_predictoras']
+    info, pipeline = obtener_modelo(carpeta_modelo)
+    features = pipeline.columnas
 
     # Verificar valores
     faltantes = [f for f in features if f not in kwargs]
@@ -188,18 +286,12 @@ def clasificar_valores_directos(**kwargs):
         return None
 
     # Crear DataFrame
+    import pandas as pd
     data = {f: [kwargs[f]] for f in features}
     df = pd.DataFrame(data)
 
-    # Codificar
-    if 'Tipo_suelo' in df.columns:
-        tipo_suelo_map = {'Arenoso': 0, 'Arcilloso': 1, 'Franco': 2}
-        df['Tipo_suelo'] = df['Tipo_suelo'].map(tipo_suelo_map)
-
-    # Clasificar
-    X_scaled = scaler.transform(df)
-    prediccion_encoded = modelo.predict(X_scaled)[0]
-    prediccion = le_target.inverse_transform([prediccion_encoded])[0]
+    # Codificar, escalar y clasificar
+    prediccion = pipeline.predecir(df)[0]
 
     print("\n📊 Valores de entrada:")
     for feature, valor in kwargs.items():
@@ -211,9 +303,169 @@ def clasificar_valores_directos(**kwargs):
     return prediccion
 
 
+def clasificar_lote(registros, carpeta_modelo='.'):
+    """Clasifica muchos registros a la vez: (etiquetas, confianzas)
+
+    registros : lista de dicts {variable: valor}, DataFrame con las variables
+                predictoras, o array numpy 2D con las columnas en el orden de
+                las variables predictoras (dtype object si hay columnas de texto)
+
+    Codifica, escala y clasifica todos los registros en una sola pasada; la
+    etiqueta es la clase de mayor probabilidad y la confianza esa probabilidad
+    (NaN si el modelo no calcula probabilidades). Los valores que falten en
+    un registro se imputan igual que en el Excel. Retorna None si hay un error.
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    if not (os.path.exists(os.path.join(carpeta_modelo, 'pipeline_clasificacion.pkl')) or
+            os.path.exists(os.path.join(carpeta_modelo, 'best_model_clasificacion.pkl'))):
+        print("❌ Error: Ejecuta primero el script 1")
+        return None
+
+    info, pipeline = obtener_modelo(carpeta_modelo)
+    features = pipeline.columnas
+
+    if isinstance(registros, pd.DataFrame):
+        df = registros
+    elif isinstance(registros, np.ndarray):
+        if registros.ndim != 2 or registros.shape[1] != len(features):
+            print(f"❌ El array debe tener {len(features)} columnas: {', '.join(features)}")
+            return None
+        # Las columnas numéricas de un array object pasan a float (si no, se codificarían como texto)
+        df = pd.DataFrame(registros, columns=features).infer_objects()
+    else:
+        registros = list(registros)
+        df = pd.DataFrame.from_records(registros) if registros else pd.DataFrame(columns=features)
+
+    faltantes = [f for f in features if f not in df.columns]
+    if faltantes:
+        print(f"❌ Faltan valores para: {', '.join(faltantes)}")
+        return None
+
+    if len(df) == 0:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.float64)
+
+    # Codificar, escalar y clasificar todo el lote (una sola pasada del modelo)
+    etiquetas, probas = pipeline.predecir_matriz_proba(pipeline.transformar(df))
+    if probas is None:
+        confianzas = np.full(len(df), np.nan)
+    else:
+        confianzas = probas.max(axis=1)
+
+    return etiquetas, confianzas
+
+
+def comparar_rendimiento(n_registros=10000, archivo_excel='Plantilla_Clasificacion_Biomasa.xlsx',
+                         n_individuales=500):
+    """Registros por segundo de clasificar_valores_directos (uno a uno) y de clasificar_lote
+
+    Usa las filas con datos del Excel (repetidas hasta n_registros). El camino
+    uno a uno se mide con n_individuales registros para no tardar demasiado.
+    """
+
+    import contextlib
+    import io
+    import numpy as np
+    import pandas as pd
+
+    print("\n" + "=" * 70)
+    print("RENDIMIENTO: REGISTRO POR REGISTRO vs LOTE")
+    print("=" * 70)
+
+    info, pipeline = obtener_modelo()
+    features = pipeline.columnas
+
+    df = pd.read_excel(archivo_excel, sheet_name='Datos para Clasificación', header=4)
+    df = df.loc[df[features].notna().all(axis=1), features]
+    if len(df) == 0:
+        print("\n   ⚠️  NO HAY DATOS EN EL EXCEL PARA LA PRUEBA")
+        return None
+
+    repeticiones = -(-n_registros // len(df))
+    registros = pd.concat([df] * repeticiones, ignore_index=True).iloc[:n_registros]
+    registros = registros.to_dict('records')
+    n_individuales = min(n_individuales, len(registros))
+
+    # Uno a uno (la salida por pantalla de cada llamada se descarta)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        individuales = [clasificar_valores_directos(**r) for r in registros[:n_individuales]]
+    segundos_individual = (time.perf_counter() - inicio) / n_individuales
+
+    # Todo el lote
+    inicio = time.perf_counter()
+    etiquetas, confianzas = clasificar_lote(registros)
+    segundos_lote = (time.perf_counter() - inicio) / len(registros)
+
+    coinciden = np.array_equal(np.asarray(individuales, dtype=object),
+                               np.asarray(etiquetas[:n_individuales], dtype=object))
+
+    print(f"   Modelo: {info['modelo']}")
+    print(f"   {'Camino':<28} {'Registros':>10} {'ms/registro':>12} {'registros/s':>12}")
+    print(f"   {'clasificar_valores_directos':<28} {n_individuales:>10} "
+          f"{segundos_individual * 1000:>12.3f} {1 / segundos_individual:>12.0f}")
+    print(f"   {'clasificar_lote':<28} {len(registros):>10} "
+          f"{segundos_lote * 1000:>12.4f} {1 / segundos_lote:>12.0f}")
+    print(f"\n   ✓ El lote es {segundos_individual / segundos_lote:.0f} veces más rápido por registro")
+    print(f"   {'✓' if coinciden else '❌'} Mismas clases en ambos caminos: {'sí' if coinciden else 'no'}")
+    print("=" * 70 + "\n")
+
+    return segundos_individual, segundos_lote
+
+
+def perfilar_arranque(archivo_excel='Plantilla_Clasificacion_Biomasa.xlsx', filas_prueba=10):
+    """Tiempo de cada etapa del arranque (--profile-startup); no escribe en el Excel"""
+
+    from perfil_arranque import PerfilArranque, PRESUPUESTO_VERIFICACION, PRESUPUESTO_10_FILAS
+
+    perfil = PerfilArranque(_INICIO)
+
+    with perfil.etapa('verificar archivos'):
+        faltantes = [a for a in archivos_necesarios(archivo_excel).values() if not os.path.exists(a)]
+    perfil.hito('verificar archivos y salir', PRESUPUESTO_VERIFICACION)
+
+    if not faltantes:
+        for modulo in ('numpy', 'pandas', 'openpyxl', 'pipeline_prediccion'):
+            perfil.importar(modulo)
+
+        import pandas as pd
+
+        with perfil.etapa('cargar modelo (artefactos)'):
+            info, pipeline = obtener_modelo()
+        with perfil.etapa(f'leer {filas_prueba} filas del Excel'):
+            df = pd.read_excel(archivo_excel, sheet_name='Datos para Clasificación',
+                               header=4, nrows=filas_prueba)
+            df = df[df[pipeline.columnas].notna().all(axis=1)]
+        with perfil.etapa('clasificar'):
+            if len(df) > 0:
+                pipeline.predecir(df)
+        perfil.hito(f'clasificar {filas_prueba} filas', PRESUPUESTO_10_FILAS)
+
+    perfil.reporte()
+    for archivo in faltantes:
+        print(f"\n⚠ Falta {archivo}: no se midió la carga del modelo")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clasificador de biomasa simplificado")
+    parser.add_argument('archivo', nargs='?', default='Plantilla_Clasificacion_Biomasa.xlsx',
+                        help="Archivo Excel con los datos a clasificar")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Medir el tiempo de cada etapa del arranque (no escribe en el Excel)")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=10000, default=None,
+                        metavar='REGISTROS',
+                        help="Comparar clasificar_valores_directos con clasificar_lote (no escribe en el Excel)")
+    args = parser.parse_args()
+
     try:
-        clasificar_biomasa_simple()
+        if args.profile_startup:
+            perfilar_arranque(args.archivo)
+        elif args.benchmark:
+            comparar_rendimiento(args.benchmark, args.archivo)
+        else:
+            clasificar_biomasa_simple(args.archivo)
     except KeyboardInterrupt:
         print("\n\n⚠️  Proceso cancelado")
     except Exception as e:
@@ -2,20 +2,31 @@
 Script 1: Guardar el Modelo Entrenado
 ======================================
 Este script debe ejecutarse DESPUÉS de entrenar los modelos en el notebook.
-Guarda el mejor modelo y el scaler para usar en predicciones futuras.
+Guarda el mejor modelo y el scaler para usar en predicciones futuras,
+y también el pipeline completo (preprocesamiento + modelo) en un solo archivo.
 
 INSTRUCCIONES:
 1. Ejecuta todo el notebook de predicción hasta tener el mejor modelo
 2. Ejecuta este script en una celda nueva al final del notebook
-3. Esto guardará: best_model.pkl, scaler.pkl, y model_info.json
+3. Esto guardará: pipeline_prediccion.pkl, best_model.pkl, scaler.pkl, y model_info.json
 """
 
 import pickle
 import json
 from datetime import datetime
+import numpy as np
+from arboles_numpy import es_modelo_arboles
+from codificacion_categorica import vocabularios_categoricos
+from pipeline_prediccion import PipelinePrediccion, guardar_pipeline
+
+# Diferencia máxima aceptada entre las predicciones float32 y float64 (modo
+# --float32 de 3_predecir_en_excel.py), como fracción del RMSE de prueba: el
+# redondeo de float32 debe ser despreciable frente al error del modelo
+FRACCION_RMSE_FLOAT32 = 0.01
 
 def guardar_modelo_entrenado(best_model, best_model_name, scaler, results_sorted,
-                             X_train, feature_names):
+                             X_train, feature_names, X_original=None, imputer=None,
+                             usa_escalado=None):
     """
     Guarda el modelo entrenado y toda la información necesaria para hacer predicciones
 
@@ -27,8 +38,19 @@ def guardar_modelo_entrenado(best_model, best_model_name, scaler, results_sorted
     results_sorted : DataFrame con resultados de todos los modelos
     X_train : DataFrame de entrenamiento
     feature_names : list, nombres de las variables predictoras
+    X_original : DataFrame con las variables ANTES de codificar (ej. df_model);
+                 se usa para guardar el vocabulario de las variables categóricas
+    imputer : SimpleImputer entrenado (opcional); si no se pasa, se imputa
+              con la mediana de X_train
+    usa_escalado : bool, si el modelo se entrenó con X_train_scaled. Si no se
+                   pasa: en el notebook los modelos de árboles (Decision Tree,
+                   Random Forest, Gradient Boosting) usan X_train sin escalar y
+                   los demás X_train_scaled
     """
 
+    if usa_escalado is None:
+        usa_escalado = not es_modelo_arboles(best_model)
+
     print("=" * 60)
     print("GUARDANDO MODELO ENTRENADO")
     print("=" * 60)
@@ -56,13 +78,44 @@ def guardar_modelo_entrenado(best_model, best_model_name, scaler, results_sorted
         },
         'feature_names': feature_names,
         'n_features': len(feature_names),
-        'n_train_samples': X_train.shape[0]
+        'n_train_samples': X_train.shape[0],
+        'usa_escalado': bool(usa_escalado)
     }
+    model_info['tolerancia_float32'] = round(
+        FRACCION_RMSE_FLOAT32 * model_info['metricas']['RMSE_test'], 6)
+
+    # Vocabulario de las variables categóricas (mismo orden que LabelEncoder)
+    if X_original is not None:
+        categorias, por_defecto = vocabularios_categoricos(X_original[feature_names])
+        model_info['categorias'] = categorias
+        model_info['categorias_por_defecto'] = por_defecto
+    else:
+        print("⚠ Sin X_original: no se guarda el vocabulario de las variables categóricas")
 
     with open('model_info.json', 'w', encoding='utf-8') as f:
         json.dump(model_info, f, indent=2, ensure_ascii=False)
     print("✓ Información guardada: model_info.json")
 
+    # 4. Guardar el pipeline completo (imputar -> codificar -> escalar -> predecir)
+    if imputer is not None:
+        medianas = imputer.statistics_
+    else:
+        medianas = np.nanmedian(np.asarray(X_train, dtype=np.float64), axis=0)
+
+    pipeline = PipelinePrediccion(
+        feature_names, best_model, scaler=scaler if usa_escalado else None,
+        categorias=model_info.get('categorias'),
+        categorias_por_defecto=model_info.get('categorias_por_defecto'),
+        medianas=medianas
+    )
+    # Escalado incorporado en los coeficientes/umbrales: el modelo recibe los datos sin escalar
+    if pipeline.plegar_escalado() and usa_escalado:
+        print("✓ Escalado incorporado en los parámetros del modelo")
+    carpeta_arboles = guardar_pipeline(pipeline, 'pipeline_prediccion.pkl')
+    print("✓ Pipeline guardado: pipeline_prediccion.pkl")
+    if carpeta_arboles:
+        print(f"✓ Árboles guardados como arreglos (mmap): {carpeta_arboles}/")
+
     print("\n" + "=" * 60)
     print("RESUMEN DEL MODELO GUARDADO")
     print("=" * 60)
@@ -74,6 +127,11 @@ def guardar_modelo_entrenado(best_model, best_model_name, scaler, results_sorted
     print("\nVariables:")
     for i, var in enumerate(feature_names, 1):
         print(f"  {i}. {var}")
+    for var, valores in model_info.get('categorias', {}).items():
+        if len(valores) <= 10:
+            print(f"  {var}: {', '.join(f'{v}={i}' for i, v in enumerate(valores))}")
+        else:
+            print(f"  {var}: {len(valores)} categorías")
 
     print("\n" + "=" * 60)
     print("¡LISTO! Ahora puedes usar el script de predicción")
@@ -94,6 +152,8 @@ model_info = guardar_modelo_entrenado(
     scaler=scaler,
     results_sorted=results_sorted,
     X_train=X_train,
-    feature_names=feature_names
+    feature_names=feature_names,
+    X_original=df_model,  # datos antes de codificar las categóricas
+    imputer=imputer
 )
 """
@@ -0,0 +1,117 @@
+"""
+Codificación de Variables Categóricas
+=====================================
+En el notebook, las variables categóricas se codifican con LabelEncoder, que
+asigna los códigos en orden alfabético (0, 1, 2, ...). Los scripts de
+guardado escriben ese vocabulario en model_info, y los predictores lo usan
+aquí para codificar los datos nuevos. Así el mismo texto recibe siempre el
+mismo código, sin importar cuántas filas ni qué valores traiga el Excel.
+
+Uso:
+    # Al guardar el modelo (con los datos ANTES de codificar)
+    categorias, por_defecto = vocabularios_categoricos(df_model[feature_names])
+    model_info['categorias'] = categorias
+    model_info['categorias_por_defecto'] = por_defecto
+
+    # Al predecir
+    codificadores = construir_codificadores(model_info, feature_names)
+    X = codificar_categoricas(X, codificadores)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Mapeos usados por los modelos guardados antes de incluir 'categorias' en
+# model_info: (valor -> código, código por defecto). Al volver a guardar el
+# modelo se usa el vocabulario real del entrenamiento.
+MAPEOS_PREDETERMINADOS = {
+    'Sector': ({'Residencial': 0, 'Comercial': 1, 'Industrial': 2}, 0),
+    'Ciudad': ({'Montería': 0, 'Sahagún': 1, 'Planeta Rica': 2, 'Cereté': 3, 'Lorica': 4}, 0),
+    'Puede_Pagar_Solar': ({'No': 0, 'Sí': 1, 'Si': 1}, 0),
+    'Tipo_suelo': ({'Arenoso': 0, 'Arcilloso': 1, 'Franco': 2}, 2),
+}
+
+
+def vocabularios_categoricos(X):
+    """Vocabulario de cada columna categórica en el orden de LabelEncoder
+
+    Retorna (categorias, por_defecto):
+    categorias  : dict {columna: [valores ordenados]}
+    por_defecto : dict {columna: valor más frecuente}, usado para valores
+                  vacíos o desconocidos al predecir
+    """
+
+    categorias, por_defecto = {}, {}
+    for col in X.columns:
+        # Igual que select_dtypes(include=['object']) en el notebook
+        if pd.api.types.is_numeric_dtype(X[col]) or pd.api.types.is_datetime64_any_dtype(X[col]):
+            continue
+        # Igual que en el notebook: LabelEncoder().fit(X[col].astype(str))
+        valores = X[col].map(str)
+        categorias[col] = sorted(valores.unique())
+        por_defecto[col] = valores.mode()[0]
+
+    return categorias, por_defecto
+
+
+def construir_codificadores(info, columnas):
+    """Tablas de búsqueda por columna: (valores, códigos int8, código por defecto,
+    código para celdas vacías)
+
+    Usa info['categorias'] si existe; si no, los mapeos predeterminados.
+    Las columnas sin vocabulario conocido no se incluyen.
+    """
+
+    categorias = info.get('categorias', {})
+    por_defecto = info.get('categorias_por_defecto', {})
+
+    codificadores = {}
+    for col in columnas:
+        if col in categorias:
+            valores = list(categorias[col])
+            tipo = np.int8 if len(valores) <= 127 else np.int32
+            codigos = np.arange(len(valores), dtype=tipo)
+            defecto = valores.index(por_defecto[col]) if por_defecto.get(col) in valores else 0
+        elif col in MAPEOS_PREDETERMINADOS:
+            mapeo, defecto = MAPEOS_PREDETERMINADOS[col]
+            valores = list(mapeo)
+            codigos = np.array(list(mapeo.values()), dtype=np.int8)
+        else:
+            continue
+
+        # LabelEncoder(astype(str)) convierte las celdas vacías en la categoría 'nan'
+        vacio = valores.index('nan') if 'nan' in valores else defecto
+        tipo = codigos.dtype.type
+        codificadores[col] = (pd.Index(valores), codigos, tipo(defecto), tipo(vacio))
+
+    return codificadores
+
+
+def codificar_columna(valores, codificador):
+    """Códigos (array int8) de una columna con su tabla de construir_codificadores"""
+
+    vocabulario, codigos, defecto, vacio = codificador
+    posiciones = vocabulario.get_indexer(valores)
+    resultado = np.where(posiciones >= 0, codigos[posiciones], defecto)
+    if vacio != defecto:
+        resultado[pd.isna(valores)] = vacio
+    return resultado
+
+
+def codificar_categoricas(X, codificadores):
+    """Reemplaza cada columna categórica de X por sus códigos
+
+    Cada columna se codifica con una búsqueda por hash sobre el vocabulario
+    (O(n)); los valores vacíos o desconocidos reciben el código por defecto.
+    """
+
+    columnas = {
+        col: codificar_columna(X[col].to_numpy(), codificador)
+        for col, codificador in codificadores.items()
+        if col in X.columns
+    }
+
+    if columnas:
+        X = X.assign(**columnas)
+
+    return X
@@ -0,0 +1,203 @@
+"""
+Trazas por Etapa de los Predictores (JSON Lines)
+================================================
+Con la opción --trace, los scripts de predicción escriben una línea JSON por
+cada etapa que ejecutan (cargar_modelo, leer_datos_excel, preprocesar_datos,
+hacer_predicciones / hacer_clasificacion, escribir_resultados), así cuando una
+ejecución es lenta se sabe qué etapa fue:
+
+    {"etapa": "leer_datos_excel", "inicio": "2026-10-18T12:30:01.204", "segundos": 0.541,
+     "cpu_segundos": 0.539, "filas": 10000, "bytes_leidos": 734012, "ok": true,
+     "archivo": "Plantilla_Prediccion_Consumo.xlsx", "ejecucion": "3f9c1a2b7d4e", "proceso": 4121}
+
+Campos de cada línea (los que no aplican a una etapa se omiten):
+    etapa            nombre de la etapa
+    inicio           fecha y hora en que empezó
+    segundos         tiempo real
+    cpu_segundos     tiempo de CPU del proceso
+    filas            filas que procesó
+    bytes_leidos     bytes del archivo leído (modelo o datos); en las etapas en
+                     memoria, los de la matriz que recibe
+    bytes_escritos   bytes del archivo escrito; en las etapas en memoria, los de
+                     la matriz que produce
+    ok               false si la etapa lanzó una excepción o informó un error
+    error            la excepción, si la hubo
+    dentro_de        etapa que la contiene (por ejemplo procesar_archivo)
+    ejecucion        identifica la ejecución (todas sus líneas lo comparten)
+    proceso          PID (en el modo --carpeta cada proceso escribe sus líneas)
+
+Las entradas Parquet / Feather / Arrow usan los mismos nombres de etapa.
+
+Destino:
+    --trace                  a la salida de errores (no se mezcla con los mensajes)
+    --trace trazas.jsonl     agrega las líneas al archivo
+
+Sin --trace no se mide nada: cada etapa cuesta una comparación. Solo usa la
+librería estándar, para no cargar nada antes de verificar los archivos.
+
+Uso:
+    import traza_etapas
+
+    @traza_etapas.trazar('leer_datos_excel')
+    def leer_datos_excel(filename, feature_names):
+        ...
+        traza_etapas.anotar(filas=len(df), bytes_leidos=traza_etapas.tamano_archivos(filename))
+        return df
+
+    with traza_etapas.etapa('escribir_resultados'):
+        escribir_tabla(tabla, salida)
+
+    traza_etapas.activar('trazas.jsonl', script='3_predecir_en_excel.py')
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# Destino de --trace sin archivo: la salida de errores
+DESTINO_ESTANDAR = '-'
+
+# Extensiones que no se aceptan como destino (sería escribir dentro de los datos,
+# por ejemplo con 'script.py --trace Plantilla.xlsx')
+EXTENSIONES_DATOS = ('.xlsx', '.xlsm', '.xls', '.csv', '.parquet', '.pq', '.feather', '.arrow', '.ipc')
+
+# Traza activa del proceso (None: trazas desactivadas)
+_traza = None
+
+
+class Traza:
+    """Escribe un registro JSON por cada etapa terminada"""
+
+    def __init__(self, destino=DESTINO_ESTANDAR, **contexto):
+        """
+        destino : DESTINO_ESTANDAR (stderr), ruta de un archivo (se agregan las
+                  líneas) o un objeto con write()
+        contexto : campos que se agregan a todos los registros (por ejemplo script=...)
+        """
+        if destino == DESTINO_ESTANDAR:
+            self.salida, self.propia = sys.stderr, False
+        elif hasattr(destino, 'write'):
+            self.salida, self.propia = destino, False
+        else:
+            if os.path.splitext(destino)[1].lower() in EXTENSIONES_DATOS:
+                raise ValueError(f"{destino} es un archivo de datos, no un destino de trazas "
+                                 f"(usa por ejemplo trazas.jsonl)")
+            self.salida, self.propia = open(destino, 'a', encoding='utf-8'), True
+
+        self.contexto = {'ejecucion': os.urandom(6).hex(), 'proceso': os.getpid(), **contexto}
+        self.abiertas = []  # registros de las etapas en curso (la última es la más interna)
+
+    @contextlib.contextmanager
+    def etapa(self, nombre, **campos):
+        """Mide el bloque; el registro (dict) se puede completar dentro del with"""
+
+        registro = {'etapa': nombre, 'inicio': datetime.now().isoformat(timespec='milliseconds'),
+                    'segundos': None, 'cpu_segundos': None, **campos}
+        if self.abiertas:
+            registro['dentro_de'] = self.abiertas[-1]['etapa']
+        self.abiertas.append(registro)
+
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield registro
+        except BaseException as e:
+            registro['ok'] = False
+            registro['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro['segundos'] = round(time.perf_counter() - inicio, 6)
+            registro['cpu_segundos'] = round(time.process_time() - inicio_cpu, 6)
+            registro.setdefault('ok', True)
+            self.abiertas.pop()
+            self.escribir(registro)
+
+    def anotar(self, **campos):
+        """Agrega campos a la etapa en curso más interna"""
+        if self.abiertas:
+            self.abiertas[-1].update(campos)
+
+    def escribir(self, registro):
+        """Una línea JSON por registro, escrita de una vez (varios procesos pueden compartir el archivo)"""
+        registro = {clave: valor for clave, valor in {**registro, **self.contexto}.items()
+                    if valor is not None}
+        self.salida.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+        self.salida.flush()
+
+    def cerrar(self):
+        if self.propia:
+            self.salida.close()
+
+
+def activar(destino=DESTINO_ESTANDAR, **contexto):
+    """Activa las trazas del proceso (reemplaza las anteriores). Retorna la Traza"""
+    global _traza
+    desactivar()
+    _traza = Traza(destino, **contexto)
+    return _traza
+
+
+def desactivar():
+    """Desactiva las trazas y cierra el archivo de destino"""
+    global _traza
+    if _traza is not None:
+        _traza.cerrar()
+        _traza = None
+
+
+def activa():
+    return _traza is not None
+
+
+def etapa(nombre, **campos):
+    """Context manager que mide el bloque como una etapa (sin trazas, no hace nada)"""
+    if _traza is None:
+        return contextlib.nullcontext({})
+    return _traza.etapa(nombre, **campos)
+
+
+def anotar(**campos):
+    """Agrega campos (filas, bytes_leidos, ...) a la etapa en curso (sin trazas, no hace nada)"""
+    if _traza is not None:
+        _traza.anotar(**campos)
+
+
+def trazar(nombre):
+    """Decorador: cada llamada a la función es una etapa
+
+    Si la función retorna None, False o una tupla que empieza con None (así
+    informan un error los scripts), la etapa queda con ok = false.
+    """
+
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _traza is None:
+                return funcion(*args, **kwargs)
+
+            with _traza.etapa(nombre) as registro:
+                resultado = funcion(*args, **kwargs)
+                if (resultado is None or resultado is False
+                        or (isinstance(resultado, tuple) and resultado and resultado[0] is None)):
+                    registro['ok'] = False
+                return resultado
+
+        return envoltura
+
+    return decorador
+
+
+def tamano_archivos(*rutas):
+    """Bytes de los archivos indicados (las carpetas se recorren; los que no existen cuentan 0)"""
+
+    total = 0
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for carpeta, _, archivos in os.walk(ruta):
+                total += sum(os.path.getsize(os.path.join(carpeta, a)) for a in archivos)
+        elif os.path.isfile(ruta):
+            total += os.path.getsize(ruta)
+    return total
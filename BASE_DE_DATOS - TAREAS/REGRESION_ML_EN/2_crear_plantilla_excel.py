@@ -8,16 +8,29 @@ INSTRUCCIONES:
 2. Se creará el archivo: Plantilla_Prediccion_Consumo.xlsx
 3. Llena los datos en el Excel
 4. Ejecuta el script de predicción (3_predecir_en_excel.py)
+
+Para preparar más filas con formato (por ejemplo 50.000):
+    python 2_crear_plantilla_excel.py --filas 50000
 """
 
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 from datetime import datetime
+import argparse
 import json
 import os
 
-def crear_plantilla_excel():
-    """Crea un archivo Excel plantilla para ingresar nuevos datos"""
+from estilos_plantilla import registrar_estilos, formato_columnas, fila, agregar_filas_id
+
+# Filas de datos preparadas por defecto (3 de ejemplo + 10 vacías)
+FILAS_DATOS = 13
+
+def crear_plantilla_excel(filas=FILAS_DATOS):
+    """Crea un archivo Excel plantilla para ingresar nuevos datos
+
+    filas : filas de datos con formato y número de ID (incluye las de ejemplo)
+    """
 
     print("=" * 60)
     print("CREANDO PLANTILLA EXCEL PARA PREDICCIONES")
@@ -77,75 +90,74 @@ def crear_plantilla_excel():
     print(f"✓ Modelo cargado: {model_info.get('model_name', 'Desconocido')}")
     print(f"✓ Variables encontradas: {len(feature_names)}")
 
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Datos para Predicción"
+    # Crear workbook (write-only: cada fila se escribe en el archivo al agregarla)
+    wb = Workbook(write_only=True)
 
-    # Estilos
-    header_fill = PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    prediction_fill = PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid")
-    prediction_font = Font(bold=True, color="000000", size=12)
+    # Estilos (se registran una vez y las celdas los usan por nombre)
     border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
         top=Side(style='thin'),
         bottom=Side(style='thin')
     )
+    centrado = Alignment(horizontal='center')
+    estilos = registrar_estilos(wb, {
+        'titulo': {'font': Font(bold=True, size=14, color="1F4788")},
+        'subtitulo': {'font': Font(italic=True, size=10)},
+        'fecha': {'font': Font(italic=True, size=9)},
+        'encabezado': {
+            'font': Font(bold=True, color="FFFFFF", size=12),
+            'fill': PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', wrap_text=True),
+            'border': border,
+        },
+        'encabezado_prediccion': {
+            'font': Font(bold=True, color="000000", size=12),
+            'fill': PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        'dato': {'alignment': centrado, 'border': border},
+        'prediccion': {
+            'fill': PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        'seccion': {'font': Font(bold=True, size=11)},
+    })
+
+    ws = wb.create_sheet("Datos para Predicción")
+    pred_col = len(feature_names) + 2
 
-    # Título
-    ws['A1'] = 'PLANTILLA DE PREDICCIÓN DE CONSUMO ENERGÉTICO'
-    ws['A1'].font = Font(bold=True, size=14, color="1F4788")
-    ws.merge_cells('A1:E1')
-
-    ws['A2'] = f'Modelo: {model_info["model_name"]} | R²: {model_info["metricas"]["R2_test"]:.4f}'
-    ws['A2'].font = Font(italic=True, size=10)
-    ws.merge_cells('A2:E2')
-
-    ws['A3'] = f'Creado: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
-    ws['A3'].font = Font(italic=True, size=9)
-    ws.merge_cells('A3:E3')
+    # Anchos y formato por columna: las filas de datos lo toman sin escribir sus celdas
+    columnas = {'A': ('dato', 8)}
+    for col_idx in range(2, pred_col):
+        columnas[get_column_letter(col_idx)] = ('dato', 20)
+    # Columna de predicción (amarilla para distinguir)
+    columnas[get_column_letter(pred_col)] = ('prediccion', 18)
+    formato_columnas(ws, estilos, columnas)
+
+    # Título (filas 1 a 4, sin el formato de las columnas)
+    ws.append(fila(ws, ['PLANTILLA DE PREDICCIÓN DE CONSUMO ENERGÉTICO'], 'titulo', pred_col))
+    ws.append(fila(ws, [f'Modelo: {model_info["model_name"]} | R²: {model_info["metricas"]["R2_test"]:.4f}'],
+                   'subtitulo', pred_col))
+    ws.append(fila(ws, [f'Creado: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'], 'fecha', pred_col))
+    ws.append(fila(ws, [], columnas=pred_col))
+    for rango in ('A1:E1', 'A2:E2', 'A3:E3'):
+        ws.merged_cells.add(rango)
 
     # Encabezados de columnas (fila 5)
-    row = 5
-    ws[f'A{row}'] = 'ID'
-    ws[f'A{row}'].font = header_font
-    ws[f'A{row}'].fill = header_fill
-    ws[f'A{row}'].alignment = Alignment(horizontal='center')
-    ws[f'A{row}'].border = border
-
-    # Variables predictoras
-    for col_idx, feature in enumerate(feature_names, start=2):
-        cell = ws.cell(row=row, column=col_idx)
-        cell.value = feature
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', wrap_text=True)
-        cell.border = border
-
-    # Columna de predicción (amarilla para distinguir)
-    pred_col = len(feature_names) + 2
-    cell = ws.cell(row=row, column=pred_col)
-    cell.value = 'Consumo_kWh_Mensual_Predicho'
-    cell.font = prediction_font
-    cell.fill = prediction_fill
-    cell.alignment = Alignment(horizontal='center')
-    cell.border = border
+    ws.append(fila(ws, ['ID'] + feature_names + ['Consumo_kWh_Mensual_Predicho'],
+                   ['encabezado'] * (pred_col - 1) + ['encabezado_prediccion']))
 
     # Agregar filas de ejemplo (fila 6 en adelante)
     ejemplos = [
         {'ID': 1, 'Sector': 'Residencial', 'Estrato': 3, 'Ciudad': 'Montería', 'Area_m2': 80, 'Puede_Pagar_Solar': 'No'},
         {'ID': 2, 'Sector': 'Comercial', 'Estrato': 5, 'Ciudad': 'Sahagún', 'Area_m2': 150, 'Puede_Pagar_Solar': 'Sí'},
         {'ID': 3, 'Sector': 'Residencial', 'Estrato': 2, 'Ciudad': 'Planeta Rica', 'Area_m2': 100, 'Puede_Pagar_Solar': 'No'},
-    ]
+    ][:filas]
 
-    row = 6
     for ejemplo in ejemplos:
-        ws[f'A{row}'] = ejemplo['ID']
-        ws[f'A{row}'].border = border
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-
         # Valores de ejemplo (ajusta según tus variables)
         # Esto asume que feature_names tiene el orden: Sector, Estrato, Ciudad, Area_m2, Puede_Pagar_Solar
         valores_ejemplo = [
@@ -155,52 +167,18 @@ def crear_plantilla_excel():
             ejemplo.get('Area_m2', 100),
             ejemplo.get('Puede_Pagar_Solar', 'No')
         ]
-
-        for col_idx, valor in enumerate(valores_ejemplo[:len(feature_names)], start=2):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = valor
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-
-        # Celda de predicción vacía
-        cell = ws.cell(row=row, column=pred_col)
-        cell.value = ""
-        cell.border = border
-        cell.fill = PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid")
-        cell.alignment = Alignment(horizontal='center')
-
-        row += 1
+        ws.append(fila(ws, [ejemplo['ID']] + valores_ejemplo[:len(feature_names)], 'dato'))
 
     # Agregar filas vacías para que el usuario pueda agregar datos
-    for i in range(10):
-        ws[f'A{row}'] = row - 5
-        ws[f'A{row}'].border = border
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-
-        for col_idx in range(2, pred_col + 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = ""
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-            if col_idx == pred_col:
-                cell.fill = PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid")
-
-        row += 1
-
-    # Ajustar anchos de columna
-    ws.column_dimensions['A'].width = 8
-    for col_idx in range(2, pred_col):
-        col_letter = chr(64 + col_idx)
-        ws.column_dimensions[col_letter].width = 20
-    ws.column_dimensions[chr(64 + pred_col)].width = 18
+    # (solo se escribe el ID; el resto de la fila toma el formato de su columna)
+    agregar_filas_id(ws, len(ejemplos) + 1, filas, 'dato')
 
     # Instrucciones en otra hoja
     ws_inst = wb.create_sheet("Instrucciones")
-    ws_inst['A1'] = 'INSTRUCCIONES DE USO'
-    ws_inst['A1'].font = Font(bold=True, size=14, color="1F4788")
+    ws_inst.column_dimensions['A'].width = 80
+    ws_inst.append(fila(ws_inst, ['INSTRUCCIONES DE USO'], 'titulo'))
 
     instrucciones = [
-        "",
         "1. LLENAR DATOS:",
         "   - En la hoja 'Datos para Predicción', llena las columnas con tus datos",
         "   - NO modifiques los encabezados (fila 5)",
@@ -228,20 +206,18 @@ def crear_plantilla_excel():
     for var in feature_names:
         instrucciones.append(f"  • {var}")
 
-    row = 1
     for inst in instrucciones:
-        ws_inst[f'A{row}'] = inst
         if inst.startswith('INFORMACIÓN') or inst.startswith('VARIABLES'):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=11)
-        row += 1
-
-    ws_inst.column_dimensions['A'].width = 80
+            ws_inst.append(fila(ws_inst, [inst], 'seccion'))
+        else:
+            ws_inst.append([inst])
 
     # Guardar archivo
     filename = 'Plantilla_Prediccion_Consumo.xlsx'
     wb.save(filename)
 
     print(f"\n✓ Plantilla creada: {filename}")
+    print(f"✓ Filas de datos preparadas: {filas:,}")
     print(f"\nVariables requeridas ({len(feature_names)}):")
     for i, var in enumerate(feature_names, 1):
         print(f"  {i}. {var}")
@@ -259,4 +235,8 @@ def crear_plantilla_excel():
 
 
 if __name__ == "__main__":
-    crear_plantilla_excel()
+    parser = argparse.ArgumentParser(description='Crea la plantilla Excel para predicciones')
+    parser.add_argument('--filas', type=int, default=FILAS_DATOS,
+                        help=f'Filas de datos con formato y número de ID (por defecto {FILAS_DATOS})')
+    args = parser.parse_args()
+    crear_plantilla_excel(args.filas)
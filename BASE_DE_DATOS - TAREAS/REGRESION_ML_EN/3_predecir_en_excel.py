@@ -8,61 +8,166 @@ INSTRUCCIONES:
 1. Asegúrate de haber llenado el Excel: Plantilla_Prediccion_Consumo.xlsx
 2. Ejecuta este script: python 3_predecir_en_excel.py
 3. Las predicciones se escribirán en la columna 'Consumo_kWh_Mensual_Predicho'
+
+Los módulos pesados (pandas, numpy, openpyxl, el pipeline) se importan dentro
+de las funciones que los usan: verificar los archivos y salir solo usa la
+librería estándar. Para ver el tiempo de cada etapa del arranque:
+    python 3_predecir_en_excel.py --profile-startup
+
+Las predicciones de cada fila se guardan en un caché junto al Excel
+(Plantilla_Prediccion_Consumo_cache.npz, ver cache_predicciones.py): al volver
+a ejecutar solo se predicen las filas nuevas o modificadas. El caché se
+descarta solo cuando cambia el modelo; para no usarlo: --sin-cache
+
+Para procesar todas las plantillas de una carpeta (o de un patrón) en paralelo,
+cargando el modelo una sola vez por proceso:
+    python 3_predecir_en_excel.py --carpeta "plantillas_recibidas"
+    python 3_predecir_en_excel.py --carpeta "plantillas_recibidas/*_mayo.xlsx" --procesos 4
+
+También acepta exportaciones Parquet / Feather / Arrow IPC (ver lectura_columnar.py):
+solo se leen las columnas del modelo y las predicciones se escriben en otro
+archivo del mismo formato (clientes.parquet -> clientes_predicciones.parquet):
+    python 3_predecir_en_excel.py clientes.parquet
+    python 3_predecir_en_excel.py clientes.parquet --salida predicciones.feather
+
+Para exportaciones que no caben en memoria, --memoria MB preprocesa y predice
+por fragmentos guardados en disco (np.memmap, ver fragmentos_memmap.py): la
+memoria de trabajo depende del presupuesto y no del tamaño del archivo (las
+predicciones quedan en un archivo con mmap):
+    python 3_predecir_en_excel.py clientes.parquet --memoria 256
+
+Con --float32 el preprocesamiento, la predicción y las predicciones usan float32
+(la mitad de memoria y de ancho de banda en archivos grandes). Antes de
+predecir se compara float32 con float64 en una muestra de filas y, si la
+diferencia supera 'tolerancia_float32' de model_info.json, no se continúa:
+    python 3_predecir_en_excel.py clientes.parquet --float32
+
+Con --trace se escribe una línea JSON por etapa (cargar_modelo, leer_datos_excel,
+preprocesar_datos, hacer_predicciones, escribir_resultados) con su tiempo real
+y de CPU, filas y bytes leídos / escritos (ver traza_etapas.py), en la salida
+de errores o agregadas a un archivo:
+    python 3_predecir_en_excel.py --trace
+    python 3_predecir_en_excel.py --carpeta "plantillas_recibidas" --trace trazas.jsonl
 """
 
+import time
+_INICIO = time.perf_counter()
+
 import pickle
 import json
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime
+import argparse
+import contextlib
+import glob
+import io
 import os
 import sys
 
+import traza_etapas
+
+# Filas por lote en el modo por lotes (--lotes): la memoria usada depende de
+# este valor y no del tamaño del archivo
+TAMANO_LOTE = 10000
+
+# Presupuesto por defecto del modo fuera de memoria (--memoria), en MB;
+# el mismo valor que fragmentos_memmap.MEMORIA_MB
+MEMORIA_MB = 512
+
+# Columnas de identificación que se copian al archivo de predicciones (entrada columnar)
+COLUMNAS_ID = ['ID']
+
+# Modo --float32: filas de la muestra que se predice también en float64, y
+# tolerancia (fracción del RMSE de prueba) si model_info.json no la trae
+MUESTRA_FLOAT32 = 2000
+FRACCION_RMSE_FLOAT32 = 0.01
+
+# Archivos del modelo: si cambia alguno, el caché de predicciones se descarta
+ARCHIVOS_MODELO = ['pipeline_prediccion.pkl', 'pipeline_prediccion_arboles',
+                   'best_model.pkl', 'scaler.pkl', 'model_info.json']
+
+def archivos_modelo():
+    """Archivos del modelo que se van a usar y los que faltan: (requeridos, faltantes)"""
+
+    if os.path.exists('pipeline_prediccion.pkl'):
+        archivos_requeridos = ['pipeline_prediccion.pkl', 'model_info.json']
+    else:
+        archivos_requeridos = ['best_model.pkl', 'scaler.pkl', 'model_info.json']
+    faltantes = [f for f in archivos_requeridos if not os.path.exists(f)]
+
+    return archivos_requeridos, faltantes
+
+
+@traza_etapas.trazar('cargar_modelo')
 def cargar_modelo():
-    """Carga el modelo entrenado, scaler e información"""
+    """Carga el pipeline de predicción (preprocesamiento + modelo) e información
+
+    Usa pipeline_prediccion.pkl si existe; si no (modelos guardados antes),
+    arma el mismo pipeline con best_model.pkl y scaler.pkl.
+    """
 
     print("=" * 70)
     print("SISTEMA DE PREDICCIÓN DE CONSUMO ENERGÉTICO")
     print("=" * 70)
 
     # Verificar archivos necesarios
-    archivos_requeridos = ['best_model.pkl', 'scaler.pkl', 'model_info.json']
-    faltantes = [f for f in archivos_requeridos if not os.path.exists(f)]
+    archivos_requeridos, faltantes = archivos_modelo()
 
     if faltantes:
         print("\n❌ ERROR: Faltan archivos necesarios:")
         for archivo in faltantes:
             print(f"   - {archivo}")
         print("\nPor favor, ejecuta primero el script 1_guardar_modelo.py")
-        return None, None, None
-
-    # Cargar modelo
-    with open('best_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-    print("✓ Modelo cargado")
-
-    # Cargar scaler
-    with open('scaler.pkl', 'rb') as f:
-        scaler = pickle.load(f)
-    print("✓ Scaler cargado")
+        return None, None
 
     # Cargar información
     with open('model_info.json', 'r', encoding='utf-8') as f:
         info = json.load(f)
     print("✓ Información cargada")
 
+    from pipeline_prediccion import PipelinePrediccion, cargar_pipeline
+
+    if 'pipeline_prediccion.pkl' in archivos_requeridos:
+        # Cargar pipeline completo (una sola lectura)
+        pipeline = cargar_pipeline('pipeline_prediccion.pkl')
+        print("✓ Pipeline cargado (preprocesamiento + modelo)")
+        if getattr(pipeline, 'arboles', None):
+            print(f"✓ {pipeline.modelo.n_arboles} árboles abiertos con mmap (predicción sin sklearn)")
+    else:
+        # Cargar modelo y scaler por separado
+        with open('best_model.pkl', 'rb') as f:
+            model = pickle.load(f)
+        print("✓ Modelo cargado")
+
+        with open('scaler.pkl', 'rb') as f:
+            scaler = pickle.load(f)
+        print("✓ Scaler cargado")
+
+        # Modelos guardados sin 'usa_escalado': en el notebook los árboles se entrenan sin escalar
+        from arboles_numpy import es_modelo_arboles
+        usa_escalado = info.get('usa_escalado', not es_modelo_arboles(model))
+        pipeline = PipelinePrediccion.desde_artefactos(model, scaler, info, info['feature_names'],
+                                                       usa_escalado=usa_escalado)
+
     print(f"\nModelo: {info['model_name']}")
     print(f"R² Score: {info['metricas']['R2_test']:.4f}")
     print(f"RMSE: {info['metricas']['RMSE_test']:.2f}")
     print(f"MAE: {info['metricas']['MAE_test']:.2f}")
 
-    return model, scaler, info
+    arboles = ['pipeline_prediccion_arboles'] if getattr(pipeline, 'arboles', None) else []
+    traza_etapas.anotar(bytes_leidos=traza_etapas.tamano_archivos(*archivos_requeridos, *arboles))
+
+    return pipeline, info
 
 
-def leer_datos_excel(filename, feature_names):
-    """Lee los datos del archivo Excel"""
+@traza_etapas.trazar('leer_datos_excel')
+def leer_datos_excel(filename, feature_names, filas=None):
+    """Lee los datos del archivo Excel
+
+    filas : tupla opcional (primera, ultima) con el rango de filas de Excel
+            a procesar (por ejemplo (6, 30)). Si es None se leen todas.
+    """
+
+    import pandas as pd
 
     print("\n" + "=" * 70)
     print("LEYENDO DATOS DEL EXCEL")
@@ -73,12 +178,29 @@ def leer_datos_excel(filename, feature_names):
         print("Por favor, ejecuta primero el script 2_crear_plantilla_excel.py")
         return None
 
-    # Leer Excel (saltando las primeras 4 filas que son título)
-    df = pd.read_excel(filename, sheet_name='Datos para Predicción', header=4)
+    # Leer Excel (saltando las primeras 4 filas que son título); con un rango
+    # de filas se deja de leer en la última fila solicitada
+    nrows = max(filas[1] - 5, 0) if filas is not None else None
+    df = pd.read_excel(filename, sheet_name='Datos para Predicción', header=4, nrows=nrows)
 
     print(f"✓ Archivo leído: {filename}")
     print(f"  Total de filas: {len(df)}")
 
+    # Verificar columnas requeridas
+    columnas_faltantes = [col for col in feature_names if col not in df.columns]
+    if columnas_faltantes:
+        print(f"\n❌ ERROR: Faltan columnas en el Excel:")
+        for col in columnas_faltantes:
+            print(f"   - {col}")
+        return None
+
+    # Restringir al rango de filas solicitado (fila de Excel = índice + 6)
+    if filas is not None:
+        primera, ultima = filas
+        fila_excel = df.index + 6
+        df = df[(fila_excel >= primera) & (fila_excel <= ultima)]
+        print(f"  Rango solicitado: filas {primera} a {ultima}")
+
     # Filtrar filas vacías (donde todas las columnas predictoras son NaN)
     df_filtrado = df.dropna(how='all', subset=feature_names)
 
@@ -89,86 +211,241 @@ def leer_datos_excel(filename, feature_names):
         print("Por favor, llena los datos en el Excel y vuelve a ejecutar")
         return None
 
-    # Verificar columnas requeridas
-    columnas_faltantes = [col for col in feature_names if col not in df.columns]
-    if columnas_faltantes:
-        print(f"\n❌ ERROR: Faltan columnas en el Excel:")
-        for col in columnas_faltantes:
-            print(f"   - {col}")
-        return None
-
     print(f"\n✓ Columnas verificadas: {len(feature_names)} variables")
 
+    traza_etapas.anotar(archivo=filename, filas=len(df_filtrado),
+                        bytes_leidos=traza_etapas.tamano_archivos(filename))
+
     return df_filtrado
 
 
-def preprocesar_datos(df, feature_names, scaler):
-    """Preprocesa los datos para predicción"""
+def leer_datos_excel_por_lotes(filename, feature_names, tamano_lote=TAMANO_LOTE, categoricas=()):
+    """Lee el archivo Excel en lotes de filas con memoria constante
 
-    print("\n" + "=" * 70)
-    print("PREPROCESANDO DATOS")
-    print("=" * 70)
+    Recorre el XML de la hoja fila por fila sin cargarla completa (ver
+    escritura_xlsx.leer_filas). Genera DataFrames de hasta `tamano_lote` filas
+    con datos, con el mismo índice que leer_datos_excel (fila de Excel - 6),
+    para que escribir_resultados sepa en qué fila va cada predicción.
+    Las columnas que no están en `categoricas` se pasan a float64 (vacíos =
+    NaN): una variable sin ningún valor en un lote no queda como texto.
+    """
 
-    # Seleccionar solo las columnas necesarias
-    X = df[feature_names].copy()
-
-    # Verificar valores faltantes
-    valores_faltantes = X.isnull().sum()
-    if valores_faltantes.any():
-        print("\n⚠ ADVERTENCIA: Hay valores faltantes:")
-        for col, count in valores_faltantes[valores_faltantes > 0].items():
-            print(f"   - {col}: {count} valores faltantes")
-        print("\n  Se rellenarán con la mediana de cada columna")
-
-        # Rellenar con mediana
-        for col in X.columns:
-            if X[col].isnull().any():
-                if X[col].dtype in ['float64', 'int64']:
-                    X[col].fillna(X[col].median(), inplace=True)
-                else:
-                    X[col].fillna(X[col].mode()[0] if not X[col].mode().empty else 'Franco', inplace=True)
-
-    # Codificar variables categóricas (si existen)
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    if len(categorical_cols) > 0:
-        print(f"\n✓ Codificando variables categóricas: {list(categorical_cols)}")
-
-        # Mapeos para las variables categóricas
-        sector_map = {'Residencial': 0, 'Comercial': 1, 'Industrial': 2}
-        ciudad_map = {'Montería': 0, 'Sahagún': 1, 'Planeta Rica': 2, 'Cereté': 3, 'Lorica': 4}
-        puede_pagar_map = {'No': 0, 'Sí': 1, 'Si': 1}
-
-        for col in categorical_cols:
-            if col == 'Sector':
-                X[col] = X[col].map(sector_map)
-                X[col].fillna(0, inplace=True)  # Residencial por defecto
-            elif col == 'Ciudad':
-                X[col] = X[col].map(ciudad_map)
-                X[col].fillna(0, inplace=True)  # Montería por defecto
-            elif col == 'Puede_Pagar_Solar':
-                X[col] = X[col].map(puede_pagar_map)
-                X[col].fillna(0, inplace=True)  # No por defecto
-            else:
-                # Para otras categóricas, usar label encoding simple
-                X[col] = pd.Categorical(X[col]).codes
+    import pandas as pd
+    from escritura_xlsx import leer_filas
+    from pipeline_prediccion import columna_numerica
+
+    filas = leer_filas(filename, 'Datos para Predicción', primera_fila=5)
+
+    # Fila 5: encabezados (si no existe, faltan todas las columnas)
+    numero, encabezados = next(filas, (None, {}))
+    if numero != 5:
+        encabezados = {}
+    por_nombre = {valor: col for col, valor in encabezados.items()}
+    columnas_faltantes = [col for col in feature_names if col not in por_nombre]
+    if columnas_faltantes:
+        raise ValueError(f"Faltan columnas en el Excel: {columnas_faltantes}")
+    posiciones = [por_nombre[col] for col in feature_names]
+    numericas = [col for col in feature_names if col not in categoricas]
+
+    def armar_lote(lote, indices):
+        df = pd.DataFrame(lote, columns=feature_names, index=indices)
+        for col in numericas:
+            df[col] = columna_numerica(df[col])
+        return df
+
+    lote, indices = [], []
+    for numero, fila in filas:
+        valores = [fila.get(p) for p in posiciones]
+
+        # Saltar filas vacías (todas las columnas predictoras sin datos)
+        if all(v is None or v == '' for v in valores):
+            continue
+
+        lote.append(valores)
+        indices.append(numero - 6)
+
+        if len(lote) == tamano_lote:
+            yield armar_lote(lote, indices)
+            lote, indices = [], []
+
+    if lote:
+        yield armar_lote(lote, indices)
+
+
+@traza_etapas.trazar('preprocesar_datos')
+def preprocesar_datos(df, pipeline, detalle=True, dtype='float64', medianas=None):
+    """Preprocesa los datos para predicción
+
+    Retorna la matriz numpy (imputada, codificada y escalada) para el modelo.
+    detalle : si es False no imprime el progreso (útil al procesar por lotes)
+    dtype : 'float64' o 'float32' (modo --float32)
+    medianas : medianas de todo el archivo si df es un lote (ver medianas_por_lotes)
+    """
+
+    mostrar = print if detalle else (lambda *args, **kwargs: None)
+
+    mostrar("\n" + "=" * 70)
+    mostrar("PREPROCESANDO DATOS")
+    mostrar("=" * 70)
+
+    if detalle:
+        # Verificar valores faltantes
+        valores_faltantes = df[pipeline.columnas].isnull().sum()
+        if valores_faltantes.any():
+            mostrar("\n⚠ ADVERTENCIA: Hay valores faltantes:")
+            for col, count in valores_faltantes[valores_faltantes > 0].items():
+                mostrar(f"   - {col}: {count} valores faltantes")
+            mostrar("\n  Se rellenarán con la mediana de cada columna")
+            mostrar("  (las categóricas con su valor más frecuente en el entrenamiento)")
+
+        categorical_cols = pipeline.columnas_categoricas()
+        if len(categorical_cols) > 0:
+            mostrar(f"\n✓ Codificando variables categóricas: {categorical_cols}")
+
+    # Imputar, codificar y escalar sobre una sola matriz numpy
+    X_scaled = pipeline.transformar(df, dtype=dtype, medianas=medianas)
 
-    print(f"✓ Datos preprocesados: {X.shape}")
+    mostrar(f"✓ Datos preprocesados: {X_scaled.shape} ({X_scaled.dtype})")
+    mostrar("✓ Datos escalados")
 
-    # Escalar datos
-    X_scaled = scaler.transform(X)
-    print("✓ Datos escalados")
+    traza_etapas.anotar(filas=len(X_scaled), bytes_escritos=X_scaled.nbytes)
 
     return X_scaled
 
 
-def hacer_predicciones(model, X_scaled):
-    """Hace las predicciones usando el modelo"""
+def obtener_tolerancia_float32(info):
+    """Diferencia máxima permitida entre las predicciones float32 y float64
+
+    Es 'tolerancia_float32' de model_info.json (la guarda 1_guardar_modelo.py);
+    en modelos guardados antes se usa FRACCION_RMSE_FLOAT32 del RMSE de prueba.
+    Retorna None si no hay ninguna de las dos.
+    """
+    if info.get('tolerancia_float32') is not None:
+        return float(info['tolerancia_float32'])
+    rmse = info.get('metricas', {}).get('RMSE_test')
+    return None if rmse is None else FRACCION_RMSE_FLOAT32 * float(rmse)
+
+
+def comprobar_float32(pipeline, datos, tolerancia, detalle=True):
+    """Predice una muestra de filas en float32 y en float64 y compara
+
+    datos : DataFrame o tabla de Arrow con las columnas del modelo
+    Lanza ValueError si la diferencia máxima supera la tolerancia.
+    Retorna la diferencia máxima.
+    """
+
+    import numpy as np
+
+    n = len(datos)
+    indices = np.unique(np.linspace(0, n - 1, min(n, MUESTRA_FLOAT32)).astype(np.intp))
+    if hasattr(datos, 'iloc'):
+        muestra = datos.iloc[indices]
+        X64, X32 = pipeline.transformar(muestra), pipeline.transformar(muestra, dtype=np.float32)
+    else:
+        muestra = datos.take(indices)
+        X64 = pipeline.transformar_tabla(muestra)
+        X32 = pipeline.transformar_tabla(muestra, dtype=np.float32)
+
+    referencia = pipeline.predecir_matriz(X64)
+    diferencia = float(np.max(np.abs(pipeline.predecir_matriz(X32).astype(np.float64) - referencia)))
+
+    if not diferencia <= tolerancia:
+        raise ValueError(f"En float32 las predicciones difieren hasta {diferencia:.6g} de float64 "
+                         f"(tolerancia {tolerancia:.6g}); ejecuta sin --float32")
+    if detalle:
+        print(f"\n✓ float32 comprobado en {len(indices)} filas: diferencia máxima {diferencia:.3g} "
+              f"(tolerancia {tolerancia:.3g})")
+    return diferencia
+
+
+def abrir_cache(filename, pipeline, float32=False):
+    """Caché de predicciones del Excel para el modelo actual (ver cache_predicciones.py)"""
+
+    import pandas as pd
+    from cache_predicciones import CachePredicciones, huella_modelo, ruta_cache
+
+    # Las columnas y la versión de pandas (que calcula el hash de cada fila) también
+    # forman parte de la huella; las predicciones float32 no se mezclan con las float64
+    huella = huella_modelo(ARCHIVOS_MODELO, *pipeline.columnas, pd.__version__,
+                           *(['float32'] if float32 else []))
+    cache = CachePredicciones.abrir(ruta_cache(filename), huella)
+    if cache.descartado:
+        print("\n✓ El modelo cambió: se descartó el caché de predicciones anterior")
+
+    return cache
+
+
+def predecir_con_cache(df, pipeline, cache=None, detalle=True, dtype='float64', medianas=None):
+    """Preprocesa y predice las filas de df; con caché solo calcula las filas que no están en él
+
+    medianas : como en preprocesar_datos
+    Retorna las predicciones (de tipo dtype) en el orden de las filas de df.
+    """
+
+    import numpy as np
+
+    claves = pipeline.claves_filas(df) if cache is not None else None
+    if claves is None:
+        if cache is not None:
+            # Una sola vez por archivo, también al procesar por lotes
+            if not cache.sin_claves:
+                print("\n⚠ Caché desactivado: hay celdas vacías y el modelo no guardó medianas "
+                      "(la predicción depende del resto del archivo)")
+            cache.sin_claves += len(df)
+        predicciones = np.empty(len(df), dtype=dtype)
+        faltan = np.ones(len(df), dtype=bool)
+    else:
+        predicciones, faltan = cache.buscar(claves)
+        predicciones = predicciones.astype(dtype, copy=False)
+        if detalle:
+            print(f"\n✓ Caché: {len(df) - faltan.sum()} filas sin cambios, "
+                  f"{faltan.sum()} filas por predecir")
+
+    if faltan.any():
+        df_nuevas = df if faltan.all() else df[faltan]
+        X_scaled = preprocesar_datos(df_nuevas, pipeline, detalle=detalle, dtype=dtype,
+                                     medianas=medianas)
+        if detalle:
+            nuevas = hacer_predicciones(pipeline, X_scaled)
+        else:
+            with traza_etapas.etapa('hacer_predicciones'):
+                nuevas = pipeline.predecir_matriz(X_scaled)
+                traza_etapas.anotar(filas=len(nuevas), bytes_leidos=X_scaled.nbytes,
+                                    bytes_escritos=nuevas.nbytes)
+        predicciones[faltan] = nuevas
+        if claves is not None:
+            cache.agregar(claves[faltan], predicciones[faltan])
+
+    return predicciones
+
+
+def guardar_cache(cache):
+    """Guarda el caché en disco; si no se puede, solo avisa (las predicciones ya se escribieron)
+
+    Si ninguna fila pudo usar el caché no se escribe nada junto al Excel.
+    """
+
+    if cache.consultas == 0:
+        return
+
+    try:
+        cache.guardar()
+        print(f"✓ Caché de predicciones: {len(cache)} filas en {os.path.basename(cache.ruta)}")
+    except OSError as e:
+        print(f"⚠ No se pudo guardar el caché de predicciones: {str(e)}")
+
+
+@traza_etapas.trazar('hacer_predicciones')
+def hacer_predicciones(pipeline, X_scaled):
+    """Hace las predicciones usando el modelo del pipeline"""
+
+    import numpy as np
 
     print("\n" + "=" * 70)
     print("HACIENDO PREDICCIONES")
     print("=" * 70)
 
-    predicciones = model.predict(X_scaled)
+    predicciones = pipeline.predecir_matriz(X_scaled)
 
     print(f"✓ Predicciones realizadas: {len(predicciones)} valores")
     print(f"\n  Estadísticas de predicciones:")
@@ -177,18 +454,115 @@ def hacer_predicciones(model, X_scaled):
     print(f"    - Promedio: {predicciones.mean():.2f}")
     print(f"    - Mediana: {np.median(predicciones):.2f}")
 
+    traza_etapas.anotar(filas=len(predicciones), bytes_leidos=X_scaled.nbytes,
+                        bytes_escritos=predicciones.nbytes)
+
     return predicciones
 
 
-def escribir_resultados(filename, predicciones, df_original):
-    """Escribe las predicciones en el mismo archivo Excel"""
+def medianas_por_lotes(filename, pipeline, tamano_lote=TAMANO_LOTE):
+    """Mediana de cada variable numérica en todo el Excel, leído por lotes
+
+    Para modelos guardados sin medianas: sin esta primera pasada cada lote se
+    imputaría con las suyas y la predicción de una fila con celdas vacías
+    dependería del tamaño del lote. Los lotes se guardan sin imputar en
+    fragmentos en disco y la mediana se calcula ahí (ver
+    FragmentosDisco.medianas), sin tener el archivo en memoria.
+    Retorna None si el Excel no tiene datos.
+    """
+
+    from fragmentos_memmap import FragmentosDisco
+
+    categoricas = pipeline.columnas_categoricas()
+    numericas = [j for j, col in enumerate(pipeline.columnas) if col not in categoricas]
+
+    with FragmentosDisco(len(pipeline.columnas)) as fragmentos:
+        for lote in leer_datos_excel_por_lotes(filename, pipeline.columnas, tamano_lote, categoricas):
+            with fragmentos.nuevo(len(lote)) as X:
+                X[:] = pipeline.transformar(lote, imputar=False)
+        if fragmentos.filas == 0:
+            return None
+        return fragmentos.medianas(numericas)
+
+
+@traza_etapas.trazar('predecir_por_lotes')
+def predecir_por_lotes(filename, pipeline, tamano_lote=TAMANO_LOTE, cache=None,
+                       tolerancia_float32=None):
+    """Lee, preprocesa y predice el archivo lote a lote
+
+    Solo un lote de filas está en memoria a la vez; se conservan únicamente
+    las predicciones (float64, o float32) y su posición en la hoja (int64).
+    Con caché, en cada lote solo se predicen las filas que no están en él.
+    tolerancia_float32 : si se indica, se predice en float32 (comprobado en el primer lote)
+    Con --trace es una etapa que contiene las de cada lote (la lectura del
+    Excel es su tiempo fuera de ellas).
+    Retorna (predicciones, indices) o (None, None) si no hay datos.
+    """
+
+    import numpy as np
 
     print("\n" + "=" * 70)
-    print("ESCRIBIENDO RESULTADOS EN EXCEL")
+    print(f"PREDICIENDO POR LOTES ({tamano_lote} filas por lote)")
     print("=" * 70)
 
-    # Cargar el workbook existente
-    wb = load_workbook(filename)
+    if not os.path.exists(filename):
+        print(f"\n❌ ERROR: No se encuentra el archivo {filename}")
+        print("Por favor, ejecuta primero el script 2_crear_plantilla_excel.py")
+        return None, None
+
+    # Sin medianas guardadas: primera pasada para imputar con las de todo el
+    # archivo, igual que sin --lotes
+    medianas = None
+    if pipeline.medianas is None:
+        medianas = medianas_por_lotes(filename, pipeline, tamano_lote)
+        print("✓ Medianas de todo el archivo calculadas (el modelo no las guardó)")
+
+    dtype = 'float64' if tolerancia_float32 is None else 'float32'
+    bloques_pred, bloques_idx = [], []
+    total = 0
+
+    lotes = leer_datos_excel_por_lotes(filename, pipeline.columnas, tamano_lote,
+                                       pipeline.columnas_categoricas())
+    for numero, lote in enumerate(lotes, 1):
+        if numero == 1 and tolerancia_float32 is not None:
+            comprobar_float32(pipeline, lote, tolerancia_float32)
+        predicciones = predecir_con_cache(lote, pipeline, cache, detalle=False, dtype=dtype,
+                                          medianas=medianas)
+        bloques_pred.append(np.asarray(predicciones, dtype=dtype))
+        bloques_idx.append(lote.index.to_numpy(dtype=np.int64))
+        total += len(lote)
+        print(f"  ✓ Lote {numero}: {len(lote)} filas (acumulado: {total})")
+
+    if total == 0:
+        print("\n❌ ERROR: No hay datos para procesar")
+        print("Por favor, llena los datos en el Excel y vuelve a ejecutar")
+        return None, None
+
+    predicciones = np.concatenate(bloques_pred)
+    indices = np.concatenate(bloques_idx)
+
+    print(f"\n✓ Predicciones realizadas: {total} valores")
+    print(f"    - Mínimo: {predicciones.min():.2f}")
+    print(f"    - Máximo: {predicciones.max():.2f}")
+    print(f"    - Promedio: {predicciones.mean():.2f}")
+    if cache is not None and cache.aciertos:
+        print(f"    - Tomadas del caché: {cache.aciertos}")
+    if cache is not None and cache.sin_claves:
+        print(f"    - Sin caché (lotes con celdas vacías): {cache.sin_claves}")
+
+    traza_etapas.anotar(archivo=filename, filas=total, bytes_leidos=traza_etapas.tamano_archivos(filename))
+
+    return predicciones, indices
+
+
+def escribir_resultados_openpyxl(filename, predicciones, df_original):
+    """Escribe las predicciones cargando y guardando el libro completo con openpyxl"""
+
+    from openpyxl import load_workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    # Cargar el workbook existente (conservando las macros si es .xlsm)
+    wb = load_workbook(filename, keep_vba=filename.lower().endswith('.xlsm'))
     ws = wb['Datos para Predicción']
 
     # Encontrar la columna de predicciones
@@ -223,50 +597,360 @@ def escribir_resultados(filename, predicciones, df_original):
     # Guardar archivo
     wb.save(filename)
 
+    return True
+
+
+@traza_etapas.trazar('escribir_resultados')
+def escribir_resultados(filename, predicciones, df_original):
+    """Escribe las predicciones en el mismo archivo Excel
+
+    Solo se reescribe la hoja de datos dentro del archivo (ver escritura_xlsx.py);
+    el resto del libro (otras hojas, macros, gráficos) se copia sin cambios.
+    La hoja se reescribe fila por fila tomando cada predicción del array, así
+    la memoria no depende del número de filas.
+    Si el archivo no admite esa escritura se usa openpyxl como respaldo.
+    """
+
+    from escritura_xlsx import EstiloCelda, ErrorEscrituraXlsx, escribir_filas_xlsx, localizar_columna
+
+    print("\n" + "=" * 70)
+    print("ESCRIBIENDO RESULTADOS EN EXCEL")
+    print("=" * 70)
+
+    try:
+        # Encontrar la columna de predicciones (fila de encabezados = 5)
+        pred_col = localizar_columna(filename, 'Datos para Predicción', 5,
+                                     'Consumo_kWh_Mensual_Predicho')
+        if pred_col is None:
+            print("❌ ERROR: No se encuentra la columna 'Consumo_kWh_Mensual_Predicho'")
+            return False
+
+        # Escribir predicciones (empezando en fila 6)
+        data_start_row = 6
+        estilo_verde = EstiloCelda(relleno="C6EFCE", centrado=True)
+
+        filas = df_original.index.to_numpy() + data_start_row
+        marca = f'Última predicción: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+
+        def cambios():
+            # Marca de tiempo (conserva el formato de la celda) y una fila por predicción
+            yield 3, {1: (marca, None)}
+            for row, pred in zip(filas, predicciones):
+                yield int(row), {pred_col: (round(float(pred), 2), estilo_verde)}
+
+        escribir_filas_xlsx(filename, 'Datos para Predicción', cambios(),
+                            ultima_fila=int(filas.max()), ultima_columna=pred_col)
+
+    except ErrorEscrituraXlsx as e:
+        print(f"⚠ Escritura rápida no disponible ({str(e)}), guardando con openpyxl...")
+        if not escribir_resultados_openpyxl(filename, predicciones, df_original):
+            return False
+
     print(f"✓ Resultados escritos en: {filename}")
     print(f"  Columna: Consumo_kWh_Mensual_Predicho")
     print(f"  Filas actualizadas: {len(predicciones)}")
 
+    traza_etapas.anotar(archivo=filename, filas=len(predicciones),
+                        bytes_escritos=traza_etapas.tamano_archivos(filename))
+
     return True
 
 
-def main():
-    """Función principal"""
+def procesar_archivo_columnar(filename, pipeline, salida=None, memoria_mb=None,
+                              tolerancia_float32=None):
+    """Predice un archivo Parquet / Feather / Arrow IPC y escribe las predicciones en otro archivo
 
-    filename = 'Plantilla_Prediccion_Consumo.xlsx'
+    Solo se leen las columnas del modelo (y las de COLUMNAS_ID si existen); se
+    predicen todas las filas (los valores vacíos se imputan). El archivo de
+    salida tiene esas columnas más 'Consumo_kWh_Mensual_Predicho'.
+    salida : archivo de salida (su extensión define el formato); por defecto
+             <nombre>_predicciones con la misma extensión
+    memoria_mb : si se indica, se procesa fuera de memoria por fragmentos en
+                 disco con ese presupuesto (ver predecir_columnar_en_disco)
+    tolerancia_float32 : si se indica, se predice en float32 (ver comprobar_float32)
+    Retorna el número de filas escritas, o False si hubo un error.
+    """
 
-    # 1. Cargar modelo
-    model, scaler, info = cargar_modelo()
-    if model is None:
-        return
+    from lectura_columnar import columnas_archivo, escribir_tabla, formato_columnar, leer_tabla, ruta_salida
 
-    feature_names = info['feature_names']
+    print("\n" + "=" * 70)
+    print("LEYENDO DATOS (FORMATO COLUMNAR)")
+    print("=" * 70)
 
-    # 2. Leer datos
-    df = leer_datos_excel(filename, feature_names)
-    if df is None:
-        return
+    if not os.path.exists(filename):
+        print(f"\n❌ ERROR: No se encuentra el archivo {filename}")
+        return False
 
-    # 3. Preprocesar
     try:
-        X_scaled = preprocesar_datos(df, feature_names, scaler)
+        import pyarrow as pa
+        disponibles = columnas_archivo(filename)
+    except ImportError:
+        print("\n❌ ERROR: Para leer Parquet/Feather/Arrow instala pyarrow: pip install pyarrow")
+        return False
     except Exception as e:
-        print(f"\n❌ ERROR al preprocesar datos: {str(e)}")
-        return
+        print(f"\n❌ ERROR al leer {filename}: {str(e)}")
+        return False
+
+    columnas_faltantes = [col for col in pipeline.columnas if col not in disponibles]
+    if columnas_faltantes:
+        print(f"\n❌ ERROR: Faltan columnas en el archivo:")
+        for col in columnas_faltantes:
+            print(f"   - {col}")
+        return False
+
+    # Proyección: solo las columnas que se usan
+    identificacion = [col for col in COLUMNAS_ID if col in disponibles and col not in pipeline.columnas]
+    salida = salida or ruta_salida(filename)
+
+    if memoria_mb:
+        try:
+            return predecir_columnar_en_disco(filename, pipeline, identificacion, salida, memoria_mb,
+                                              tolerancia_float32)
+        except Exception as e:
+            print(f"\n❌ ERROR al predecir por fragmentos: {str(e)}")
+            return False
+
+    formato = formato_columnar(filename)
+    with traza_etapas.etapa('leer_datos_excel', archivo=filename, formato=formato):
+        tabla = leer_tabla(filename, identificacion + pipeline.columnas)
+        # Bytes de las columnas leídas (no de todo el archivo)
+        traza_etapas.anotar(filas=tabla.num_rows, bytes_leidos=tabla.nbytes)
+
+    print(f"✓ Archivo leído: {filename}")
+    print(f"  Filas: {tabla.num_rows}")
+    print(f"  Columnas leídas: {tabla.num_columns} de {len(disponibles)}")
+
+    if tabla.num_rows == 0:
+        print("\n❌ ERROR: No hay datos para procesar")
+        return False
 
-    # 4. Predecir
+    # Preprocesar y predecir
     try:
-        predicciones = hacer_predicciones(model, X_scaled)
+        dtype = 'float64'
+        if tolerancia_float32 is not None:
+            comprobar_float32(pipeline, tabla, tolerancia_float32)
+            dtype = 'float32'
+        with traza_etapas.etapa('preprocesar_datos', formato=formato):
+            X_scaled = pipeline.transformar_tabla(tabla, dtype=dtype)
+            traza_etapas.anotar(filas=len(X_scaled), bytes_escritos=X_scaled.nbytes)
+        print(f"✓ Datos preprocesados: {X_scaled.shape[0]} filas x {X_scaled.shape[1]} variables "
+              f"({X_scaled.dtype})")
+        predicciones = hacer_predicciones(pipeline, X_scaled).astype(dtype, copy=False)
     except Exception as e:
         print(f"\n❌ ERROR al hacer predicciones: {str(e)}")
-        return
+        return False
+
+    # Escribir resultados
+    try:
+        with traza_etapas.etapa('escribir_resultados', archivo=salida, formato=formato_columnar(salida)):
+            resultado = tabla.append_column('Consumo_kWh_Mensual_Predicho',
+                                            pa.array(predicciones, type=pa.from_numpy_dtype(predicciones.dtype)))
+            escribir_tabla(resultado, salida)
+            traza_etapas.anotar(filas=resultado.num_rows, bytes_escritos=traza_etapas.tamano_archivos(salida))
+    except Exception as e:
+        print(f"\n❌ ERROR al escribir resultados: {str(e)}")
+        return False
+
+    print("\n" + "=" * 70)
+    print("✓ ¡PROCESO COMPLETADO EXITOSAMENTE!")
+    print("=" * 70)
+    print(f"\nPredicciones escritas en: {salida}")
+    print(f"  Columna: Consumo_kWh_Mensual_Predicho")
+    print(f"  Filas: {len(predicciones)}")
+    print("\n" + "=" * 70)
+
+    return len(predicciones)
+
+
+def predecir_columnar_en_disco(filename, pipeline, identificacion, salida, memoria_mb,
+                               tolerancia_float32=None):
+    """Predice un archivo columnar fuera de memoria (ver fragmentos_memmap.py)
+
+    1. Lee el archivo por lotes y escribe la matriz codificada (sin imputar) en
+       fragmentos np.memmap en disco
+    2. Imputa, escala y predice fragmento por fragmento sobre un np.memmap de
+       resultados
+    3. Vuelve a leer el archivo por lotes y escribe cada lote con sus predicciones
+    Si el pipeline no guardó medianas, se imputa con las de todo el archivo,
+    calculadas sobre los fragmentos (como al predecirlo de una vez). Con
+    tolerancia_float32 los fragmentos y las predicciones son float32
+    (comprobado en el primer lote).
+    Con --trace cada pasada es una etapa (preprocesar_datos incluye la lectura).
+    Retorna el número de filas escritas.
+    """
+
+    import numpy as np
+    import pyarrow as pa
+    from fragmentos_memmap import FragmentosDisco, filas_por_fragmento, memoria_maxima_mb
+    from lectura_columnar import FORMATOS, escribir_lotes, formato_columnar, leer_lotes
+
+    # Validar la salida antes de las pasadas sobre el archivo
+    if formato_columnar(salida) is None:
+        raise ValueError(f"Formato de salida no soportado: {salida} "
+                         f"(usa {', '.join(sorted(FORMATOS))})")
+
+    columnas = identificacion + pipeline.columnas
+    dtype = 'float64' if tolerancia_float32 is None else 'float32'
+    filas_lote = filas_por_fragmento(memoria_mb, len(pipeline.columnas), dtype)
+
+    print("\n" + "=" * 70)
+    print(f"PREDICCIÓN FUERA DE MEMORIA (presupuesto {memoria_mb} MB, "
+          f"hasta {filas_lote} filas por fragmento, {dtype})")
+    print("=" * 70)
+
+    formato = formato_columnar(filename)
+
+    with FragmentosDisco(len(pipeline.columnas), dtype=dtype) as fragmentos:
+        # 1. Preprocesar a fragmentos en disco
+        with traza_etapas.etapa('preprocesar_datos', archivo=filename, formato=formato):
+            for lote in leer_lotes(filename, pipeline.columnas, filas_lote):
+                if len(fragmentos) == 0 and tolerancia_float32 is not None:
+                    comprobar_float32(pipeline, lote, tolerancia_float32)
+                with fragmentos.nuevo(lote.num_rows) as X:
+                    pipeline.transformar_tabla(lote, salida=X, imputar=False)
+                print(f"  ✓ Fragmento {len(fragmentos)}: {lote.num_rows} filas preprocesadas "
+                      f"(acumulado: {fragmentos.filas})")
+                del lote
+
+            medianas = None
+            if pipeline.medianas is None and fragmentos.filas:
+                categoricas = pipeline.columnas_categoricas()
+                medianas = fragmentos.medianas([j for j, col in enumerate(pipeline.columnas)
+                                                if col not in categoricas])
+                print("  ✓ Medianas de todo el archivo calculadas (el modelo no las guardó)")
+            traza_etapas.anotar(filas=fragmentos.filas, fragmentos=len(fragmentos),
+                                bytes_escritos=traza_etapas.tamano_archivos(fragmentos.carpeta))
+
+        if fragmentos.filas == 0:
+            print("\n❌ ERROR: No hay datos para procesar")
+            return False
+
+        def predecir(X):
+            return pipeline.predecir_matriz(pipeline.imputar_y_escalar(np.array(X), medianas))
+
+        # 2. Imputar y predecir fragmento por fragmento
+        with traza_etapas.etapa('hacer_predicciones', formato=formato):
+            predicciones = fragmentos.predecir(
+                predecir, 1,
+                lambda numero, filas: print(f"  ✓ Fragmento {numero}: {filas} filas predichas"))[:, 0]
+            traza_etapas.anotar(filas=len(predicciones), bytes_escritos=predicciones.nbytes)
+
+        print(f"\n✓ Predicciones realizadas: {len(predicciones)} valores")
+        print(f"    - Mínimo: {predicciones.min():.2f}")
+        print(f"    - Máximo: {predicciones.max():.2f}")
+        print(f"    - Promedio: {predicciones.mean():.2f}")
+
+        # 3. Escribir cada lote del archivo con su tramo de predicciones
+        def lotes_con_predicciones():
+            inicio = 0
+            for lote in leer_lotes(filename, columnas, filas_lote):
+                fin = inicio + lote.num_rows
+                yield lote.append_column('Consumo_kWh_Mensual_Predicho',
+                                         pa.array(predicciones[inicio:fin],
+                                                  type=pa.from_numpy_dtype(predicciones.dtype)))
+                inicio = fin
+
+        with traza_etapas.etapa('escribir_resultados', archivo=salida, formato=formato_columnar(salida)):
+            filas = escribir_lotes(lotes_con_predicciones(), salida)
+            traza_etapas.anotar(filas=filas, bytes_escritos=traza_etapas.tamano_archivos(salida))
+        del predicciones
+
+    print("\n" + "=" * 70)
+    print("✓ ¡PROCESO COMPLETADO EXITOSAMENTE!")
+    print("=" * 70)
+    print(f"\nPredicciones escritas en: {salida}")
+    print(f"  Columna: Consumo_kWh_Mensual_Predicho")
+    print(f"  Filas: {filas}")
+    memoria = memoria_maxima_mb()
+    if memoria is not None:
+        print(f"  Memoria máxima del proceso: {memoria:.0f} MB")
+    print("\n" + "=" * 70)
+
+    return filas
+
+
+@traza_etapas.trazar('procesar_archivo')
+def procesar_archivo(filename, pipeline, info, filas=None, tamano_lote=None, usar_cache=True,
+                     salida=None, memoria_mb=None, float32=False):
+    """Lee, preprocesa, predice y escribe los resultados de un archivo Excel
+
+    Recibe el pipeline ya cargado para que pueda reutilizarse en varias
+    ejecuciones (por ejemplo desde servidor_prediccion.py).
+    Si se indica tamano_lote, el archivo se procesa por lotes con memoria
+    constante (recomendado para archivos muy grandes).
+    usar_cache : solo predecir las filas que no están en el caché del Excel
+    Los archivos Parquet / Feather / Arrow IPC se procesan con
+    procesar_archivo_columnar (salida: archivo de predicciones; memoria_mb:
+    presupuesto del modo fuera de memoria).
+    float32 : preprocesar y predecir en float32, si en una muestra de filas la
+              diferencia con float64 no supera la tolerancia de model_info.json
+    Con --trace es una etapa que contiene las de este archivo.
+    Retorna el número de filas escritas, o False si hubo un error.
+    """
+
+    from lectura_columnar import formato_columnar
+
+    traza_etapas.anotar(archivo=filename)
+
+    tolerancia = None
+    if float32:
+        tolerancia = obtener_tolerancia_float32(info)
+        if tolerancia is None:
+            print("\n❌ ERROR: model_info.json no tiene 'tolerancia_float32' ni 'RMSE_test': "
+                  "no se puede comprobar float32")
+            print("Ejecuta sin --float32 o vuelve a ejecutar 1_guardar_modelo.py")
+            return False
+
+    if formato_columnar(filename):
+        return procesar_archivo_columnar(filename, pipeline, salida, memoria_mb, tolerancia)
+
+    feature_names = pipeline.columnas
+    cache = None
+
+    if tamano_lote:
+        # 2-4. Leer, preprocesar y predecir lote a lote
+        try:
+            if usar_cache:
+                cache = abrir_cache(filename, pipeline, float32)
+            predicciones, indices = predecir_por_lotes(filename, pipeline, tamano_lote, cache,
+                                                       tolerancia)
+        except Exception as e:
+            print(f"\n❌ ERROR al predecir por lotes: {str(e)}")
+            return False
+        if predicciones is None:
+            return False
+
+        # escribir_resultados solo necesita la posición de cada fila
+        import pandas as pd
+        df = pd.DataFrame(index=indices)
+    else:
+        # 2. Leer datos
+        df = leer_datos_excel(filename, feature_names, filas=filas)
+        if df is None:
+            return False
+
+        # 3-4. Preprocesar y predecir (con caché, solo las filas nuevas o modificadas)
+        try:
+            dtype = 'float64'
+            if tolerancia is not None:
+                comprobar_float32(pipeline, df, tolerancia)
+                dtype = 'float32'
+            if usar_cache:
+                cache = abrir_cache(filename, pipeline, float32)
+            predicciones = predecir_con_cache(df, pipeline, cache, dtype=dtype)
+        except Exception as e:
+            print(f"\n❌ ERROR al hacer predicciones: {str(e)}")
+            return False
 
     # 5. Escribir resultados
     try:
         exito = escribir_resultados(filename, predicciones, df)
     except Exception as e:
         print(f"\n❌ ERROR al escribir resultados: {str(e)}")
-        return
+        return False
+
+    if exito and cache is not None:
+        guardar_cache(cache)
 
     if exito:
         print("\n" + "=" * 70)
@@ -276,13 +960,290 @@ def main():
         print("Las predicciones están en la columna 'Consumo_kWh_Mensual_Predicho' (fondo verde)")
         print("\n" + "=" * 70)
 
+    return len(predicciones) if exito else False
+
+
+def verificar(filename):
+    """Verifica que existan el modelo y el Excel sin cargar nada. Retorna True si está todo"""
+
+    _, faltantes = archivos_modelo()
+    if not os.path.exists(filename):
+        faltantes.append(filename)
+
+    for archivo in faltantes:
+        print(f"❌ Falta: {archivo}")
+    if not faltantes:
+        print("✓ Modelo y Excel disponibles")
+
+    return not faltantes
+
+
+def perfilar_arranque(filename, filas_prueba=10):
+    """Tiempo de cada etapa del arranque (--profile-startup); no escribe en el Excel
+
+    Mide dos caminos contra su presupuesto (ver perfil_arranque.py):
+    verificar los archivos y salir, y cargar el modelo y predecir filas_prueba filas.
+    """
+
+    from perfil_arranque import PerfilArranque, PRESUPUESTO_VERIFICACION, PRESUPUESTO_10_FILAS
+
+    perfil = PerfilArranque(_INICIO)
+
+    with perfil.etapa('verificar archivos'):
+        completo = verificar(filename)
+    perfil.hito('verificar archivos y salir', PRESUPUESTO_VERIFICACION)
+
+    if completo:
+        for modulo in ('numpy', 'pandas', 'openpyxl', 'pipeline_prediccion', 'escritura_xlsx'):
+            perfil.importar(modulo)
+
+        with perfil.etapa('cargar modelo (artefactos)'):
+            pipeline, info = cargar_modelo()
+        with perfil.etapa(f'leer {filas_prueba} filas del Excel'):
+            df = leer_datos_excel(filename, pipeline.columnas, filas=(6, 5 + filas_prueba))
+        if df is not None:
+            with perfil.etapa('preprocesar'):
+                X_scaled = preprocesar_datos(df, pipeline)
+            with perfil.etapa('predecir'):
+                hacer_predicciones(pipeline, X_scaled)
+        perfil.hito(f'predecir {filas_prueba} filas', PRESUPUESTO_10_FILAS)
+
+    perfil.reporte()
+    if not completo:
+        print("\n⚠ Faltan archivos: no se midió la carga del modelo")
+    elif df is None:
+        print(f"\n⚠ Las filas 6 a {5 + filas_prueba} no tienen datos: no se midió la predicción")
+
+    return completo
+
+
+def main(filename='Plantilla_Prediccion_Consumo.xlsx', tamano_lote=None, usar_cache=True, salida=None,
+         memoria_mb=None, float32=False):
+    """Función principal"""
+
+    # 1. Cargar modelo
+    pipeline, info = cargar_modelo()
+    if pipeline is None:
+        return
+
+    procesar_archivo(filename, pipeline, info, tamano_lote=tamano_lote, usar_cache=usar_cache,
+                     salida=salida, memoria_mb=memoria_mb, float32=float32)
+
+
+# Estado de cada proceso del modo carpeta (ver _iniciar_trabajador)
+_TRABAJADOR = {}
+
+
+def listar_archivos(ruta):
+    """Archivos a procesar: los Excel (.xlsx/.xlsm) y columnares (.parquet, .feather, ...)
+    de una carpeta, o los que coinciden con un patrón
+    """
+
+    from lectura_columnar import FORMATOS, SUFIJO_SALIDA
+
+    if os.path.isdir(ruta):
+        patrones = [os.path.join(ruta, '*' + extension)
+                    for extension in ['.xlsx', '.xlsm'] + list(FORMATOS)]
+    else:
+        patrones = [ruta]
+
+    archivos = {os.path.abspath(a) for patron in patrones for a in glob.glob(patron)}
+    # Excel crea '~$archivo.xlsx' mientras el libro está abierto; en una carpeta
+    # tampoco se vuelven a predecir los archivos de predicciones de otra ejecución
+    return sorted(a for a in archivos
+                  if os.path.isfile(a) and not os.path.basename(a).startswith('~$')
+                  and not (os.path.isdir(ruta) and
+                           os.path.splitext(a)[0].endswith(SUFIJO_SALIDA)))
+
+
+def _iniciar_trabajador(tamano_lote, usar_cache, memoria_mb=None, float32=False, traza=None):
+    """Inicializador de cada proceso: carga el modelo una sola vez
+
+    traza : destino de las trazas (--trace); cada proceso escribe sus líneas
+    """
+
+    if traza:
+        traza_etapas.activar(traza, script=os.path.basename(__file__))
+
+    # Si el inicializador fallara, el pool volvería a crear el proceso sin fin:
+    # el error se informa al procesar cada archivo
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline, info = cargar_modelo()
+    except Exception:
+        pipeline, info = None, None
+    _TRABAJADOR.update(pipeline=pipeline, info=info, tamano_lote=tamano_lote,
+                       usar_cache=usar_cache, memoria_mb=memoria_mb, float32=float32)
+
+
+def _procesar_en_trabajador(filename):
+    """Procesa un archivo con el modelo del proceso. Retorna un dict con el resultado"""
+
+    inicio = time.perf_counter()
+    salida = io.StringIO()
+    filas, error = 0, None
+
+    try:
+        with contextlib.redirect_stdout(salida):
+            if _TRABAJADOR['pipeline'] is None:
+                raise RuntimeError("No se pudo cargar el modelo")
+            filas = procesar_archivo(filename, _TRABAJADOR['pipeline'], _TRABAJADOR['info'],
+                                     tamano_lote=_TRABAJADOR['tamano_lote'],
+                                     usar_cache=_TRABAJADOR['usar_cache'],
+                                     memoria_mb=_TRABAJADOR['memoria_mb'],
+                                     float32=_TRABAJADOR['float32'])
+    except Exception as e:
+        error = str(e)
+
+    if not filas and error is None:
+        # procesar_archivo informa los errores por pantalla: se toma la primera línea con ❌
+        errores = [linea.strip() for linea in salida.getvalue().splitlines() if '❌' in linea]
+        error = errores[0].lstrip('❌ ') if errores else "Error desconocido"
+
+    return {
+        'archivo': filename,
+        'ok': error is None,
+        'filas': int(filas or 0),
+        'segundos': time.perf_counter() - inicio,
+        'error': error,
+    }
+
+
+def procesar_carpeta(ruta, procesos=None, tamano_lote=None, usar_cache=True, memoria_mb=None,
+                     float32=False, traza=None):
+    """Predice todos los Excel de una carpeta (o de un patrón glob) en paralelo
+
+    Cada proceso carga el modelo una sola vez y procesa varios archivos.
+    traza : destino de las trazas de cada proceso (--trace)
+    Al terminar imprime un resumen con el rendimiento y los archivos que fallaron.
+    Retorna la lista de resultados (un dict por archivo).
+    """
+
+    import multiprocessing
+
+    print("=" * 70)
+    print("PREDICCIÓN DE VARIOS ARCHIVOS EN PARALELO")
+    print("=" * 70)
+
+    archivos = listar_archivos(ruta)
+    if not archivos:
+        print(f"\n❌ ERROR: No hay archivos Excel, Parquet, Feather ni Arrow en {ruta}")
+        return []
+
+    # Verificar el modelo antes de iniciar los procesos
+    _, faltantes = archivos_modelo()
+    if faltantes:
+        print("\n❌ ERROR: Faltan archivos necesarios:")
+        for archivo in faltantes:
+            print(f"   - {archivo}")
+        print("\nPor favor, ejecuta primero el script 1_guardar_modelo.py")
+        return []
+
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(archivos)))
+    print(f"✓ Archivos encontrados: {len(archivos)}")
+    print(f"✓ Procesos: {procesos}\n")
+
+    inicio = time.perf_counter()
+    resultados = []
+
+    with multiprocessing.Pool(procesos, initializer=_iniciar_trabajador,
+                              initargs=(tamano_lote, usar_cache, memoria_mb, float32, traza)) as pool:
+        for resultado in pool.imap_unordered(_procesar_en_trabajador, archivos):
+            resultados.append(resultado)
+            nombre = os.path.basename(resultado['archivo'])
+            if resultado['ok']:
+                print(f"  ✓ [{len(resultados)}/{len(archivos)}] {nombre}: "
+                      f"{resultado['filas']} filas ({resultado['segundos']:.2f} s)")
+            else:
+                print(f"  ❌ [{len(resultados)}/{len(archivos)}] {nombre}: {resultado['error']}")
+
+    segundos = time.perf_counter() - inicio
+    correctos = [r for r in resultados if r['ok']]
+    fallidos = [r for r in resultados if not r['ok']]
+    filas = sum(r['filas'] for r in correctos)
+
+    print("\n" + "=" * 70)
+    print("RESUMEN")
+    print("=" * 70)
+    print(f"  Archivos procesados: {len(correctos)} de {len(resultados)}")
+    print(f"  Filas predichas: {filas}")
+    print(f"  Tiempo total: {segundos:.2f} s con {procesos} "
+          f"{'proceso' if procesos == 1 else 'procesos'}")
+    print(f"  Rendimiento: {len(resultados) / segundos:.2f} archivos/s, {filas / segundos:.0f} filas/s")
+    if resultados:
+        print(f"  Tiempo promedio por archivo: {sum(r['segundos'] for r in resultados) / len(resultados):.2f} s")
+
+    if fallidos:
+        print(f"\n❌ Archivos con error ({len(fallidos)}):")
+        for r in fallidos:
+            print(f"   - {os.path.basename(r['archivo'])}: {r['error']}")
+    else:
+        print("\n✓ ¡Todos los archivos se procesaron correctamente!")
+    print("=" * 70)
+
+    return resultados
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicción automática en Excel")
+    parser.add_argument('archivo', nargs='?', default='Plantilla_Prediccion_Consumo.xlsx',
+                        help="Archivo Excel (o Parquet/Feather/Arrow) con los datos a predecir")
+    parser.add_argument('--salida', metavar='ARCHIVO', default=None,
+                        help="Con un archivo Parquet/Feather/Arrow: dónde escribir las predicciones "
+                             "(por defecto <nombre>_predicciones con la misma extensión)")
+    parser.add_argument('--lotes', type=int, nargs='?', const=TAMANO_LOTE, default=None,
+                        metavar='FILAS',
+                        help=f"Procesar por lotes con memoria constante (por defecto {TAMANO_LOTE} filas)")
+    parser.add_argument('--memoria', type=int, nargs='?', const=MEMORIA_MB, default=None,
+                        metavar='MB',
+                        help="Con Parquet/Feather/Arrow: predecir fuera de memoria por fragmentos "
+                             f"en disco con este presupuesto (por defecto {MEMORIA_MB} MB)")
+    parser.add_argument('--float32', action='store_true',
+                        help="Preprocesar y predecir en float32 (comprobado contra float64 en una "
+                             "muestra con la tolerancia de model_info.json)")
+    parser.add_argument('--carpeta', metavar='RUTA',
+                        help="Procesar todos los Excel de una carpeta o de un patrón (por ejemplo 'datos/*.xlsx')")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos en paralelo con --carpeta (por defecto, uno por núcleo)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Predecir todas las filas sin usar ni actualizar el caché de predicciones")
+    parser.add_argument('--verificar', action='store_true',
+                        help="Solo verificar que existan el modelo y el Excel, y salir")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Medir el tiempo de cada etapa del arranque (no escribe en el Excel)")
+    parser.add_argument('--trace', nargs='?', const=traza_etapas.DESTINO_ESTANDAR, default=None,
+                        metavar='ARCHIVO',
+                        help="Escribir el tiempo, las filas y los bytes de cada etapa como JSON lines "
+                             "(en la salida de errores, o agregadas a ARCHIVO)")
+    args = parser.parse_args()
+
+    if args.verificar:
+        sys.exit(0 if verificar(args.archivo) else 1)
+
+    if args.trace:
+        try:
+            traza_etapas.activar(args.trace, script=os.path.basename(__file__))
+        except (ValueError, OSError) as e:
+            parser.error(f"--trace: {e}")
+
     try:
-        main()
+        if args.profile_startup:
+            perfilar_arranque(args.archivo)
+        elif args.carpeta:
+            resultados = procesar_carpeta(args.carpeta, procesos=args.procesos,
+                                          tamano_lote=args.lotes, usar_cache=not args.sin_cache,
+                                          memoria_mb=args.memoria, float32=args.float32,
+                                          traza=args.trace)
+            if not resultados or not all(r['ok'] for r in resultados):
+                sys.exit(1)
+        else:
+            main(args.archivo, tamano_lote=args.lotes, usar_cache=not args.sin_cache,
+                 salida=args.salida, memoria_mb=args.memoria, float32=args.float32)
     except KeyboardInterrupt:
         print("\n\n⚠ Proceso interrumpido por el usuario")
     except Exception as e:
         print(f"\n❌ ERROR INESPERADO: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        traza_etapas.desactivar()
@@ -16,14 +16,24 @@ INSTRUCCIONES:
 3. Abre el archivo Excel
 4. Llena los datos
 5. Haz clic en el botón "🎯 PREDECIR BIOMASA"
+
+Para preparar más filas con formato (por ejemplo 50.000):
+    python 4_crear_excel_con_boton.py --filas 50000
 """
 
+import argparse
 import json
 import os
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 from datetime import datetime
 
+from estilos_plantilla import registrar_estilos, formato_columnas, fila, agregar_filas_id
+
+# Filas de datos preparadas por defecto
+FILAS_DATOS = 25
+
 
 def crear_codigo_vba():
     """Genera el código VBA que ejecutará las predicciones"""
@@ -66,18 +76,19 @@ Sub PredecirConsumo()
     pythonPath = "python"
 
     ' Construir el comando completo
-    ' El script predictor_excel_simple.py debe estar en la misma carpeta
-    command = "cmd /c cd /d """ & scriptPath & """ && " & pythonPath & " predictor_excel_simple.py"
-
-    ' Ejecutar el comando
+    ' cliente_prediccion.py envía la solicitud al servidor residente
+    ' (servidor_prediccion.py) que mantiene el modelo cargado en memoria.
+    ' Si el servidor no está activo, ejecuta 3_predecir_en_excel.py y
+    ' deja el servidor arrancando para los próximos clics.
+    command = "cmd /c cd /d """ & scriptPath & """ && " & pythonPath & _
+              " cliente_prediccion.py """ & ThisWorkbook.Name & """ --arrancar-servidor"
+
+    ' Ejecutar el comando (espera a que termine: no hace falta una pausa fija)
     Set shell = CreateObject("WScript.Shell")
 
     On Error GoTo ErrorHandler
     resultado = shell.Run(command, windowStyle, waitOnReturn)
 
-    ' Esperar un momento para que Python termine de escribir
-    Application.Wait (Now + TimeValue("0:00:02"))
-
     ' Cerrar el archivo actual (sin guardar porque Python ya lo modificó)
     ThisWorkbook.Close SaveChanges:=False
 
@@ -105,7 +116,7 @@ ErrorHandler:
            Err.Description & vbCrLf & vbCrLf & _
            "Verifica que:" & vbCrLf & _
            "1. Python está instalado" & vbCrLf & _
-           "2. El archivo predictor_excel_simple.py está en la misma carpeta" & vbCrLf & _
+           "2. Los archivos cliente_prediccion.py y 3_predecir_en_excel.py están en la misma carpeta" & vbCrLf & _
            "3. Los archivos del modelo (best_model.pkl, scaler.pkl) existen", _
            vbCritical, "Error"
 End Sub
@@ -135,8 +146,11 @@ End Sub
     return vba_code
 
 
-def crear_excel_con_boton():
-    """Crea el archivo Excel con la estructura y prepara para macros"""
+def crear_excel_con_boton(filas=FILAS_DATOS):
+    """Crea el archivo Excel con la estructura y prepara para macros
+
+    filas : filas de datos con formato y número de ID
+    """
 
     print("\n" + "🚀" * 35)
     print("   CREADOR DE EXCEL CON BOTÓN DE PREDICCIÓN")
@@ -156,137 +170,129 @@ def crear_excel_con_boton():
     print(f"✓ Modelo cargado: {model_info['model_name']}")
     print(f"✓ Variables: {len(feature_names)}\n")
 
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Datos para Predicción"
+    # Crear workbook (write-only: cada fila se escribe en el archivo al agregarla)
+    wb = Workbook(write_only=True)
 
     # ==================== ESTILOS ====================
+    # Se registran una vez y las celdas los usan por nombre
     border = Border(
         left=Side(style='thin', color='666666'),
         right=Side(style='thin', color='666666'),
         top=Side(style='thin', color='666666'),
         bottom=Side(style='thin', color='666666')
     )
+    centrado = Alignment(horizontal='center', vertical='center')
+
+    estilos = registrar_estilos(wb, {
+        'boton': {
+            'font': Font(bold=True, size=14, color="FFFFFF", name='Arial'),
+            'fill': PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid"),
+            'alignment': centrado,
+        },
+        'aviso_boton': {
+            'font': Font(bold=True, size=10, color="FF6F00", name='Arial'),
+            'alignment': Alignment(horizontal='left', vertical='center'),
+        },
+        'info_modelo': {
+            'font': Font(italic=True, size=10, color="555555"),
+            'alignment': Alignment(horizontal='center'),
+        },
+        'marca_tiempo': {'font': Font(italic=True, size=9, color="006400")},
+        'encabezado': {
+            'font': Font(bold=True, color="FFFFFF", size=12, name='Arial'),
+            'fill': PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid"),
+            'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True),
+            'border': border,
+        },
+        'encabezado_prediccion': {
+            'font': Font(bold=True, color="FFFFFF", size=12, name='Arial'),
+            'fill': PatternFill(start_color="FF6F00", end_color="FF6F00", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        'dato': {'alignment': centrado, 'border': border},
+        'prediccion': {
+            'fill': PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid"),
+            'alignment': centrado,
+            'border': border,
+        },
+        # Hoja de instrucciones
+        'titulo_instrucciones': {
+            'font': Font(bold=True, size=14, color="D32F2F"),
+            'alignment': centrado,
+        },
+        'separador': {'font': Font(color="CCCCCC", size=9)},
+        'opcion': {
+            'font': Font(bold=True, size=12, color="1976D2"),
+            'fill': PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid"),
+        },
+        'paso': {'font': Font(bold=True, size=10, color="F57C00")},
+        'vineta': {'font': Font(size=9, color="555555")},
+        'advertencia': {
+            'font': Font(bold=True, size=11, color="D32F2F"),
+            'fill': PatternFill(start_color="FFEBEE", end_color="FFEBEE", fill_type="solid"),
+        },
+        'codigo_vba': {
+            'font': Font(name='Consolas', size=9, color="000000"),
+            'fill': PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid"),
+        },
+    })
+
+    ws = wb.create_sheet("Datos para Predicción")
+    header_row = 5
+    pred_col = len(feature_names) + 2
 
-    header_fill = PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12, name='Arial')
-
-    pred_fill = PatternFill(start_color="FF6F00", end_color="FF6F00", fill_type="solid")
-    pred_font = Font(bold=True, color="FFFFFF", size=12, name='Arial')
+    # ==================== ANCHOS Y FORMATO POR COLUMNA ====================
+    # Las filas de datos toman el formato de su columna sin escribir sus celdas
+    columnas = {'A': ('dato', 6)}
+    for col_idx in range(2, pred_col):
+        columnas[get_column_letter(col_idx)] = ('dato', 18)
+    columnas[get_column_letter(pred_col)] = ('prediccion', 18)
+    formato_columnas(ws, estilos, columnas)
 
-    button_fill = PatternFill(start_color="4CAF50", end_color="4CAF50", fill_type="solid")
+    ws.row_dimensions[1].height = 40
+    ws.row_dimensions[header_row].height = 30
 
 
     # ==================== ÁREA DEL BOTÓN ====================
-    ws.merge_cells('A1:C1')
-    ws['A1'] = '🎯 PREDECIR CONSUMO'
-    ws['A1'].font = Font(bold=True, size=14, color="FFFFFF", name='Arial')
-    ws['A1'].fill = button_fill
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    ws.row_dimensions[1].height = 40
-
-    # Instrucciones del botón
-    ws.merge_cells('D1:F1')
-    ws['D1'] = '👈 HAZ CLIC EN EL BOTÓN VERDE DESPUÉS DE LLENAR LOS DATOS'
-    ws['D1'].font = Font(bold=True, size=10, color="FF6F00", name='Arial')
-    ws['D1'].alignment = Alignment(horizontal='left', vertical='center')
+    # Instrucciones del botón en D1
+    ws.append(fila(ws, ['🎯 PREDECIR CONSUMO', None, None,
+                        '👈 HAZ CLIC EN EL BOTÓN VERDE DESPUÉS DE LLENAR LOS DATOS'],
+                   ['boton', 'boton', 'boton', 'aviso_boton'], pred_col))
+    ws.merged_cells.add('A1:C1')
+    ws.merged_cells.add('D1:F1')
 
 
     # ==================== INFORMACIÓN ====================
-    ws['A2'] = f'📊 Modelo: {model_info["model_name"]} | R²: {model_info["metricas"]["R2_test"]:.4f}'
-    ws['A2'].font = Font(italic=True, size=10, color="555555")
-    ws.merge_cells('A2:F2')
-    ws['A2'].alignment = Alignment(horizontal='center')
+    ws.append(fila(ws, [f'📊 Modelo: {model_info["model_name"]} | R²: {model_info["metricas"]["R2_test"]:.4f}'],
+                   'info_modelo', pred_col))
+    ws.merged_cells.add('A2:F2')
 
-    ws['A3'] = ''  # Timestamp se agregará aquí después de predecir
-    ws['A3'].font = Font(italic=True, size=9, color="006400")
+    ws.append(fila(ws, [None], 'marca_tiempo', pred_col))  # Timestamp se agregará aquí después de predecir
 
-    ws['A4'] = ''  # Fila vacía
+    ws.append(fila(ws, [], columnas=pred_col))  # Fila vacía
 
 
     # ==================== ENCABEZADOS ====================
-    header_row = 5
-
-    # ID
-    cell = ws.cell(row=header_row, column=1)
-    cell.value = 'ID'
-    cell.font = header_font
-    cell.fill = header_fill
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    cell.border = border
-
-    # Variables
-    for col_idx, feature in enumerate(feature_names, start=2):
-        cell = ws.cell(row=header_row, column=col_idx)
-        cell.value = feature
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = border
-
-    # Columna de predicción
-    pred_col = len(feature_names) + 2
-    cell = ws.cell(row=header_row, column=pred_col)
-    cell.value = 'Consumo_kWh_Mensual_Predicho'
-    cell.font = pred_font
-    cell.fill = pred_fill
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    cell.border = border
-
-    ws.row_dimensions[header_row].height = 30
+    ws.append(fila(ws, ['ID'] + feature_names + ['Consumo_kWh_Mensual_Predicho'],
+                   ['encabezado'] * (pred_col - 1) + ['encabezado_prediccion']))
 
 
     # ==================== FILAS DE DATOS ====================
-    data_start_row = 6
-
-    for i in range(25):
-        row = data_start_row + i
-
-        # ID
-        cell = ws.cell(row=row, column=1)
-        cell.value = i + 1
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-
-        # Columnas de datos
-        for col_idx in range(2, pred_col):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = ""
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-
-        # Columna de predicción
-        cell = ws.cell(row=row, column=pred_col)
-        cell.value = ""
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.fill = PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid")
-
-
-    # ==================== AJUSTAR ANCHOS ====================
-    ws.column_dimensions['A'].width = 6
-    ws.column_dimensions['B'].width = 6
-    ws.column_dimensions['C'].width = 6
-
-    for col_idx in range(2, pred_col):
-        col_letter = chr(64 + col_idx)
-        ws.column_dimensions[col_letter].width = 18
-
-    ws.column_dimensions[chr(64 + pred_col)].width = 18
+    # Solo se escribe el ID; el resto de la fila toma el formato de su columna
+    agregar_filas_id(ws, 1, filas, 'dato')
 
 
     # ==================== HOJA DE INSTRUCCIONES ====================
     ws_inst = wb.create_sheet("📖 Instrucciones VBA")
-
-    ws_inst['A1'] = '📖 INSTRUCCIONES PARA ACTIVAR EL BOTÓN DE PREDICCIÓN'
-    ws_inst['A1'].font = Font(bold=True, size=14, color="D32F2F")
-    ws_inst.merge_cells('A1:B1')
-    ws_inst['A1'].alignment = Alignment(horizontal='center', vertical='center')
+    ws_inst.column_dimensions['A'].width = 120
     ws_inst.row_dimensions[1].height = 25
 
+    ws_inst.append(fila(ws_inst, ['📖 INSTRUCCIONES PARA ACTIVAR EL BOTÓN DE PREDICCIÓN'],
+                        'titulo_instrucciones'))
+    ws_inst.merged_cells.add('A1:B1')
+
     instrucciones = [
-        "",
         "⚠️ IMPORTANTE: Este archivo necesita configuración VBA para funcionar",
         "━" * 100,
         "",
@@ -327,7 +333,15 @@ def crear_excel_con_boton():
         "Si no quieres configurar VBA, simplemente:",
         "1. Llena los datos en este Excel",
         "2. Guarda el archivo",
-        "3. Ejecuta desde terminal: python predictor_excel_simple.py",
+        "3. Ejecuta desde terminal: python 3_predecir_en_excel.py",
+        "",
+        "",
+        "OPCIÓN C: Servidor de Predicción (botón más rápido)",
+        "",
+        "1. Abre una terminal en esta carpeta",
+        "2. Ejecuta: python servidor_prediccion.py (deja la ventana abierta)",
+        "3. El botón usará el modelo ya cargado en memoria (respuesta casi inmediata)",
+        "   • Si el servidor no está activo, el botón lo inicia automáticamente",
         "",
         "",
         "━" * 100,
@@ -336,34 +350,25 @@ def crear_excel_con_boton():
         "",
     ]
 
-    row = 1
     for inst in instrucciones:
-        ws_inst[f'A{row}'] = inst
-
         if inst.startswith('━'):
-            ws_inst[f'A{row}'].font = Font(color="CCCCCC", size=9)
+            estilo = 'separador'
         elif inst.startswith(('OPCIÓN', 'CÓDIGO VBA')):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=12, color="1976D2")
-            ws_inst[f'A{row}'].fill = PatternFill(start_color="E3F2FD", end_color="E3F2FD", fill_type="solid")
+            estilo = 'opcion'
         elif any(c.isdigit() and '. ' in inst for c in inst[:3]):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=10, color="F57C00")
+            estilo = 'paso'
         elif inst.startswith('   •'):
-            ws_inst[f'A{row}'].font = Font(size=9, color="555555")
+            estilo = 'vineta'
         elif inst.startswith('⚠️'):
-            ws_inst[f'A{row}'].font = Font(bold=True, size=11, color="D32F2F")
-            ws_inst[f'A{row}'].fill = PatternFill(start_color="FFEBEE", end_color="FFEBEE", fill_type="solid")
+            estilo = 'advertencia'
+        else:
+            estilo = None
 
-        row += 1
+        ws_inst.append(fila(ws_inst, [inst], estilo) if estilo else [inst])
 
     # Agregar el código VBA
-    vba_lines = crear_codigo_vba().split('\n')
-    for vba_line in vba_lines:
-        ws_inst[f'A{row}'] = vba_line
-        ws_inst[f'A{row}'].font = Font(name='Consolas', size=9, color="000000")
-        ws_inst[f'A{row}'].fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid")
-        row += 1
-
-    ws_inst.column_dimensions['A'].width = 120
+    for vba_line in crear_codigo_vba().split('\n'):
+        ws_inst.append(fila(ws_inst, [vba_line], 'codigo_vba'))
 
 
     # ==================== GUARDAR ====================
@@ -383,7 +388,8 @@ def crear_excel_con_boton():
     print(f"   1. {filename} - Plantilla Excel")
     print(f"   2. {vba_filename} - Código VBA para el botón")
 
-    print(f"\n📋 Variables incluidas: {len(feature_names)}")
+    print(f"\n📋 Filas de datos preparadas: {filas:,}")
+    print(f"📋 Variables incluidas: {len(feature_names)}")
     for i, var in enumerate(feature_names, 1):
         print(f"   {i}. {var}")
 
@@ -393,15 +399,21 @@ def crear_excel_con_boton():
     print(f"1. Abre: {filename}")
     print("2. Ve a la pestaña '📖 Instrucciones VBA'")
     print("3. Sigue las instrucciones para configurar el botón")
-    print("   (O simplemente usa el método sin botón ejecutando predictor_excel_simple.py)")
+    print("   (O simplemente usa el método sin botón ejecutando 3_predecir_en_excel.py)")
+    print("4. Opcional: python servidor_prediccion.py para que el botón responda al instante")
     print("\n" + "=" * 80 + "\n")
 
     return filename
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Crea la plantilla Excel con botón de predicción')
+    parser.add_argument('--filas', type=int, default=FILAS_DATOS,
+                        help=f'Filas de datos con formato y número de ID (por defecto {FILAS_DATOS})')
+    args = parser.parse_args()
+
     try:
-        crear_excel_con_boton()
+        crear_excel_con_boton(args.filas)
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
@@ -0,0 +1,167 @@
+"""
+Caché de Predicciones entre Ejecuciones
+=======================================
+Al volver a ejecutar 3_predecir_en_excel.py sobre la misma plantilla después
+de agregar unas pocas filas, todas las filas se volvían a preprocesar y
+predecir. Este caché se guarda junto al Excel y recuerda la predicción de
+cada fila indexada por un hash de sus valores:
+
+    <nombre del Excel>_cache.npz
+        claves     hash (uint64) de los valores de cada fila, ordenados
+        valores    predicción de cada clave
+        uso        última ejecución en que se usó cada clave
+        huella     huella de los archivos del modelo
+        ejecucion  número de ejecuciones que usaron el caché
+
+Cada ejecución solo calcula las filas cuyo hash no está en el caché (las filas
+nuevas o modificadas, sin importar en qué fila de la hoja estén). Si los
+archivos del modelo cambian (por ejemplo al reentrenar best_model.pkl) la
+huella no coincide y el caché se descarta completo. Cuando supera
+MAX_ENTRADAS se descartan las claves usadas hace más ejecuciones.
+
+Uso:
+    cache = CachePredicciones.abrir(ruta_cache(filename), huella_modelo(archivos))
+    claves = pipeline.claves_filas(df)
+    predicciones, faltan = cache.buscar(claves)
+    predicciones[faltan] = pipeline.predecir(df[faltan])
+    cache.agregar(claves[faltan], predicciones[faltan])
+    cache.guardar()
+"""
+
+import hashlib
+import os
+import zipfile
+
+import numpy as np
+
+# Predicciones que se conservan como máximo (~20 bytes cada una en disco)
+MAX_ENTRADAS = 500_000
+
+
+def ruta_cache(filename):
+    """Archivo del caché de un Excel: 'Plantilla.xlsx' -> 'Plantilla_cache.npz'"""
+    return os.path.splitext(filename)[0] + '_cache.npz'
+
+
+def huella_modelo(rutas, *extra):
+    """Huella (texto hexadecimal) de los archivos del modelo
+
+    Usa el nombre, el tamaño y la fecha de modificación de cada archivo (las
+    carpetas se recorren completas), sin leer su contenido: no cuesta más con
+    un modelo grande. extra: otros textos que también invalidan el caché
+    (por ejemplo las columnas del pipeline).
+    """
+
+    h = hashlib.sha256()
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos = sorted(os.path.join(ruta, nombre) for nombre in os.listdir(ruta))
+        else:
+            archivos = [ruta]
+        for archivo in archivos:
+            if os.path.isfile(archivo):
+                estado = os.stat(archivo)
+                h.update(f'{archivo}|{estado.st_size}|{estado.st_mtime_ns}\n'.encode('utf-8'))
+            else:
+                h.update(f'{archivo}|-\n'.encode('utf-8'))
+    for texto in extra:
+        h.update(f'{texto}\n'.encode('utf-8'))
+    return h.hexdigest()
+
+
+class CachePredicciones:
+    """Predicciones indexadas por el hash de los valores de cada fila"""
+
+    def __init__(self, ruta, huella, max_entradas=MAX_ENTRADAS):
+        self.ruta = ruta
+        self.huella = huella
+        self.max_entradas = max_entradas
+        self.claves = np.empty(0, dtype=np.uint64)
+        self.valores = np.empty(0, dtype=np.float64)
+        self.uso = np.empty(0, dtype=np.int64)
+        self.ejecucion = 1
+        self.aciertos = 0
+        self.calculadas = 0
+        self.consultas = 0    # llamadas a buscar en esta ejecución
+        self.sin_claves = 0   # filas que no se pudieron buscar (ver claves_filas)
+        self.descartado = False  # True si había un caché de otro modelo
+
+    @classmethod
+    def abrir(cls, ruta, huella, max_entradas=MAX_ENTRADAS):
+        """Lee el caché de disco; si no existe, está dañado o es de otro modelo, empieza vacío"""
+
+        cache = cls(ruta, huella, max_entradas)
+        if not os.path.exists(ruta):
+            return cache
+
+        try:
+            with np.load(ruta, allow_pickle=False) as datos:
+                if str(datos['huella']) != huella:
+                    cache.descartado = True
+                    return cache
+                cache.claves = datos['claves'].astype(np.uint64)
+                cache.valores = datos['valores'].astype(np.float64)
+                cache.uso = datos['uso'].astype(np.int64)
+                cache.ejecucion = int(datos['ejecucion']) + 1
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            cache.descartado = True
+
+        return cache
+
+    def __len__(self):
+        return len(self.claves)
+
+    def buscar(self, claves):
+        """(predicciones, faltan): las predicciones guardadas (NaN donde no hay)
+        y una máscara con las filas que hay que calcular
+        """
+
+        claves = np.asarray(claves, dtype=np.uint64)
+        predicciones = np.full(len(claves), np.nan)
+        self.consultas += 1
+        if len(self.claves) == 0:
+            return predicciones, np.ones(len(claves), dtype=bool)
+
+        # Búsqueda binaria sobre las claves ordenadas
+        posiciones = np.searchsorted(self.claves, claves)
+        posiciones[posiciones == len(self.claves)] = 0
+        encontradas = self.claves[posiciones] == claves
+
+        predicciones[encontradas] = self.valores[posiciones[encontradas]]
+        self.uso[posiciones[encontradas]] = self.ejecucion
+        self.aciertos += int(encontradas.sum())
+
+        return predicciones, ~encontradas
+
+    def agregar(self, claves, valores):
+        """Guarda las predicciones calculadas (reemplaza las claves que ya existían)"""
+
+        claves, posiciones = np.unique(np.asarray(claves, dtype=np.uint64), return_index=True)
+        valores = np.asarray(valores, dtype=np.float64)[posiciones]
+        self.calculadas += len(claves)
+
+        conservar = ~np.isin(self.claves, claves, assume_unique=True)
+        todas = np.concatenate([self.claves[conservar], claves])
+        orden = np.argsort(todas, kind='stable')
+
+        self.claves = todas[orden]
+        self.valores = np.concatenate([self.valores[conservar], valores])[orden]
+        self.uso = np.concatenate([self.uso[conservar],
+                                   np.full(len(claves), self.ejecucion, dtype=np.int64)])[orden]
+
+    def guardar(self):
+        """Escribe el caché en disco, descartando las claves menos usadas si excede el máximo"""
+
+        if len(self.claves) > self.max_entradas:
+            # Las usadas más recientemente primero; se conserva el orden de las claves
+            recientes = np.sort(np.argsort(-self.uso, kind='stable')[:self.max_entradas])
+            self.claves = self.claves[recientes]
+            self.valores = self.valores[recientes]
+            self.uso = self.uso[recientes]
+
+        # Escribir a un temporal y reemplazar: nunca queda un caché a medio escribir
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            np.savez(f, claves=self.claves, valores=self.valores, uso=self.uso,
+                     huella=np.array(self.huella), ejecucion=np.array(self.ejecucion))
+        os.replace(temporal, self.ruta)
@@ -0,0 +1,123 @@
+"""
+Cliente Ligero de Predicción (usado por el botón de Excel)
+==========================================================
+Envía la solicitud "predecir este archivo" al servidor residente
+(servidor_prediccion.py). Solo usa la librería estándar, así que arranca
+en milisegundos: no importa pandas, sklearn ni openpyxl.
+
+Si el servidor no está en ejecución, lanza 3_predecir_en_excel.py como
+siempre (y opcionalmente deja el servidor arrancando para los próximos clics).
+
+Uso:
+  python cliente_prediccion.py                                  # plantilla por defecto
+  python cliente_prediccion.py Plantilla.xlsm --filas 6:30      # solo un rango
+  python cliente_prediccion.py Plantilla.xlsm --arrancar-servidor
+  python cliente_prediccion.py --detener-servidor
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+
+HOST = '127.0.0.1'
+PUERTO = int(os.environ.get('PREDICTOR_PUERTO', '8765'))
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_POR_DEFECTO = 'Plantilla_Prediccion_Consumo.xlsx'
+
+
+def enviar_solicitud(solicitud, timeout_conexion=0.5, timeout_respuesta=600):
+    """Envía una solicitud al servidor. Retorna la respuesta o None si no hay servidor
+
+    También retorna None si el servidor se cae o no responde a tiempo, o si en
+    el puerto responde otro programa: así el botón usa el respaldo.
+    """
+
+    try:
+        with socket.create_connection((HOST, PUERTO), timeout=timeout_conexion) as conexion:
+            conexion.settimeout(timeout_respuesta)
+            conexion.sendall((json.dumps(solicitud, ensure_ascii=False) + '\n').encode('utf-8'))
+            with conexion.makefile('rb') as f:
+                linea = f.readline()
+        respuesta = json.loads(linea.decode('utf-8')) if linea else None
+    except (OSError, ValueError):
+        return None
+
+    return respuesta if isinstance(respuesta, dict) else None
+
+
+def predecir_sin_servidor(archivo, filas=None):
+    """Respaldo: ejecuta el script de predicción en un proceso nuevo de Python"""
+
+    print("⚠ Servidor de predicción no disponible, ejecutando 3_predecir_en_excel.py...")
+    if filas is not None:
+        print("  (el script completo procesa todas las filas del archivo)")
+    return subprocess.call([sys.executable, '3_predecir_en_excel.py', archivo], cwd=CARPETA)
+
+
+def arrancar_servidor_en_segundo_plano():
+    """Lanza servidor_prediccion.py desacoplado de esta ventana"""
+
+    opciones = {'cwd': CARPETA, 'stdin': subprocess.DEVNULL,
+                'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    if os.name == 'nt':
+        opciones['creationflags'] = (subprocess.CREATE_NEW_PROCESS_GROUP |
+                                     subprocess.CREATE_NO_WINDOW)
+    else:
+        opciones['start_new_session'] = True
+
+    subprocess.Popen([sys.executable, 'servidor_prediccion.py', str(PUERTO)], **opciones)
+    print("✓ Servidor de predicción iniciado en segundo plano para los próximos clics")
+
+
+def predecir(archivo, filas=None, arrancar_servidor=False):
+    """Predice usando el servidor si está disponible. Retorna el código de salida"""
+
+    solicitud = {'accion': 'predecir', 'archivo': os.path.abspath(archivo), 'carpeta': CARPETA}
+    if filas is not None:
+        solicitud['filas'] = list(filas)
+
+    respuesta = enviar_solicitud(solicitud)
+
+    if respuesta is None or ('salida' not in respuesta and not respuesta.get('ok')):
+        if respuesta is not None:
+            print(f"⚠ {respuesta.get('error', 'El servidor rechazó la solicitud')}")
+        codigo = predecir_sin_servidor(archivo, filas)
+        if arrancar_servidor and respuesta is None:
+            arrancar_servidor_en_segundo_plano()
+        return codigo
+
+    print(respuesta.get('salida', ''), end='')
+    print(f"\n⚡ Predicción atendida por el servidor en {respuesta['segundos']:.2f} s")
+    return 0 if respuesta['ok'] else 1
+
+
+def _leer_rango(texto):
+    """Convierte '6:30' en (6, 30)"""
+    primera, ultima = texto.split(':')
+    return int(primera), int(ultima)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cliente del servidor de predicción")
+    parser.add_argument('archivo', nargs='?', default=ARCHIVO_POR_DEFECTO,
+                        help="Archivo Excel a predecir")
+    parser.add_argument('--filas', type=_leer_rango, default=None,
+                        help="Rango de filas de Excel a predecir, por ejemplo 6:30")
+    parser.add_argument('--arrancar-servidor', action='store_true',
+                        help="Si no hay servidor, iniciarlo en segundo plano tras predecir")
+    parser.add_argument('--detener-servidor', action='store_true',
+                        help="Detiene el servidor de predicción en ejecución")
+    args = parser.parse_args()
+
+    os.chdir(CARPETA)
+
+    if args.detener_servidor:
+        respuesta = enviar_solicitud({'accion': 'detener'})
+        print("✓ Servidor detenido" if respuesta else "⚠ No hay servidor en ejecución")
+        sys.exit(0)
+
+    sys.exit(predecir(args.archivo, args.filas, args.arrancar_servidor))
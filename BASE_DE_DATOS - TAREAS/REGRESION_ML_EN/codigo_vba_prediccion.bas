@@ -1,7 +1,7 @@
 
-Sub PredecirBiomasa()
+Sub PredecirConsumo()
     '=============================================================================
-    ' MACRO: Predicción de Biomasa usando Machine Learning
+    ' MACRO: Predicción de Consumo Energético usando Machine Learning
     '=============================================================================
     ' Esta macro ejecuta el script Python que hace las predicciones y actualiza
     ' automáticamente este archivo Excel con los resultados
@@ -20,8 +20,8 @@ Sub PredecirBiomasa()
     Application.DisplayAlerts = False
 
     ' Mensaje inicial
-    MsgBox "Iniciando predicción de biomasa..." & vbCrLf & vbCrLf & _
-           "Este proceso puede tomar unos segundos.", vbInformation, "Predictor de Biomasa"
+    MsgBox "Iniciando predicción de consumo energético..." & vbCrLf & vbCrLf & _
+           "Este proceso puede tomar unos segundos.", vbInformation, "Predictor de Consumo"
 
     ' Guardar el archivo antes de ejecutar Python
     ThisWorkbook.Save
@@ -36,18 +36,19 @@ Sub PredecirBiomasa()
     pythonPath = "python"
 
     ' Construir el comando completo
-    ' El script predictor_excel_simple.py debe estar en la misma carpeta
-    command = "cmd /c cd /d """ & scriptPath & """ && " & pythonPath & " predictor_excel_simple.py"
-
-    ' Ejecutar el comando
+    ' cliente_prediccion.py envía la solicitud al servidor residente
+    ' (servidor_prediccion.py) que mantiene el modelo cargado en memoria.
+    ' Si el servidor no está activo, ejecuta 3_predecir_en_excel.py y
+    ' deja el servidor arrancando para los próximos clics.
+    command = "cmd /c cd /d """ & scriptPath & """ && " & pythonPath & _
+              " cliente_prediccion.py """ & ThisWorkbook.Name & """ --arrancar-servidor"
+
+    ' Ejecutar el comando (espera a que termine: no hace falta una pausa fija)
     Set shell = CreateObject("WScript.Shell")
 
     On Error GoTo ErrorHandler
     resultado = shell.Run(command, windowStyle, waitOnReturn)
 
-    ' Esperar un momento para que Python termine de escribir
-    Application.Wait (Now + TimeValue("0:00:02"))
-
     ' Cerrar el archivo actual (sin guardar porque Python ya lo modificó)
     ThisWorkbook.Close SaveChanges:=False
 
@@ -75,7 +76,7 @@ ErrorHandler:
            Err.Description & vbCrLf & vbCrLf & _
            "Verifica que:" & vbCrLf & _
            "1. Python está instalado" & vbCrLf & _
-           "2. El archivo predictor_excel_simple.py está en la misma carpeta" & vbCrLf & _
+           "2. Los archivos cliente_prediccion.py y 3_predecir_en_excel.py están en la misma carpeta" & vbCrLf & _
            "3. Los archivos del modelo (best_model.pkl, scaler.pkl) existen", _
            vbCritical, "Error"
 End Sub
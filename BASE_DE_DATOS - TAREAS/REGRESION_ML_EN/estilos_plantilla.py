@@ -0,0 +1,113 @@
+"""
+Plantillas Excel con Estilos con Nombre y Formato por Columna
+=============================================================
+Los scripts que crean las plantillas (2_crear_plantilla_excel*.py y
+4_crear_excel_con_boton*.py) creaban un Border, un Alignment y un PatternFill
+nuevos para cada celda de cada fila. Con 13 a 25 filas no se nota, pero una
+plantilla preparada para 50.000 filas tardaba minutos y el archivo guardaba el
+formato de cada celda por separado.
+
+Con este módulo:
+    - cada formato es un estilo con nombre (NamedStyle) que se registra una
+      sola vez en el libro; las celdas lo usan por referencia
+    - el formato de las filas de datos (bordes, alineación, relleno de la
+      columna de resultados) va en la definición de cada columna: Excel lo
+      aplica a todas las filas sin que haya una celda escrita por fila
+    - el libro se crea con Workbook(write_only=True): cada fila se escribe en
+      el archivo al agregarla y la memoria no crece con las filas
+
+De cada fila de datos vacía solo se escribe el ID, así el tiempo y el tamaño
+de la plantilla casi no dependen de las filas preparadas.
+
+En write-only las filas se agregan en orden: el ancho y el formato de las
+columnas se fijan antes de la primera fila y la altura de una fila antes de
+agregarla. Las celdas combinadas se pueden indicar en cualquier momento antes
+de guardar (ws.merged_cells.add('A1:E1')).
+
+Uso:
+    wb = Workbook(write_only=True)
+    estilos = registrar_estilos(wb, {'dato': {'border': borde, 'alignment': centrado}, ...})
+    ws = wb.create_sheet('Datos para Predicción')
+    formato_columnas(ws, estilos, {'A': ('dato', 8), 'B': ('dato', 20)})
+    ws.append(fila(ws, ['PLANTILLA DE PREDICCIÓN'], 'titulo', columnas=5))
+    agregar_filas_id(ws, 1, 50000, 'dato')
+    wb.save('Plantilla.xlsx')
+"""
+
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle
+
+# Estilo de las celdas que deben quedar sin formato dentro de una columna con
+# formato (por ejemplo en las filas de títulos)
+SIN_FORMATO = 'sin_formato'
+
+
+def registrar_estilos(wb, definiciones):
+    """Registra los estilos con nombre en el libro (una sola vez cada uno)
+
+    definiciones : {nombre: {'font': Font(...), 'fill': ..., 'border': ...,
+                    'alignment': ..., 'number_format': ...}}
+    Retorna {nombre: NamedStyle}, incluido SIN_FORMATO.
+    """
+
+    estilos = {}
+    for nombre, atributos in {SIN_FORMATO: {}, **definiciones}.items():
+        estilo = NamedStyle(name=nombre, **atributos)
+        if nombre not in wb.named_styles:
+            wb.add_named_style(estilo)
+        estilos[nombre] = estilo
+    return estilos
+
+
+def formato_columnas(ws, estilos, columnas):
+    """Ancho y formato de cada columna
+
+    columnas : {letra: (nombre del estilo o None, ancho)}
+    Las celdas vacías de la columna se ven con ese formato en todas las filas.
+    """
+
+    for letra, (nombre, ancho) in columnas.items():
+        dimension = ws.column_dimensions[letra]
+        dimension.width = ancho
+        if nombre is not None:
+            estilo = estilos[nombre]
+            dimension.font = estilo.font
+            dimension.fill = estilo.fill
+            dimension.border = estilo.border
+            dimension.alignment = estilo.alignment
+            dimension.number_format = estilo.number_format
+
+
+def celda(ws, valor, estilo=SIN_FORMATO):
+    """Celda de una hoja write-only con un estilo con nombre"""
+    c = WriteOnlyCell(ws, value=valor)
+    c.style = estilo
+    return c
+
+
+def fila(ws, valores, estilo=SIN_FORMATO, columnas=0):
+    """Celdas de una fila para ws.append
+
+    estilo : nombre de un estilo para todas las celdas o lista con uno por valor
+    columnas : se completa hasta ese número de columnas con celdas SIN_FORMATO,
+               para que las filas de títulos no tomen el formato de las columnas
+    """
+
+    estilos_fila = [estilo] * len(valores) if isinstance(estilo, str) else list(estilo)
+    celdas = [celda(ws, valor, nombre) for valor, nombre in zip(valores, estilos_fila)]
+    celdas += [celda(ws, None) for _ in range(len(celdas), columnas)]
+    return celdas
+
+
+def agregar_filas_id(ws, desde, hasta, estilo):
+    """Agrega las filas de datos vacías con su ID (desde..hasta, inclusive)
+
+    Solo se escribe la celda del ID; las demás celdas de la fila no existen y
+    toman el formato de su columna. La misma celda se reutiliza: en write-only
+    cada fila queda escrita en el archivo al agregarla.
+    """
+
+    id_celda = celda(ws, None, estilo)
+    for numero in range(desde, hasta + 1):
+        id_celda.value = numero
+        ws.append([id_celda])
@@ -0,0 +1,197 @@
+"""
+Predicción Fuera de Memoria con Fragmentos en Disco (np.memmap)
+===============================================================
+Al predecir una exportación de millones de filas de una sola vez, en memoria
+quedan al mismo tiempo la tabla leída, la matriz preprocesada, las copias
+temporales del modelo y las predicciones: varias veces el tamaño de los datos.
+
+En el modo fuera de memoria (--memoria MB en los scripts de predicción) el
+trabajo se hace en tres pasadas, con un número de filas por fragmento que
+depende del presupuesto de memoria y no del tamaño del archivo:
+
+    1. Preprocesar: el archivo se lee por lotes y cada lote se codifica
+       directamente sobre un fragmento .npy en disco (np.memmap), sin imputar
+    2. Predecir: cada fragmento se abre con mmap, se imputa y escala, y sus
+       predicciones se escriben en otro archivo .npy (np.memmap) con una fila
+       por fila de datos
+    3. Escribir: el archivo se vuelve a leer por lotes y cada lote se escribe
+       en la salida junto a su tramo de predicciones
+
+Si el modelo no guardó medianas, entre 1 y 2 se calcula la mediana de cada
+columna sobre todos los fragmentos (FragmentosDisco.medianas): cada fila se
+imputa con la mediana de todo el archivo, igual que al predecirlo de una vez.
+
+Los fragmentos se guardan en una carpeta temporal del disco local que se
+borra al terminar. El presupuesto cubre los datos; el modelo y las librerías
+ocupan memoria aparte. Los resultados (y la columna de FragmentosDisco.medianas)
+se leen y escriben con mmap: sus páginas, 8 bytes por fila y por salida, cuentan
+en la memoria residente del proceso, pero son del archivo y el sistema las
+puede liberar.
+
+Uso:
+    with FragmentosDisco(n_columnas) as fragmentos:
+        for lote in leer_lotes(filename, columnas, filas_por_fragmento(512, n_columnas)):
+            with fragmentos.nuevo(lote.num_rows) as X:
+                pipeline.transformar_tabla(lote, salida=X, imputar=False)
+        medianas = fragmentos.medianas() if pipeline.medianas is None else None
+        predicciones = fragmentos.predecir(
+            lambda X: pipeline.predecir_matriz(pipeline.imputar_y_escalar(np.array(X), medianas)), 1)
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Presupuesto de memoria por defecto para los datos (MB)
+MEMORIA_MB = 512
+
+# Bytes en memoria por cada celda de la matriz mientras se procesa un fragmento:
+# el lote de Arrow, la matriz float64, la copia float32 que usan los árboles y
+# los temporales de la imputación
+BYTES_POR_CELDA = 32
+
+# Mínimo de filas por fragmento (con menos, el costo de cada pasada domina)
+FILAS_MINIMAS = 1000
+
+
+def filas_por_fragmento(memoria_mb, n_columnas, dtype=np.float64):
+    """Filas de cada fragmento para que un fragmento en proceso quepa en memoria_mb
+
+    Con dtype float32 cada celda ocupa la mitad y caben el doble de filas.
+    """
+    bytes_fila = BYTES_POR_CELDA * max(1, n_columnas) * np.dtype(dtype).itemsize // 8
+    return max(FILAS_MINIMAS, int(memoria_mb * 1024 * 1024 // bytes_fila))
+
+
+def memoria_maxima_mb():
+    """Memoria residente máxima del proceso hasta ahora (MB); None si el sistema no la informa
+
+    Incluye las páginas de los archivos abiertos con mmap (ver FragmentosDisco).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la informa en KB y macOS en bytes
+    return maxima / (1024 * 1024) if os.uname().sysname == 'Darwin' else maxima / 1024
+
+
+class FragmentosDisco:
+    """Matriz preprocesada guardada en disco por fragmentos .npy (np.memmap)"""
+
+    def __init__(self, n_columnas, carpeta=None, dtype=np.float64):
+        """
+        n_columnas : columnas de la matriz (variables del modelo)
+        carpeta : dónde crear la carpeta temporal (por defecto la del sistema)
+        dtype : tipo de los fragmentos y de los resultados (float64 o float32)
+        """
+        self.n_columnas = n_columnas
+        self.dtype = np.dtype(dtype)
+        self.carpeta = tempfile.mkdtemp(prefix='fragmentos_', dir=carpeta)
+        self.fragmentos = []  # (archivo, filas)
+        self.filas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.eliminar()
+
+    def __len__(self):
+        return len(self.fragmentos)
+
+    @contextlib.contextmanager
+    def nuevo(self, n_filas):
+        """Fragmento np.memmap (n_filas, n_columnas) de tipo self.dtype para llenar dentro del with
+
+        Al salir se escribe a disco y se cierra: sus páginas dejan de contar
+        como memoria modificada del proceso.
+        """
+        archivo = os.path.join(self.carpeta, f'X_{len(self.fragmentos):05d}.npy')
+        X = np.lib.format.open_memmap(archivo, mode='w+', dtype=self.dtype,
+                                      shape=(n_filas, self.n_columnas))
+        try:
+            yield X
+            X.flush()
+        finally:
+            del X
+
+        self.fragmentos.append((archivo, n_filas))
+        self.filas += n_filas
+
+    def __iter__(self):
+        """(fila inicial, fragmento abierto con mmap en solo lectura)"""
+        inicio = 0
+        for archivo, n_filas in self.fragmentos:
+            yield inicio, np.load(archivo, mmap_mode='r')
+            inicio += n_filas
+
+    def predecir(self, funcion, n_salidas, al_terminar_fragmento=None):
+        """Aplica funcion a cada fragmento y guarda los resultados en un .npy (np.memmap)
+
+        funcion(X) retorna un array de n_salidas valores por fila (o uno solo si
+        n_salidas es 1). al_terminar_fragmento(numero, filas) se llama después
+        de cada fragmento (para mostrar el avance).
+        Retorna los resultados (filas, n_salidas) de tipo self.dtype abiertos con mmap.
+        """
+        archivo = os.path.join(self.carpeta, 'predicciones.npy')
+        resultados = np.lib.format.open_memmap(archivo, mode='w+', dtype=self.dtype,
+                                               shape=(self.filas, n_salidas))
+
+        for numero, (inicio, X) in enumerate(self, 1):
+            fin = inicio + len(X)
+            resultados[inicio:fin] = np.asarray(funcion(X), dtype=self.dtype).reshape(len(X), n_salidas)
+            # Liberar las páginas del fragmento antes de pasar al siguiente
+            del X
+            resultados.flush()
+            if al_terminar_fragmento is not None:
+                al_terminar_fragmento(numero, fin - inicio)
+
+        del resultados
+        return np.load(archivo, mmap_mode='r')
+
+    def medianas(self, columnas=None):
+        """Mediana de cada columna sobre todos los fragmentos, sin contar los NaN (como np.nanmedian)
+
+        Los valores de cada columna se copian a un .npy en disco y se ordenan
+        parcialmente ahí (np.memmap), así la columna completa no queda en la
+        memoria del proceso.
+        columnas : posiciones de las columnas a calcular (por defecto todas)
+        Retorna un array float64 (n_columnas,), con NaN en las columnas no
+        calculadas y en las que no tienen ningún valor.
+        """
+        medianas = np.full(self.n_columnas, np.nan)
+        archivo = os.path.join(self.carpeta, 'columna.npy')
+
+        for j in range(self.n_columnas) if columnas is None else columnas:
+            valores = np.lib.format.open_memmap(archivo, mode='w+', dtype=self.dtype,
+                                                shape=(max(1, self.filas),))
+            n = 0
+            for _, X in self:
+                columna = X[:, j]
+                columna = columna[~np.isnan(columna)]
+                valores[n:n + len(columna)] = columna
+                n += len(columna)
+                del X
+
+            if n:
+                # Los dos valores centrales (el mismo si n es impar), como np.median
+                centro = [(n - 1) // 2, n // 2]
+                valores[:n].partition(centro)
+                medianas[j] = valores[centro].mean()
+            del valores
+
+        if os.path.exists(archivo):
+            os.remove(archivo)
+        return medianas
+
+    def eliminar(self):
+        """Borra los fragmentos y los resultados del disco"""
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+        self.fragmentos = []
+        self.filas = 0
@@ -0,0 +1,202 @@
+"""
+Generador de Carga para servicio_puntuacion.py
+==============================================
+Simula a varias personas pidiendo predicciones de una fila al mismo tiempo:
+abre N conexiones concurrentes al servicio, cada una envía solicitudes
+POST /predecir/<modelo> una tras otra, y al final reporta la latencia de
+cada solicitud (p50 / p95 / p99) y las filas por segundo.
+
+Las filas se toman de un Excel (--excel, por ejemplo la plantilla con datos)
+o se generan al azar con las columnas y categorías que informa GET /salud.
+
+Uso:
+  python generador_carga.py                                   # 2000 solicitudes, 32 conexiones
+  python generador_carga.py --modelo clasificacion --solicitudes 10000 --concurrencia 64
+  python generador_carga.py --excel Plantilla_con_datos.xlsx           # filas de una plantilla
+
+Para comparar, ejecuta el servicio con --max-lote 1 (sin micro-lotes) y
+vuelve a medir con la misma carga.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+URL = 'http://127.0.0.1:8780'
+
+
+async def _solicitud(lector, escritor, metodo, ruta, host, datos=None):
+    """Envía una solicitud HTTP/1.1 por una conexión abierta y retorna (estado, JSON)"""
+
+    cuerpo = b'' if datos is None else json.dumps(datos).encode('utf-8')
+    escritor.write(
+        f'{metodo} {ruta} HTTP/1.1\r\nHost: {host}\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n'.encode('latin-1')
+        + cuerpo
+    )
+    await escritor.drain()
+
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        if nombre.strip().lower() == 'content-length':
+            largo = int(valor)
+    return estado, json.loads(await lector.readexactly(largo))
+
+
+async def consultar(url, metodo, ruta, datos=None):
+    """Una solicitud en una conexión nueva (para GET /salud)"""
+    partes = urlsplit(url)
+    lector, escritor = await asyncio.open_connection(partes.hostname, partes.port or 80)
+    try:
+        return await _solicitud(lector, escritor, metodo, ruta, partes.netloc, datos)
+    finally:
+        escritor.close()
+
+
+def filas_desde_excel(archivo, columnas):
+    """Filas con datos de la hoja de una plantilla (encabezados en la fila 5)"""
+
+    import pandas as pd
+
+    df = pd.read_excel(archivo, sheet_name=0, header=4)
+    faltantes = [col for col in columnas if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"El Excel no tiene las columnas: {', '.join(faltantes)}")
+
+    df = df[columnas].dropna(how='all')
+    df = df.astype(object).where(df.notna(), None)
+    return [{col: (valor.item() if hasattr(valor, 'item') else valor) for col, valor in fila.items()}
+            for fila in df.to_dict('records')]
+
+
+def filas_al_azar(columnas, categorias, n, semilla=0):
+    """Filas sintéticas: categorías conocidas al azar y números entre 0 y 100"""
+
+    azar = random.Random(semilla)
+    return [{col: azar.choice(categorias[col]) if categorias.get(col) else round(azar.uniform(0, 100), 3)
+             for col in columnas}
+            for _ in range(n)]
+
+
+async def _conexion(url, ruta, filas, siguiente, total, latencias, errores):
+    """Una conexión persistente que envía solicitudes hasta completar el total"""
+
+    partes = urlsplit(url)
+    lector, escritor = await asyncio.open_connection(partes.hostname, partes.port or 80)
+    try:
+        while siguiente[0] < total:
+            i = siguiente[0]
+            siguiente[0] += 1
+            inicio = time.perf_counter()
+            estado, respuesta = await _solicitud(lector, escritor, 'POST', ruta, partes.netloc,
+                                                 {'registro': filas[i % len(filas)]})
+            if estado == 200 and respuesta.get('ok'):
+                latencias.append(time.perf_counter() - inicio)
+            else:
+                errores.append(respuesta.get('error', f'HTTP {estado}'))
+    finally:
+        escritor.close()
+
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) de una lista ordenada, por el rango más cercano"""
+    if not valores_ordenados:
+        return float('nan')
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+async def generar_carga(url=URL, modelo=None, solicitudes=2000, concurrencia=32, excel=None):
+    """Ejecuta la carga y muestra el resumen. Retorna True si no hubo errores"""
+
+    print("=" * 70)
+    print("GENERADOR DE CARGA - SERVICIO DE PUNTUACIÓN")
+    print("=" * 70)
+
+    try:
+        _, salud = await consultar(url, 'GET', '/salud')
+    except OSError as e:
+        print(f"\n❌ ERROR: No se pudo conectar a {url}: {str(e)}")
+        print("   Inicia primero: python servicio_puntuacion.py")
+        return False
+
+    modelos = salud['modelos']
+    if modelo is None:
+        modelo = next(iter(modelos))
+    if modelo not in modelos:
+        print(f"\n❌ ERROR: Modelo desconocido '{modelo}' (disponibles: {', '.join(modelos)})")
+        return False
+    descripcion = modelos[modelo]
+
+    if excel:
+        try:
+            filas = filas_desde_excel(excel, descripcion['columnas'])
+        except Exception as e:
+            print(f"\n❌ ERROR al leer {excel}: {str(e)}")
+            return False
+        origen = f"{len(filas)} filas de {excel}"
+    else:
+        filas = filas_al_azar(descripcion['columnas'], descripcion['categorias'], 1000)
+        origen = "1000 filas al azar"
+
+    if not filas:
+        print("\n❌ ERROR: No hay filas para enviar")
+        return False
+
+    print(f"✓ Modelo: {modelo} ({descripcion['tipo']}, {descripcion['modelo']})")
+    print(f"✓ Datos: {origen}")
+    print(f"✓ Carga: {solicitudes} solicitudes de 1 fila, {concurrencia} conexiones concurrentes")
+
+    latencias, errores, siguiente = [], [], [0]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _conexion(url, f'/predecir/{modelo}', filas, siguiente, solicitudes, latencias, errores)
+        for _ in range(min(concurrencia, solicitudes))
+    ))
+    segundos = time.perf_counter() - inicio
+
+    _, salud_final = await consultar(url, 'GET', '/salud')
+    final = salud_final['modelos'][modelo]
+    lotes = final['lotes'] - descripcion['lotes']
+    filas_servidas = final['filas'] - descripcion['filas']
+
+    latencias.sort()
+    print("\n" + "=" * 70)
+    print("RESULTADOS")
+    print("=" * 70)
+    print(f"  Completadas: {len(latencias)}   Errores: {len(errores)}")
+    print(f"  Tiempo total: {segundos:.2f} s")
+    print(f"  Rendimiento: {len(latencias) / segundos:,.0f} filas/s")
+    print(f"  Latencia p50: {percentil(latencias, 50) * 1000:.1f} ms")
+    print(f"  Latencia p95: {percentil(latencias, 95) * 1000:.1f} ms")
+    print(f"  Latencia p99: {percentil(latencias, 99) * 1000:.1f} ms")
+    print(f"  Latencia máx: {percentil(latencias, 100) * 1000:.1f} ms")
+    if lotes:
+        print(f"  Micro-lotes del servidor: {lotes} ({filas_servidas / lotes:.1f} filas por lote)")
+    if errores:
+        print(f"\n⚠ Primer error: {errores[0]}")
+
+    return not errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de carga para servicio_puntuacion.py")
+    parser.add_argument('--url', default=URL, help=f"URL del servicio (por defecto {URL})")
+    parser.add_argument('--modelo', default=None, help="Nombre del modelo (por defecto el primero)")
+    parser.add_argument('--solicitudes', type=int, default=2000, help="Total de solicitudes")
+    parser.add_argument('--concurrencia', type=int, default=32, help="Conexiones simultáneas")
+    parser.add_argument('--excel', default=None, help="Tomar las filas de este Excel")
+    args = parser.parse_args()
+
+    exito = asyncio.run(generar_carga(args.url, args.modelo, args.solicitudes,
+                                      args.concurrencia, args.excel))
+    sys.exit(0 if exito else 1)
@@ -0,0 +1,253 @@
+"""
+Entrada y Salida en Formatos Columnares (Parquet / Feather / Arrow IPC)
+=======================================================================
+Para predecir una exportación grande (por ejemplo toda la base de clientes
+en Parquet) no hace falta pasarla a Excel: los scripts de predicción leen
+directamente estos archivos y escriben las predicciones en otro archivo del
+mismo tipo.
+
+    .parquet / .pq     Parquet
+    .feather           Feather v2 (= Arrow IPC, comprimido con lz4 al escribir)
+    .arrow / .ipc      Arrow IPC sin comprimir (se lee con mmap, sin copiar)
+
+Solo se leen del disco las columnas que pide el modelo (proyección de
+columnas). Las columnas numéricas pasan de los buffers de Arrow a numpy sin
+crear un objeto de Python por celda, y las categóricas se codifican una vez
+por valor distinto (ver PipelinePrediccion.transformar_tabla).
+
+Para archivos que no caben en memoria, leer_lotes recorre el archivo en
+tablas de un número fijo de filas y escribir_lotes escribe el resultado lote
+a lote (ver fragmentos_memmap.py).
+
+Necesita pyarrow (pip install pyarrow); los Excel no lo usan.
+
+Uso:
+    if formato_columnar(filename):
+        tabla = leer_tabla(filename, pipeline.columnas)
+        X = pipeline.transformar_tabla(tabla)
+        escribir_tabla(tabla.append_column('Prediccion', pa.array(y)), ruta_salida(filename))
+"""
+
+import os
+
+# Extensión -> formato
+FORMATOS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'arrow',
+    '.ipc': 'arrow',
+}
+
+# 'clientes.parquet' -> 'clientes_predicciones.parquet'
+SUFIJO_SALIDA = '_predicciones'
+
+
+def formato_columnar(filename):
+    """'parquet', 'feather' o 'arrow' según la extensión; None si no es columnar (por ejemplo .xlsx)"""
+    return FORMATOS.get(os.path.splitext(filename)[1].lower())
+
+
+def ruta_salida(filename):
+    """Archivo de predicciones de un archivo columnar (mismo formato, sufijo _predicciones)"""
+    base, extension = os.path.splitext(filename)
+    return base + SUFIJO_SALIDA + extension
+
+
+def columnas_archivo(filename):
+    """Nombres de las columnas del archivo (solo lee el esquema, no los datos)"""
+
+    import pyarrow as pa
+
+    if formato_columnar(filename) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(filename).names
+
+    with pa.memory_map(filename) as fuente:
+        try:
+            return pa.ipc.open_file(fuente).schema.names
+        except pa.ArrowInvalid:
+            # Arrow IPC en formato stream (sin índice al final del archivo)
+            fuente.seek(0)
+            return pa.ipc.open_stream(fuente).schema.names
+
+
+def leer_tabla(filename, columnas):
+    """Tabla de Arrow con solo las columnas indicadas (en ese orden)
+
+    Parquet decodifica únicamente esas columnas; Feather y Arrow IPC se abren
+    con mmap y las columnas sin comprimir quedan apuntando al archivo.
+    """
+
+    import pyarrow as pa
+
+    columnas = list(columnas)
+    if formato_columnar(filename) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(filename, columns=columnas, memory_map=True)
+
+    fuente = pa.memory_map(filename)
+    try:
+        lector = pa.ipc.open_file(fuente)
+    except pa.ArrowInvalid:
+        fuente.seek(0)
+        lector = pa.ipc.open_stream(fuente)
+    return lector.read_all().select(columnas)
+
+
+def leer_lotes(filename, columnas, filas_por_lote):
+    """Genera tablas de Arrow de hasta filas_por_lote filas con las columnas indicadas
+
+    Recorre el archivo sin cargarlo completo: Parquet decodifica un lote a la
+    vez y Feather / Arrow IPC leen un bloque (record batch) a la vez.
+    Parquet se lee sin mmap y sin pre_buffer: con pre_buffer los bloques ya
+    leídos quedan guardados hasta cerrar el archivo (la memoria crecería con
+    el archivo), y con mmap sus páginas contarían en la memoria del proceso.
+    """
+
+    import pyarrow as pa
+
+    columnas = list(columnas)
+
+    if formato_columnar(filename) == 'parquet':
+        import pyarrow.parquet as pq
+        with pq.ParquetFile(filename, pre_buffer=False) as archivo:
+            for lote in archivo.iter_batches(batch_size=filas_por_lote, columns=columnas):
+                yield pa.Table.from_batches([lote]).select(columnas)
+        return
+
+    with pa.memory_map(filename) as fuente:
+        try:
+            lector = pa.ipc.open_file(fuente)
+            bloques = (lector.get_batch(i) for i in range(lector.num_record_batches))
+        except pa.ArrowInvalid:
+            fuente.seek(0)
+            bloques = iter(pa.ipc.open_stream(fuente))
+
+        for bloque in bloques:
+            bloque = pa.Table.from_batches([bloque]).select(columnas)
+            # Un bloque del archivo puede ser más grande que el lote pedido
+            for inicio in range(0, bloque.num_rows, filas_por_lote):
+                yield bloque.slice(inicio, filas_por_lote)
+
+
+def escribir_lotes(tablas, filename):
+    """Escribe una secuencia de tablas (con el mismo esquema) en un solo archivo
+
+    Como escribir_tabla, pero solo una tabla está en memoria a la vez.
+    Retorna el número de filas escritas.
+    """
+
+    import pyarrow as pa
+
+    formato = formato_columnar(filename)
+    if formato is None:
+        raise ValueError(f"Formato de salida no soportado: {filename} "
+                         f"(usa {', '.join(sorted(FORMATOS))})")
+
+    temporal = filename + '.tmp'
+    escritor = None
+    filas = 0
+    try:
+        for tabla in tablas:
+            if escritor is None:
+                if formato == 'parquet':
+                    import pyarrow.parquet as pq
+                    escritor = pq.ParquetWriter(temporal, tabla.schema)
+                else:
+                    opciones = pa.ipc.IpcWriteOptions(
+                        compression='lz4' if formato == 'feather' else None)
+                    escritor = pa.ipc.new_file(temporal, tabla.schema, options=opciones)
+            escritor.write_table(tabla)
+            filas += tabla.num_rows
+        if escritor is not None:
+            escritor.close()
+    except BaseException:
+        if escritor is not None:
+            escritor.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    if escritor is None:
+        raise ValueError("No hay datos para escribir")
+    os.replace(temporal, filename)
+    return filas
+
+
+def escribir_tabla(tabla, filename):
+    """Escribe la tabla en el formato de la extensión (a un temporal y luego reemplaza)"""
+
+    import pyarrow.feather as feather
+
+    formato = formato_columnar(filename)
+    if formato is None:
+        raise ValueError(f"Formato de salida no soportado: {filename} "
+                         f"(usa {', '.join(sorted(FORMATOS))})")
+
+    temporal = filename + '.tmp'
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(tabla, temporal)
+    elif formato == 'feather':
+        feather.write_feather(tabla, temporal)
+    else:
+        # Sin comprimir: quien lo lea puede usar los buffers con mmap
+        feather.write_feather(tabla, temporal, compression='uncompressed')
+    os.replace(temporal, filename)
+
+
+def es_numerica(columna):
+    """True si la columna de Arrow se usa como número (entero, decimal, booleano o vacía)"""
+
+    import pyarrow as pa
+
+    tipo = columna.type
+    return (pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or pa.types.is_boolean(tipo)
+            or pa.types.is_decimal(tipo) or pa.types.is_null(tipo))
+
+
+def columna_float64(columna):
+    """Columna numérica de Arrow -> array float64 (vacíos = NaN)
+
+    Si ya es float64, de un solo bloque y sin vacíos, el array usa el mismo
+    buffer de Arrow (sin copia).
+    """
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if columna.type != pa.float64():
+        columna = pc.cast(columna, pa.float64())
+    if columna.null_count:
+        columna = pc.fill_null(columna, float('nan'))
+    return columna.to_numpy()
+
+
+def columna_categorias(columna):
+    """(valores, indices) de una columna categórica: valores distintos y la
+    posición de cada fila en ellos
+
+    valores es un array object con cada valor distinto una sola vez más None
+    al final (las celdas vacías apuntan a ese None); indices es un array de
+    enteros. valores[indices] reconstruye la columna, pero así solo hay un
+    objeto de Python por valor distinto, no por fila.
+    """
+
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_dictionary(columna.type):
+        # Los bloques pueden traer diccionarios distintos: se vuelve a codificar
+        columna = pc.cast(columna, columna.type.value_type)
+    codificada = pc.dictionary_encode(columna.combine_chunks()
+                                      if isinstance(columna, pa.ChunkedArray) else columna)
+
+    diccionario = codificada.dictionary.to_pylist()
+    valores = np.empty(len(diccionario) + 1, dtype=object)
+    valores[:-1] = diccionario
+    valores[-1] = None
+
+    indices = pc.fill_null(codificada.indices, len(diccionario)).to_numpy()
+    return valores, indices
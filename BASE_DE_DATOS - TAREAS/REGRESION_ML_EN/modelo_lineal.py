@@ -0,0 +1,116 @@
+"""
+Modelos Lineales como Arreglos Numpy
+====================================
+Los modelos lineales de los notebooks (Linear Regression, Ridge, Lasso,
+ElasticNet, Logistic Regression) se entrenan con X_train_scaled, así que al
+predecir había que escalar toda la matriz antes de model.predict. Como el
+escalado también es lineal, se puede incorporar en los coeficientes:
+
+    coef · (x - media) / escala + b  =  (coef / escala) · x + (b - coef · media / escala)
+
+Con eso la predicción es una sola multiplicación de matrices sobre los datos
+sin escalar, y el modelo guardado solo necesita numpy (no importa sklearn).
+
+Uso:
+    lineal = convertir_lineal(best_model)
+    lineal = lineal.plegar_escalado(scaler.mean_, scaler.scale_)
+    predicciones = lineal.predict(X)
+"""
+
+import numpy as np
+
+MODELOS_LINEALES = {
+    'LinearRegression', 'Ridge', 'RidgeCV', 'Lasso', 'LassoCV',
+    'ElasticNet', 'ElasticNetCV', 'SGDRegressor', 'LinearSVR',
+    'LogisticRegression', 'LogisticRegressionCV',
+}
+
+
+def _sigmoide(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class ModeloLineal:
+    """Coeficientes e intercepto de un modelo lineal de sklearn
+
+    enlace : None (regresión), 'logistica' (clasificación binaria),
+             'softmax' (multinomial) o 'ovr' (una contra el resto)
+    """
+
+    def __init__(self, coef, intercepto, clases=None, enlace=None):
+        self.coef = np.atleast_2d(np.asarray(coef, dtype=np.float64))
+        self.intercepto = np.broadcast_to(
+            np.asarray(intercepto, dtype=np.float64), (self.coef.shape[0],)
+        ).copy()
+        self.classes_ = None if clases is None else np.asarray(clases)
+        self.enlace = enlace
+
+    @property
+    def es_clasificacion(self):
+        return self.classes_ is not None
+
+    def plegar_escalado(self, media, escala):
+        """Modelo equivalente que recibe los datos sin escalar"""
+        coef = self.coef / escala
+        intercepto = self.intercepto - coef @ media
+        return ModeloLineal(coef, intercepto, self.classes_, self.enlace)
+
+    def decision_function(self, X):
+        # Con X float32 (modo --float32) el producto se hace en float32
+        X = np.asarray(X)
+        if X.dtype != np.float32:
+            X = X.astype(np.float64, copy=False)
+        return X @ self.coef.T.astype(X.dtype, copy=False) + self.intercepto.astype(X.dtype, copy=False)
+
+    def predict(self, X):
+        salida = self.decision_function(X)
+        if not self.es_clasificacion:
+            return salida[:, 0]
+        if self.enlace == 'logistica':
+            return self.classes_[(salida[:, 0] > 0).astype(np.intp)]
+        return self.classes_[salida.argmax(axis=1)]
+
+    def predict_proba(self, X):
+        if not self.es_clasificacion:
+            raise AttributeError("predict_proba solo está disponible en clasificación")
+
+        salida = self.decision_function(X)
+        if self.enlace == 'logistica':
+            positiva = _sigmoide(salida[:, 0])
+            return np.column_stack([1.0 - positiva, positiva])
+        if self.enlace == 'softmax':
+            salida = np.exp(salida - salida.max(axis=1, keepdims=True))
+            return salida / salida.sum(axis=1, keepdims=True)
+        probas = _sigmoide(salida)
+        return probas / probas.sum(axis=1, keepdims=True)
+
+
+def convertir_lineal(modelo):
+    """ModeloLineal equivalente a un modelo lineal de sklearn, o None si no es soportado"""
+
+    modelo = getattr(modelo, 'best_estimator_', modelo)  # GridSearchCV
+    if type(modelo).__name__ not in MODELOS_LINEALES:
+        return None
+
+    coef = np.atleast_2d(np.asarray(modelo.coef_, dtype=np.float64))
+    clases = getattr(modelo, 'classes_', None)
+
+    if clases is None:
+        if coef.shape[0] != 1:
+            return None  # regresión con varias salidas
+        return ModeloLineal(coef, modelo.intercept_)
+
+    if len(clases) == 2:
+        enlaces = ['logistica']
+    else:
+        enlaces = ['softmax', 'ovr']
+
+    # Usar el enlace que reproduce predict_proba del modelo original
+    muestra = np.random.default_rng(0).normal(size=(64, coef.shape[1]))
+    referencia = modelo.predict_proba(muestra)
+    for enlace in enlaces:
+        lineal = ModeloLineal(coef, modelo.intercept_, clases, enlace)
+        if np.allclose(lineal.predict_proba(muestra), referencia, rtol=1e-7, atol=1e-10):
+            return lineal
+
+    return None
@@ -0,0 +1,79 @@
+"""
+Perfil de Arranque de los Predictores
+=====================================
+Mide cuánto tarda cada etapa del arranque de un predictor (verificar los
+archivos del modelo, importar los módulos, cargar el modelo, leer y predecir
+unas pocas filas) y compara el total con un presupuesto de tiempo.
+
+Los predictores lo usan con la opción --profile-startup, por ejemplo:
+    python 3_predecir_en_excel.py --profile-startup
+
+Solo usa la librería estándar, para no cargar nada antes de medirlo.
+"""
+
+import contextlib
+import importlib
+import io
+import sys
+import time
+
+# Presupuestos (segundos desde que arranca el script)
+PRESUPUESTO_VERIFICACION = 0.25   # verificar los archivos del modelo y salir
+PRESUPUESTO_10_FILAS = 3.0        # cargar el modelo y predecir 10 filas
+
+# Paquetes pesados que interesa ver en qué etapa se importan
+PAQUETES_PESADOS = ('numpy', 'pandas', 'openpyxl', 'sklearn', 'scipy', 'joblib')
+
+
+class PerfilArranque:
+    """Tiempos de cada etapa y de los hitos del arranque"""
+
+    def __init__(self, inicio):
+        """inicio : time.perf_counter() tomado al comenzar el script"""
+        self.inicio = inicio
+        self.etapas = []  # (nombre, segundos, paquetes importados en la etapa)
+        self.hitos = []   # (nombre, segundos desde el inicio, presupuesto)
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        """Mide una etapa (su salida por pantalla se descarta)"""
+
+        antes = set(sys.modules)
+        t0 = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+        finally:
+            nuevos = set(sys.modules) - antes
+            pesados = [p for p in PAQUETES_PESADOS if p in nuevos]
+            self.etapas.append((nombre, time.perf_counter() - t0, pesados))
+
+    def importar(self, modulo):
+        with self.etapa(f'import {modulo}'):
+            importlib.import_module(modulo)
+
+    def hito(self, nombre, presupuesto):
+        """Marca un punto del arranque y lo compara con su presupuesto"""
+        self.hitos.append((nombre, time.perf_counter() - self.inicio, presupuesto))
+
+    def reporte(self):
+        """Imprime la tabla de etapas y los hitos. Retorna True si se cumplen los presupuestos"""
+
+        print("\n" + "=" * 70)
+        print("PERFIL DE ARRANQUE")
+        print("=" * 70)
+        print(f"  {'Etapa':<38} {'ms':>9}  Importa")
+        print("  " + "-" * 66)
+        for nombre, segundos, pesados in self.etapas:
+            print(f"  {nombre:<38} {segundos * 1000:9.1f}  {', '.join(pesados)}")
+
+        cumple = True
+        print("\n  Desde el inicio del script:")
+        for nombre, segundos, presupuesto in self.hitos:
+            ok = segundos <= presupuesto
+            cumple = cumple and ok
+            estado = "✓" if ok else "⚠ excede"
+            print(f"    {nombre:<36} {segundos * 1000:9.1f} ms  "
+                  f"(presupuesto {presupuesto * 1000:.0f} ms) {estado}")
+
+        return cumple
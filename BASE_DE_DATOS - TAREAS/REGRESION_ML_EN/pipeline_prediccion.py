@@ -0,0 +1,343 @@
+"""
+Pipeline de Predicción (preprocesamiento + modelo en un solo archivo)
+=====================================================================
+Reúne en un objeto todo lo que hace falta para predecir:
+
+    imputar -> codificar categóricas -> escalar -> predecir -> decodificar clase
+
+Los scripts de guardado lo escriben en un solo .pkl, y los predictores lo
+cargan con una sola lectura. El camino de predicción trabaja sobre una matriz
+numpy contigua (float64): cada columna del Excel se copia una sola vez a la
+matriz y la imputación y el escalado se hacen en el mismo lugar, sin crear
+DataFrames intermedios.
+
+Si el modelo es un árbol, un bosque o gradient boosting, guardar_pipeline
+escribe sus nodos aparte como arreglos .npy (ver arboles_numpy.py) y
+cargar_pipeline los abre con mmap, así el .pkl queda pequeño, se carga en un
+tiempo casi constante y la predicción no necesita importar sklearn.
+
+Los scripts de guardado llaman a plegar_escalado: el StandardScaler se
+incorpora en los coeficientes (modelos lineales, ver modelo_lineal.py) o en
+los umbrales de los árboles, y el modelo recibe directamente los datos sin
+escalar (sin la pasada de escalado sobre toda la matriz).
+
+Los archivos Parquet/Feather/Arrow se transforman con transformar_tabla, que
+lee las columnas directamente de la tabla de Arrow (ver lectura_columnar.py).
+
+transformar y transformar_tabla aceptan dtype=np.float32 (modo --float32 de
+los predictores): la matriz ocupa la mitad y los modelos lineales y de árboles
+predicen sobre ella sin volver a float64.
+
+Uso:
+    pipeline = PipelinePrediccion(feature_names, modelo, scaler=scaler,
+                                  categorias=..., categorias_por_defecto=...,
+                                  medianas=imputer.statistics_)
+    pipeline.plegar_escalado()
+    guardar_pipeline(pipeline, 'pipeline_prediccion.pkl')
+
+    pipeline = cargar_pipeline('pipeline_prediccion.pkl')
+    predicciones = pipeline.predecir(df)
+"""
+
+import copy
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from arboles_numpy import cargar_arboles, convertir_arboles, exportar_arboles
+from codificacion_categorica import construir_codificadores, codificar_columna
+from modelo_lineal import convertir_lineal
+
+
+class PipelinePrediccion:
+    """Imputación, codificación, escalado, modelo y decodificación de clases"""
+
+    def __init__(self, columnas, modelo, scaler=None, categorias=None,
+                 categorias_por_defecto=None, medianas=None, clases=None):
+        """
+        columnas : list, variables predictoras en el orden del entrenamiento
+        modelo : modelo entrenado (con predict y, si aplica, predict_proba)
+        scaler : StandardScaler entrenado o None si el modelo usa datos sin escalar
+        categorias, categorias_por_defecto : vocabulario de las categóricas
+                  (ver codificacion_categorica.py); None usa los mapeos predeterminados
+        medianas : valores para imputar cada columna (imputer.statistics_);
+                   None usa la mediana de los datos a predecir (al procesar
+                   por partes, la de todo el archivo: ver transformar)
+        clases : nombres de las clases (LabelEncoder.classes_) o None en regresión
+        """
+
+        self.columnas = list(columnas)
+        self.modelo = modelo
+        self.categorias = categorias
+        self.categorias_por_defecto = categorias_por_defecto
+        self.medianas = None if medianas is None else np.asarray(medianas, dtype=np.float64)
+        self.clases = None if clases is None else np.asarray(clases)
+        self.arboles = None  # carpeta con los arreglos del modelo (ver guardar_pipeline)
+
+        # StandardScaler se aplica como (X - media) / escala sobre la matriz
+        self.scaler = None
+        self.media = None
+        self.escala = None
+        if scaler is not None:
+            if hasattr(scaler, 'var_') and hasattr(scaler, 'scale_'):
+                n = len(self.columnas)
+                self.media = (np.asarray(scaler.mean_, dtype=np.float64)
+                              if getattr(scaler, 'with_mean', True) else np.zeros(n))
+                self.escala = (np.asarray(scaler.scale_, dtype=np.float64)
+                               if getattr(scaler, 'with_std', True) else np.ones(n))
+            else:
+                self.scaler = scaler
+
+        self._preparar()
+
+    def _preparar(self):
+        """Tablas de codificación (se reconstruyen al cargar el pickle)"""
+        info = {}
+        if self.categorias is not None:
+            info = {'categorias': self.categorias,
+                    'categorias_por_defecto': self.categorias_por_defecto or {}}
+        self._codificadores = construir_codificadores(info, self.columnas)
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado['_codificadores']
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._preparar()
+
+    @classmethod
+    def desde_artefactos(cls, modelo, scaler, info, feature_names, le_target=None, imputer=None,
+                         usa_escalado=True):
+        """Arma el pipeline con los archivos separados (modelos guardados antes del pipeline)
+
+        Los árboles y bosques se pasan a arreglos numpy (predicción más rápida).
+        usa_escalado : False si el modelo se entrenó con los datos sin escalar
+        """
+        modelo = convertir_arboles(modelo) or modelo
+        return cls(feature_names, modelo, scaler=scaler if usa_escalado else None,
+                   categorias=info.get('categorias'),
+                   categorias_por_defecto=info.get('categorias_por_defecto'),
+                   medianas=getattr(imputer, 'statistics_', None),
+                   clases=getattr(le_target, 'classes_', None))
+
+    @property
+    def es_clasificacion(self):
+        return self.clases is not None
+
+    def plegar_escalado(self):
+        """Pasa el modelo a arreglos numpy e incorpora el escalado en sus parámetros
+
+        Modelos lineales: el escalado pasa a los coeficientes y al intercepto.
+        Árboles, bosques y boosting: pasa a los umbrales de cada nodo.
+        Después, transformar ya no escala la matriz y el modelo recibe los datos
+        tal como vienen del Excel. Retorna True si el pipeline ya no escala.
+        """
+        modelo = convertir_arboles(self.modelo) or convertir_lineal(self.modelo)
+        if modelo is None:
+            return self.media is None and self.scaler is None
+
+        if self.media is not None:
+            modelo = modelo.plegar_escalado(self.media, self.escala)
+            self.media = self.escala = None
+
+        self.modelo = modelo
+        # Un escalador distinto de StandardScaler no se puede incorporar: se mantiene aparte
+        return self.scaler is None
+
+    def columnas_categoricas(self):
+        """Columnas que se codifican como categóricas (las que tienen vocabulario)
+
+        Las demás son numéricas aunque el lote las traiga como texto o vacías.
+        """
+        return [col for col in self.columnas if col in self._codificadores]
+
+    def transformar(self, df, dtype=np.float64, medianas=None, imputar=True):
+        """Matriz (n_filas, n_columnas) lista para el modelo (float64, o float32 si se indica)
+
+        medianas : si el pipeline no guardó medianas, las de todo el archivo
+                   cuando df es solo una parte (si no, se usan las de df)
+        imputar : False retorna la matriz sin imputar ni escalar (NaN en las
+                  celdas vacías), para calcular esas medianas
+        """
+
+        X = np.empty((len(df), len(self.columnas)), dtype=dtype)
+
+        for j, col in enumerate(self.columnas):
+            if col in self._codificadores:
+                X[:, j] = codificar_columna(df[col].to_numpy(), self._codificadores[col])
+            else:
+                X[:, j] = columna_numerica(df[col], X.dtype)
+
+        return self.imputar_y_escalar(X, medianas) if imputar else X
+
+    def transformar_tabla(self, tabla, salida=None, dtype=np.float64, medianas=None, imputar=True):
+        """Como transformar, pero desde una tabla de Arrow (Parquet, Feather, IPC)
+
+        Las columnas numéricas se copian de los buffers de Arrow a la matriz sin
+        pasar por objetos de Python; las categóricas se codifican una sola vez
+        por valor distinto (ver lectura_columnar.py).
+        salida : matriz (n_filas, n_columnas) donde escribir el resultado, por
+                 ejemplo un fragmento np.memmap (ver fragmentos_memmap.py); si se
+                 indica, su tipo reemplaza a dtype
+        medianas, imputar : como en transformar
+        """
+
+        from lectura_columnar import columna_categorias, columna_float64, es_numerica
+
+        X = salida if salida is not None else np.empty((tabla.num_rows, len(self.columnas)),
+                                                       dtype=dtype)
+
+        for j, col in enumerate(self.columnas):
+            columna = tabla.column(col)
+            if col in self._codificadores:
+                valores, indices = columna_categorias(columna)
+                X[:, j] = codificar_columna(valores, self._codificadores[col])[indices]
+            elif es_numerica(columna):
+                X[:, j] = columna_float64(columna)
+            else:
+                # Texto en una columna numérica: se convierte una vez por valor distinto
+                valores, indices = columna_categorias(columna)
+                X[:, j] = columna_numerica(pd.Series(valores))[indices]
+
+        if not imputar:
+            return X
+
+        X_final = self.imputar_y_escalar(X, medianas)
+        if salida is not None and X_final is not salida:
+            salida[:] = X_final
+            return salida
+        return X_final
+
+    def imputar_y_escalar(self, X, medianas=None):
+        """Imputa y escala en el mismo lugar una matriz de transformar(..., imputar=False)
+
+        medianas : como en transformar (solo si el pipeline no guardó medianas)
+        """
+
+        # Imputar valores faltantes (solo columnas numéricas pueden tenerlos)
+        faltantes = np.isnan(X)
+        if faltantes.any():
+            if self.medianas is not None:
+                medianas = self.medianas
+            elif medianas is None:
+                medianas = np.nanmedian(X, axis=0)
+            filas, cols = np.nonzero(faltantes)
+            X[filas, cols] = medianas[cols]
+
+        # Escalar en el mismo lugar
+        if self.media is not None:
+            X -= self.media
+            X /= self.escala
+        elif self.scaler is not None:
+            X = np.ascontiguousarray(self.scaler.transform(X), dtype=X.dtype)
+
+        return X
+
+    def claves_filas(self, df):
+        """Hash (array uint64) de los valores de cada fila tal como los usa transformar
+
+        Dos filas con la misma clave reciben la misma predicción (lo usa
+        cache_predicciones.py). Retorna None si la predicción de una fila depende
+        de las demás: medianas calculadas sobre los datos a predecir.
+        """
+
+        valores = {}
+        for col in self.columnas:
+            if col in self._codificadores:
+                # El tipo es parte de la clave: 1 y '1' pueden tener códigos distintos
+                valores[col] = ['' if pd.isna(v) else f'{type(v).__name__}:{v}' for v in df[col]]
+            else:
+                valores[col] = columna_numerica(df[col])
+                if self.medianas is None and np.isnan(valores[col]).any():
+                    return None
+
+        filas = pd.DataFrame(valores, index=df.index)
+        return pd.util.hash_pandas_object(filas, index=False).to_numpy(dtype=np.uint64)
+
+    def decodificar(self, codigos):
+        """Nombres de clase a partir de los códigos que predice el modelo"""
+        codigos = np.asarray(codigos)
+        if self.clases is None or codigos.dtype.kind not in 'iu':
+            return codigos
+        return self.clases[codigos]
+
+    def predecir_matriz(self, X):
+        """Predice sobre una matriz ya transformada"""
+        return self.decodificar(self.modelo.predict(X))
+
+    def predecir(self, df):
+        """Predice directamente desde un DataFrame con las columnas originales"""
+        return self.predecir_matriz(self.transformar(df))
+
+    def predecir_proba(self, df):
+        """Probabilidad de cada clase (en el orden de self.clases)"""
+        return self.modelo.predict_proba(self.transformar(df))
+
+    def clases_modelo(self):
+        """Nombres de las clases en el orden de las columnas de predict_proba"""
+        return self.decodificar(self.modelo.classes_)
+
+    def predecir_matriz_proba(self, X):
+        """(clases, probabilidades) con una sola pasada del modelo sobre la matriz
+
+        La clase de cada fila es la de mayor probabilidad. Si el modelo no tiene
+        predict_proba se usa predict y probabilidades es None.
+        """
+        if not hasattr(self.modelo, 'predict_proba'):
+            return self.predecir_matriz(X), None
+
+        probas = np.asarray(self.modelo.predict_proba(X), dtype=np.float64)
+        return self.decodificar(self.modelo.classes_[probas.argmax(axis=1)]), probas
+
+
+def columna_numerica(serie, dtype=np.float64):
+    """Columna de una variable numérica como array float (vacíos y texto = NaN)
+
+    No depende del tipo que pandas le dio a la columna: en un lote donde la
+    variable está vacía llega como object y se trata igual que en el resto.
+    """
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return serie.to_numpy(dtype=dtype, na_value=np.nan)
+
+
+def carpeta_arboles(filename):
+    """Carpeta de los arreglos del modelo: 'pipeline_prediccion.pkl' -> 'pipeline_prediccion_arboles'"""
+    return os.path.splitext(filename)[0] + '_arboles'
+
+
+def guardar_pipeline(pipeline, filename):
+    """Guarda el pipeline completo en un solo archivo
+
+    Los árboles y bosques se guardan aparte (carpeta_arboles) como arreglos
+    .npy; el .pkl solo guarda el nombre de esa carpeta. Retorna la carpeta de
+    los arreglos, o None si el modelo va dentro del .pkl.
+    """
+    carpeta = carpeta_arboles(filename)
+    if exportar_arboles(pipeline.modelo, carpeta) is None:
+        carpeta = None
+    else:
+        pipeline = copy.copy(pipeline)
+        pipeline.modelo = None
+        pipeline.arboles = os.path.basename(carpeta)
+
+    with open(filename, 'wb') as f:
+        pickle.dump(pipeline, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return carpeta
+
+
+def cargar_pipeline(filename):
+    """Carga el pipeline guardado con guardar_pipeline (los árboles se abren con mmap)"""
+    with open(filename, 'rb') as f:
+        pipeline = pickle.load(f)
+
+    if getattr(pipeline, 'arboles', None):
+        carpeta = os.path.join(os.path.dirname(os.path.abspath(filename)), pipeline.arboles)
+        pipeline.modelo = cargar_arboles(carpeta)
+
+    return pipeline
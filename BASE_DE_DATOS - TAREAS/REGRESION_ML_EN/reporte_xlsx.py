@@ -0,0 +1,334 @@
+"""
+Reportes Excel en Streaming
+===========================
+generar_reporte_excel() del notebook escribía la hoja 'Predicciones' celda por
+celda con openpyxl (dataframe_to_rows, round() en Python y un PatternFill nuevo
+por cada celda del error porcentual). Con el conjunto de prueba completo de un
+reentrenamiento era la celda más lenta del notebook y todo el libro quedaba en
+memoria hasta guardarlo.
+
+Este módulo escribe el .xlsx directamente en el ZIP:
+    - los formatos (fuente, relleno, borde, alineación y formato numérico) se
+      definen una sola vez en styles.xml y las celdas los usan por su índice
+    - las columnas numéricas se escriben como vectores: el XML de cada bloque
+      de filas se arma con numpy y el valor queda como número (se muestra con
+      el formato numérico del estilo, no como texto)
+    - cada hoja se escribe en el ZIP a medida que se agregan filas: la memoria
+      depende del tamaño del bloque (FILAS_POR_BLOQUE), no del total de filas
+
+Las hojas se escriben una después de otra, y el ancho de las columnas y las
+celdas combinadas se indican al crear cada hoja.
+
+Solo usa numpy y la librería estándar.
+
+Uso:
+    with LibroStreaming('Reporte.xlsx') as libro:
+        titulo = libro.estilo(negrita=True, tamano=14, color='1F4788')
+        decimal = libro.estilo(borde=True, centrado=True, formato='0.00')
+        with libro.hoja('Predicciones', anchos=[18] * 3, combinadas=['A1:C1']) as hoja:
+            hoja.fila(['PREDICCIONES'], titulo)
+            hoja.columnas([y_real, y_predicha, error], [decimal, decimal, estilos_error])
+"""
+
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from escritura_xlsx import letra_columna
+
+# Filas que se convierten a XML de una vez (la memoria depende de esto, no del total)
+FILAS_POR_BLOQUE = 25000
+
+# Compresión del ZIP: 1 es varias veces más rápida que la de openpyxl (6) y el
+# archivo queda apenas más grande
+NIVEL_COMPRESION = 1
+
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_CABECERA_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Formatos numéricos propios (los predefinidos de Excel se usan por su número)
+_FORMATOS_PREDEFINIDOS = {'General': 0, '0': 1, '0.00': 2, '#,##0': 3, '#,##0.00': 4,
+                          '0%': 9, '0.00%': 10}
+_PRIMER_FORMATO_PROPIO = 164
+
+
+def _atributo(texto):
+    return escape(str(texto), {'"': '&quot;'})
+
+
+def _xml_valor(ref, valor, estilo):
+    """XML de una celda suelta (número, booleano o texto)"""
+
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+    if valor is None or (isinstance(valor, float) and not np.isfinite(valor)):
+        return f'<c r="{ref}"{atributo_estilo}/>' if estilo else ''
+    if isinstance(valor, (bool, np.bool_)):
+        return f'<c r="{ref}"{atributo_estilo} t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, np.integer)):
+        return f'<c r="{ref}"{atributo_estilo}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (float, np.floating)):
+        return f'<c r="{ref}"{atributo_estilo}><v>{float(valor)!r}</v></c>'
+    texto = escape(str(valor))
+    return (f'<c r="{ref}"{atributo_estilo} t="inlineStr"><is>'
+            f'<t xml:space="preserve">{texto}</t></is></c>')
+
+
+def _textos_columna(valores):
+    """(texto de cada valor dentro de <v>/<t>, vacíos, es_texto) de una columna"""
+
+    valores = np.asarray(valores)
+    if valores.dtype.kind == 'b':
+        return valores.astype(np.int8).astype(str), np.zeros(len(valores), bool), False
+    if valores.dtype.kind in 'iu':
+        return valores.astype(str), np.zeros(len(valores), bool), False
+    if valores.dtype.kind == 'f':
+        vacios = ~np.isfinite(valores)
+        return np.where(vacios, 0, valores).astype(str), vacios, False
+
+    # Texto: se escapan &, < y > de una vez para toda la columna
+    vacios = np.array([v is None or (isinstance(v, float) and v != v) for v in valores], bool)
+    texto = np.where(vacios, '', valores).astype(str)
+    for caracter, entidad in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;')):
+        texto = np.char.replace(texto, caracter, entidad)
+    return texto, vacios, True
+
+
+class HojaStreaming:
+    """Hoja de un LibroStreaming: las filas se escriben en el ZIP al agregarlas"""
+
+    def __init__(self, salida, anchos, combinadas):
+        self.salida = salida
+        self.combinadas = list(combinadas)
+        self.siguiente = 1  # número de la próxima fila
+
+        columnas = ''.join(f'<col min="{j}" max="{j}" width="{ancho}" customWidth="1"/>'
+                           for j, ancho in enumerate(anchos or [], 1) if ancho)
+        self._escribir(f'{_CABECERA_XML}<worksheet xmlns="{_NS_MAIN}">'
+                       + (f'<cols>{columnas}</cols>' if columnas else '') + '<sheetData>')
+
+    def _escribir(self, texto):
+        self.salida.write(texto.encode('utf-8'))
+
+    def saltar(self, filas=1):
+        """Deja filas vacías"""
+        self.siguiente += filas
+
+    def fila(self, valores, estilos=0):
+        """Agrega una fila con valores sueltos (títulos, encabezados, métricas)
+
+        estilos : índice de LibroStreaming.estilo para todas las celdas o lista
+                  con uno por valor
+        """
+
+        if isinstance(estilos, (int, np.integer)):
+            estilos = [estilos] * len(valores)
+        numero = self.siguiente
+        celdas = ''.join(_xml_valor(f'{letra_columna(j)}{numero}', valor, estilo)
+                         for j, (valor, estilo) in enumerate(zip(valores, estilos), 1))
+        self._escribir(f'<row r="{numero}">{celdas}</row>')
+        self.siguiente += 1
+
+    def columnas(self, valores, estilos, filas_por_bloque=FILAS_POR_BLOQUE):
+        """Agrega filas a partir de columnas (arrays de numpy del mismo largo)
+
+        estilos : un índice de estilo por columna, o un array de índices (uno
+                  por fila) para dar formato según el valor (por ejemplo con
+                  np.select)
+        Los números no finitos (NaN, inf) quedan como celdas vacías con estilo.
+        """
+
+        valores = [np.asarray(v) for v in valores]
+        total = len(valores[0])
+        letras = [letra_columna(j) for j in range(1, len(valores) + 1)]
+
+        for inicio in range(0, total, filas_por_bloque):
+            fin = min(inicio + filas_por_bloque, total)
+            numeros = np.arange(self.siguiente + inicio, self.siguiente + fin).astype(str)
+
+            celdas = []
+            for letra, columna, estilo in zip(letras, valores, estilos):
+                texto, vacios, es_texto = _textos_columna(columna[inicio:fin])
+                if isinstance(estilo, (int, np.integer)):
+                    atributo = f' s="{estilo}"' if estilo else ''
+                else:
+                    atributo = np.char.add(np.char.add(' s="', np.asarray(estilo[inicio:fin]).astype(str)), '"')
+
+                apertura = np.char.add(np.char.add(f'<c r="{letra}', numeros), '"')
+                apertura = np.char.add(apertura, atributo)
+                if es_texto:
+                    celda = np.char.add(np.char.add(apertura, ' t="inlineStr"><is><t xml:space="preserve">'),
+                                        np.char.add(texto, '</t></is></c>'))
+                else:
+                    celda = np.char.add(np.char.add(apertura, '><v>'), np.char.add(texto, '</v></c>'))
+                celdas.append(np.where(vacios, np.char.add(apertura, '/>'), celda).tolist())
+
+            inicio_fila = np.char.add(np.char.add('<row r="', numeros), '">').tolist()
+            self._escribir(''.join(f'{a}{"".join(c)}</row>' for a, *c in zip(inicio_fila, *celdas)))
+
+        self.siguiente += total
+
+    def cerrar(self):
+        combinadas = ''.join(f'<mergeCell ref="{rango}"/>' for rango in self.combinadas)
+        self._escribir('</sheetData>'
+                       + (f'<mergeCells count="{len(self.combinadas)}">{combinadas}</mergeCells>'
+                          if combinadas else '')
+                       + '</worksheet>')
+        self.salida.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class LibroStreaming:
+    """Libro .xlsx que se escribe hoja por hoja directamente en el ZIP"""
+
+    def __init__(self, destino, nivel_compresion=NIVEL_COMPRESION):
+        self.destino = destino
+        self.temporal = os.path.join(os.path.dirname(os.path.abspath(destino)),
+                                     f'.{os.path.basename(destino)}.tmp')
+        self.zf = zipfile.ZipFile(self.temporal, 'w', zipfile.ZIP_DEFLATED, compresslevel=nivel_compresion)
+        self.hojas = []
+        self.hoja_abierta = None
+
+        # Tablas de styles.xml; el índice 0 de cada una es el formato normal
+        self.fuentes = ['<font><sz val="11"/><name val="Calibri"/></font>']
+        self.rellenos = ['<fill><patternFill patternType="none"/></fill>',
+                         '<fill><patternFill patternType="gray125"/></fill>']
+        self.bordes = ['<border><left/><right/><top/><bottom/><diagonal/></border>']
+        self.formatos = {}
+        self.xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+        self.cache = {}
+
+    @staticmethod
+    def _indice(tabla, elemento):
+        if elemento not in tabla:
+            tabla.append(elemento)
+        return tabla.index(elemento)
+
+    def estilo(self, negrita=False, cursiva=False, tamano=11, color=None, relleno=None,
+               borde=False, centrado=False, ajustar_texto=False, formato=None):
+        """Índice de un formato de celda (se define una sola vez en styles.xml)
+
+        color / relleno : RGB ('1F4788'); formato : formato numérico ('0.00', '0.0%')
+        """
+
+        clave = (negrita, cursiva, tamano, color, relleno, borde, centrado, ajustar_texto, formato)
+        if clave in self.cache:
+            return self.cache[clave]
+
+        fuente = ('<font>' + ('<b/>' if negrita else '') + ('<i/>' if cursiva else '')
+                  + f'<sz val="{tamano}"/>' + (f'<color rgb="FF{color[-6:]}"/>' if color else '')
+                  + '<name val="Calibri"/></font>')
+        id_fuente = self._indice(self.fuentes, fuente)
+        id_relleno = self._indice(self.rellenos, (
+            f'<fill><patternFill patternType="solid"><fgColor rgb="FF{relleno[-6:]}"/>'
+            f'<bgColor rgb="FF{relleno[-6:]}"/></patternFill></fill>')) if relleno else 0
+        id_borde = self._indice(self.bordes, (
+            '<border>' + ''.join(f'<{lado} style="thin"><color auto="1"/></{lado}>'
+                                 for lado in ('left', 'right', 'top', 'bottom'))
+            + '<diagonal/></border>')) if borde else 0
+        if formato is None:
+            id_formato = 0
+        elif formato in _FORMATOS_PREDEFINIDOS:
+            id_formato = _FORMATOS_PREDEFINIDOS[formato]
+        else:
+            id_formato = self.formatos.setdefault(formato, _PRIMER_FORMATO_PROPIO + len(self.formatos))
+
+        alineacion = ''
+        if centrado or ajustar_texto:
+            alineacion = ('<alignment' + (' horizontal="center"' if centrado else '')
+                          + (' wrapText="1"' if ajustar_texto else '') + '/>')
+        self.xfs.append(
+            f'<xf numFmtId="{id_formato}" fontId="{id_fuente}" fillId="{id_relleno}" '
+            f'borderId="{id_borde}" xfId="0" applyNumberFormat="1" applyFont="1" applyFill="1" '
+            f'applyBorder="1"' + (f' applyAlignment="1">{alineacion}</xf>' if alineacion else '/>'))
+
+        self.cache[clave] = len(self.xfs) - 1
+        return self.cache[clave]
+
+    def hoja(self, nombre, anchos=None, combinadas=()):
+        """Crea la siguiente hoja (la anterior debe estar cerrada)
+
+        anchos : ancho de cada columna desde la A (None: el de Excel)
+        combinadas : rangos de celdas combinadas ('A1:F1')
+        """
+
+        if self.hoja_abierta is not None and not self.hoja_abierta.salida.closed:
+            raise RuntimeError("Cierra la hoja anterior antes de crear otra")
+        self.hojas.append(nombre[:31])
+        salida = self.zf.open(f'xl/worksheets/sheet{len(self.hojas)}.xml', 'w', force_zip64=True)
+        self.hoja_abierta = HojaStreaming(salida, anchos, combinadas)
+        return self.hoja_abierta
+
+    def _estilos_xml(self):
+        formatos = ''.join(f'<numFmt numFmtId="{i}" formatCode="{_atributo(codigo)}"/>'
+                           for codigo, i in self.formatos.items())
+        return (
+            f'{_CABECERA_XML}<styleSheet xmlns="{_NS_MAIN}">'
+            + (f'<numFmts count="{len(self.formatos)}">{formatos}</numFmts>' if formatos else '')
+            + f'<fonts count="{len(self.fuentes)}">{"".join(self.fuentes)}</fonts>'
+            + f'<fills count="{len(self.rellenos)}">{"".join(self.rellenos)}</fills>'
+            + f'<borders count="{len(self.bordes)}">{"".join(self.bordes)}</borders>'
+            + '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            + f'<cellXfs count="{len(self.xfs)}">{"".join(self.xfs)}</cellXfs>'
+            + '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            + '</styleSheet>'
+        )
+
+    def cerrar(self):
+        """Escribe el libro, las relaciones y los estilos, y deja el archivo en su destino"""
+
+        if self.hoja_abierta is not None and not self.hoja_abierta.salida.closed:
+            self.hoja_abierta.cerrar()
+
+        tipo = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+        rango = range(1, len(self.hojas) + 1)
+        self.zf.writestr('[Content_Types].xml', (
+            f'{_CABECERA_XML}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{tipo}.sheet.main+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{tipo}.worksheet+xml"/>'
+                      for i in rango)
+            + f'<Override PartName="/xl/styles.xml" ContentType="{tipo}.styles+xml"/></Types>'))
+        self.zf.writestr('_rels/.rels', (
+            f'{_CABECERA_XML}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        self.zf.writestr('xl/workbook.xml', (
+            f'{_CABECERA_XML}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>'
+            + ''.join(f'<sheet name="{_atributo(nombre)}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, nombre in zip(rango, self.hojas))
+            + '</sheets></workbook>'))
+        self.zf.writestr('xl/_rels/workbook.xml.rels', (
+            f'{_CABECERA_XML}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in rango)
+            + f'<Relationship Id="rId{len(self.hojas) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            '</Relationships>'))
+        self.zf.writestr('xl/styles.xml', self._estilos_xml())
+        self.zf.close()
+        os.replace(self.temporal, self.destino)
+
+    def descartar(self):
+        """Borra el archivo a medio escribir (si hubo un error)"""
+        if self.hoja_abierta is not None and not self.hoja_abierta.salida.closed:
+            self.hoja_abierta.salida.close()
+        self.zf.close()
+        if os.path.exists(self.temporal):
+            os.remove(self.temporal)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_error, *exc):
+        if tipo_error is None:
+            self.cerrar()
+        else:
+            self.descartar()
@@ -0,0 +1,175 @@
+"""
+Servidor de Predicción Residente
+================================
+Mantiene el modelo cargado en memoria y atiende solicitudes de predicción
+por un socket local (127.0.0.1). Así cada clic en el botón de Excel evita
+arrancar Python, importar pandas/sklearn y deserializar el modelo de nuevo.
+
+INSTRUCCIONES:
+1. Abre una terminal en esta carpeta
+2. Ejecuta: python servidor_prediccion.py
+3. Deja la ventana abierta; el botón de Excel (cliente_prediccion.py)
+   usará el servidor automáticamente
+4. Para detenerlo: Ctrl+C, o python cliente_prediccion.py --detener-servidor
+
+PROTOCOLO (una línea JSON por solicitud y por respuesta):
+  {"accion": "ping"}
+  {"accion": "predecir", "archivo": "...xlsx", "carpeta": "...", "filas": [6, 30]}
+  {"accion": "detener"}
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime
+
+HOST = '127.0.0.1'
+PUERTO = int(os.environ.get('PREDICTOR_PUERTO', '8765'))
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+ARCHIVOS_MODELO = ['pipeline_prediccion.pkl', 'best_model.pkl', 'scaler.pkl', 'model_info.json']
+
+
+def _firma_artefactos():
+    """Fechas de modificación de los archivos del modelo (detecta reentrenamientos)"""
+    return tuple(
+        os.path.getmtime(f) if os.path.exists(f) else None
+        for f in ARCHIVOS_MODELO
+    )
+
+
+class ModeloResidente:
+    """Pipeline de predicción e información cargados una sola vez y reutilizados"""
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.lock = threading.Lock()
+        self.firma = None
+        self.pipeline = None
+        self.info = None
+
+    def asegurar_cargado(self):
+        """Carga (o recarga si cambió en disco) el modelo. Retorna True si está listo"""
+        firma = _firma_artefactos()
+        if self.pipeline is not None and firma == self.firma:
+            return True
+
+        pipeline, info = self.predictor.cargar_modelo()
+        if pipeline is None:
+            return False
+
+        self.pipeline, self.info = pipeline, info
+        self.firma = firma
+        return True
+
+    def predecir(self, archivo, filas=None):
+        """Ejecuta el flujo completo de 3_predecir_en_excel.py sobre un archivo"""
+
+        # Una predicción a la vez: evita escrituras simultáneas sobre el mismo Excel
+        with self.lock:
+            salida = io.StringIO()
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(salida):
+                listo = self.asegurar_cargado()
+                exito = listo and self.predictor.procesar_archivo(
+                    archivo, self.pipeline, self.info, filas=filas
+                )
+            return {
+                'ok': bool(exito),
+                'segundos': round(time.perf_counter() - inicio, 3),
+                'salida': salida.getvalue(),
+            }
+
+
+class ManejadorPrediccion(socketserver.StreamRequestHandler):
+    """Atiende una solicitud JSON por conexión"""
+
+    def handle(self):
+        linea = self.rfile.readline()
+        try:
+            solicitud = json.loads(linea.decode('utf-8'))
+            respuesta = self.server.atender(solicitud)
+        except Exception as e:
+            respuesta = {'ok': False, 'error': str(e)}
+
+        self.wfile.write((json.dumps(respuesta, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+class ServidorPrediccion(socketserver.ThreadingTCPServer):
+    # En Windows SO_REUSEADDR permitiría dos servidores en el mismo puerto
+    allow_reuse_address = os.name != 'nt'
+    daemon_threads = True
+
+    def __init__(self, direccion, modelo):
+        super().__init__(direccion, ManejadorPrediccion)
+        self.modelo = modelo
+
+    def atender(self, solicitud):
+        accion = solicitud.get('accion')
+
+        if accion == 'ping':
+            return {
+                'ok': True,
+                'carpeta': CARPETA,
+                'modelo': self.modelo.info['model_name'] if self.modelo.info else None,
+            }
+
+        if accion == 'detener':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+
+        if accion == 'predecir':
+            # Cada carpeta tiene su propio modelo: no atender plantillas de otro proyecto
+            carpeta = solicitud.get('carpeta')
+            if carpeta and os.path.normcase(os.path.abspath(carpeta)) != os.path.normcase(CARPETA):
+                return {'ok': False, 'error': f'El servidor atiende la carpeta {CARPETA}'}
+
+            archivo = os.path.join(CARPETA, solicitud['archivo'])
+            filas = tuple(solicitud['filas']) if solicitud.get('filas') else None
+
+            resultado = self.modelo.predecir(archivo, filas=filas)
+            hora = datetime.now().strftime("%H:%M:%S")
+            estado = "✓" if resultado['ok'] else "❌"
+            print(f"[{hora}] {estado} {os.path.basename(archivo)} ({resultado['segundos']:.2f} s)")
+            return resultado
+
+        return {'ok': False, 'error': f'Acción desconocida: {accion}'}
+
+
+def iniciar_servidor(puerto=PUERTO):
+    """Carga el modelo y atiende solicitudes hasta recibir 'detener' o Ctrl+C"""
+
+    os.chdir(CARPETA)
+    predictor = importlib.import_module('3_predecir_en_excel')
+
+    modelo = ModeloResidente(predictor)
+    if not modelo.asegurar_cargado():
+        return
+
+    with ServidorPrediccion((HOST, puerto), modelo) as servidor:
+        print("\n" + "=" * 70)
+        print(f"✓ SERVIDOR DE PREDICCIÓN ESCUCHANDO EN {HOST}:{puerto}")
+        print("=" * 70)
+        print("Deja esta ventana abierta mientras usas el botón de Excel")
+        print("Presiona Ctrl+C para detener\n")
+        servidor.serve_forever()
+
+    print("\n✓ Servidor detenido")
+
+
+if __name__ == "__main__":
+    # Opcional: python servidor_prediccion.py <puerto>
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else PUERTO
+    try:
+        iniciar_servidor(puerto)
+    except KeyboardInterrupt:
+        print("\n\n⚠ Servidor detenido por el usuario")
+    except OSError as e:
+        print(f"\n❌ ERROR: No se pudo abrir el puerto {puerto}: {str(e)}")
+        print("   ¿Ya hay un servidor de predicción en ejecución?")